@@ -1,8 +1,13 @@
 import ollama
 import chromadb
-import time
+import time, os, sys
 from chroma_functions import getclient, getcollection
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import tracing
+from hybrid_retriever import HybridRetriever, load_lexical_index, build_context
+from reranker import OllamaReranker
+
 #--------- CONSTANTs -------------
 embedModel = "all-minilm"
 llmodel = "gemma2:2b"
@@ -12,6 +17,20 @@ MIN_DOCUMENTS = 5
 MAX_DOCUMENTS = int((8100 * .75)/ 75)
 MAX_DOCUMENTS = 20
 
+#hybrid retrieval: fuse the newsGetter keyword index with the vector search (see hybrid_retriever.py)
+USE_HYBRID = False
+LEXICAL_INDEX_FILE = "../newsGetter/bar.obj"  #pickled by newsGetter/make_index.py
+FUSION_METHOD = "rrf"  #or "weighted"
+HYBRID_CHUNKS = 8
+
+#reranking: over-fetch candidates and keep the few a small local model scores highest (see reranker.py)
+USE_RERANK = False
+RERANK_MODEL = "qwen2.5:0.5b"
+RERANK_CANDIDATES = 30
+RERANK_KEEP = 5
+RERANK_BATCH = 4
+RERANK_BUDGET = 3.0  #seconds of scoring per question
+
 initial_prompt ="""You are an aerospace engineer specializing in amatuer-built aircraft. Don't restate this. If you don't know the answer, 
     just say that you don't know, don't try to make up an answer. """
 initial_prompt = ""
@@ -38,6 +57,13 @@ def get_min_relevant_response(results,fMaxDistance,nMinDocs):
             r = i
     print(f"r:{r}")
     return r
+
+# put the chroma results at the given indexes first, keeping the rest behind them in their original order
+def reorder_results(results,order):
+    order = order + [j for j in range(0,len(results['ids'][0])) if j not in order]
+    for key in ('ids','documents','metadatas','distances'):
+        results[key][0] = [results[key][0][j] for j in order]
+    return results
     
 
 #-------------MAIN-------------------
@@ -49,6 +75,14 @@ results=[]
 t0 = time.time()
 #get chromacollection
 collection = getcollection(chromaclient,embedModel) 
+reranker = None
+if USE_RERANK:
+    reranker = OllamaReranker(RERANK_MODEL, keep=RERANK_KEEP, batch_size=RERANK_BATCH, time_budget=RERANK_BUDGET)
+retriever = None
+if USE_HYBRID:
+    retriever = HybridRetriever(collection, load_lexical_index(LEXICAL_INDEX_FILE), embedModel,
+                                method=FUSION_METHOD, vector_results=MAX_DOCUMENTS,
+                                max_chunks=RERANK_CANDIDATES if reranker else HYBRID_CHUNKS)
 
 stats = {}
 stats['Model'] = llmodel
@@ -62,25 +96,56 @@ for i in range(0,len(questions)):
 
     t1 = time.time()
     print(f"  getting question {i} related docs...")
-    queryembed = ollama.embed(model=embedModel, input=query)['embeddings']
-    rQuery = collection.query(query_embeddings=queryembed, n_results=MAX_DOCUMENTS)
-    nDocs = get_min_relevant_response(rQuery,MAX_DISTANCE,MIN_DOCUMENTS)
-    relateddocs = '\n\n'.join(rQuery['documents'][0][:nDocs])
+    if retriever is not None:
+        hybrid = retriever.retrieve(query)
+        if reranker is not None:
+            ranked = reranker.rerank(query, [chunk["document"] for chunk in hybrid])
+            hybrid = [hybrid[index] for index, _ in ranked]
+        relateddocs = build_context(hybrid)
+        stats[str(i)+"hybrid"] = hybrid
+    else:
+        with tracing.span("retrieve", model=embedModel, question=i):
+            queryembed = ollama.embed(model=embedModel, input=query)['embeddings']
+            rQuery = collection.query(query_embeddings=queryembed,
+                                      n_results=RERANK_CANDIDATES if reranker else MAX_DOCUMENTS)
+        if reranker is not None:
+            ranked = reranker.rerank(query, rQuery['documents'][0])
+            rQuery = reorder_results(rQuery, [index for index, _ in ranked])
+            nDocs = len(ranked)
+        else:
+            nDocs = get_min_relevant_response(rQuery,MAX_DISTANCE,MIN_DOCUMENTS)
+        relateddocs = '\n\n'.join(rQuery['documents'][0][:nDocs])
+        stats[str(i)+"related"] = rQuery
+        stats[str(i)+"numdocs"] = nDocs
     prompt = f"{initial_prompt} {query} {secondary_prompt} {relateddocs}"
     
     print(f"  asking question {i}...")
-    answer = ollama.generate(model=llmodel, prompt=prompt, stream=False)
+    with tracing.span("generate", model=llmodel, question=i):
+        answer = ollama.generate(model=llmodel, prompt=prompt, stream=False)
+    tracing.count("generated_tokens", answer.get('eval_count') or 0, model=llmodel)
 
     stats[str(i)+"time"] = time.time()-t1
     stats[str(i)+"answer"] = answer['response']
-    stats[str(i)+"related"] = rQuery
-    stats[str(i)+"numdocs"] = nDocs
+
+if retriever is not None:
+    retriever.close()
 
 print(f"\n------PROMPT------")
 print(f"{initial_prompt} ..query.. {secondary_prompt}")
 
 print(f"\n----QUESTIONS-----")
 for i in range(0,len(questions)):
+    if retriever is not None:
+        hybrid = stats[str(i)+"hybrid"]
+        print(f"Question {i+1}: {questions[i]}")
+        print(f"  Stats: \
+              \n{'':>10}Secs: {stats[str(i)+'time']:.2f}\n{'':>10}Chunks: {len(hybrid)}")
+        print(f"--- ANSWER Question {i+1} ---")
+        print(stats[str(i)+'answer'])
+        for chunk in hybrid:
+            print(f"Score: {chunk['score']:.4f} doc: {chunk['source']} "
+                  f"(vector rank {chunk['vector_rank']}, keyword rank {chunk['lexical_rank']})")
+        continue
     distances = stats[str(i)+"related"]['distances'][0]
     numDocs = stats[str(i)+"numdocs"]
     distAvg = sum(distances[:numDocs]) / numDocs
@@ -1,8 +1,11 @@
 import ollama, chromadb
 from openai import OpenAI
-import time, os
+import time, os, sys
 from chroma_functions import getclient, getcollection
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import tracing
+
 #--------- CONSTANTs -------------
 embedModel = "all-minilm"
 KEY = os.environ.get("OPENAI_KEY")
@@ -80,8 +83,9 @@ for i in range(0,len(questions)):
 
     
     print(f"  getting question {i} related docs...")
-    queryembed = ollama.embed(model=embedModel, input=query)['embeddings']
-    rQuery = collection.query(query_embeddings=queryembed, n_results=MAX_DOCUMENTS)
+    with tracing.span("retrieve", model=embedModel, question=i):
+        queryembed = ollama.embed(model=embedModel, input=query)['embeddings']
+        rQuery = collection.query(query_embeddings=queryembed, n_results=MAX_DOCUMENTS)
     nDocs = get_min_relevant_response(rQuery,MAX_DISTANCE,MIN_DOCUMENTS)
     relateddocs = '\n\n'.join(rQuery['documents'][0][:nDocs])
     prompt = f"{initial_prompt} {query} {secondary_prompt} {relateddocs}"
@@ -91,12 +95,14 @@ for i in range(0,len(questions)):
 
     t1 = time.time()
     # Make a request to the API
-    completion = client.chat.completions.create(
-        model=MODEL,
-        messages=[
-            {"role": "user", "content": prompt}
-        ]
-    )
+    with tracing.span("generate", model=MODEL, question=i):
+        completion = client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+    tracing.count("generated_tokens", completion.usage.completion_tokens, model=MODEL)
 
     stats[str(i)+"time"] = time.time()-t1
     stats[str(i)+"answer"] = completion.choices[0].message.content
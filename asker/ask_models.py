@@ -1,8 +1,11 @@
 import ollama
 import chromadb
-import time
+import time, os, sys
 from chroma_functions import getclient, getcollection
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import tracing
+
 #--------- CONSTANTs -------------
 embedModel = "all-minilm"
 llmodels = [
@@ -72,8 +75,9 @@ for i in range(0,len(questions)):
 
     
     print(f"  getting question {i} related docs...")
-    queryembed = ollama.embed(model=embedModel, input=query)['embeddings']
-    rQuery = collection.query(query_embeddings=queryembed, n_results=MAX_DOCUMENTS)
+    with tracing.span("retrieve", model=embedModel, question=i):
+        queryembed = ollama.embed(model=embedModel, input=query)['embeddings']
+        rQuery = collection.query(query_embeddings=queryembed, n_results=MAX_DOCUMENTS)
     nDocs = get_min_relevant_response(rQuery,MAX_DISTANCE,MIN_DOCUMENTS)
     relateddocs = '\n\n'.join(rQuery['documents'][0][:nDocs])
     prompt = f"{initial_prompt} {query} {secondary_prompt} {relateddocs}"
@@ -84,7 +88,9 @@ for i in range(0,len(questions)):
     for j in range(0,len(llmodels)):
         print(f"  asking llm {llmodels[j]}...")
         t1 = time.time()
-        answer = ollama.generate(model=llmodels[j], prompt=prompt, stream=False)
+        with tracing.span("generate", model=llmodels[j], question=i):
+            answer = ollama.generate(model=llmodels[j], prompt=prompt, stream=False)
+        tracing.count("generated_tokens", answer.get('eval_count') or 0, model=llmodels[j])
         stats[str(i)+str(j)+"time"] = time.time()-t1
         stats[str(i)+str(j)+"answer"] = answer['response']
 
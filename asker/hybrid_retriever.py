@@ -0,0 +1,208 @@
+# ABOUTME: Hybrid retriever fusing the newsGetter TF-IDF keyword index with a Chroma vector collection
+# ABOUTME: Both are queried in parallel; results are fused per message (RRF or weighted scores) into a deduplicated context
+
+import os
+import pickle
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import ollama
+
+#the keyword index (Index, analyze) lives in newsGetter
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "newsGetter"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analysis import analyze
+from common import tracing
+
+RRF_K = 60  #standard reciprocal rank fusion constant
+
+
+def load_lexical_index(path):
+    """Load an index pickled by newsGetter/make_index.py."""
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+def rrf_scores(rankings, weights=None, k=RRF_K):
+    """
+    Reciprocal rank fusion.
+
+    Args:
+        rankings: lists of ids, best first
+        weights: weight per ranking (default 1 each)
+        k: rank damping constant
+
+    Returns:
+        id -> sum of weight / (k + rank)
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, id in enumerate(ranking, 1):
+            scores[id] = scores.get(id, 0.0) + weight / (k + rank)
+    return scores
+
+
+def weighted_scores(scored_lists, weights):
+    """
+    Weighted sum of min-max normalised scores.
+
+    Args:
+        scored_lists: lists of (id, score), higher score = better
+        weights: weight per list
+
+    Returns:
+        id -> fused score
+    """
+    fused = {}
+    for scored, weight in zip(scored_lists, weights):
+        if not scored:
+            continue
+        values = [score for _, score in scored]
+        low, high = min(values), max(values)
+        for id, score in scored:
+            norm = (score - low) / (high - low) if high > low else 1.0
+            fused[id] = fused.get(id, 0.0) + weight * norm
+    return fused
+
+
+def query_overlap(tokens, text):
+    """Number of distinct analyzed query tokens present in a chunk."""
+    return len(set(tokens) & set(analyze(text)))
+
+
+class HybridRetriever:
+    """
+    Retrieve context for a question from both search engines.
+
+    The Chroma collection is searched by embedding similarity (chunks) and
+    the newsGetter Index by TF-IDF (whole messages). Messages are the unit of
+    fusion: a Chroma chunk belongs to the message in its "source" metadata,
+    which is the message id the keyword index stores as msg_id. Messages
+    found only by the keyword index contribute their chunks that share the
+    most terms with the question, so part numbers such as "O-320" reach the
+    prompt even when the embedding model misses them.
+    """
+
+    def __init__(self, collection, lexical_index, embed_model, ollamaclient=None,
+                 method="rrf", vector_weight=1.0, lexical_weight=1.0,
+                 vector_results=20, lexical_results=20, max_chunks=8, chunks_per_source=2):
+        """
+        Args:
+            collection: Chroma collection (chunks with a "source" metadata)
+            lexical_index: newsGetter index.Index
+            embed_model: Ollama model used to embed the collection
+            ollamaclient: ollama.Client (default: the module-level client)
+            method: "rrf" (reciprocal rank fusion) or "weighted" (normalised scores)
+            vector_weight, lexical_weight: Weight of each engine in the fusion
+            vector_results: Chunks requested from Chroma
+            lexical_results: Messages taken from the keyword index
+            max_chunks: Chunks in the returned context
+            chunks_per_source: Chunks taken from any one message
+        """
+        if method not in ("rrf", "weighted"):
+            raise ValueError(f"unknown fusion method {method}")
+        self.collection = collection
+        self.lexical_index = lexical_index
+        self.embed_model = embed_model
+        self.ollamaclient = ollamaclient or ollama
+        self.method = method
+        self.weights = [vector_weight, lexical_weight]
+        self.vector_results = vector_results
+        self.lexical_results = lexical_results
+        self.max_chunks = max_chunks
+        self.chunks_per_source = chunks_per_source
+        self._executor = ThreadPoolExecutor(max_workers=2)
+
+    def vector_search(self, query):
+        """Chroma hits as a list of {id, source, document, distance}, nearest first."""
+        with tracing.span("retrieve_vector", model=self.embed_model):
+            queryembed = self.ollamaclient.embed(model=self.embed_model, input=query)['embeddings']
+            rQuery = self.collection.query(query_embeddings=queryembed, n_results=self.vector_results)
+        return [{"id": id, "source": metadata["source"], "document": document, "distance": distance}
+                for id, metadata, document, distance in zip(rQuery['ids'][0], rQuery['metadatas'][0],
+                                                           rQuery['documents'][0], rQuery['distances'][0])]
+
+    def lexical_search(self, query):
+        """Keyword index hits as a list of (msg_id, TF-IDF score), best first."""
+        with tracing.span("retrieve_lexical"):
+            #tokens missing from the index have no idf (document frequency 0) and match nothing
+            tokens = [token for token in analyze(query) if token in self.lexical_index.index]
+            postings = [self.lexical_index.index[token] for token in tokens]
+            if not postings:
+                return []
+            documents = [self.lexical_index.documents[doc_id] for doc_id in set().union(*postings)]
+            ranked = self.lexical_index.rank(tokens, documents)
+        return [(document.msg_id, score) for document, score in ranked[:self.lexical_results]]
+
+    def retrieve(self, query):
+        """
+        Search both engines in parallel and fuse the results.
+
+        Returns:
+            Up to max_chunks dicts {id, source, document, score, vector_rank,
+            lexical_rank}, best first, each chunk once
+        """
+        with tracing.span("retrieve", method=self.method) as span:
+            vector_future = self._executor.submit(self.vector_search, query)
+            lexical_future = self._executor.submit(self.lexical_search, query)
+            vector_hits = vector_future.result()
+            lexical_hits = lexical_future.result()
+
+            vector_sources = []
+            for hit in vector_hits:
+                if hit["source"] not in vector_sources:
+                    vector_sources.append(hit["source"])
+            lexical_sources = [msg_id for msg_id, _ in lexical_hits]
+
+            if self.method == "rrf":
+                fused = rrf_scores([vector_sources, lexical_sources], self.weights)
+            else:
+                vector_best = {}
+                for hit in vector_hits:
+                    vector_best.setdefault(hit["source"], 1.0 - hit["distance"])
+                fused = weighted_scores([list(vector_best.items()), lexical_hits], self.weights)
+
+            vector_rank = {source: rank for rank, source in enumerate(vector_sources, 1)}
+            lexical_rank = {source: rank for rank, source in enumerate(lexical_sources, 1)}
+            chunks_by_source = {}
+            for hit in vector_hits:
+                chunks_by_source.setdefault(hit["source"], []).append(hit)
+
+            tokens = analyze(query)
+            context = []
+            seen_ids = set()
+            seen_text = set()
+            for source in sorted(fused, key=fused.get, reverse=True):
+                chunks = chunks_by_source.get(source) or self._best_chunks(source, tokens)
+                for chunk in chunks[:self.chunks_per_source]:
+                    text_key = re.sub(r'\s+', ' ', chunk["document"]).strip().lower()
+                    if chunk["id"] in seen_ids or text_key in seen_text:
+                        continue
+                    seen_ids.add(chunk["id"])
+                    seen_text.add(text_key)
+                    context.append({"id": chunk["id"], "source": source, "document": chunk["document"],
+                                    "score": fused[source], "vector_rank": vector_rank.get(source),
+                                    "lexical_rank": lexical_rank.get(source)})
+                    if len(context) >= self.max_chunks:
+                        break
+                if len(context) >= self.max_chunks:
+                    break
+            span.set(vector=len(vector_sources), lexical=len(lexical_sources), chunks=len(context))
+        return context
+
+    def _best_chunks(self, source, tokens):
+        """Chunks of a message found only by keyword, most query terms first."""
+        records = self.collection.get(where={"source": source}, include=["documents"])
+        chunks = [{"id": id, "document": document} for id, document in zip(records['ids'], records['documents'])]
+        chunks.sort(key=lambda chunk: query_overlap(tokens, chunk["document"]), reverse=True)
+        return chunks
+
+    def close(self):
+        self._executor.shutdown()
+
+
+def build_context(chunks):
+    """Join retrieved chunks into the text handed to the LLM."""
+    return '\n\n'.join(chunk["document"] for chunk in chunks)
@@ -0,0 +1,119 @@
+# ABOUTME: Optional reranking stage: scores over-fetched candidate chunks with a small local model through Ollama
+# ABOUTME: Candidates are scored in concurrent batches until a time budget runs out; only the best few reach the prompt
+
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import ollama
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import tracing
+
+RERANK_PROMPT = """Rate how well the passage answers the question on a scale of 0 to 10.
+Reply with only the number.
+
+Question: {query}
+
+Passage: {document}
+
+Score:"""
+
+MAX_SCORE = 10.0
+
+
+def parse_score(text):
+    """First number in a model reply, clamped to 0..MAX_SCORE (None if there is none)."""
+    match = re.search(r'\d+(?:\.\d+)?', text)
+    if match is None:
+        return None
+    return min(max(float(match.group()), 0.0), MAX_SCORE)
+
+
+class OllamaReranker:
+    """
+    Rerank retrieved chunks with a local model served by Ollama.
+
+    Each candidate is scored on its own (pointwise, like a cross-encoder:
+    question and passage in one input) so small models give stable numbers.
+    A batch of candidates is scored concurrently; before each batch the time
+    budget is checked, and a batch still running when it expires is abandoned.
+    Candidates left unscored keep their retrieval order behind the scored
+    ones, so a slow model degrades to plain vector ranking instead of
+    stalling the question.
+    """
+
+    def __init__(self, model, ollamaclient=None, keep=5, batch_size=4, time_budget=3.0, max_chars=1500):
+        """
+        Args:
+            model: Ollama model used for scoring (a small instruct model)
+            ollamaclient: ollama.Client (default: the module-level client)
+            keep: Chunks returned for the prompt
+            batch_size: Candidates scored concurrently
+            time_budget: Seconds allowed for scoring one question
+            max_chars: Passage text sent to the model is cut to this length
+        """
+        self.model = model
+        self.ollamaclient = ollamaclient or ollama
+        self.keep = keep
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self.max_chars = max_chars
+
+    def score(self, query, document):
+        """Relevance of one passage to the question (None if the reply has no number)."""
+        prompt = RERANK_PROMPT.format(query=query, document=document[:self.max_chars])
+        answer = self.ollamaclient.generate(model=self.model, prompt=prompt, stream=False,
+                                            options={"temperature": 0, "num_predict": 4})
+        return parse_score(answer['response'])
+
+    def rerank(self, query, documents):
+        """
+        Order candidate documents by model score.
+
+        Args:
+            query: The question
+            documents: Candidate texts, in retrieval order
+
+        Returns:
+            Up to keep (index into documents, score) tuples, best first.
+            score is None for candidates the budget left unscored or
+            whose reply failed or held no number.
+        """
+        with tracing.span("rerank", model=self.model, candidates=len(documents)) as span:
+            deadline = time.perf_counter() + self.time_budget
+            scores = {}
+            attempted = 0
+            #a new pool per question: a batch abandoned at the deadline keeps its threads busy until the
+            #model answers, and those stragglers must not hold the workers the next question needs
+            executor = ThreadPoolExecutor(max_workers=self.batch_size)
+            try:
+                for start in range(0, len(documents), self.batch_size):
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    futures = {executor.submit(self.score, query, documents[index]): index
+                               for index in range(start, min(start + self.batch_size, len(documents)))}
+                    done, pending = wait(futures, timeout=remaining)
+                    attempted += len(done)
+                    for future in done:
+                        try:
+                            scores[futures[future]] = future.result()
+                        except Exception as e:
+                            print(f"  rerank failed for candidate {futures[future]}: {e}")
+                    if pending:
+                        break
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+            skipped = len(documents) - attempted
+            if skipped:
+                tracing.count("rerank_budget_exhausted", model=self.model)
+            #scored candidates first (highest score, ties by retrieval order), then the rest in retrieval order
+            order = sorted(range(len(documents)),
+                           key=lambda index: (scores.get(index) is None, -(scores.get(index) or 0.0), index))
+            ranked = [(index, scores.get(index)) for index in order[:self.keep]]
+            span.set(scored=len(scores), skipped=skipped, kept=len(ranked))
+        return ranked
@@ -0,0 +1,2 @@
+# ABOUTME: Modules shared by every pipeline directory (msgGetter, webGetter, embedder, asker, ...)
+# ABOUTME: Scripts put the repository root on sys.path and import from here, e.g. "from common import tracing"
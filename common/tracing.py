@@ -0,0 +1,276 @@
+# ABOUTME: Lightweight instrumentation: spans, counters and histograms shared by every pipeline stage
+# ABOUTME: Off by default (no-op); exports a JSONL trace and a Prometheus text snapshot when enabled
+
+import atexit
+import functools
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Environment variables that switch tracing on for any script without code changes
+TRACE_FILE_ENV = "EA_TRACE_FILE"
+METRICS_FILE_ENV = "EA_METRICS_FILE"
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = "ea_"
+
+
+class _NoopSpan:
+    """Shared span returned while tracing is disabled."""
+    __slots__ = ()
+    seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """A timed section; nested spans record their parent."""
+    __slots__ = ("tracer", "name", "attrs", "span_id", "parent_id", "start", "seconds", "_t0")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = None
+        self.parent_id = None
+        self.start = 0.0
+        self.seconds = 0.0
+        self._t0 = 0.0
+
+    def set(self, **attrs):
+        """Attach attributes (e.g. result sizes) before the span ends."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.span_id, self.parent_id = self.tracer._push()
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._t0
+        self.tracer._pop()
+        self.tracer._finish(self, None if exc_type is None else exc_type.__name__)
+        return False
+
+
+class Tracer:
+    """
+    Collects spans, counters and histograms.
+
+    While disabled every call returns immediately (span() hands back a
+    shared no-op object), so instrumented hot paths cost one attribute
+    check. Use the module-level functions, which act on the default tracer.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_file: Optional[str] = None
+        self.metrics_file: Optional[str] = None
+        self._trace_handle = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_id = 0
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple], Dict] = {}
+        self.buckets = DEFAULT_BUCKETS
+
+    def configure(self, trace_file: Optional[str] = None, metrics_file: Optional[str] = None,
+                  enabled: bool = True, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        """
+        Switch tracing on or off.
+
+        Args:
+            trace_file: JSONL file that receives one record per finished span (None = no trace)
+            metrics_file: Prometheus text snapshot written by flush() and at exit (None = none)
+            enabled: False returns to no-op mode
+            buckets: Histogram bucket bounds in seconds
+        """
+        self.close()
+        self.enabled = enabled
+        self.trace_file = trace_file
+        self.metrics_file = metrics_file
+        self.buckets = tuple(sorted(buckets))
+        if enabled and trace_file:
+            self._trace_handle = open(trace_file, "a", encoding="utf-8")
+
+    def reset(self):
+        """Forget all counters and histograms."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # --- spans ---------------------------------------------------------
+
+    def span(self, name: str, **attrs):
+        """Context manager timing a section: ``with span("embed", chunks=10): ...``"""
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def _push(self) -> Tuple[int, Optional[int]]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        parent_id = stack[-1] if stack else None
+        stack.append(span_id)
+        return span_id, parent_id
+
+    def _pop(self):
+        self._local.stack.pop()
+
+    def _finish(self, span: Span, error: Optional[str]):
+        self.observe(f"{span.name}_seconds", span.seconds)
+        if error is not None:
+            self.count(f"{span.name}_errors")
+        if self._trace_handle is not None:
+            record = {"name": span.name, "span_id": span.span_id, "parent_id": span.parent_id,
+                      "thread": threading.current_thread().name, "start": span.start,
+                      "duration_ms": span.seconds * 1000}
+            if span.attrs:
+                record["attrs"] = span.attrs
+            if error is not None:
+                record["error"] = error
+            line = json.dumps(record, default=str) + "\n"
+            with self._lock:
+                self._trace_handle.write(line)
+
+    # --- metrics -------------------------------------------------------
+
+    def count(self, name: str, value: float = 1, **labels):
+        """Add to a counter."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a value (seconds for *_seconds metrics) in a histogram."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+                    break
+            hist["count"] += 1
+            hist["sum"] += value
+
+    # --- export --------------------------------------------------------
+
+    def prometheus_text(self) -> str:
+        """Counters and histograms in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, dict(hist, buckets=list(hist["buckets"])))
+                                for key, hist in self.histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            metric = _metric_name(name) + "_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {_number(value)}")
+        for (name, labels), hist in histograms:
+            metric = _metric_name(name)
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, n in zip(self.buckets, hist["buckets"]):
+                cumulative += n
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels(labels + (('le', '+Inf'),))} {hist['count']}")
+            lines.append(f"{metric}_sum{_labels(labels)} {_number(hist['sum'])}")
+            lines.append(f"{metric}_count{_labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def flush(self):
+        """Flush the trace file and rewrite the metrics snapshot."""
+        if self._trace_handle is not None:
+            with self._lock:
+                self._trace_handle.flush()
+        if self.enabled and self.metrics_file:
+            tmp = self.metrics_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, self.metrics_file)
+
+    def close(self):
+        """Flush and close the trace file."""
+        self.flush()
+        if self._trace_handle is not None:
+            self._trace_handle.close()
+            self._trace_handle = None
+
+
+def _metric_name(name: str) -> str:
+    return METRIC_PREFIX + re.sub(r'[^a-zA-Z0-9_:]', '_', name)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{re.sub(r"[^a-zA-Z0-9_]", "_", k)}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# --- default tracer ----------------------------------------------------
+
+tracer = Tracer()
+span = tracer.span
+count = tracer.count
+observe = tracer.observe
+configure = tracer.configure
+flush = tracer.flush
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator wrapping every call of a function in a span (default name: the function name)."""
+    def decorate(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with tracer.span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+if os.environ.get(TRACE_FILE_ENV) or os.environ.get(METRICS_FILE_ENV):
+    configure(os.environ.get(TRACE_FILE_ENV), os.environ.get(METRICS_FILE_ENV))
+atexit.register(tracer.close)
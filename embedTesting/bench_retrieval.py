@@ -0,0 +1,288 @@
+# ABOUTME: Retrieval-quality and latency benchmark sweeping embed models, chunk sizes, k values and LLMs
+# ABOUTME: Scores recall@k and MRR against expected source documents; writes JSON results and a markdown comparison table
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+#the Embedder, fake Ollama and synthetic corpus live with the embedder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "embedder"))
+from f_embed import Embedder
+from f_misc import get_filepaths_list, get_id_from_path
+
+#--------- CONSTANTs -------------
+RESULTSFILE = "bench_retrieval_results.json"
+CONTEXT_K = 10  #chunks handed to the LLM, as in TestModels.py
+BASE_PROMPT = """You are an aerospace engineer specializing in amatuer-built aircraft. Don't restate this. If you don't know the answer,
+    just say that you don't know, don't try to make up an answer. """
+RAG_PROMPT = """ Use the following pieces of context to answer the users question. -----"""
+
+
+def load_question_set(path):
+    """
+    Read a question set (.json, or .yaml/.yml when PyYAML is installed).
+
+    Format:
+        questions: list of {question, expected: [source ids]}; questions
+            without expected sources are only used for timing and generation
+        sweep (optional): embed_models, chunk_sizes, k_values, llms
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if isinstance(data, list):
+        data = {"questions": data}
+    for q in data["questions"]:
+        q.setdefault("expected", [])
+    return data
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def ranked_sources(metadatas):
+    """Source ids in rank order, each document once (a document has many chunks)."""
+    seen = set()
+    ranked = []
+    for metadata in metadatas:
+        if metadata["source"] not in seen:
+            seen.add(metadata["source"])
+            ranked.append(metadata["source"])
+    return ranked
+
+
+def recall_at_k(metadatas, expected, k):
+    """Fraction of expected documents that have a chunk among the top k chunks."""
+    if not expected:
+        return None
+    return len(set(ranked_sources(metadatas[:k])) & set(expected)) / len(expected)
+
+
+def reciprocal_rank(metadatas, expected, k):
+    """1/(document rank) of the first expected document within the top k chunks (0 if none)."""
+    if not expected:
+        return None
+    for rank, source in enumerate(ranked_sources(metadatas[:k]), 1):
+        if source in expected:
+            return 1.0 / rank
+    return 0.0
+
+
+def collection_name(model, chunk_size):
+    """Chroma collection name for a configuration (alphanumerics, _ and - only)."""
+    return re.sub(r'[^A-Za-z0-9_-]', '_', f"bench_{model}_{chunk_size}")[:63]
+
+
+def build_collection(embdr, files, model, chunk_size, doc_prefix):
+    """Embed the corpus into a fresh collection; returns (seconds, chunk count)."""
+    embdr.set_collection(collection_name(model, chunk_size), initialize=True)
+    embdr.set_model(model)
+    embdr.set_chunk_size(chunk_size)
+    embdr.set_prefix(doc_prefix)
+    t0 = time.perf_counter()
+    for path in files:
+        embdr.embed_file(path)
+    return time.perf_counter() - t0, embdr.get_collection_count()
+
+
+def run_sweep(embdr, corpus_dir, question_set, embed_models, chunk_sizes, k_values, llms,
+              doc_prefix="", query_prefix="", context_k=CONTEXT_K):
+    """
+    Run every configuration of the sweep.
+
+    Returns:
+        {"retrieval": rows per (embed model, chunk size, k),
+         "generation": rows per (embed model, chunk size, llm),
+         "questions": per-question ranked sources and answers}
+    """
+    files = get_filepaths_list(corpus_dir)
+    questions = question_set["questions"]
+    max_k = max(max(k_values), context_k if llms else 0)
+    results = {"retrieval": [], "generation": [], "questions": []}
+
+    for model in embed_models:
+        for chunk_size in chunk_sizes:
+            print(f"embedding {len(files)} files with {model}, chunk size {chunk_size}...")
+            embed_seconds, nchunks = build_collection(embdr, files, model, chunk_size, doc_prefix)
+
+            query_seconds = []
+            retrieved = []
+            contexts = []
+            for q in questions:
+                t0 = time.perf_counter()
+                queryembed = embdr.ollamaclient.embed(model, input=query_prefix + q["question"])["embeddings"]
+                rQuery = embdr.chromacollection.query(query_embeddings=queryembed, n_results=min(max_k, nchunks))
+                query_seconds.append(time.perf_counter() - t0)
+                retrieved.append(rQuery["metadatas"][0])
+                contexts.append(rQuery["documents"][0][:context_k])
+
+            scored = [(q, metadatas) for q, metadatas in zip(questions, retrieved) if q["expected"]]
+            for k in k_values:
+                recalls = [recall_at_k(metadatas, q["expected"], k) for q, metadatas in scored]
+                rrs = [reciprocal_rank(metadatas, q["expected"], k) for q, metadatas in scored]
+                results["retrieval"].append({
+                    "embed_model": model, "chunk_size": chunk_size, "k": k,
+                    "recall": sum(recalls) / len(recalls) if scored else None,
+                    "mrr": sum(rrs) / len(rrs) if scored else None,
+                    "scored_questions": len(scored),
+                    "chunks": nchunks,
+                    "embed_seconds": embed_seconds,
+                    "embed_chunks_per_sec": nchunks / embed_seconds if embed_seconds else 0.0,
+                    "query_p50_ms": percentile(query_seconds, 50) * 1000,
+                    "query_p95_ms": percentile(query_seconds, 95) * 1000
+                })
+
+            answers = {}
+            for llm in llms:
+                gen_seconds = []
+                tokens = 0
+                eval_ns = 0
+                for i, q in enumerate(questions):
+                    relateddocs = '\n\n'.join(contexts[i])
+                    prompt = f"{BASE_PROMPT} {q['question']} {RAG_PROMPT} {relateddocs}"
+                    t0 = time.perf_counter()
+                    answer = embdr.ollamaclient.generate(model=llm, prompt=prompt, stream=False)
+                    gen_seconds.append(time.perf_counter() - t0)
+                    tokens += answer.get("eval_count") or 0
+                    eval_ns += answer.get("eval_duration") or 0
+                    answers.setdefault(i, {})[llm] = answer["response"]
+                results["generation"].append({
+                    "embed_model": model, "chunk_size": chunk_size, "llm": llm,
+                    "gen_p50_s": percentile(gen_seconds, 50),
+                    "gen_p95_s": percentile(gen_seconds, 95),
+                    "tokens": tokens,
+                    "tokens_per_sec": tokens / (eval_ns / 1e9) if eval_ns else None
+                })
+
+            for i, q in enumerate(questions):
+                results["questions"].append({
+                    "embed_model": model, "chunk_size": chunk_size, "question": q["question"],
+                    "expected": q["expected"], "ranked_sources": ranked_sources(retrieved[i]), "answers": answers.get(i, {})
+                })
+    return results
+
+
+def _fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def format_table(results):
+    """Markdown comparison tables of a sweep."""
+    lines = ["| embed model | chunk | k | recall@k | MRR | embed s | chunks/s | query p50 ms | query p95 ms |",
+             "|---|---|---|---|---|---|---|---|---|"]
+    for row in results["retrieval"]:
+        lines.append(f"| {row['embed_model']} | {row['chunk_size']} | {row['k']} | {_fmt(row['recall'], '.3f')} "
+                     f"| {_fmt(row['mrr'], '.3f')} | {row['embed_seconds']:.2f} | {row['embed_chunks_per_sec']:.1f} "
+                     f"| {row['query_p50_ms']:.1f} | {row['query_p95_ms']:.1f} |")
+    if results["generation"]:
+        lines += ["", "| embed model | chunk | llm | gen p50 s | gen p95 s | tokens/s |", "|---|---|---|---|---|---|"]
+        for row in results["generation"]:
+            lines.append(f"| {row['embed_model']} | {row['chunk_size']} | {row['llm']} | {row['gen_p50_s']:.2f} "
+                         f"| {row['gen_p95_s']:.2f} | {_fmt(row['tokens_per_sec'], '.1f')} |")
+    return '\n'.join(lines)
+
+
+def make_synthetic(directory, ndocs, seed=1):
+    """
+    Synthetic corpus plus a question per document for smoke runs.
+
+    Each question is a slice of words from its document, so the expected
+    source is known.
+    """
+    import random
+    from bench_ingest import make_corpus
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "msgGetter"))
+    from f_filter import filter_markdown
+
+    rng = random.Random(seed)
+    questions = []
+    for path in make_corpus(os.path.join(directory, "raw"), ndocs, seed):
+        with open(path, "r", encoding="utf-8") as f:
+            text = filter_markdown(f.read())
+        out_path = os.path.join(directory, "docs", os.path.basename(path)[:-3] + ".txt")
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        words = text.split()
+        start = rng.randint(0, max(0, len(words) - 12))
+        questions.append({"question": ' '.join(words[start:start + 12]), "expected": [get_id_from_path(out_path)]})
+    return os.path.join(directory, "docs"), {"questions": questions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep embed models, chunk sizes, k and LLMs over a question set")
+    parser.add_argument("--questions", help="Question set (.json/.yaml) with expected source ids")
+    parser.add_argument("--corpus", default="../data/test", help="Directory of text documents to embed")
+    parser.add_argument("--embed-models", nargs="+", help="Embed models (default: question set sweep or nomic-embed-text)")
+    parser.add_argument("--chunk-sizes", nargs="+", type=int, help="Words per chunk")
+    parser.add_argument("--k", nargs="+", type=int, dest="k_values", help="k values for recall@k / MRR")
+    parser.add_argument("--llms", nargs="*", help="LLMs to time on the retrieved context (none = retrieval only)")
+    parser.add_argument("--doc-prefix", default="", help="Prefix for document chunks (e.g. search_document:)")
+    parser.add_argument("--query-prefix", default="", help="Prefix for questions (e.g. search_query:)")
+    parser.add_argument("--context-k", type=int, default=CONTEXT_K, help="Chunks handed to the LLM")
+    parser.add_argument("--ollama-host", default="localhost")
+    parser.add_argument("--ollama-port", default="11434")
+    parser.add_argument("--chroma-host", help="Chroma server (default: temporary local Chroma)")
+    parser.add_argument("--chroma-port", default="8000")
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="Smoke run: N synthetic documents and questions against the fake Ollama")
+    parser.add_argument("--output", default=RESULTSFILE, help="Results JSON (the table goes next to it as .md)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_retrieval_")
+    fake = None
+    try:
+        if args.synthetic:
+            from fake_ollama import FakeOllama
+            fake = FakeOllama().start()
+            args.ollama_host, args.ollama_port = fake.url[len("http://"):].split(":")
+            corpus_dir, question_set = make_synthetic(workdir, args.synthetic)
+        else:
+            if not args.questions:
+                parser.error("--questions is required unless --synthetic is used")
+            corpus_dir, question_set = args.corpus, load_question_set(args.questions)
+
+        sweep = question_set.get("sweep", {})
+        embed_models = args.embed_models or sweep.get("embed_models") or ["nomic-embed-text"]
+        chunk_sizes = args.chunk_sizes or sweep.get("chunk_sizes") or [250]
+        k_values = args.k_values or sweep.get("k_values") or [1, 5, 10]
+        llms = args.llms if args.llms is not None else sweep.get("llms", [])
+
+        if args.chroma_host:
+            embdr = Embedder(chromahost=args.chroma_host, chromaport=args.chroma_port,
+                             ollamahost=args.ollama_host, ollamaport=args.ollama_port)
+        else:
+            embdr = Embedder(ollamahost=args.ollama_host, ollamaport=args.ollama_port,
+                             chromapath=os.path.join(workdir, "chroma"))
+
+        results = run_sweep(embdr, corpus_dir, question_set, embed_models, chunk_sizes, k_values, llms,
+                            args.doc_prefix, args.query_prefix, args.context_k)
+    finally:
+        if fake is not None:
+            fake.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    table = format_table(results)
+    print(table)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    with open(os.path.splitext(args.output)[0] + ".md", "w", encoding="utf-8") as f:
+        f.write(table + "\n")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# ABOUTME: Ingest-path benchmark: filter_markdown -> chunksplitter -> get_embedding -> chroma add
+# ABOUTME: Runs on a synthetic msgs corpus against the fake Ollama and a local Chroma; compares with saved baselines
+
+import argparse
+import json
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from f_embed import Embedder
+from fake_ollama import FakeOllama, DEFAULT_DIMENSIONS
+
+#filter_markdown lives with the message getter
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "msgGetter"))
+from f_filter import filter_markdown
+
+#--------- CONSTANTs -------------
+BASELINEFILE = "bench_ingest_baseline.json"
+STAGES = ["read", "filter", "chunk", "embed", "store"]
+TOLERANCE = 0.20  #allowed slowdown before a metric is reported as a regression
+MIN_DELTA_MS = 0.5  #latency changes smaller than this are timer noise, never regressions
+
+VOCABULARY = (
+    "canard firewall cowling spar winglet fuselage avionics panel engine mount landing gear nose fuel tank "
+    "strake elevator aileron rudder pitot static epoxy glass layup foam micro flox peel ply cure sanding "
+    "primer lycoming o360 carburetor magneto alternator battery wiring bus breaker fuse relay starter "
+    "prop spinner baffles oil cooler exhaust muffler brakes caliper wheel axle bulkhead seat belt canopy "
+    "hinge latch torque tube bearing rod end bolt nut washer rivet drill template plans chapter builder "
+    "hangar taxi runway climb cruise stall speed weight balance cg ballast test flight inspection"
+).split()
+FILLER = "the a and to of in is it for on with that this was my we have just but at be so".split()
+NAMES = ["agustin millan", "marc zeitlin", "buly", "keith spreuer", "nick ugolini", "jon matcho", "wayne hicks"]
+HEADER_NOISE = ("Reply to author Forward Delete You do not have permission to delete messages in this group "
+                "Copy link Report message Show original message to cozy\\_builders@googlegroups.com")
+
+
+def make_message(rng, msgid):
+    """One raw message thread in the msgs_md layout written by msgGetter/process_message.py."""
+    lines = [f"[Original Message ID:{msgid}](https://groups.google.com/g/cozy_builders/c/{msgid})",
+             f" # {' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 6)))}", ""]
+    for _ in range(rng.randint(1, 5)):
+        name = rng.choice(NAMES)
+        user = name.replace(' ', '')
+        lines.append(f" ![{name}'s profile photo](https://lh3.googleusercontent.com/a/default-user=s40-c) ### {name}")
+        lines.append(f" \\<{user}@gmail.com\\> Mar {rng.randint(1, 28)}, 20{rng.randint(10, 24)}, "
+                     f"{rng.randint(1, 12)}:{rng.randint(10, 59)}:15 AM 3/30/20 {HEADER_NOISE} ")
+        #post lengths are skewed like the real corpus: mostly short, a few very long
+        for _ in range(max(1, int(rng.lognormvariate(1.2, 0.8)))):
+            words = [rng.choice(VOCABULARY) if rng.random() < 0.35 else rng.choice(FILLER)
+                     for _ in range(rng.randint(8, 60))]
+            if rng.random() < 0.2:
+                words.append(f"https://groups.google.com/group/cozy_builders/attach/{rng.getrandbits(40):x}/Image.jpeg")
+            lines.append(" " + ' '.join(words) + ".")
+            lines.append("")
+    return '\n'.join(lines)
+
+
+def make_corpus(directory, ndocs, seed=1):
+    """Write ndocs synthetic messages into first-letter subdirectories; returns their paths."""
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + "-_"
+    paths = []
+    for _ in range(ndocs):
+        msgid = ''.join(rng.choice(alphabet) for _ in range(11))
+        subdir = msgid.upper()[0] if msgid[0].isalpha() else "aDigits"
+        path = os.path.join(directory, subdir, msgid + ".md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(make_message(rng, msgid))
+        paths.append(path)
+    return paths
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def ingest(embdr, path, timings):
+    """Run one file through the ingest stages, appending seconds per stage to timings; returns chunk count."""
+    t0 = time.perf_counter()
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    t1 = time.perf_counter()
+    text = filter_markdown(text)
+    t2 = time.perf_counter()
+    chunks = embdr.chunksplitter(text)
+    t3 = time.perf_counter()
+    embeds = embdr.get_embedding(chunks)
+    t4 = time.perf_counter()
+    embdr.store_chunks(path, chunks, embeds)
+    t5 = time.perf_counter()
+    for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+        timings[stage].append(seconds)
+    return len(chunks)
+
+
+def run_benchmark(ndocs=500, chunk_size=250, dimensions=DEFAULT_DIMENSIONS, embed_latency=0.0,
+                  item_latency=0.0, warmup=5, seed=1, chroma_path=None):
+    """
+    Build a synthetic corpus, ingest it and return the metrics.
+
+    The first `warmup` documents are ingested but not measured (Chroma and
+    HTTP connection start-up).
+    """
+    workdir = tempfile.mkdtemp(prefix="bench_ingest_")
+    try:
+        paths = make_corpus(os.path.join(workdir, "msgs_md"), ndocs + warmup, seed)
+        with FakeOllama(intDimensions=dimensions, fRequestLatency=embed_latency, fItemLatency=item_latency) as fake:
+            host, port = fake.url[len("http://"):].split(":")
+            embdr = Embedder(ollamahost=host, ollamaport=port, chromapath=chroma_path or os.path.join(workdir, "chroma"))
+            embdr.set_collection("bench_ingest", initialize=True)
+            embdr.set_chunk_size(chunk_size)
+            embdr.set_prefix("search_document:")
+
+            scratch = {stage: [] for stage in STAGES}
+            for path in paths[:warmup]:
+                ingest(embdr, path, scratch)
+
+            timings = {stage: [] for stage in STAGES}
+            nchunks = 0
+            t0 = time.perf_counter()
+            for path in paths[warmup:]:
+                nchunks += ingest(embdr, path, timings)
+            wall = time.perf_counter() - t0
+            count = embdr.get_collection_count()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "config": {"docs": ndocs, "chunk_size": chunk_size, "dimensions": dimensions,
+                   "embed_latency": embed_latency, "item_latency": item_latency, "seed": seed},
+        "docs": ndocs,
+        "chunks": nchunks,
+        "collection_count": count,
+        "seconds": wall,
+        "docs_per_sec": ndocs / wall if wall else 0.0,
+        "chunks_per_sec": nchunks / wall if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {}
+    }
+    for stage in STAGES:
+        results["stages"][stage] = {"p50_ms": percentile(timings[stage], 50) * 1000,
+                                    "p95_ms": percentile(timings[stage], 95) * 1000,
+                                    "total_s": sum(timings[stage])}
+    return results
+
+
+def config_key(results):
+    """Baselines are only compared between runs with the same configuration."""
+    return ",".join(f"{k}={v}" for k, v in sorted(results["config"].items()))
+
+
+def flat_metrics(results):
+    """metric name -> (value, True if higher is better)."""
+    metrics = {"docs_per_sec": (results["docs_per_sec"], True),
+               "chunks_per_sec": (results["chunks_per_sec"], True)}
+    if results["peak_rss_mb"] is not None:
+        metrics["peak_rss_mb"] = (results["peak_rss_mb"], False)
+    for stage, values in results["stages"].items():
+        metrics[f"{stage}_p50_ms"] = (values["p50_ms"], False)
+        metrics[f"{stage}_p95_ms"] = (values["p95_ms"], False)
+    return metrics
+
+
+def compare_to_baseline(results, baseline, tolerance=TOLERANCE):
+    """
+    Regressions of results against a baseline run.
+
+    Returns:
+        List of (metric, baseline value, current value, relative change) for
+        metrics that got worse by more than tolerance.
+    """
+    regressions = []
+    base = flat_metrics(baseline)
+    for name, (value, higher_better) in flat_metrics(results).items():
+        if name not in base or not base[name][0]:
+            continue
+        old = base[name][0]
+        if name.endswith("_ms") and abs(value - old) < MIN_DELTA_MS:
+            continue
+        change = (value - old) / old
+        if (change < -tolerance) if higher_better else (change > tolerance):
+            regressions.append((name, old, value, change))
+    return regressions
+
+
+def format_results(results):
+    lines = [f"{results['docs']} docs, {results['chunks']} chunks in {results['seconds']:.2f}s: "
+             f"{results['docs_per_sec']:.1f} docs/s, {results['chunks_per_sec']:.1f} chunks/s"]
+    if results["peak_rss_mb"] is not None:
+        lines.append(f"peak RSS {results['peak_rss_mb']:.1f} MB")
+    lines.append(f"{'stage':<8}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for stage, values in results["stages"].items():
+        lines.append(f"{stage:<8}{values['p50_ms']:>10.3f}{values['p95_ms']:>10.3f}{values['total_s']:>10.3f}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embed ingest path with a fake Ollama and local Chroma")
+    parser.add_argument("--docs", type=int, default=500, help="Measured documents")
+    parser.add_argument("--chunk-size", type=int, default=250, help="Words per chunk (embedder.py CHUNKSIZE)")
+    parser.add_argument("--dimensions", type=int, default=DEFAULT_DIMENSIONS, help="Embedding size")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Fake Ollama seconds per embed request")
+    parser.add_argument("--item-latency", type=float, default=0.0, help="Fake Ollama seconds per embedded chunk")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured documents ingested first")
+    parser.add_argument("--seed", type=int, default=1, help="Synthetic corpus seed")
+    parser.add_argument("--chroma-path", help="Local Chroma directory (default: temporary)")
+    parser.add_argument("--baseline", default=BASELINEFILE, help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline for its configuration")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Relative change reported as a regression")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.docs, args.chunk_size, args.dimensions, args.embed_latency,
+                            args.item_latency, args.warmup, args.seed, args.chroma_path)
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baselines = json.load(f)
+    key = config_key(results)
+
+    status = 0
+    if args.save_baseline:
+        baselines[key] = results
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=1)
+        print(f"baseline saved to {args.baseline}")
+    elif key in baselines:
+        regressions = compare_to_baseline(results, baselines[key], args.tolerance)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.3f} -> {new:.3f} ({change:+.0%})")
+        if regressions:
+            status = 1
+        else:
+            print(f"no regressions against baseline (tolerance {args.tolerance:.0%})")
+    else:
+        print(f"no baseline for this configuration in {args.baseline} (use --save-baseline)")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from f_misc import get_filepaths_list, get_ids_list_from_file, get_id_from_path
 SOURCEDOCPATHS = ["../data/msgs","../data/news","../data/aeroelectric","../data/cozybuilders"]
 #SOURCEDOCPATHS = ["../data/test",]
 COMPLETEDEMBEDFILE = "embedstatus.txt"
+CHANGEDFILESLIST = "../data/changed_files.txt"  #appended by webGetter/process_page.py for re-crawled pages
 NMAXFILE = 20_000 
 NMAXFILE = 20_000
 
@@ -15,6 +16,8 @@ CHUNKSIZE = 250 #initial 75
 INITEMBED = False
 EMBEDMODEL = "nomic-embed-text"
 EMBED_PREFIX = "search_document:"  #search_query:
+#the changed files list is shared by every collection; each one records how many of its lines it has applied
+CHANGESDONEFILE = f"changes_done_{EMBEDMODEL}.txt"
 #use default localhose for chroma and ollam
 #use default ports for chroma and ollama
 
@@ -54,6 +57,27 @@ if os.path.exists(COMPLETEDEMBEDFILE):
             ids_embedded = get_ids_list_from_file(COMPLETEDEMBEDFILE)
 print(f"Files embedded: {len(ids_embedded)}")
 
+#files whose source changed since they were embedded: drop their old chunks and embed them again
+if os.path.exists(CHANGEDFILESLIST):
+    changes = get_ids_list_from_file(CHANGEDFILESLIST)
+    changes_done = 0
+    if os.path.exists(CHANGESDONEFILE) and not INITEMBED:
+        with open(CHANGESDONEFILE) as fpDone:
+            changes_done = int(fpDone.read().strip() or 0)
+    changed_ids = set()
+    for path in changes[changes_done:]:
+        id = get_id_from_path(path)
+        if id in ids_embedded and id not in changed_ids:
+            embdr.delete_file(path)
+            changed_ids.add(id)
+    if changed_ids:
+        ids_embedded = [id for id in ids_embedded if id not in changed_ids]
+        with open(COMPLETEDEMBEDFILE, "w") as fpStatus:
+            fpStatus.writelines(id + '\n' for id in ids_embedded)
+    with open(CHANGESDONEFILE, "w") as fpDone:
+        fpDone.write(f"{len(changes)}\n")
+    print(f"Changed files to re-embed: {len(changed_ids)}")
+
 #remove the ids that have been saved from the files
 files = []
 for f in embed_files:
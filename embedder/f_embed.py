@@ -1,7 +1,10 @@
-import os, re, time
+import os, re, sys
 import chromadb, ollama
 from f_misc import get_id_from_path, get_filepaths_list
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import tracing
+
 
 
 def readtextfile(path):
@@ -12,10 +15,14 @@ def readtextfile(path):
   return text_contents
 
 class Embedder():
+    #chromapath: use a local on-disk chroma (no server) instead of chromahost:chromaport
     def __init__(self, chromahost="localhost", chromaport='8000', \
-                ollamahost="localhost", ollamaport="11434"):
+                ollamahost="localhost", ollamaport="11434", chromapath=None):
         self.ollamaclient = ollama.Client(f"http://{ollamahost}:{ollamaport}")
-        self.chromaclient = chromadb.HttpClient(chromahost, chromaport)
+        if chromapath is not None:
+          self.chromaclient = chromadb.PersistentClient(path=chromapath)
+        else:
+          self.chromaclient = chromadb.HttpClient(chromahost, chromaport)
         #set initial model,prefix and collection to defaults, which can be changed
         #after init if need be
         self.set_collection()
@@ -44,20 +51,24 @@ class Embedder():
       self.chunk_size = chunk_size
       return
     
+    #remove all chunks of a file (before re-embedding a changed version)
+    def delete_file(self, textdocspath):
+      self.chromacollection.delete(where={"source": get_id_from_path(textdocspath)})
+      return
+
     def get_collection_count(self):
       return (self.chromacollection.count())
 
     def get_embedding(self, chunks):
-      #print(f"  ef:embeding with {model}")
-      t0 = time.time()
-      embeds = self.ollamaclient.embed(self.model, input=chunks)
-      t1 = time.time()-t0
-      #print(f"  ef:done {t1 } secs")
+      with tracing.span("embed", model=self.model, chunks=len(chunks)):
+        embeds = self.ollamaclient.embed(self.model, input=chunks)
+      tracing.count("embedded_chunks", len(chunks), model=self.model)
       return embeds.get('embeddings', [])
     
     def get_chroma_get(self):
       return self.chromacollection.get(include=["documents","metadatas"])
     
+    @tracing.traced("chunk")
     def chunksplitter(self, text):
       words = re.findall(r'\S+', text)
 
@@ -79,6 +90,7 @@ class Embedder():
 
       return chunks
 
+    @tracing.traced("embed_file")
     def embed_file(self, textdocspath): 
       text_data = readtextfile(textdocspath)
 
@@ -90,10 +102,16 @@ class Embedder():
         #else:
         #  print(f"{textdocspath} {len(chunks)} chunks {self.chunk_size}")
         embeds = self.get_embedding(chunks)
-        chunknumber = list(range(len(chunks)))
-        id = get_id_from_path(filename)
-        ids = [id + str(index) for index in chunknumber]
-        metadatas = [{"source": id} for index in chunknumber]
+        self.store_chunks(filename, chunks, embeds)
+      return
+
+    #add a file's chunks and their embeddings to the collection
+    def store_chunks(self, textdocspath, chunks, embeds):
+      chunknumber = list(range(len(chunks)))
+      id = get_id_from_path(textdocspath)
+      ids = [id + str(index) for index in chunknumber]
+      metadatas = [{"source": id} for index in chunknumber]
+      with tracing.span("vector_store", chunks=len(chunks)):
         self.chromacollection.add(ids=ids, documents=chunks, embeddings=embeds, metadatas=metadatas)
       return
 
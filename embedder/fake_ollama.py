@@ -0,0 +1,186 @@
+# ABOUTME: Deterministic stand-in for the Ollama HTTP API (embed, embeddings, generate, chat, tags)
+# ABOUTME: Lets the ingest and retrieval benchmarks run on a laptop without a GPU or downloaded models
+
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+DEFAULT_DIMENSIONS = 768  # nomic-embed-text
+
+
+def fake_embedding(text: str, intDimensions: int = DEFAULT_DIMENSIONS) -> List[float]:
+    """
+    Deterministic unit vector for a text.
+
+    Words are hashed into signed buckets (feature hashing), so texts that
+    share words get similar vectors and retrieval benchmarks still rank
+    related chunks first.
+    """
+    lstVector = [0.0] * intDimensions
+    for strWord in re.findall(r'\w+', text.lower()):
+        bytDigest = hashlib.blake2b(strWord.encode('utf-8'), digest_size=8).digest()
+        intHash = int.from_bytes(bytDigest, 'little')
+        lstVector[intHash % intDimensions] += 1.0 if (intHash >> 63) else -1.0
+    fNorm = math.sqrt(sum(f * f for f in lstVector))
+    if fNorm == 0:
+        lstVector[0] = fNorm = 1.0
+    return [f / fNorm for f in lstVector]
+
+
+def fake_completion(strPrompt: str, intWords: int = 40) -> str:
+    """Deterministic answer text: the prompt's words cycled in a hash-chosen order."""
+    lstWords = re.findall(r'\w+', strPrompt) or ["ok"]
+    intSeed = int(hashlib.sha256(strPrompt.encode('utf-8')).hexdigest(), 16)
+    return ' '.join(lstWords[(intSeed + i * 7) % len(lstWords)] for i in range(intWords))
+
+
+class FakeOllama:
+    """
+    Threaded HTTP server answering the Ollama endpoints used by this repo.
+
+    Latency knobs simulate model cost: each request sleeps
+    fRequestLatency + fItemLatency per input (embed) or per generated word
+    (generate/chat). Use as a context manager or call start()/stop().
+    """
+
+    def __init__(self, strHost: str = "127.0.0.1", intPort: int = 0, intDimensions: int = DEFAULT_DIMENSIONS,
+                 fRequestLatency: float = 0.0, fItemLatency: float = 0.0, intAnswerWords: int = 40):
+        """
+        Args:
+            strHost: Interface to bind
+            intPort: Port (0 = any free port)
+            intDimensions: Embedding size
+            fRequestLatency: Seconds added to every request
+            fItemLatency: Seconds added per embedded input or generated word
+            intAnswerWords: Words in generate/chat answers
+        """
+        self.intDimensions = intDimensions
+        self.fRequestLatency = fRequestLatency
+        self.fItemLatency = fItemLatency
+        self.intAnswerWords = intAnswerWords
+        self.dctCalls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((strHost, intPort), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to ollama.Client."""
+        strHost, intPort = self.server.server_address[:2]
+        return f"http://{strHost}:{intPort}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, strPath: str):
+        with self._lock:
+            self.dctCalls[strPath] = self.dctCalls.get(strPath, 0) + 1
+
+    def handle(self, strPath: str, dctRequest: Dict) -> Dict:
+        """Build the JSON answer for one API call."""
+        self._count(strPath)
+        strModel = dctRequest.get("model", "")
+        dctBase = {"model": strModel, "created_at": datetime.now(timezone.utc).isoformat(), "done": True,
+                   "done_reason": "stop"}
+
+        if strPath == "/api/embed":
+            lstInput = dctRequest.get("input", [])
+            if isinstance(lstInput, str):
+                lstInput = [lstInput]
+            fSeconds = self.fRequestLatency + self.fItemLatency * len(lstInput)
+            time.sleep(fSeconds)
+            return dict(dctBase, embeddings=[fake_embedding(s, self.intDimensions) for s in lstInput],
+                        total_duration=int(fSeconds * 1e9), prompt_eval_count=sum(len(s.split()) for s in lstInput))
+
+        if strPath == "/api/embeddings":
+            time.sleep(self.fRequestLatency + self.fItemLatency)
+            return {"embedding": fake_embedding(dctRequest.get("prompt", ""), self.intDimensions)}
+
+        if strPath in ("/api/generate", "/api/chat"):
+            if strPath == "/api/chat":
+                strPrompt = ' '.join(m.get("content", "") for m in dctRequest.get("messages", []))
+            else:
+                strPrompt = dctRequest.get("prompt", "")
+            strAnswer = fake_completion(strPrompt, self.intAnswerWords)
+            fSeconds = self.fRequestLatency + self.fItemLatency * self.intAnswerWords
+            time.sleep(fSeconds)
+            dctStats = {"total_duration": int(fSeconds * 1e9), "eval_duration": int(max(fSeconds, 1e-6) * 1e9),
+                        "prompt_eval_count": len(strPrompt.split()), "eval_count": self.intAnswerWords}
+            if strPath == "/api/chat":
+                return dict(dctBase, message={"role": "assistant", "content": strAnswer}, **dctStats)
+            return dict(dctBase, response=strAnswer, **dctStats)
+
+        if strPath == "/api/tags":
+            return {"models": []}
+        if strPath == "/api/show":
+            return {"modelfile": "", "parameters": "", "template": "", "details": {}}
+        raise KeyError(strPath)
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _answer(self, intStatus: int, dctBody: Dict, bStream: bool = False):
+                bytBody = (json.dumps(dctBody) + ('\n' if bStream else '')).encode('utf-8')
+                self.send_response(intStatus)
+                self.send_header("Content-Type", "application/x-ndjson" if bStream else "application/json")
+                self.send_header("Content-Length", str(len(bytBody)))
+                self.end_headers()
+                self.wfile.write(bytBody)
+
+            def _dispatch(self):
+                intLength = int(self.headers.get("Content-Length") or 0)
+                dctRequest = json.loads(self.rfile.read(intLength) or b'{}')
+                try:
+                    dctAnswer = fake.handle(self.path, dctRequest)
+                except KeyError:
+                    self._answer(404, {"error": f"unknown endpoint {self.path}"})
+                    return
+                # Streamed requests get their whole answer as a single final chunk
+                self._answer(200, dctAnswer, bool(dctRequest.get("stream")))
+
+            do_POST = _dispatch
+            do_GET = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a deterministic fake Ollama server")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--dimensions", type=int, default=DEFAULT_DIMENSIONS)
+    parser.add_argument("--request-latency", type=float, default=0.0, help="Seconds per request")
+    parser.add_argument("--item-latency", type=float, default=0.0, help="Seconds per input or generated word")
+    args = parser.parse_args()
+
+    fake = FakeOllama(intPort=args.port, intDimensions=args.dimensions,
+                      fRequestLatency=args.request_latency, fItemLatency=args.item_latency)
+    print(f"fake ollama on {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        fake.server.server_close()
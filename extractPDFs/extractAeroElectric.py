@@ -1,19 +1,22 @@
-from pypdf import PdfReader
 import os
+from pdfExtract import extract_pdf_to_pages, file_sha256, format_timing, PdfHashCache
 
 INPUT_FILE = "/mnt/c/Users/tom/Documents/Cozy/aeroelectric_connection.pdf"
 OUTPUT_DIR = './data/aeroelectric/'
+HASH_CACHE = OUTPUT_DIR + 'pdf_hashes.json'
+WORKERS = None  # None = one process per CPU
 
 if __name__ == "__main__":
-    reader = PdfReader(INPUT_FILE)
-    numPage = 0
-    for page in reader.pages:
-        numPage += 1
-        text_file = OUTPUT_DIR + f"page{numPage}.txt"
-        print(f"file:{text_file}")
-        with open(text_file, 'w', encoding='utf-8') as f:
-            text = page.extract_text()
-            f.write(text)
-            f.close()
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    cache = PdfHashCache(HASH_CACHE)
+    strHash = file_sha256(INPUT_FILE)
+    if cache.is_unchanged(INPUT_FILE, OUTPUT_DIR + "page1.txt", strHash):
+        print(f"{INPUT_FILE} unchanged, nothing to do")
+    else:
+        # Pages are extracted in parallel and written in page order as they complete
+        dctStats = extract_pdf_to_pages(INPUT_FILE, OUTPUT_DIR, "page{n}.txt", WORKERS)
+        cache.put(INPUT_FILE, strHash)
+        cache.save()
+        print(f"{INPUT_FILE}: {format_timing(dctStats)}")
 
 
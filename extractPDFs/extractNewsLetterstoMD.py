@@ -1,5 +1,8 @@
-from pypdf import PdfReader
 import os
+from pdfExtract import extract_pdf_to_text, extract_documents, format_timing
+
+WORKERS = None  # None = one process per CPU
+HASH_CACHE = "news_txt\\pdf_hashes.json"
 
 def scan_for_files_ext(directory,extension):
   """Scans a directory and subdirectories for files with a '.md' extension and returns a list of their names without the extension.
@@ -21,20 +24,17 @@ def scan_for_files_ext(directory,extension):
 
 
 def extractFileToText(pdf_file,text_file):
-    reader = PdfReader(pdf_file)
-    with open(text_file, 'w', encoding='utf-8') as f:
-        for page in reader.pages:
-            text = page.extract_text()
-            f.write(text)
+    return extract_pdf_to_text(pdf_file, text_file, WORKERS)
 
 if __name__ == "__main__":
     # Example usage:
     directory_to_scan = "C:\\Users\\tom\\Documents\\Cozy\\Cozy_Newsletters_04-91"
     file_list = scan_for_files_ext(directory_to_scan,'.pdf')
-    for file_name in file_list:
-       pdf_file = f"{directory_to_scan}\\{file_name}.pdf"
-       text_file = f"news_txt\\{file_name}.txt"
-       extractFileToText(pdf_file,text_file)
+    jobs = [(f"{directory_to_scan}\\{file_name}.pdf", f"news_txt\\{file_name}.txt") for file_name in file_list]
+    # Newsletters are small, so whole documents go to the worker processes;
+    # PDFs whose hash matches the last run are skipped
+    for pdf_file, stats in extract_documents(jobs, WORKERS, HASH_CACHE):
+       print(f"{pdf_file}: {format_timing(stats)}")
 
 
 
@@ -0,0 +1,239 @@
+# ABOUTME: PDF text extraction engine: pages or documents fanned out over a process pool, text streamed in page order
+# ABOUTME: Records per-page timing and skips PDFs whose content hash matches the last extraction
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pypdf import PdfReader
+
+# Documents with fewer pages are extracted in-process (pool start-up costs more than it saves)
+MIN_PAGES_PARALLEL = 8
+# Pages handed to a worker at a time
+PAGES_PER_TASK = 4
+
+PdfSource = Union[str, bytes]
+
+
+def open_reader(source: PdfSource) -> PdfReader:
+    """PdfReader for a file path or for PDF bytes held in memory."""
+    return PdfReader(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+
+
+def _extract_page(reader: PdfReader, intPage: int) -> Tuple[int, str, float]:
+    """Extract one page: (page index, text, seconds). Unreadable pages give empty text."""
+    t0 = time.perf_counter()
+    try:
+        strText = reader.pages[intPage].extract_text() or ""
+    except Exception as e:
+        print(f"  page {intPage + 1}: could not extract text: {e}")
+        strText = ""
+    return intPage, strText, time.perf_counter() - t0
+
+
+# Each pool worker opens the document once and keeps it for all its page ranges
+_workerReader: Optional[PdfReader] = None
+
+
+def _init_worker(source: PdfSource):
+    global _workerReader
+    _workerReader = open_reader(source)
+
+
+def _extract_range(tupleRange: Tuple[int, int]) -> List[Tuple[int, str, float]]:
+    return [_extract_page(_workerReader, intPage) for intPage in range(*tupleRange)]
+
+
+def iter_page_text(source: PdfSource, intWorkers: Optional[int] = None) -> Iterator[Tuple[int, str, float]]:
+    """
+    Extract the text of every page, in page order.
+
+    Pages of large documents are spread over a process pool; results are
+    yielded as soon as the next page in order is ready, so callers can
+    stream them to disk without holding the whole document's text.
+
+    Args:
+        source: PDF file path or PDF bytes
+        intWorkers: Worker processes (None = CPU count, 1 = in-process)
+
+    Yields:
+        (page index, text, extraction seconds)
+    """
+    reader = open_reader(source)
+    intPages = len(reader.pages)
+
+    if intWorkers == 1 or intPages < MIN_PAGES_PARALLEL:
+        for intPage in range(intPages):
+            yield _extract_page(reader, intPage)
+        return
+
+    del reader
+    lstRanges = [(intStart, min(intStart + PAGES_PER_TASK, intPages))
+                 for intStart in range(0, intPages, PAGES_PER_TASK)]
+    with ProcessPoolExecutor(max_workers=intWorkers, initializer=_init_worker, initargs=(source,)) as executor:
+        for lstResults in executor.map(_extract_range, lstRanges):
+            yield from lstResults
+
+
+def _timing_stats(lstPageSeconds: List[float], intChars: int, fSeconds: float) -> Dict:
+    intSlowest = max(range(len(lstPageSeconds)), key=lstPageSeconds.__getitem__) if lstPageSeconds else None
+    return {
+        "pages": len(lstPageSeconds),
+        "chars": intChars,
+        "seconds": fSeconds,
+        "page_seconds": lstPageSeconds,
+        "slowest_page": None if intSlowest is None else intSlowest + 1,
+        "skipped": False
+    }
+
+
+def extract_pdf_to_text(source: PdfSource, strTextPath: str, intWorkers: Optional[int] = None,
+                        strSeparator: str = "") -> Dict:
+    """
+    Extract a PDF into one text file, streaming pages in order.
+
+    Args:
+        source: PDF file path or PDF bytes
+        strTextPath: Output text file
+        intWorkers: Worker processes (None = CPU count, 1 = in-process)
+        strSeparator: Written between pages
+
+    Returns:
+        Stats dict: pages, chars, seconds, page_seconds (per page), slowest_page (1-based), skipped
+    """
+    t0 = time.perf_counter()
+    lstPageSeconds = []
+    intChars = 0
+    with open(strTextPath, 'w', encoding='utf-8') as f:
+        for intPage, strText, fSeconds in iter_page_text(source, intWorkers):
+            if intPage and strSeparator:
+                f.write(strSeparator)
+            f.write(strText)
+            intChars += len(strText)
+            lstPageSeconds.append(fSeconds)
+    return _timing_stats(lstPageSeconds, intChars, time.perf_counter() - t0)
+
+
+def extract_pdf_to_pages(source: PdfSource, strOutputDir: str, strNameFormat: str = "page{n}.txt",
+                         intWorkers: Optional[int] = None) -> Dict:
+    """
+    Extract a PDF into one text file per page (named with the 1-based page number).
+
+    Args:
+        source: PDF file path or PDF bytes
+        strOutputDir: Output directory
+        strNameFormat: File name format, {n} = page number
+        intWorkers: Worker processes (None = CPU count, 1 = in-process)
+
+    Returns:
+        Stats dict as extract_pdf_to_text
+    """
+    os.makedirs(strOutputDir, exist_ok=True)
+    t0 = time.perf_counter()
+    lstPageSeconds = []
+    intChars = 0
+    for intPage, strText, fSeconds in iter_page_text(source, intWorkers):
+        with open(os.path.join(strOutputDir, strNameFormat.format(n=intPage + 1)), 'w', encoding='utf-8') as f:
+            f.write(strText)
+        intChars += len(strText)
+        lstPageSeconds.append(fSeconds)
+    return _timing_stats(lstPageSeconds, intChars, time.perf_counter() - t0)
+
+
+def file_sha256(strPath: str) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(strPath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PdfHashCache:
+    """
+    JSON sidecar of PDF path -> content hash at the last extraction.
+
+    A PDF is skipped when its hash is unchanged and its output still exists.
+    """
+
+    def __init__(self, strPath: str):
+        self.strPath = strPath
+        self.dctHashes: Dict[str, str] = {}
+        if os.path.exists(strPath):
+            with open(strPath, 'r', encoding='utf-8') as f:
+                self.dctHashes = json.load(f)
+
+    def is_unchanged(self, strPdfPath: str, strOutput: str, strHash: str) -> bool:
+        return self.dctHashes.get(os.path.abspath(strPdfPath)) == strHash and os.path.exists(strOutput)
+
+    def put(self, strPdfPath: str, strHash: str):
+        self.dctHashes[os.path.abspath(strPdfPath)] = strHash
+
+    def save(self):
+        with open(self.strPath, 'w', encoding='utf-8') as f:
+            json.dump(self.dctHashes, f, indent=1)
+
+
+def _document_job(tupleJob: Tuple[str, str]) -> Dict:
+    """Process pool entry point: extract one whole document in the worker."""
+    strPdfPath, strTextPath = tupleJob
+    return extract_pdf_to_text(strPdfPath, strTextPath, intWorkers=1)
+
+
+def extract_documents(lstJobs: Iterable[Tuple[str, str]], intWorkers: Optional[int] = None,
+                      strHashCache: str = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Extract many PDFs, one document per worker process.
+
+    Args:
+        lstJobs: (pdf path, text path) pairs
+        intWorkers: Worker processes (None = CPU count, 1 = in-process)
+        strHashCache: Optional PdfHashCache file; PDFs with an unchanged hash
+            and an existing text file are skipped
+
+    Yields:
+        (pdf path, stats) in job order; skipped PDFs have stats {"skipped": True}
+    """
+    cache = PdfHashCache(strHashCache) if strHashCache else None
+    lstTodo = []
+    dctHashes = {}
+    for strPdfPath, strTextPath in lstJobs:
+        if cache is not None:
+            dctHashes[strPdfPath] = file_sha256(strPdfPath)
+            if cache.is_unchanged(strPdfPath, strTextPath, dctHashes[strPdfPath]):
+                yield strPdfPath, {"skipped": True}
+                continue
+        lstTodo.append((strPdfPath, strTextPath))
+
+    if intWorkers == 1 or len(lstTodo) < 2:
+        results = map(_document_job, lstTodo)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=intWorkers)
+        results = executor.map(_document_job, lstTodo)
+
+    try:
+        for (strPdfPath, _), dctStats in zip(lstTodo, results):
+            if cache is not None:
+                cache.put(strPdfPath, dctHashes[strPdfPath])
+                cache.save()
+            yield strPdfPath, dctStats
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def format_timing(dctStats: Dict) -> str:
+    """One-line timing summary of an extraction."""
+    if dctStats.get("skipped"):
+        return "unchanged, skipped"
+    if not dctStats["pages"]:
+        return "no pages"
+    fSlowest = dctStats["page_seconds"][dctStats["slowest_page"] - 1]
+    return (f"{dctStats['pages']} pages, {dctStats['chars']} chars in {dctStats['seconds']:.2f}s "
+            f"(avg {sum(dctStats['page_seconds']) / dctStats['pages']:.3f}s/page, "
+            f"slowest page {dctStats['slowest_page']} {fSlowest:.3f}s)")
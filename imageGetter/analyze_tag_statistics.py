@@ -2,36 +2,27 @@
 # ABOUTME: Analyze keyword statistics from tagged image index
 # ABOUTME: Generates text report and interactive HTML view with checkbox selection and export
 
-import json
 import argparse
+import json
 from pathlib import Path
 from collections import Counter
 from datetime import datetime
+from generate_derivatives import pick_derivative
+from index_store import load_index_file
+from keyword_stats import KeywordMatrix, open_keyword_matrix
 
 
 def load_index(index_file: str, limit: int = None) -> dict:
-    """Load image index from JSON file.
+    """Load image index from JSON file or index database.
 
     Args:
-        index_file: Path to image index JSON file
+        index_file: Path to image index JSON file (or .sqlite/.db IndexStore)
         limit: Optional limit on number of messages to load
 
     Returns:
         Dictionary of messages (limited if specified)
     """
-    with open(index_file, 'r') as f:
-        data = json.load(f)
-
-    if limit:
-        # Limit to first N messages
-        limited_data = {}
-        for i, (key, value) in enumerate(data.items()):
-            if i >= limit:
-                break
-            limited_data[key] = value
-        return limited_data
-
-    return data
+    return load_index_file(index_file, limit=limit)
 
 
 def analyze_keywords(index_data: dict) -> Counter:
@@ -39,22 +30,7 @@ def analyze_keywords(index_data: dict) -> Counter:
 
     Combines both message keywords and image keywords.
     """
-    keyword_counter = Counter()
-
-    for message in index_data.values():
-        # Collect message keywords
-        msg_keywords = message.get("keywords", [])
-        for kw in msg_keywords:
-            keyword_counter[kw.lower()] += 1
-
-        # Collect image keywords
-        images = message.get("images", [])
-        for image in images:
-            keywords = image.get("keywords", [])
-            for kw in keywords:
-                keyword_counter[kw.lower()] += 1
-
-    return keyword_counter
+    return KeywordMatrix.build(index_data).frequencies()
 
 
 
@@ -110,16 +86,16 @@ def format_keyword_statistics(keyword_counter: Counter) -> str:
 
 
 
-def format_summary(index_data: dict, keyword_counter: Counter) -> str:
-    """Format summary statistics."""
+def format_summary(summary: dict, keyword_counter: Counter) -> str:
+    """Format summary statistics (summary counts from KeywordMatrix.summary)."""
     output = []
     output.append("=" * 70)
     output.append("SUMMARY")
     output.append("=" * 70)
 
-    total_messages = len(index_data)
-    messages_with_keywords = sum(1 for m in index_data.values() if m.get("keywords"))
-    messages_with_image_keywords = sum(1 for m in index_data.values() if any(img.get("keywords") for img in m.get("images", [])))
+    total_messages = summary["messages"]
+    messages_with_keywords = summary["messages_with_keywords"]
+    messages_with_image_keywords = summary["messages_with_image_keywords"]
 
     output.append(f"Total messages: {total_messages}")
     output.append(f"Messages with keywords: {messages_with_keywords}")
@@ -139,8 +115,112 @@ def format_summary(index_data: dict, keyword_counter: Counter) -> str:
     return "\n".join(output)
 
 
+def format_cooccurrence(pairs: Counter, top: int = 50) -> str:
+    """Format the most frequent keyword pairs (messages carrying both)."""
+    output = []
+    output.append("=" * 70)
+    output.append("KEYWORD CO-OCCURRENCE")
+    output.append("=" * 70)
+    output.append(f"Keyword pairs seen together: {len(pairs)}")
+    output.append("")
+
+    if pairs:
+        output.append(f"Top {min(top, len(pairs))} pairs (messages with both keywords):")
+        output.append("-" * 70)
+        for (keyword_a, keyword_b), count in sorted(pairs.items(), key=lambda x: (-x[1], x[0]))[:top]:
+            output.append(f"  {count:4d}  {keyword_a} + {keyword_b}")
+        output.append("")
+
+    return "\n".join(output)
+
+
+def format_chapter_distribution(chapter_counts: dict, top: int = 10) -> str:
+    """Format the most frequent keywords within each chapter."""
+    output = []
+    output.append("=" * 70)
+    output.append("KEYWORDS BY CHAPTER")
+    output.append("=" * 70)
+
+    if not chapter_counts:
+        output.append("No categorized messages")
+    for chapter, counts in chapter_counts.items():
+        top_keywords = sorted(counts.items(), key=lambda x: (-x[1], x[0]))[:top]
+        output.append(f"Chapter {chapter:2d}: " + ", ".join(f"{kw} ({count})" for kw, count in top_keywords))
+    output.append("")
+
+    return "\n".join(output)
+
+
+def format_year_trends(year_counts: dict, keyword_counter: Counter, top: int = 15) -> str:
+    """Format messages per year for the most frequent keywords."""
+    output = []
+    output.append("=" * 70)
+    output.append("KEYWORD TRENDS BY YEAR")
+    output.append("=" * 70)
+
+    if not year_counts:
+        output.append("No dated messages")
+        output.append("")
+        return "\n".join(output)
+
+    years = list(year_counts)
+    keywords = [kw for kw, _ in sorted(keyword_counter.items(), key=lambda x: (-x[1], x[0]))[:top]]
+    output.append(f"Messages per year for the top {len(keywords)} keywords:")
+    output.append("-" * 70)
+    output.append(f"  {'keyword':<20}" + "".join(f"{year:>6}" for year in years))
+    for keyword in keywords:
+        output.append(f"  {keyword[:20]:<20}" + "".join(f"{year_counts[year].get(keyword, 0):>6}" for year in years))
+    output.append("")
+
+    return "\n".join(output)
+
+
+def format_image_tag(img_data: dict, thumb_dir: str, derived_dir: str = None,
+                     display_size: int = 200) -> str:
+    """Build the HTML for one grid image.
+
+    Uses recorded derivatives (see generate_derivatives.py) when available:
+    a <picture> with a WebP source and 1x/2x srcset, falling back to JPEG.
+    Otherwise points at the legacy {stem}_thumb.jpg thumbnail.
+
+    Args:
+        img_data: Image dictionary with local_filename and optional derivatives
+        thumb_dir: Relative path to thumbnail directory
+        derived_dir: Relative path to derivatives directory (None = ignore derivatives)
+        display_size: CSS pixel size the image is shown at
+
+    Returns:
+        HTML string
+    """
+    if derived_dir and img_data.get("derivatives"):
+        def srcset(fmt):
+            entries = []
+            for density, size in (("1x", display_size), ("2x", display_size * 2)):
+                derivative = pick_derivative(img_data, size, fmt)
+                if derivative:
+                    entries.append(f"{derived_dir}/{derivative['path']} {density}")
+            return ", ".join(entries)
+
+        fallback = pick_derivative(img_data, display_size, "jpeg")
+        if fallback:
+            parts = ["<picture>"]
+            webp_srcset = srcset("webp")
+            if webp_srcset:
+                parts.append(f"<source type='image/webp' srcset='{webp_srcset}'>")
+            parts.append(f"<img src='{derived_dir}/{fallback['path']}' srcset='{srcset('jpeg')}' "
+                         f"alt='Image' loading='lazy'>")
+            parts.append("</picture>")
+            return "".join(parts)
+
+    thumb_path = f"{thumb_dir}/{img_data['local_filename']}"
+    # Replace file extension with _thumb.jpg
+    thumb_path = thumb_path.rsplit('.', 1)[0] + '_thumb.jpg'
+    return f"<img src='{thumb_path}' alt='Image' loading='lazy'>"
+
+
 def generate_html_page(images: list, thumb_dir: str, output_file: str,
-                       page_num: int, total_pages: int, base_filename: str):
+                       page_num: int, total_pages: int, base_filename: str,
+                       derived_dir: str = None):
     """Generate a single HTML page with pagination.
 
     Args:
@@ -150,6 +230,7 @@ def generate_html_page(images: list, thumb_dir: str, output_file: str,
         page_num: Current page number (1-indexed)
         total_pages: Total number of pages
         base_filename: Base filename for generating page links
+        derived_dir: Relative path to derivatives directory (None = thumbnails only)
     """
     html = []
     html.append("<!DOCTYPE html>")
@@ -240,9 +321,6 @@ def generate_html_page(images: list, thumb_dir: str, output_file: str,
             idx = i + j
             if idx < len(images):
                 img_data = images[idx]
-                thumb_path = f"{thumb_dir}/{img_data['local_filename']}"
-                # Replace file extension with _thumb.jpg
-                thumb_path = thumb_path.rsplit('.', 1)[0] + '_thumb.jpg'
 
                 # Format metadata
                 keywords_str = ", ".join(img_data['keywords'][:10]) if img_data['keywords'] else "none"
@@ -256,7 +334,7 @@ def generate_html_page(images: list, thumb_dir: str, output_file: str,
                 html.append(f"          <input type='checkbox' class='remove-checkbox' ")
                 html.append(f"                 data-filename='{img_data['local_filename']}' ")
                 html.append(f"                 onchange='updateSelection()'>")
-                html.append(f"          <img src='{thumb_path}' alt='Image'>")
+                html.append(f"          {format_image_tag(img_data, thumb_dir, derived_dir)}")
                 html.append(f"        </div>")
                 html.append(f"        <pre>keywords: {keywords_str}</pre>")
                 html.append("      </td>")
@@ -352,17 +430,16 @@ def generate_html_page(images: list, thumb_dir: str, output_file: str,
         f.write("\n".join(html))
 
 
-def generate_html_view(index_data: dict, thumb_dir: str, output_base: str, page_size: int = 210):
-    """Generate paginated HTML views of tagged images.
+def iter_view_images(index_data: dict):
+    """Yield the images shown in the tag view, in index order.
 
     Args:
         index_data: Dictionary of messages with images
-        thumb_dir: Relative path to thumbnail directory
-        output_base: Base path for output HTML files (without extension)
-        page_size: Number of images per page (default: 210)
+
+    Yields:
+        Image dictionaries with msg_id, subject, local_filename, keywords
+        (message + image) and derivatives
     """
-    # Collect all images with their metadata
-    images = []
     for msg_id, message in index_data.items():
         metadata = message.get("metadata", {})
         subject = metadata.get("subject", "Unknown")
@@ -379,12 +456,27 @@ def generate_html_view(index_data: dict, thumb_dir: str, output_base: str, page_
             # Combine all keywords (message + image)
             all_keywords = list(msg_keywords) + list(img_keywords)
 
-            images.append({
+            yield {
                 "msg_id": msg_id,
                 "subject": subject,
                 "local_filename": local_filename,
-                "keywords": all_keywords
-            })
+                "keywords": all_keywords,
+                "derivatives": image.get("derivatives", [])
+            }
+
+
+def generate_html_view(index_data: dict, thumb_dir: str, output_base: str, page_size: int = 210,
+                       derived_dir: str = None):
+    """Generate paginated HTML views of tagged images.
+
+    Args:
+        index_data: Dictionary of messages with images
+        thumb_dir: Relative path to thumbnail directory
+        output_base: Base path for output HTML files (without extension)
+        page_size: Number of images per page (default: 210)
+        derived_dir: Relative path to derivatives directory (None = thumbnails only)
+    """
+    images = list(iter_view_images(index_data))
 
     # Calculate number of pages
     total_images = len(images)
@@ -395,7 +487,6 @@ def generate_html_view(index_data: dict, thumb_dir: str, output_base: str, page_
         return
 
     # Extract base filename from output_base
-    from pathlib import Path
     base_path = Path(output_base)
     base_filename = base_path.stem
 
@@ -407,16 +498,286 @@ def generate_html_view(index_data: dict, thumb_dir: str, output_base: str, page_
 
         output_file = f"{output_base}_page{page_num}.html"
         generate_html_page(page_images, thumb_dir, output_file,
-                          page_num, total_pages, base_filename)
+                          page_num, total_pages, base_filename, derived_dir)
 
     print(f"Generated {total_pages} HTML pages ({total_images} images, {page_size} per page)")
     print(f"Start at: {output_base}_page1.html")
 
 
+# ---- static site mode ------------------------------------------------------
+
+# Shared by every static page; written once per output directory
+STATIC_SITE_CSS = """\
+body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }
+h1 { color: #333; }
+.info { background: #fff; padding: 15px; margin-bottom: 20px; border-radius: 5px; }
+.pagination { background: #fff; padding: 15px; margin-bottom: 20px; border-radius: 5px;
+              text-align: center; font-size: 16px; }
+.pagination a { margin: 0 5px; padding: 8px 12px; background: #007bff; color: white;
+                text-decoration: none; border-radius: 4px; }
+.pagination a:hover { background: #0056b3; }
+.pagination a.disabled { background: #ccc; cursor: not-allowed; pointer-events: none; }
+.pagination .current { margin: 0 10px; font-weight: bold; }
+.toolbar { background: #fff; padding: 15px; margin-bottom: 20px; border-radius: 5px;
+           display: flex; gap: 10px; align-items: center; }
+.toolbar button { padding: 8px 16px; background: #007bff; color: white; border: none;
+                  border-radius: 4px; cursor: pointer; font-size: 14px; }
+.toolbar button:hover { background: #0056b3; }
+.toolbar button.secondary { background: #6c757d; }
+.toolbar button.secondary:hover { background: #545b62; }
+.toolbar button.export { background: #28a745; }
+.toolbar button.export:hover { background: #1e7e34; }
+.counter { font-weight: bold; color: #333; margin-left: auto; }
+table { border-collapse: collapse; background: #fff; }
+td { padding: 10px; vertical-align: top; border: 1px solid #ddd; width: 210px; position: relative; }
+td.selected { background: #ffe6e6; border-color: #ff6b6b; }
+.image-container { position: relative; }
+.remove-checkbox { position: absolute; top: 5px; left: 5px; width: 20px; height: 20px;
+                   cursor: pointer; z-index: 10; }
+img { width: 200px; height: auto; display: block; margin-bottom: 10px; }
+pre { background: #f8f8f8; padding: 8px; font-size: 10px;
+      border: 1px solid #ddd; border-radius: 3px; overflow-x: auto; margin: 0;
+      word-wrap: break-word; white-space: pre-wrap; }
+.subject { font-size: 11px; color: #666; margin-bottom: 5px; font-style: italic;
+           word-wrap: break-word; }
+.msg-id { font-size: 9px; color: #999; margin-bottom: 10px; }
+"""
+
+# Renders a page from its manifest: renderPage({page, pages, base, images: [[msg_id, subject, filename, keywords, img_html], ...]})
+STATIC_SITE_JS = """\
+let pageNum = 1;
+
+function el(tag, className, text) {
+  const node = document.createElement(tag);
+  if (className) node.className = className;
+  if (text !== undefined) node.textContent = text;
+  return node;
+}
+
+function pageLink(data, label, target, enabled) {
+  const a = el('a', enabled ? '' : 'disabled', label);
+  if (enabled) a.href = `${data.base}_page${target}.html`;
+  return a;
+}
+
+function renderPagination(container, data) {
+  container.replaceChildren(
+    pageLink(data, '<< First', 1, data.page > 1),
+    pageLink(data, '< Previous', data.page - 1, data.page > 1),
+    el('span', 'current', `Page ${data.page} of ${data.pages}`),
+    pageLink(data, 'Next >', data.page + 1, data.page < data.pages),
+    pageLink(data, 'Last >>', data.pages, data.page < data.pages)
+  );
+}
+
+function renderPage(data) {
+  pageNum = data.page;
+  document.title = `Tag View - Page ${data.page} of ${data.pages}`;
+  document.getElementById('heading').textContent = document.title;
+  document.getElementById('image-count').textContent = data.images.length;
+  document.getElementById('page-info').textContent = `${data.page} of ${data.pages}`;
+  document.querySelectorAll('.pagination').forEach(nav => renderPagination(nav, data));
+
+  const cols = 6;
+  const table = document.getElementById('images');
+  for (let i = 0; i < data.images.length; i += cols) {
+    const row = table.insertRow();
+    for (let j = 0; j < cols; j++) {
+      const cell = row.insertCell();
+      const image = data.images[i + j];
+      if (!image) continue;
+      const [msgId, subject, filename, keywords, imgHtml] = image;
+      cell.id = `cell-${i + j}`;
+      const container = el('div', 'image-container');
+      const checkbox = el('input', 'remove-checkbox');
+      checkbox.type = 'checkbox';
+      checkbox.dataset.filename = filename;
+      checkbox.onchange = updateSelection;
+      container.appendChild(checkbox);
+      container.insertAdjacentHTML('beforeend', imgHtml);
+      cell.append(el('div', 'subject', subject), el('div', 'msg-id', msgId), container,
+                  el('pre', '', `keywords: ${keywords}`));
+    }
+  }
+}
+
+function updateSelection() {
+  const checkboxes = document.querySelectorAll('.remove-checkbox');
+  const checked = Array.from(checkboxes).filter(cb => cb.checked);
+  document.getElementById('count').textContent = checked.length;
+  checkboxes.forEach(cb => cb.closest('td').classList.toggle('selected', cb.checked));
+}
+
+function selectAll() {
+  document.querySelectorAll('.remove-checkbox').forEach(cb => cb.checked = true);
+  updateSelection();
+}
+
+function clearAll() {
+  document.querySelectorAll('.remove-checkbox').forEach(cb => cb.checked = false);
+  updateSelection();
+}
+
+function exportList() {
+  const checkboxes = document.querySelectorAll('.remove-checkbox:checked');
+  if (checkboxes.length === 0) {
+    alert('No images selected for removal');
+    return;
+  }
+
+  const filenames = Array.from(checkboxes).map(cb => cb.dataset.filename);
+  const content = filenames.join('\\n') + '\\n';
+
+  const blob = new Blob([content], { type: 'text/plain' });
+  const url = URL.createObjectURL(blob);
+  const a = document.createElement('a');
+  a.href = url;
+  a.download = `images_to_remove_page${pageNum}.txt`;
+  document.body.appendChild(a);
+  a.click();
+  document.body.removeChild(a);
+  URL.revokeObjectURL(url);
+
+  alert(`Exported ${filenames.length} images to images_to_remove_page${pageNum}.txt`);
+}
+"""
+
+# Page shell: identical for every page apart from the manifest it loads
+STATIC_PAGE_TEMPLATE = """\
+<!DOCTYPE html>
+<html>
+<head>
+  <meta charset='UTF-8'>
+  <title>Tag View</title>
+  <link rel='stylesheet' href='{assets}/tag_view.css'>
+  <script src='{assets}/tag_view.js'></script>
+</head>
+<body>
+  <h1 id='heading'>Tag View</h1>
+  <div class='info'>
+    <strong>Images on this page:</strong> <span id='image-count'></span><br>
+    <strong>Page:</strong> <span id='page-info'></span>
+  </div>
+  <div class='pagination'></div>
+  <div class='toolbar'>
+    <button onclick='selectAll()'>Select All</button>
+    <button onclick='clearAll()' class='secondary'>Clear All</button>
+    <button onclick='exportList()' class='export'>Export Removal List</button>
+    <div class='counter'>Selected: <span id='count'>0</span></div>
+  </div>
+  <table id='images'></table>
+  <div class='pagination' style='margin-top: 20px;'></div>
+  <script src='{assets}/page{page_num}.js'></script>
+</body>
+</html>
+"""
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Write a file only if its content differs from what is on disk.
+
+    Returns:
+        True if the file was written
+    """
+    try:
+        if path.read_text(encoding='utf-8') == content:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    path.write_text(content, encoding='utf-8')
+    return True
+
+
+def _page_manifest(images: list, page_num: int, total_pages: int, base_filename: str,
+                   thumb_dir: str, derived_dir: str = None) -> str:
+    """Compact JSON manifest of one page, wrapped in a renderPage() call."""
+    rows = []
+    for img_data in images:
+        keywords_str = ", ".join(img_data['keywords'][:10]) if img_data['keywords'] else "none"
+        if len(img_data['keywords']) > 10:
+            keywords_str += f" ... ({len(img_data['keywords'])} total)"
+        rows.append([img_data['msg_id'], img_data['subject'][:50], img_data['local_filename'],
+                     keywords_str, format_image_tag(img_data, thumb_dir, derived_dir)])
+
+    manifest = {"page": page_num, "pages": total_pages, "base": base_filename, "images": rows}
+    return f"renderPage({json.dumps(manifest, ensure_ascii=False, separators=(',', ':'))});\n"
+
+
+def generate_static_site(index_data: dict, thumb_dir: str, output_base: str, page_size: int = 210,
+                         derived_dir: str = None) -> dict:
+    """Generate the paginated tag view as a static site.
+
+    Every page is a small HTML shell sharing one CSS and one JS file from
+    {output_base}_assets/, plus a per-page manifest script holding the
+    page's data (rendered client-side). Pages are streamed to disk as they
+    fill, and files whose content is unchanged are not rewritten, so a
+    re-run after a small index change touches only the affected pages.
+    Manifests are scripts rather than .json files so the pages still work
+    when opened from disk (browsers block fetch() of local files).
+
+    Args:
+        index_data: Dictionary of messages with images
+        thumb_dir: Relative path to thumbnail directory
+        output_base: Base path for output HTML files (without extension)
+        page_size: Number of images per page (default: 210)
+        derived_dir: Relative path to derivatives directory (None = thumbnails only)
+
+    Returns:
+        Dictionary with pages, images, written, unchanged and removed file counts
+    """
+    base_path = Path(output_base)
+    base_filename = base_path.stem
+    assets_name = f"{base_filename}_assets"
+    assets_dir = base_path.parent / assets_name
+    assets_dir.mkdir(parents=True, exist_ok=True)
+
+    total_images = sum(1 for _ in iter_view_images(index_data))
+    total_pages = (total_images + page_size - 1) // page_size
+    stats = {"pages": total_pages, "images": total_images, "written": 0, "unchanged": 0, "removed": 0}
+
+    def write(path: Path, content: str):
+        if _write_if_changed(path, content):
+            stats["written"] += 1
+        else:
+            stats["unchanged"] += 1
+
+    write(assets_dir / "tag_view.css", STATIC_SITE_CSS)
+    write(assets_dir / "tag_view.js", STATIC_SITE_JS)
+
+    def flush(page_num: int, page_images: list):
+        write(Path(f"{output_base}_page{page_num}.html"),
+              STATIC_PAGE_TEMPLATE.format(assets=assets_name, page_num=page_num))
+        write(assets_dir / f"page{page_num}.js",
+              _page_manifest(page_images, page_num, total_pages, base_filename, thumb_dir, derived_dir))
+
+    page_num = 0
+    page_images = []
+    for img_data in iter_view_images(index_data):
+        page_images.append(img_data)
+        if len(page_images) == page_size:
+            page_num += 1
+            flush(page_num, page_images)
+            page_images = []
+    if page_images:
+        page_num += 1
+        flush(page_num, page_images)
+
+    # Remove pages left over from an earlier, larger run
+    stale = [p for p in base_path.parent.glob(f"{base_filename}_page*.html")
+             if p.stem[len(base_filename) + 5:].isdigit() and int(p.stem[len(base_filename) + 5:]) > total_pages]
+    stale += [p for p in assets_dir.glob("page*.js")
+              if p.stem[4:].isdigit() and int(p.stem[4:]) > total_pages]
+    for path in stale:
+        path.unlink()
+        stats["removed"] += 1
+
+    return stats
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Analyze keyword statistics from tagged image index',
-        usage='%(prog)s SOURCE [DEST] [--suppress-html] [--limit N] [--page-size N]'
+        usage='%(prog)s SOURCE [DEST] [--suppress-html] [--static-site] [--limit N] [--page-size N]'
     )
 
     # Positional arguments
@@ -430,10 +791,19 @@ def main():
                         help='Limit number of messages to process')
     parser.add_argument('--thumb_dir', default='../data/images/thumbs',
                         help='Relative path to thumbnail directory (default: ../data/images/thumbs)')
+    parser.add_argument('--derived_dir', default='../data/images/derived',
+                        help='Relative path to derivatives directory, used for images with recorded derivatives (default: ../data/images/derived)')
     parser.add_argument('--page-size', type=int, default=210,
                         help='Number of images per HTML page (default: 210)')
     parser.add_argument('--suppress-html', action='store_true',
                         help='Skip HTML view generation (only create text statistics)')
+    parser.add_argument('--top-pairs', type=int, default=50,
+                        help='Number of keyword pairs in the co-occurrence report (default: 50)')
+    parser.add_argument('--stats-cache', default=None,
+                        help='Keyword matrix cache file (default: SOURCE with _keyword_stats.json suffix)')
+    parser.add_argument('--static-site', action='store_true',
+                        help='Write the HTML view as small page shells with shared CSS/JS and per-page '
+                             'data manifests, rewriting only pages whose content changed')
 
     args = parser.parse_args()
 
@@ -446,14 +816,22 @@ def main():
     dest_path = Path(args.dest)
     html_base = str(dest_path.parent / (dest_path.stem + '_view'))
 
-    print(f"Loading index from {args.source}...")
-    index_data = load_index(args.source, limit=args.limit)
-    print(f"Loaded {len(index_data)} messages")
-    if args.limit:
-        print(f"(limited to first {args.limit} messages)")
+    index_data = None
+    if args.limit or not args.suppress_html:
+        print(f"Loading index from {args.source}...")
+        index_data = load_index(args.source, limit=args.limit)
+        print(f"Loaded {len(index_data)} messages")
+        if args.limit:
+            print(f"(limited to first {args.limit} messages)")
 
     print("Analyzing keywords...")
-    keyword_counter = analyze_keywords(index_data)
+    if args.limit:
+        # A partial index is not what the cache describes
+        matrix = KeywordMatrix.build(index_data)
+    else:
+        # Text-only runs on an unchanged index read the cached matrix, not the index
+        matrix = open_keyword_matrix(args.source, cache_file=args.stats_cache, index_data=index_data)
+    keyword_counter = matrix.frequencies()
 
     # Write text statistics
     print(f"Writing statistics to {args.dest}...")
@@ -467,11 +845,19 @@ def main():
         f.write("\n\n")
 
         # Summary
-        f.write(format_summary(index_data, keyword_counter))
+        f.write(format_summary(matrix.summary, keyword_counter))
         f.write("\n\n")
 
         # Keyword statistics
         f.write(format_keyword_statistics(keyword_counter))
+        f.write("\n\n")
+
+        # Co-occurrence, chapter and year breakdowns
+        f.write(format_cooccurrence(matrix.cooccurrence(), top=args.top_pairs))
+        f.write("\n\n")
+        f.write(format_chapter_distribution(matrix.by_chapter()))
+        f.write("\n\n")
+        f.write(format_year_trends(matrix.by_year(), keyword_counter))
 
     print(f"Statistics written to: {args.dest}")
     print(f"Total unique keywords: {len(keyword_counter)}")
@@ -479,7 +865,15 @@ def main():
     # Generate HTML view (unless suppressed)
     if not args.suppress_html:
         print(f"Generating HTML view...")
-        generate_html_view(index_data, args.thumb_dir, html_base, args.page_size)
+        if args.static_site:
+            site_stats = generate_static_site(index_data, args.thumb_dir, html_base, args.page_size,
+                                              args.derived_dir)
+            print(f"Generated {site_stats['pages']} pages ({site_stats['images']} images, {args.page_size} per page): "
+                  f"{site_stats['written']} files written, {site_stats['unchanged']} unchanged, "
+                  f"{site_stats['removed']} stale removed")
+            print(f"Start at: {html_base}_page1.html")
+        else:
+            generate_html_view(index_data, args.thumb_dir, html_base, args.page_size, args.derived_dir)
     else:
         print("HTML generation suppressed (--suppress-html)")
 
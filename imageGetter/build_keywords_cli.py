@@ -5,6 +5,7 @@
 import argparse
 from pathlib import Path
 from tqdm import tqdm
+from llm_cache import LLMResponseCache
 from keyword_builder import (
     load_image_index,
     sample_random_messages,
@@ -16,13 +17,13 @@ from keyword_builder import (
     filter_noise_keywords,
     sort_keywords
 )
-from llm_config import LLM_TIMEOUT
+from llm_config import LLM_CACHE_FILE, LLM_TIMEOUT
 
 
 def main():
     parser = argparse.ArgumentParser(
         description='Build keyword list by sampling messages and extracting keywords with LLM',
-        usage='%(prog)s [-h] [--sample N] [--existing FILE] [--model MODEL] [--verbose] SOURCE [DEST]'
+        usage='%(prog)s [-h] [--sample N] [--existing FILE] [--model MODEL] [--llm-cache FILE | --no-llm-cache] [--verbose] SOURCE [DEST]'
     )
 
     # Positional arguments
@@ -38,6 +39,10 @@ def main():
                         help='Existing keywords file to merge with (default: keywords_seed.txt)')
     parser.add_argument('--model', type=str, default=None,
                         help='Override LLM model from config')
+    parser.add_argument('--llm-cache', type=str, default=LLM_CACHE_FILE,
+                        help=f'LLM response cache file (default: {LLM_CACHE_FILE})')
+    parser.add_argument('--no-llm-cache', action='store_true',
+                        help='Always ask the LLM, ignore the response cache')
     parser.add_argument('--verbose', action='store_true',
                         help='Show detailed progress including message subjects')
 
@@ -101,7 +106,8 @@ def main():
         print(f"Providing {len(existing_keywords)} existing keywords to LLM for context")
     if args.verbose:
         print("Verbose mode enabled - showing message subjects and errors")
-    extractor = KeywordExtractor(model=args.model)
+    cache = None if args.no_llm_cache else LLMResponseCache(args.llm_cache)
+    extractor = KeywordExtractor(model=args.model, cache=cache)
 
     all_keywords = []
     failed_messages = []
@@ -134,6 +140,11 @@ def main():
             continue
 
     print(f"\nExtracted keywords from {len(all_keywords)} messages")
+    if cache is not None:
+        cache_stats = cache.get_stats()
+        print(f"LLM response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['hit_rate']:.1%} hit rate)")
+        cache.close()
     if failed_messages:
         print(f"WARNING: {len(failed_messages)} messages failed (skipped)")
         if args.verbose:
@@ -2,10 +2,45 @@
 # ABOUTME: Remove invalid keywords from image index file
 # ABOUTME: Filters both message-level and image-level keywords against INVALID_KEYWORDS list
 
-import json
 import argparse
 from pathlib import Path
 from llm_config import INVALID_KEYWORDS
+from index_store import IndexStore, load_index_file, save_index_file, updates_in_place
+
+
+def _clean_message(message: dict, invalid_lower: set, stats: dict) -> tuple:
+    """Remove invalid keywords from one message in place.
+
+    Returns:
+        (message keywords changed, image keywords changed)
+    """
+    keywords_changed = False
+    images_changed = False
+
+    # Clean message-level keywords
+    if message.get('keywords'):
+        original_count = len(message['keywords'])
+        message['keywords'] = [
+            kw for kw in message['keywords']
+            if kw.lower() not in invalid_lower
+        ]
+        removed = original_count - len(message['keywords'])
+        stats['message_keywords_removed'] += removed
+        keywords_changed = removed > 0
+
+    # Clean image-level keywords
+    for image in message.get('images', []):
+        if 'keywords' in image:
+            original_count = len(image['keywords'])
+            image['keywords'] = [
+                kw for kw in image['keywords']
+                if kw.lower() not in invalid_lower
+            ]
+            removed = original_count - len(image['keywords'])
+            stats['image_keywords_removed'] += removed
+            images_changed = images_changed or removed > 0
+
+    return keywords_changed, images_changed
 
 
 def clean_invalid_keywords(index_file: str, output_file: str = None) -> dict:
@@ -21,9 +56,8 @@ def clean_invalid_keywords(index_file: str, output_file: str = None) -> dict:
         - message_keywords_removed: Count of message keywords removed
         - image_keywords_removed: Count of image keywords removed
     """
-    # Load index
-    with open(index_file, 'r') as f:
-        index_data = json.load(f)
+    if output_file is None:
+        output_file = index_file
 
     # Create case-insensitive set of invalid keywords
     invalid_lower = {kw.lower() for kw in INVALID_KEYWORDS}
@@ -34,37 +68,35 @@ def clean_invalid_keywords(index_file: str, output_file: str = None) -> dict:
         'image_keywords_removed': 0
     }
 
+    if updates_in_place(index_file, output_file):
+        # Cleaning a store in place: stream messages, write back only the ones that changed
+        store = IndexStore(index_file)
+        try:
+            changed = []
+            for msg_id, message in store.iter_messages():
+                stats['messages_processed'] += 1
+                keywords_changed, images_changed = _clean_message(message, invalid_lower, stats)
+                if keywords_changed or images_changed:
+                    changed.append((msg_id, message, keywords_changed, images_changed))
+            with store.transaction():
+                for msg_id, message, keywords_changed, images_changed in changed:
+                    if keywords_changed:
+                        store.set_keywords(msg_id, message['keywords'])
+                    if images_changed:
+                        store.set_images(msg_id, message['images'])
+        finally:
+            store.close()
+        return stats
+
+    # Load index
+    index_data = load_index_file(index_file)
+
     # Process each message
     for msg_id, message in index_data.items():
         stats['messages_processed'] += 1
+        _clean_message(message, invalid_lower, stats)
 
-        # Clean message-level keywords
-        if 'keywords' in message:
-            original_count = len(message['keywords'])
-            message['keywords'] = [
-                kw for kw in message['keywords']
-                if kw.lower() not in invalid_lower
-            ]
-            removed = original_count - len(message['keywords'])
-            stats['message_keywords_removed'] += removed
-
-        # Clean image-level keywords
-        for image in message.get('images', []):
-            if 'keywords' in image:
-                original_count = len(image['keywords'])
-                image['keywords'] = [
-                    kw for kw in image['keywords']
-                    if kw.lower() not in invalid_lower
-                ]
-                removed = original_count - len(image['keywords'])
-                stats['image_keywords_removed'] += removed
-
-    # Save result
-    if output_file is None:
-        output_file = index_file
-
-    with open(output_file, 'w') as f:
-        json.dump(index_data, f, indent=2)
+    save_index_file(index_data, output_file)
 
     return stats
 
@@ -1,22 +1,33 @@
-# ABOUTME: Deduplicate images within messages based on file size
-# ABOUTME: Removes duplicate images (same size) and missing image files from index
+# ABOUTME: Deduplicate images across the whole index using content (SHA-256) and perceptual (dHash) hashes
+# ABOUTME: Also provides the legacy per-message dedupe by file size and missing image file removal
 
 import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from index_store import load_index_file, save_index_file
+
+# dHash grid: 9x8 grayscale -> 64 horizontal gradient bits
+DHASH_SIZE = 8
+
+# Default maximum Hamming distance between dHashes to call two images near-duplicates
+DEFAULT_MAX_DISTANCE = 4
 
 
 def load_index(index_file: str) -> Dict:
-    """Load image index from JSON file.
+    """Load image index from JSON file or index database.
 
     Args:
-        index_file: Path to image index JSON file
+        index_file: Path to image index JSON file (or .sqlite/.db IndexStore)
 
     Returns:
         Dictionary of messages with metadata and images
     """
-    with open(index_file, 'r') as f:
-        return json.load(f)
+    return load_index_file(index_file)
 
 
 def dedupe_message_images(message: Dict, images_dir: str) -> Tuple[Dict, Dict]:
@@ -78,11 +89,290 @@ def dedupe_message_images(message: Dict, images_dir: str) -> Tuple[Dict, Dict]:
 
 
 def save_index(index_data: Dict, output_file: str):
-    """Save image index to JSON file.
+    """Save image index to JSON file or index database.
 
     Args:
         index_data: Dictionary to save
-        output_file: Path to output file
+        output_file: Path to output file (or .sqlite/.db IndexStore)
+    """
+    save_index_file(index_data, output_file)
+
+
+def compute_dhash(image_file: str, hash_size: int = DHASH_SIZE) -> int:
+    """Compute difference hash (dHash) of an image.
+
+    Shrinks the image to (hash_size+1) x hash_size grayscale and records whether
+    each pixel is brighter than its right neighbour. Robust to resizing and
+    recompression, so reposted copies of the same photo hash alike.
+
+    Args:
+        image_file: Path to image file
+        hash_size: Hash grid size (default 8 -> 64-bit hash)
+
+    Returns:
+        Hash as an integer
+    """
+    with Image.open(image_file) as img:
+        # Let JPEG decoder downscale in the DCT domain - we only need a tiny image
+        img.draft('L', (hash_size * 8, hash_size * 8))
+        small = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+        pixels = small.tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def compute_image_hashes(image_file: str) -> Dict:
+    """Compute content and perceptual hashes for one image file.
+
+    Args:
+        image_file: Path to image file
+
+    Returns:
+        Dictionary with sha256 (hex string) and dhash (hex string, or None if the
+        file can't be decoded as an image)
+    """
+    hasher = hashlib.sha256()
+    with open(image_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+
+    try:
+        dhash = f"{compute_dhash(image_file):016x}"
+    except Exception:
+        dhash = None
+
+    return {"sha256": hasher.hexdigest(), "dhash": dhash}
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """Burkhard-Keller tree for Hamming-distance nearest neighbour queries.
+
+    Queries visit only subtrees whose edge distance is within the search radius
+    (triangle inequality), instead of comparing against every hash.
+    """
+
+    def __init__(self):
+        """Initialize empty tree."""
+        self.root = None
+
+    def add(self, hash_value: int, item):
+        """Add a hash with an attached item.
+
+        Args:
+            hash_value: Integer hash
+            item: Payload returned by find()
+        """
+        node = (hash_value, item, {})
+        if self.root is None:
+            self.root = node
+            return
+
+        current = self.root
+        while True:
+            distance = hamming_distance(hash_value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def find(self, hash_value: int, max_distance: int) -> List[Tuple[int, object]]:
+        """Find all items within max_distance of hash_value.
+
+        Args:
+            hash_value: Integer hash to search for
+            max_distance: Maximum Hamming distance (inclusive)
+
+        Returns:
+            List of (distance, item) tuples
+        """
+        results = []
+        if self.root is None:
+            return results
+
+        stack = [self.root]
+        while stack:
+            node_hash, item, children = stack.pop()
+            distance = hamming_distance(hash_value, node_hash)
+            if distance <= max_distance:
+                results.append((distance, item))
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+
+        return results
+
+
+def load_hash_cache(cache_file: str) -> Dict:
+    """Load sidecar hash cache (missing file -> empty cache).
+
+    Args:
+        cache_file: Path to hash cache JSON file
+
+    Returns:
+        Dictionary mapping local_filename -> {size, mtime_ns, sha256, dhash}
+    """
+    cache_path = Path(cache_file)
+    if not cache_path.exists():
+        return {}
+    with open(cache_path, 'r') as f:
+        return json.load(f)
+
+
+def save_hash_cache(cache: Dict, cache_file: str):
+    """Save sidecar hash cache.
+
+    Args:
+        cache: Dictionary from load_hash_cache()/hash_images()
+        cache_file: Path to hash cache JSON file
+    """
+    with open(cache_file, 'w') as f:
+        json.dump(cache, f)
+
+
+def hash_images(filenames: List[str], images_dir: str, cache: Dict,
+                workers: Optional[int] = None) -> Dict:
+    """Hash image files in parallel, reusing cached hashes for unchanged files.
+
+    A cache entry is reused when file size and modification time still match.
+    Files that don't exist are left out of the result.
+
+    Args:
+        filenames: Local filenames to hash
+        images_dir: Directory containing image files
+        cache: Existing cache (updated in-place with new hashes)
+        workers: Number of worker processes (default: CPU count, 1 = in-process)
+
+    Returns:
+        Dictionary mapping local_filename -> hashes for every existing file
+    """
+    images_path = Path(images_dir)
+    result = {}
+    to_hash = []
+
+    for filename in filenames:
+        try:
+            stat = (images_path / filename).stat()
+        except OSError:
+            # Missing file or file name too long - treat as missing
+            continue
+
+        entry = cache.get(filename)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            result[filename] = entry
+        else:
+            to_hash.append((filename, stat))
+
+    paths = [str(images_path / filename) for filename, _ in to_hash]
+    if workers == 1 or len(paths) < 2:
+        hashes = [compute_image_hashes(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            hashes = list(executor.map(compute_image_hashes, paths, chunksize=16))
+
+    for (filename, stat), image_hashes in zip(to_hash, hashes):
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, **image_hashes}
+        cache[filename] = entry
+        result[filename] = entry
+
+    return result
+
+
+def dedupe_index(index_data: Dict, hashes: Dict,
+                 max_distance: int = DEFAULT_MAX_DISTANCE) -> Tuple[Dict, Dict]:
+    """Deduplicate images across the whole index so each image is stored once.
+
+    Images are compared by SHA-256 (exact copies) and by dHash within
+    max_distance (near-duplicates such as resized or recompressed reposts).
+    The first occurrence in index order is kept. Duplicates are removed from
+    their message and linked both ways:
+    - kept image gets "references": [{message_id, local_filename}, ...]
+    - the message that lost it gets "shared_images": [{message_id, local_filename}, ...]
+      pointing at the kept copy
+    Images whose files are missing (not in hashes) are removed.
+
+    Args:
+        index_data: Dictionary of messages with images
+        hashes: Dictionary from hash_images()
+        max_distance: Maximum dHash Hamming distance for near-duplicates
+            (negative disables perceptual matching)
+
+    Returns:
+        Tuple of (deduped_index, stats_dict)
+        stats_dict contains: exact_duplicates, near_duplicates, missing_removed
     """
-    with open(output_file, 'w') as f:
-        json.dump(index_data, f, indent=2)
+    stats = {
+        "exact_duplicates": 0,
+        "near_duplicates": 0,
+        "missing_removed": 0
+    }
+    by_sha256 = {}
+    tree = BKTree()
+    result = {}
+
+    for msg_id, message in index_data.items():
+        kept_images = []
+        shared = list(message.get("shared_images", []))
+
+        for image in message.get("images", []):
+            local_filename = image.get("local_filename", "")
+            if not local_filename:
+                continue
+
+            image_hashes = hashes.get(local_filename)
+            if image_hashes is None:
+                stats["missing_removed"] += 1
+                continue
+
+            # Exact copy?
+            canonical = by_sha256.get(image_hashes["sha256"])
+            if canonical is not None:
+                stats["exact_duplicates"] += 1
+            elif image_hashes.get("dhash") is not None and max_distance >= 0:
+                # Near-duplicate? Prefer the closest, then the earliest kept image
+                matches = tree.find(int(image_hashes["dhash"], 16), max_distance)
+                if matches:
+                    canonical = min(matches, key=lambda m: (m[0], m[1][0]))[1]
+                    stats["near_duplicates"] += 1
+
+            if canonical is None:
+                # First time we see this image - keep it
+                kept = dict(image)
+                kept_images.append(kept)
+                entry = (len(by_sha256), msg_id, kept)
+                by_sha256[image_hashes["sha256"]] = entry
+                if image_hashes.get("dhash") is not None:
+                    tree.add(int(image_hashes["dhash"], 16), entry)
+                continue
+
+            # Duplicate - link back to the kept copy (unless it's in this same message)
+            _, canonical_msg_id, canonical_image = canonical
+            if canonical_msg_id != msg_id:
+                canonical_image.setdefault("references", []).append({
+                    "message_id": msg_id,
+                    "local_filename": local_filename
+                })
+                ref = {
+                    "message_id": canonical_msg_id,
+                    "local_filename": canonical_image["local_filename"]
+                }
+                if ref not in shared:
+                    shared.append(ref)
+
+        deduped_message = message.copy()
+        deduped_message["images"] = kept_images
+        if shared:
+            deduped_message["shared_images"] = shared
+        result[msg_id] = deduped_message
+
+    return result, stats
@@ -1,15 +1,60 @@
 #!/usr/bin/env python3
-# ABOUTME: CLI tool to deduplicate images in index based on file size
-# ABOUTME: Removes duplicate images (same size) and missing files, prints statistics
+# ABOUTME: CLI tool to deduplicate images across the index by content and perceptual hash
+# ABOUTME: Removes duplicate images and missing files, links duplicates back to kept copy, prints statistics
 
 import argparse
 from pathlib import Path
-from dedupe_images import load_index, dedupe_message_images, save_index
+from dedupe_images import (
+    load_index,
+    dedupe_message_images,
+    save_index,
+    load_hash_cache,
+    save_hash_cache,
+    hash_images,
+    dedupe_index,
+    DEFAULT_MAX_DISTANCE
+)
+from index_store import save_messages, updates_in_place
+
+
+def dedupe_by_size(index_data: dict, images_dir: str) -> dict:
+    """Legacy per-message dedupe by file size (in-place).
+
+    Args:
+        index_data: Dictionary of messages with images
+        images_dir: Path to images directory
+
+    Returns:
+        Dictionary with statistics: messages_affected, duplicates_removed, missing_removed
+    """
+    totals = {"messages_affected": 0, "duplicates_removed": 0, "missing_removed": 0}
+
+    for msg_id, message in index_data.items():
+        deduped_message, stats = dedupe_message_images(message, images_dir)
+        index_data[msg_id] = deduped_message
+
+        duplicates = stats["duplicates_removed"]
+        missing = stats["missing_removed"]
+        totals["duplicates_removed"] += duplicates
+        totals["missing_removed"] += missing
+
+        # Print output for affected messages
+        if duplicates > 0 or missing > 0:
+            totals["messages_affected"] += 1
+            subject = message.get("metadata", {}).get("subject", "Unknown")
+            print(f"  {msg_id}: \"{subject[:60]}\"")
+            if duplicates > 0:
+                print(f"    - Removed {duplicates} duplicate image(s) (same file size)")
+            if missing > 0:
+                print(f"    - Removed {missing} missing image(s) (file not found)")
+
+    return totals
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description='Deduplicate images within messages based on file size and remove missing files'
+        description='Deduplicate images across the index by content and perceptual hash, and remove missing files',
+        usage='%(prog)s [-h] [--images_dir DIR] [--hash-cache FILE] [--max-distance N] [--workers N] [--by-size] index_file output_file'
     )
 
     parser.add_argument('index_file',
@@ -18,6 +63,14 @@ def main():
                         help='Path to output deduped index JSON file')
     parser.add_argument('--images_dir', default='../data/images/full',
                         help='Path to images directory (default: ../data/images/full)')
+    parser.add_argument('--hash-cache', default=None,
+                        help='Sidecar hash cache file (default: image_hashes.json next to images_dir)')
+    parser.add_argument('--max-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help=f'Max dHash bit difference for near-duplicates, -1 = exact copies only (default: {DEFAULT_MAX_DISTANCE})')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for hashing (default: CPU count)')
+    parser.add_argument('--by-size', action='store_true',
+                        help='Legacy mode: dedupe within each message by file size only')
 
     args = parser.parse_args()
 
@@ -36,45 +89,45 @@ def main():
     print(f"Loaded {len(index_data)} messages")
     print()
 
-    # Process each message
-    total_images_before = 0
-    total_images_after = 0
-    total_duplicates = 0
-    total_missing = 0
-    messages_affected = 0
-
-    print("Processing messages...")
-    for msg_id, message in index_data.items():
-        images_before = len(message.get("images", []))
-        total_images_before += images_before
-
-        # Dedupe and remove missing
-        deduped_message, stats = dedupe_message_images(message, args.images_dir)
-        index_data[msg_id] = deduped_message
-
-        images_after = len(deduped_message.get("images", []))
-        total_images_after += images_after
-
-        # Track statistics
-        duplicates = stats["duplicates_removed"]
-        missing = stats["missing_removed"]
-        total_duplicates += duplicates
-        total_missing += missing
-
-        # Print output for affected messages
-        if duplicates > 0 or missing > 0:
-            messages_affected += 1
-            subject = message.get("metadata", {}).get("subject", "Unknown")
-            print(f"  {msg_id}: \"{subject[:60]}\"")
-            if duplicates > 0:
-                print(f"    - Removed {duplicates} duplicate image(s) (same file size)")
-            if missing > 0:
-                print(f"    - Removed {missing} missing image(s) (file not found)")
+    total_images_before = sum(len(m.get("images", [])) for m in index_data.values())
+    # Both modes replace changed messages with copies, so the originals stay intact for comparison
+    original_index = dict(index_data)
+
+    if args.by_size:
+        print("Processing messages (by file size)...")
+        totals = dedupe_by_size(index_data, args.images_dir)
+        messages_affected = totals["messages_affected"]
+        total_missing = totals["missing_removed"]
+    else:
+        cache_file = args.hash_cache or str(Path(args.images_dir).parent / "image_hashes.json")
+        cache = load_hash_cache(cache_file)
+        filenames = [image.get("local_filename", "")
+                     for message in index_data.values()
+                     for image in message.get("images", [])
+                     if image.get("local_filename")]
+
+        print(f"Hashing {len(filenames)} images ({len(cache)} cached in {cache_file})...")
+        hashes = hash_images(filenames, args.images_dir, cache, workers=args.workers)
+        save_hash_cache(cache, cache_file)
+
+        print("Finding duplicates across all messages...")
+        deduped, totals = dedupe_index(index_data, hashes, max_distance=args.max_distance)
+        messages_affected = sum(
+            1 for msg_id, message in deduped.items()
+            if len(message["images"]) != len(index_data[msg_id].get("images", []))
+        )
+        total_missing = totals["missing_removed"]
+        index_data = deduped
+
+    total_images_after = sum(len(m.get("images", [])) for m in index_data.values())
 
     # Save deduped index
     print()
     print(f"Saving deduped index to {args.output_file}...")
-    save_index(index_data, args.output_file)
+    changed_ids = [msg_id for msg_id, message in index_data.items() if message != original_index[msg_id]]
+    if not (updates_in_place(args.index_file, args.output_file)
+            and save_messages(index_data, args.output_file, changed_ids)):
+        save_index(index_data, args.output_file)
 
     # Print summary
     print()
@@ -88,7 +141,11 @@ def main():
     print(f"Total images after:            {total_images_after}")
     print(f"Total images removed:          {total_images_before - total_images_after}")
     print()
-    print(f"  Duplicates removed:          {total_duplicates}")
+    if args.by_size:
+        print(f"  Duplicates removed:          {totals['duplicates_removed']}")
+    else:
+        print(f"  Exact duplicates removed:    {totals['exact_duplicates']}")
+        print(f"  Near duplicates removed:     {totals['near_duplicates']}")
     print(f"  Missing files removed:       {total_missing}")
     print("="*60)
     print()
@@ -2,10 +2,9 @@
 # ABOUTME: Handles retry logic, validation, and progress tracking for batch downloads
 
 import time
-import json
 import requests
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from PIL import Image
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -14,6 +13,16 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from tqdm import tqdm
 
+from index_store import is_index_store, load_index_images, save_images, save_index_file
+from download_journal import (
+    DownloadJournal,
+    get_journal_path,
+    hash_file,
+    load_journal,
+    is_download_complete,
+    fold_journal_into_index
+)
+
 
 def create_selenium_driver():
     """
@@ -32,7 +41,7 @@ def create_selenium_driver():
     driver = webdriver.Chrome(service=service, options=options)
     return driver
 
-def download_image(strUrl: str, strOutputPath: str, seleniumDriver=None, intRetries: int = 3, dctCookies: Optional[Dict] = None) -> bool:
+def download_image(strUrl: str, strOutputPath: str, seleniumDriver=None, intRetries: int = 3, dctCookies: Optional[Dict] = None, lstErrors: Optional[List[str]] = None) -> bool:
     """
     Download a single image from URL using Selenium.
 
@@ -42,6 +51,7 @@ def download_image(strUrl: str, strOutputPath: str, seleniumDriver=None, intRetr
         seleniumDriver: Optional Selenium driver (for testing). If None, creates new one.
         intRetries: Number of retry attempts (default 3)
         dctCookies: Optional pre-extracted cookies dict for direct binary downloads
+        lstErrors: Optional list that receives an error message for each failed attempt
 
     Returns:
         True if successful, False otherwise
@@ -58,6 +68,8 @@ def download_image(strUrl: str, strOutputPath: str, seleniumDriver=None, intRetr
             boolCloseDriver = True
         except Exception as e:
             print(f"Failed to create Selenium driver: {e}")
+            if lstErrors is not None:
+                lstErrors.append(f"Failed to create Selenium driver: {e}")
             return False
 
     # Attempt download with retries
@@ -109,6 +121,8 @@ def download_image(strUrl: str, strOutputPath: str, seleniumDriver=None, intRetr
 
         except Exception as e:
             print(f"Download attempt {intAttempt + 1}/{intRetries} failed: {e}")
+            if lstErrors is not None:
+                lstErrors.append(str(e))
             if intAttempt < intRetries - 1:
                 time.sleep(2 ** intAttempt)  # Exponential backoff
             continue
@@ -123,39 +137,44 @@ def download_image(strUrl: str, strOutputPath: str, seleniumDriver=None, intRetr
     return False
 
 
-def download_batch(strIndexPath: str, strOutputDir: str, intLimit: Optional[int] = None, seleniumDriver=None) -> Dict[str, int]:
+def download_batch(strIndexPath: str, strOutputDir: str, intLimit: Optional[int] = None, seleniumDriver=None, strJournalPath: Optional[str] = None) -> Dict[str, int]:
     """
     Download all images from image index with progress tracking.
 
-    Skips images that already exist in the output directory (resume functionality).
-    Displays progress stats every 10 images and saves index periodically.
+    Every download outcome (success/failure, size, SHA-256, error) is appended to a
+    JSONL journal next to the index. On resume the journal is replayed: images it
+    records as downloaded are skipped only if the file is still on disk with the
+    recorded size. Files present on disk but missing from the journal (downloaded
+    before the journal existed) are adopted into the journal and skipped.
+    The journal is folded into the index once, at the end of the run.
 
     Args:
-        strIndexPath: Path to image_index.json file
+        strIndexPath: Path to image_index.json file (or .sqlite/.db IndexStore)
         strOutputDir: Directory to save downloaded images
         intLimit: Optional limit on number of images to download
         seleniumDriver: Optional Selenium driver (for testing). If None, creates new one.
+        strJournalPath: Optional journal path (default: {index stem}_downloads.jsonl)
 
     Returns:
         Dict with statistics: {"total": int, "success": int, "failed": int, "skipped": int}
     """
-    # Open debug log file
-    fileDebug = open('download_debug.log', 'w', encoding='utf-8')
-    fileDebug.write("=== Image Download Debug Log ===\n\n")
+    if strJournalPath is None:
+        strJournalPath = get_journal_path(strIndexPath)
+
+    # Load image index (only the images table of an IndexStore)
+    dctIndex = load_index_images(strIndexPath)
 
-    # Load image index
-    with open(strIndexPath, 'r', encoding='utf-8') as f:
-        dctIndex = json.load(f)
+    # Replay journal from previous runs
+    dctJournal = load_journal(strJournalPath)
 
-    # Collect all images from all messages (with reference to original dict for updates)
+    # Collect all images from all messages
     lstAllImages = []
     for strMessageId, dctEntry in dctIndex.items():
         for dctImage in dctEntry["images"]:
             lstAllImages.append({
                 "message_id": strMessageId,
                 "url": dctImage["url"],
-                "local_filename": dctImage["local_filename"],
-                "image_ref": dctImage  # Reference to update size_bytes and too_small
+                "local_filename": dctImage["local_filename"]
             })
 
     # Apply limit if specified
@@ -170,7 +189,7 @@ def download_batch(strIndexPath: str, strOutputDir: str, intLimit: Optional[int]
         "skipped": 0
     }
 
-    # Counter for periodic stats display and index saving
+    # Counter for periodic stats display
     intProcessedCount = 0
 
     # Create output directory
@@ -214,59 +233,111 @@ def download_batch(strIndexPath: str, strOutputDir: str, intLimit: Optional[int]
         print("Will attempt to download without pre-extracted cookies (slower)")
         dctCookies = None  # Signal to extract cookies per-image
 
-    # Download each image with progress bar
-    for dctImageInfo in tqdm(lstAllImages, desc="Downloading images", unit="image"):
-        strUrl = dctImageInfo["url"]
-        strLocalFilename = dctImageInfo["local_filename"]
-        strOutputPath = str(pathOutputDir / strLocalFilename)
-        dctImageRef = dctImageInfo["image_ref"]
-
-        # Skip if file already exists (resume functionality)
-        pathOutputFile = Path(strOutputPath)
-        if pathOutputFile.exists():
-            dctStats["skipped"] += 1
-            continue
-
-        # Download image
-        boolSuccess = download_image(strUrl, strOutputPath, seleniumDriver=seleniumDriver, intRetries=3, dctCookies=dctCookies)
-
-        if boolSuccess:
-            dctStats["success"] += 1
-        else:
-            dctStats["failed"] += 1
-
-        # Increment processed counter
-        intProcessedCount += 1
-
-        # Display stats every 10 images and save index
-        if intProcessedCount % 10 == 0:
-            print(f"\n--- Progress Update ({intProcessedCount}/{dctStats['total']}) ---")
-            print(f"  Success: {dctStats['success']}")
-            print(f"  Skipped: {dctStats['skipped']}")
-            print(f"  Failed: {dctStats['failed']}")
-            print()
-
-            # Save index
-            with open(strIndexPath, 'w', encoding='utf-8') as f:
-                json.dump(dctIndex, f, indent=2, ensure_ascii=False)
-
-    # Save final index
-    with open(strIndexPath, 'w', encoding='utf-8') as f:
-        json.dump(dctIndex, f, indent=2, ensure_ascii=False)
-
-    # Close debug log
-    fileDebug.write(f"\n=== Download Complete ===\n")
-    fileDebug.write(f"Total: {dctStats['total']}\n")
-    fileDebug.write(f"Success: {dctStats['success']}\n")
-    fileDebug.write(f"Skipped: {dctStats['skipped']}\n")
-    fileDebug.write(f"Failed: {dctStats['failed']}\n")
-    fileDebug.close()
-
-    # Close driver if we created it
-    if boolCloseDriver:
-        try:
-            seleniumDriver.quit()
-        except:
-            pass
+    journal = DownloadJournal(strJournalPath)
+    try:
+        # Download each image with progress bar
+        for dctImageInfo in tqdm(lstAllImages, desc="Downloading images", unit="image"):
+            strMessageId = dctImageInfo["message_id"]
+            strUrl = dctImageInfo["url"]
+            strLocalFilename = dctImageInfo["local_filename"]
+            strOutputPath = str(pathOutputDir / strLocalFilename)
+            pathOutputFile = Path(strOutputPath)
+
+            # Skip if journal confirms download and file is intact (resume functionality)
+            if is_download_complete(dctJournal.get(strLocalFilename), pathOutputFile):
+                dctStats["skipped"] += 1
+                continue
+
+            # Adopt files downloaded before the journal existed
+            if strLocalFilename not in dctJournal and pathOutputFile.exists():
+                journal.record(strMessageId, strLocalFilename, "success",
+                               intSizeBytes=pathOutputFile.stat().st_size,
+                               strSha256=hash_file(strOutputPath))
+                dctStats["skipped"] += 1
+                continue
+
+            # Download image
+            lstErrors = []
+            boolSuccess = download_image(strUrl, strOutputPath, seleniumDriver=seleniumDriver, intRetries=3, dctCookies=dctCookies, lstErrors=lstErrors)
+
+            if boolSuccess:
+                journal.record(strMessageId, strLocalFilename, "success",
+                               intSizeBytes=pathOutputFile.stat().st_size,
+                               strSha256=hash_file(strOutputPath))
+                dctStats["success"] += 1
+            else:
+                journal.record(strMessageId, strLocalFilename, "failed",
+                               strError=lstErrors[-1] if lstErrors else "download failed")
+                dctStats["failed"] += 1
+
+            # Increment processed counter
+            intProcessedCount += 1
+
+            # Display stats every 10 images
+            if intProcessedCount % 10 == 0:
+                print(f"\n--- Progress Update ({intProcessedCount}/{dctStats['total']}) ---")
+                print(f"  Success: {dctStats['success']}")
+                print(f"  Skipped: {dctStats['skipped']}")
+                print(f"  Failed: {dctStats['failed']}")
+                print()
+    finally:
+        journal.close()
+
+        # Fold journal into index once (also runs after Ctrl-C or a crash mid-batch)
+        save_folded_index(dctIndex, strIndexPath, load_journal(strJournalPath))
+
+        # Close driver if we created it
+        if boolCloseDriver:
+            try:
+                seleniumDriver.quit()
+            except:
+                pass
 
     return dctStats
+
+
+def fold_journal(strIndexPath: str, strJournalPath: Optional[str] = None) -> int:
+    """
+    Fold download journal into image index on demand (no downloads).
+
+    Args:
+        strIndexPath: Path to image_index.json file (or .sqlite/.db IndexStore)
+        strJournalPath: Optional journal path (default: {index stem}_downloads.jsonl)
+
+    Returns:
+        Number of image entries updated
+    """
+    if strJournalPath is None:
+        strJournalPath = get_journal_path(strIndexPath)
+
+    dctIndex = load_index_images(strIndexPath)
+
+    return save_folded_index(dctIndex, strIndexPath, load_journal(strJournalPath))
+
+
+def save_folded_index(dctIndex: Dict, strIndexPath: str, dctJournal: Dict[str, Dict]) -> int:
+    """
+    Fold journal outcomes into the index and save it.
+
+    An IndexStore only gets the images of messages with journaled files
+    rewritten; a JSON index is saved whole.
+
+    Args:
+        dctIndex: Index from load_index_images()
+        strIndexPath: Path the index was loaded from
+        dctJournal: Output of load_journal()
+
+    Returns:
+        Number of image entries updated
+    """
+    intUpdated = fold_journal_into_index(dctIndex, dctJournal)
+
+    if is_index_store(strIndexPath):
+        lstChangedIds = [strMessageId for strMessageId, dctMessage in dctIndex.items()
+                         if any(dctImage.get("local_filename", "") in dctJournal
+                                for dctImage in dctMessage.get("images", []))]
+        save_images(dctIndex, strIndexPath, lstChangedIds)
+    else:
+        save_index_file(dctIndex, strIndexPath, ensure_ascii=False)
+
+    return intUpdated
@@ -4,14 +4,14 @@
 import argparse
 import sys
 from pathlib import Path
-from download_images import download_batch
+from download_images import download_batch, fold_journal
 
 
 def main():
     """CLI entry point for batch image downloads."""
     parser = argparse.ArgumentParser(
         description="Download images from Google Groups using image index",
-        usage="%(prog)s [-h] [--limit N] SOURCE DEST"
+        usage="%(prog)s [-h] [--limit N] [--fold-journal] SOURCE [DEST]"
     )
     parser.add_argument(
         "source",
@@ -21,6 +21,7 @@ def main():
     parser.add_argument(
         "dest",
         metavar="DEST",
+        nargs="?",
         help="Directory to save downloaded images"
     )
     parser.add_argument(
@@ -29,6 +30,11 @@ def main():
         default=None,
         help="Optional limit on number of images to download (for testing)"
     )
+    parser.add_argument(
+        "--fold-journal",
+        action="store_true",
+        help="Only fold the download journal into the index (no downloads)"
+    )
 
     args = parser.parse_args()
 
@@ -38,6 +44,15 @@ def main():
         print(f"Error: Index file not found: {args.source}", file=sys.stderr)
         sys.exit(1)
 
+    # Fold journal on demand and exit
+    if args.fold_journal:
+        intUpdated = fold_journal(args.source)
+        print(f"Folded download journal into {args.source} ({intUpdated} images updated)")
+        return
+
+    if args.dest is None:
+        parser.error("DEST is required unless --fold-journal is given")
+
     # Display configuration
     print("Image Batch Download")
     print("=" * 50)
@@ -68,7 +83,7 @@ def main():
         print("Download Complete")
         print(f"  Total images: {dctStats['total']}")
         print(f"  Successful: {dctStats['success']}")
-        print(f"  Skipped (already exist): {dctStats['skipped']}")
+        print(f"  Skipped (already downloaded): {dctStats['skipped']}")
         print(f"  Failed: {dctStats['failed']}")
         print()
 
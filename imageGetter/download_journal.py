@@ -0,0 +1,168 @@
+# ABOUTME: Append-only JSONL journal recording the outcome of every image download
+# ABOUTME: Replayed on resume and folded into the image index once instead of rewriting it per batch
+
+import json
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def get_journal_path(strIndexPath: str) -> str:
+    """
+    Get the journal path that belongs to an image index.
+
+    Args:
+        strIndexPath: Path to image_index.json file
+
+    Returns:
+        Path to sidecar journal, e.g. image_index.json -> image_index_downloads.jsonl
+    """
+    pathIndex = Path(strIndexPath)
+    return str(pathIndex.parent / f"{pathIndex.stem}_downloads.jsonl")
+
+
+def hash_file(strPath: str) -> str:
+    """
+    Compute SHA-256 of a file in fixed-size chunks.
+
+    Args:
+        strPath: Path to file
+
+    Returns:
+        Hex digest string
+    """
+    hasher = hashlib.sha256()
+    with open(strPath, 'rb') as f:
+        for bytesChunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(bytesChunk)
+    return hasher.hexdigest()
+
+
+class DownloadJournal:
+    """Append-only record of download outcomes, one JSON object per line."""
+
+    def __init__(self, strJournalPath: str):
+        """
+        Open journal for appending (created if missing).
+
+        Args:
+            strJournalPath: Path to JSONL journal file
+        """
+        self.strJournalPath = strJournalPath
+        Path(strJournalPath).parent.mkdir(parents=True, exist_ok=True)
+        self.fileJournal = open(strJournalPath, 'a', encoding='utf-8')
+
+    def record(self, strMessageId: str, strLocalFilename: str, strStatus: str,
+               intSizeBytes: Optional[int] = None, strSha256: Optional[str] = None,
+               strError: Optional[str] = None):
+        """
+        Append one download outcome and flush it to disk immediately.
+
+        Args:
+            strMessageId: Message the image belongs to
+            strLocalFilename: Local filename of the image (journal key)
+            strStatus: "success" or "failed"
+            intSizeBytes: Size of downloaded file (success only)
+            strSha256: SHA-256 of downloaded file (success only)
+            strError: Error description (failure only)
+        """
+        dctEntry = {
+            "message_id": strMessageId,
+            "local_filename": strLocalFilename,
+            "status": strStatus,
+            "size_bytes": intSizeBytes,
+            "sha256": strSha256,
+            "error": strError,
+            "timestamp": datetime.now().isoformat(timespec='seconds')
+        }
+        self.fileJournal.write(json.dumps(dctEntry, ensure_ascii=False) + "\n")
+        self.fileJournal.flush()
+
+    def close(self):
+        """Close the journal file."""
+        self.fileJournal.close()
+
+
+def load_journal(strJournalPath: str) -> Dict[str, Dict]:
+    """
+    Replay journal into latest outcome per local filename.
+
+    Later entries override earlier ones. A truncated final line (crash during
+    write) is ignored.
+
+    Args:
+        strJournalPath: Path to JSONL journal file
+
+    Returns:
+        Dict mapping local_filename -> latest journal entry (empty if no journal)
+    """
+    dctLatest = {}
+    pathJournal = Path(strJournalPath)
+    if not pathJournal.exists():
+        return dctLatest
+
+    with open(pathJournal, 'r', encoding='utf-8') as f:
+        for strLine in f:
+            strLine = strLine.strip()
+            if not strLine:
+                continue
+            try:
+                dctEntry = json.loads(strLine)
+            except json.JSONDecodeError:
+                continue
+            dctLatest[dctEntry["local_filename"]] = dctEntry
+
+    return dctLatest
+
+
+def is_download_complete(dctEntry: Optional[Dict], pathImage: Path) -> bool:
+    """
+    Check whether a journaled download is still valid on disk.
+
+    Args:
+        dctEntry: Latest journal entry for the image (or None)
+        pathImage: Expected location of the downloaded file
+
+    Returns:
+        True if journal records success and the file exists with the recorded size
+    """
+    if dctEntry is None or dctEntry.get("status") != "success":
+        return False
+    try:
+        return pathImage.stat().st_size == dctEntry.get("size_bytes")
+    except OSError:
+        return False
+
+
+def fold_journal_into_index(dctIndex: Dict, dctJournal: Dict[str, Dict]) -> int:
+    """
+    Apply journaled outcomes to image entries in the index (in-place).
+
+    Successful downloads get size_bytes and sha256; failures get download_error.
+    Every journaled image gets download_status.
+
+    Args:
+        dctIndex: Image index dictionary
+        dctJournal: Output of load_journal()
+
+    Returns:
+        Number of image entries updated
+    """
+    intUpdated = 0
+    for dctMessage in dctIndex.values():
+        for dctImage in dctMessage.get("images", []):
+            dctEntry = dctJournal.get(dctImage.get("local_filename", ""))
+            if dctEntry is None:
+                continue
+
+            dctImage["download_status"] = dctEntry["status"]
+            if dctEntry["status"] == "success":
+                dctImage["size_bytes"] = dctEntry["size_bytes"]
+                dctImage["sha256"] = dctEntry["sha256"]
+                dctImage.pop("download_error", None)
+            else:
+                dctImage["download_error"] = dctEntry["error"]
+            intUpdated += 1
+
+    return intUpdated
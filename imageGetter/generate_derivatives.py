@@ -0,0 +1,191 @@
+# ABOUTME: Generate multi-size, multi-format (JPEG/WebP/AVIF) image derivatives from one decode
+# ABOUTME: Small sizes are center-cropped squares, large sizes keep aspect ratio; results recorded in index
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from PIL import Image, features
+
+DEFAULT_SIZES = [200, 400, 1024]
+DEFAULT_FORMATS = ["jpeg", "webp"]
+
+# Sizes up to this are square center crops (grid thumbnails); larger sizes fit within size x size
+CROP_MAX_SIZE = 400
+
+# Encoder settings per format: (file extension, Pillow format name, save options)
+FORMAT_SETTINGS = {
+    "jpeg": ("jpg", "JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("webp", "WEBP", {"quality": 80, "method": 4}),
+    "avif": ("avif", "AVIF", {"quality": 60}),
+}
+
+
+def check_formats(lstFormats: List[str]) -> List[str]:
+    """
+    Validate requested output formats against what this Pillow build can encode.
+
+    Args:
+        lstFormats: Format names (jpeg, webp, avif)
+
+    Returns:
+        List of format names that are unknown or unsupported (empty if all OK)
+    """
+    lstBad = []
+    for strFormat in lstFormats:
+        if strFormat not in FORMAT_SETTINGS:
+            lstBad.append(strFormat)
+        elif strFormat in ("webp", "avif") and not features.check(strFormat):
+            lstBad.append(strFormat)
+    return lstBad
+
+
+def get_derivative_filename(strLocalFilename: str, intSize: int, strFormat: str) -> str:
+    """
+    Build derivative filename, e.g. MSG_part0_1_x.jpg -> MSG_part0_1_x_400.webp
+
+    Args:
+        strLocalFilename: Source image local filename
+        intSize: Derivative size in pixels
+        strFormat: Output format name
+
+    Returns:
+        Derivative filename (no directory)
+    """
+    return f"{Path(strLocalFilename).stem}_{intSize}.{FORMAT_SETTINGS[strFormat][0]}"
+
+
+def _center_square_box(intWidth: int, intHeight: int) -> Tuple[int, int, int, int]:
+    """Crop box for the largest centered square."""
+    intSide = min(intWidth, intHeight)
+    intLeft = (intWidth - intSide) // 2
+    intTop = (intHeight - intSide) // 2
+    return (intLeft, intTop, intLeft + intSide, intTop + intSide)
+
+
+def generate_derivatives(strInputPath: str, strOutputDir: str,
+                         lstSizes: List[int] = None, lstFormats: List[str] = None,
+                         bForce: bool = False) -> Optional[List[Dict]]:
+    """
+    Generate all derivative sizes and formats of one image from a single decode.
+
+    The source is decoded once (JPEG draft mode sized for the largest derivative),
+    then every size is resized from that decoded image and encoded in every
+    format. Derivatives newer than the source are kept unless bForce is set.
+
+    Args:
+        strInputPath: Path to source image
+        strOutputDir: Directory to write derivatives
+        lstSizes: Sizes in pixels (default DEFAULT_SIZES)
+        lstFormats: Format names (default DEFAULT_FORMATS)
+        bForce: Regenerate even if derivatives are up to date
+
+    Returns:
+        List of dicts {size, format, path, width, height, bytes} (path is the
+        filename inside strOutputDir), or None on failure
+    """
+    lstSizes = sorted(lstSizes or DEFAULT_SIZES, reverse=True)
+    lstFormats = lstFormats or DEFAULT_FORMATS
+    strLocalFilename = Path(strInputPath).name
+    pathOutputDir = Path(strOutputDir)
+
+    lstPlanned = [(intSize, strFormat, pathOutputDir / get_derivative_filename(strLocalFilename, intSize, strFormat))
+                  for intSize in lstSizes for strFormat in lstFormats]
+
+    try:
+        fSourceMtime = os.stat(strInputPath).st_mtime
+
+        # Everything up to date: describe existing files without decoding
+        if not bForce and all(p.exists() and p.stat().st_mtime >= fSourceMtime for _, _, p in lstPlanned):
+            lstResults = []
+            for intSize, strFormat, pathOut in lstPlanned:
+                with Image.open(pathOut) as imgOut:
+                    intWidth, intHeight = imgOut.size
+                lstResults.append({"size": intSize, "format": strFormat, "path": pathOut.name,
+                                   "width": intWidth, "height": intHeight,
+                                   "bytes": pathOut.stat().st_size})
+            return lstResults
+
+        pathOutputDir.mkdir(parents=True, exist_ok=True)
+
+        with Image.open(strInputPath) as img:
+            # One decode, at the smallest JPEG scale that still covers the largest derivative
+            img.draft('RGB', (lstSizes[0], lstSizes[0]))
+            imgSource = img.convert('RGB') if img.mode != 'RGB' else img.copy()
+
+        imgSquare = imgSource.crop(_center_square_box(*imgSource.size))
+
+        lstResults = []
+        for intSize, strFormat, pathOut in lstPlanned:
+            if intSize <= CROP_MAX_SIZE:
+                imgOut = imgSquare.resize((intSize, intSize), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            else:
+                # Fit within intSize x intSize, never upscale
+                imgOut = imgSource.copy()
+                imgOut.thumbnail((intSize, intSize), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+            _, strPilFormat, dctOptions = FORMAT_SETTINGS[strFormat]
+            imgOut.save(pathOut, strPilFormat, **dctOptions)
+            lstResults.append({"size": intSize, "format": strFormat, "path": pathOut.name,
+                               "width": imgOut.width, "height": imgOut.height,
+                               "bytes": pathOut.stat().st_size})
+
+        return lstResults
+
+    except Exception as e:
+        print(f"Error generating derivatives for {strInputPath}: {e}")
+        return None
+
+
+def _derivatives_job(tupleJob: Tuple) -> Tuple[str, Optional[List[Dict]]]:
+    """Process pool entry point: unpack job and generate one image's derivatives."""
+    strInputPath, strOutputDir, lstSizes, lstFormats, bForce = tupleJob
+    return strInputPath, generate_derivatives(strInputPath, strOutputDir, lstSizes, lstFormats, bForce)
+
+
+def generate_derivatives_parallel(lstInputPaths: List[str], strOutputDir: str,
+                                  lstSizes: List[int] = None, lstFormats: List[str] = None,
+                                  bForce: bool = False,
+                                  intWorkers: Optional[int] = None) -> Iterator[Tuple[str, Optional[List[Dict]]]]:
+    """
+    Generate derivatives for many images on a process pool.
+
+    Args:
+        lstInputPaths: Source image paths
+        strOutputDir: Directory to write derivatives
+        lstSizes: Sizes in pixels (default DEFAULT_SIZES)
+        lstFormats: Format names (default DEFAULT_FORMATS)
+        bForce: Regenerate even if derivatives are up to date
+        intWorkers: Number of worker processes (default: CPU count, 1 = in-process)
+
+    Yields:
+        (input_path, derivatives or None) for each source, in input order
+    """
+    lstArgs = [(strPath, strOutputDir, lstSizes, lstFormats, bForce) for strPath in lstInputPaths]
+
+    if intWorkers == 1 or len(lstArgs) < 2:
+        for tupleJob in lstArgs:
+            yield _derivatives_job(tupleJob)
+        return
+
+    with ProcessPoolExecutor(max_workers=intWorkers) as executor:
+        yield from executor.map(_derivatives_job, lstArgs, chunksize=4)
+
+
+def pick_derivative(dctImage: Dict, intSize: int, strFormat: str) -> Optional[Dict]:
+    """
+    Find a recorded derivative of an index image entry.
+
+    Args:
+        dctImage: Image entry from the index
+        intSize: Wanted size
+        strFormat: Wanted format
+
+    Returns:
+        Derivative dict or None if not recorded
+    """
+    for dctDerivative in dctImage.get("derivatives", []):
+        if dctDerivative["size"] == intSize and dctDerivative["format"] == strFormat:
+            return dctDerivative
+    return None
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# ABOUTME: CLI tool to generate multi-size JPEG/WebP/AVIF derivatives for all images in the index
+# ABOUTME: Records derivative paths, dimensions and byte sizes on each image entry in the index
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from tqdm import tqdm
+from index_store import load_index_file, load_index_images, save_images, save_index_file, updates_in_place
+from generate_derivatives import (
+    generate_derivatives_parallel,
+    check_formats,
+    DEFAULT_SIZES,
+    DEFAULT_FORMATS
+)
+
+
+def main():
+    """Generate derivatives for every image in the index and record them"""
+    parser = argparse.ArgumentParser(
+        description='Generate multi-size, multi-format image derivatives and record them in the index',
+        usage='%(prog)s [-h] [--images-dir DIR] [--output-dir DIR] [--sizes N,N] [--formats F,F] [--workers N] [--limit N] [--force] SOURCE [DEST]'
+    )
+    parser.add_argument('source', metavar='SOURCE',
+                        help='Path to input image index file')
+    parser.add_argument('dest', metavar='DEST', nargs='?',
+                        help='Path to output index file (default: overwrite SOURCE)')
+    parser.add_argument('--images-dir', default='../data/images/full',
+                        help='Directory containing full-resolution images (default: ../data/images/full)')
+    parser.add_argument('--output-dir', default='../data/images/derived',
+                        help='Directory to save derivatives (default: ../data/images/derived)')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help=f"Comma-separated sizes in pixels (default: {','.join(str(s) for s in DEFAULT_SIZES)})")
+    parser.add_argument('--formats', default=','.join(DEFAULT_FORMATS),
+                        help=f"Comma-separated formats: jpeg, webp, avif (default: {','.join(DEFAULT_FORMATS)})")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: CPU count, 1 = no pool)')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='Limit number of images to process (for testing)')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenerate derivatives even if newer than source')
+
+    args = parser.parse_args()
+    dest = args.dest or args.source
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    formats = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
+    unsupported = check_formats(formats)
+    if unsupported:
+        print(f"Error: Unsupported format(s) in this Pillow build: {', '.join(unsupported)}")
+        return 1
+
+    if not Path(args.source).exists():
+        print(f"Error: Input file not found: {args.source}")
+        return 1
+
+    images_dir = Path(args.images_dir)
+    if not images_dir.is_dir():
+        print(f"Error: Images directory not found: {images_dir}")
+        return 1
+
+    print(f"Loading index from {args.source}...")
+    # Updating an index database in place needs only its images; anything else is copied whole
+    in_place = updates_in_place(args.source, dest)
+    index_data = load_index_images(args.source) if in_place else load_index_file(args.source)
+
+    # Map source path -> (message id, image entry) (the same file may appear more than once)
+    entries_by_path = {}
+    for msg_id, message in index_data.items():
+        for image in message.get("images", []):
+            local_filename = image.get("local_filename")
+            if local_filename:
+                entries_by_path.setdefault(str(images_dir / local_filename), []).append((msg_id, image))
+
+    paths = list(entries_by_path)
+    if args.limit:
+        paths = paths[:args.limit]
+
+    print(f"Images: {len(paths)}")
+    print(f"Sizes: {sizes}  Formats: {formats}")
+    print(f"Output: {Path(args.output_dir).absolute()}")
+    print()
+
+    success_count = 0
+    failed_count = 0
+    total_bytes = {fmt: 0 for fmt in formats}
+    changed_ids = set()
+    start_time = time.perf_counter()
+
+    results = generate_derivatives_parallel(paths, args.output_dir, sizes, formats,
+                                            bForce=args.force, intWorkers=args.workers)
+    for path, derivatives in tqdm(results, total=len(paths), desc="Generating derivatives", unit="img"):
+        if derivatives is None:
+            failed_count += 1
+            continue
+        success_count += 1
+        for msg_id, image in entries_by_path[path]:
+            image["derivatives"] = derivatives
+            changed_ids.add(msg_id)
+        for derivative in derivatives:
+            total_bytes[derivative["format"]] += derivative["bytes"]
+
+    elapsed = time.perf_counter() - start_time
+
+    print(f"Saving index to {dest}...")
+    if in_place:
+        save_images(index_data, dest, [msg_id for msg_id in index_data if msg_id in changed_ids])
+    else:
+        save_index_file(index_data, dest)
+
+    print()
+    print("=" * 50)
+    print("Summary:")
+    print(f"  Images:        {len(paths)}")
+    print(f"  Successful:    {success_count}")
+    if failed_count > 0:
+        print(f"  Failed:        {failed_count}")
+    for fmt, byte_count in total_bytes.items():
+        print(f"  {fmt.upper():<6} total:  {byte_count / 1024 / 1024:.1f} MB")
+    if paths:
+        print(f"  Elapsed:       {elapsed:.1f}s ({len(paths) / max(elapsed, 1e-9):.1f} images/s)")
+    print("=" * 50)
+
+    return 0 if failed_count == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
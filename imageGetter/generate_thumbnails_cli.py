@@ -4,8 +4,9 @@
 
 import argparse
 import sys
+import time
 from pathlib import Path
-from generate_thumbnails import generate_thumbnail
+from generate_thumbnails import generate_thumbnails_parallel, is_thumbnail_current
 from tqdm import tqdm
 
 
@@ -39,7 +40,13 @@ def main():
     parser.add_argument(
         '--force',
         action='store_true',
-        help='Force regeneration of existing thumbnails (default: skip existing)'
+        help='Force regeneration of existing thumbnails (default: skip thumbnails newer than source)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes (default: CPU count, 1 = no pool)'
     )
 
     args = parser.parse_args()
@@ -83,29 +90,30 @@ def main():
     print(f"Output: {output_dir.absolute()}")
     print()
 
-    # Process images
-    success_count = 0
+    # Select images whose thumbnail is missing or older than the source
+    jobs = []
     skipped_count = 0
-    failed_count = 0
-
-    for img_path in tqdm(image_files, desc="Generating thumbnails", unit="img"):
-        # Generate thumbnail filename
-        thumb_name = img_path.stem + "_thumb.jpg"
-        thumb_path = output_dir / thumb_name
-
-        # Skip if thumbnail exists (unless --force flag set)
-        if not args.force and thumb_path.exists():
+    for img_path in image_files:
+        thumb_path = output_dir / (img_path.stem + "_thumb.jpg")
+        if not args.force and is_thumbnail_current(str(img_path), str(thumb_path)):
             skipped_count += 1
             continue
+        jobs.append((str(img_path), str(thumb_path)))
 
-        # Generate thumbnail
-        result = generate_thumbnail(str(img_path), str(thumb_path), intSize=args.size)
+    # Process images
+    success_count = 0
+    failed_count = 0
+    start_time = time.perf_counter()
 
+    results = generate_thumbnails_parallel(jobs, intSize=args.size, intWorkers=args.workers)
+    for _, result in tqdm(results, total=len(jobs), desc="Generating thumbnails", unit="img"):
         if result:
             success_count += 1
         else:
             failed_count += 1
 
+    elapsed = time.perf_counter() - start_time
+
     # Print summary
     print()
     print("=" * 50)
@@ -116,6 +124,8 @@ def main():
         print(f"  Skipped:       {skipped_count}")
     if failed_count > 0:
         print(f"  Failed:        {failed_count}")
+    if jobs:
+        print(f"  Elapsed:       {elapsed:.1f}s ({len(jobs) / max(elapsed, 1e-9):.1f} images/s)")
     print("=" * 50)
 
     return 0 if failed_count == 0 else 1
@@ -0,0 +1,414 @@
+# ABOUTME: Inverted image index for keyword, chapter, author and date queries with boolean combinations
+# ABOUTME: Postings are built once from the image index and cached beside it, so queries never scan all messages
+
+import json
+import os
+import re
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from generate_derivatives import pick_derivative
+from index_store import is_index_store, load_index_file
+from search_tagger import WORD_PATTERN, stem_word
+
+DEFAULT_THUMB_DIR = "../data/images/thumbs"
+DEFAULT_PAGE_SIZE = 50
+
+# Bump when the cached postings layout changes
+CACHE_VERSION = 1
+
+# Message dates as written by extract_image_urls.py ("Feb 11, 2011"), plus ISO dates
+DATE_FORMATS = ("%b %d, %Y", "%B %d, %Y", "%Y-%m-%d")
+
+TOKEN_PATTERN = re.compile(r'\(|\)|[A-Za-z]+:"[^"]*"|"[^"]*"|[^\s()]+')
+OPERATORS = ("AND", "OR", "NOT")
+
+
+def parse_message_date(text: str) -> Optional[date]:
+    """Parse a message date from the index metadata (None if missing or unparseable)."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), fmt).date()
+        except (ValueError, AttributeError):
+            continue
+    return None
+
+
+def parse_date_bound(text: str, end: bool) -> date:
+    """Parse YYYY, YYYY-MM or YYYY-MM-DD as the first (or, with end=True, last) day it covers.
+
+    Raises:
+        ValueError: If text is not one of those forms
+    """
+    parts = text.split("-")
+    if not 1 <= len(parts) <= 3 or not all(p.isdigit() for p in parts):
+        raise ValueError(f"Invalid date '{text}' (use YYYY, YYYY-MM or YYYY-MM-DD)")
+    year = int(parts[0])
+    if len(parts) == 3:
+        return date(year, int(parts[1]), int(parts[2]))
+    if len(parts) == 2:
+        month = int(parts[1])
+        if not end:
+            return date(year, month, 1)
+        next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        return next_month - timedelta(days=1)
+    return date(year, 12, 31) if end else date(year, 1, 1)
+
+
+def _root(word: str) -> str:
+    """Stem a word until it stops changing.
+
+    stem_word strips one suffix per call ("cowlings" -> "cowling" -> "cowl"),
+    so a single pass would give a plural and its singular different keys.
+    """
+    stem = stem_word(word)
+    while stem != word:
+        word, stem = stem, stem_word(stem)
+    return stem
+
+
+def keyword_key(keyword: str) -> str:
+    """Posting key for a keyword: lowercase word roots, so plurals find singulars."""
+    return " ".join(_root(word) for word in WORD_PATTERN.findall(keyword.lower()))
+
+
+def thumbnail_path(image: Dict, thumb_dir: str = DEFAULT_THUMB_DIR, derived_dir: str = None,
+                   size: int = 200) -> str:
+    """Thumbnail for an image entry: a recorded JPEG derivative if available, else {stem}_thumb.jpg."""
+    if derived_dir:
+        derivative = pick_derivative(image, size, "jpeg")
+        if derivative:
+            return f"{derived_dir}/{derivative['path']}"
+    return f"{thumb_dir}/{Path(image['local_filename']).stem}_thumb.jpg"
+
+
+def parse_query(text: str):
+    """Parse a query into a tree of ("and"|"or", [children]), ("not", child) and (field, value) nodes.
+
+    Terms are keywords (quote multi-word ones), chapter:N, author:NAME,
+    after:DATE and before:DATE. Terms next to each other are ANDed; AND, OR,
+    NOT (upper case) and parentheses combine them.
+
+    Raises:
+        ValueError: On malformed queries
+    """
+    tokens = TOKEN_PATTERN.findall(text)
+    if not tokens:
+        raise ValueError("Empty query")
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def parse_or():
+        nonlocal pos
+        children = [parse_and()]
+        while peek() == "OR":
+            pos += 1
+            children.append(parse_and())
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def parse_and():
+        nonlocal pos
+        children = [parse_not()]
+        while peek() is not None and peek() not in ("OR", ")"):
+            if peek() == "AND":
+                pos += 1
+            children.append(parse_not())
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def parse_not():
+        nonlocal pos
+        if peek() == "NOT":
+            pos += 1
+            return ("not", parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        nonlocal pos
+        token = peek()
+        if token is None:
+            raise ValueError("Query ends unexpectedly")
+        pos += 1
+        if token == "(":
+            node = parse_or()
+            if peek() != ")":
+                raise ValueError("Missing closing parenthesis")
+            pos += 1
+            return node
+        if token == ")" or token in OPERATORS:
+            raise ValueError(f"Unexpected '{token}'")
+
+        field, sep, value = token.partition(":")
+        if not sep or field.lower() not in ("chapter", "author", "after", "before"):
+            field, value = "keyword", token
+        field = field.lower()
+        value = value.strip('"')
+        if field == "chapter":
+            if not value.isdigit():
+                raise ValueError(f"Invalid chapter '{value}'")
+            return (field, int(value))
+        if field in ("after", "before"):
+            return (field, parse_date_bound(value, end=(field == "before")))
+        return (field, value)
+
+    tree = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f"Unexpected '{tokens[pos]}'")
+    return tree
+
+
+class ImageQueryIndex:
+    """Inverted postings from keywords, chapters, authors and dates to images.
+
+    Every downloaded image gets an integer id in index order. Keywords
+    (message keywords, llm_keywords and image keywords), chapters and
+    authors map to sorted lists of image ids; dates are kept as one sorted
+    list so a date range is two bisects. Queries combine postings as sets
+    and only touch the images on the requested page.
+    """
+
+    def __init__(self):
+        self.images: List[Dict] = []
+        self.messages: Dict[str, Dict] = {}
+        self.keywords: Dict[str, List[int]] = {}
+        self.chapters: Dict[int, List[int]] = {}
+        self.authors: Dict[str, List[int]] = {}
+        self.date_ordinals: List[int] = []
+        self.date_ids: List[int] = []
+
+    @classmethod
+    def build(cls, index_data: Dict) -> "ImageQueryIndex":
+        """Build postings from an image index dictionary (one pass over all messages)."""
+        query_index = cls()
+        dated = []
+
+        for msg_id, message in index_data.items():
+            images = [image for image in message.get("images", []) if image.get("local_filename")]
+            if not images:
+                continue
+            metadata = message.get("metadata", {})
+            query_index.messages[msg_id] = {
+                "subject": metadata.get("subject", ""),
+                "author": metadata.get("author", ""),
+                "date": metadata.get("date", "")
+            }
+
+            message_keys = {keyword_key(kw) for field in ("keywords", "llm_keywords")
+                            for kw in message.get(field) or []}
+            author = metadata.get("author", "").strip().lower()
+            message_date = parse_message_date(metadata.get("date", ""))
+
+            for image in images:
+                image_id = len(query_index.images)
+                entry = {"msg_id": msg_id, "local_filename": image["local_filename"]}
+                if image.get("derivatives"):
+                    entry["derivatives"] = image["derivatives"]
+                query_index.images.append(entry)
+
+                keys = message_keys | {keyword_key(kw) for kw in image.get("keywords") or []}
+                for key in keys:
+                    if key:
+                        query_index.keywords.setdefault(key, []).append(image_id)
+                for chapter in message.get("chapters") or []:
+                    query_index.chapters.setdefault(int(chapter), []).append(image_id)
+                if author:
+                    query_index.authors.setdefault(author, []).append(image_id)
+                if message_date:
+                    dated.append((message_date.toordinal(), image_id))
+
+        dated.sort()
+        query_index.date_ordinals = [ordinal for ordinal, _ in dated]
+        query_index.date_ids = [image_id for _, image_id in dated]
+        return query_index
+
+    # ---- persistence -------------------------------------------------------
+
+    def save(self, cache_file: str, source: Dict = None):
+        """Write postings to a JSON cache file.
+
+        Args:
+            cache_file: Output path
+            source: Fingerprint of the index the postings were built from
+        """
+        data = {
+            "version": CACHE_VERSION,
+            "source": source,
+            "images": self.images,
+            "messages": self.messages,
+            "keywords": self.keywords,
+            "chapters": {str(chapter): ids for chapter, ids in self.chapters.items()},
+            "authors": self.authors,
+            "date_ordinals": self.date_ordinals,
+            "date_ids": self.date_ids
+        }
+        Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, cache_file: str, source: Dict = None) -> Optional["ImageQueryIndex"]:
+        """Read postings from a JSON cache file.
+
+        Returns:
+            ImageQueryIndex, or None if the cache is missing, unreadable,
+            from another version or (if source is given) built from a different index
+        """
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != CACHE_VERSION or (source is not None and data.get("source") != source):
+            return None
+
+        query_index = cls()
+        query_index.images = data["images"]
+        query_index.messages = data["messages"]
+        query_index.keywords = data["keywords"]
+        query_index.chapters = {int(chapter): ids for chapter, ids in data["chapters"].items()}
+        query_index.authors = data["authors"]
+        query_index.date_ordinals = data["date_ordinals"]
+        query_index.date_ids = data["date_ids"]
+        return query_index
+
+    # ---- queries -----------------------------------------------------------
+
+    def keyword_ids(self, keyword: str) -> Set[int]:
+        return set(self.keywords.get(keyword_key(keyword), []))
+
+    def chapter_ids(self, chapter: int) -> Set[int]:
+        return set(self.chapters.get(chapter, []))
+
+    def author_ids(self, author: str) -> Set[int]:
+        """Images by authors whose name contains the given text (case-insensitive)."""
+        needle = author.strip().lower()
+        ids = set()
+        for name, postings in self.authors.items():
+            if needle in name:
+                ids.update(postings)
+        return ids
+
+    def date_range_ids(self, start: date = None, end: date = None) -> Set[int]:
+        """Images from messages dated within [start, end] (either bound optional)."""
+        low = bisect_left(self.date_ordinals, start.toordinal()) if start else 0
+        high = bisect_right(self.date_ordinals, end.toordinal()) if end else len(self.date_ordinals)
+        return set(self.date_ids[low:high])
+
+    def evaluate(self, node) -> Set[int]:
+        """Image ids matching a parse_query() tree."""
+        kind, value = node
+        if kind == "and":
+            # Smallest posting first keeps the intersections cheap; NOT terms
+            # are subtracted afterwards instead of complemented against all images
+            positive = [child for child in value if child[0] != "not"]
+            if not positive:
+                return self.evaluate(("not", ("or", [child[1] for child in value])))
+            result = set.intersection(*sorted((self.evaluate(child) for child in positive), key=len))
+            for child in value:
+                if child[0] == "not" and result:
+                    result -= self.evaluate(child[1])
+            return result
+        if kind == "or":
+            return set().union(*(self.evaluate(child) for child in value))
+        if kind == "not":
+            return set(range(len(self.images))) - self.evaluate(value)
+        if kind == "keyword":
+            return self.keyword_ids(value)
+        if kind == "chapter":
+            return self.chapter_ids(value)
+        if kind == "author":
+            return self.author_ids(value)
+        if kind == "after":
+            return self.date_range_ids(start=value)
+        if kind == "before":
+            return self.date_range_ids(end=value)
+        raise ValueError(f"Unknown query node '{kind}'")
+
+    def search(self, query: str, page: int = 1, page_size: int = DEFAULT_PAGE_SIZE,
+               thumb_dir: str = DEFAULT_THUMB_DIR, derived_dir: str = None) -> Dict:
+        """Run a query and return one page of matching images in index order.
+
+        Args:
+            query: Query text (see parse_query)
+            page: 1-based page number
+            page_size: Images per page
+            thumb_dir: Thumbnail directory used in returned paths
+            derived_dir: Derivatives directory (None = thumbnails only)
+
+        Returns:
+            Dictionary with total, page, page_size, pages and images; each image
+            has msg_id, local_filename, thumbnail, subject, author and date
+
+        Raises:
+            ValueError: On malformed queries
+        """
+        ids = sorted(self.evaluate(parse_query(query)))
+        start = (max(page, 1) - 1) * page_size
+
+        images = []
+        for image_id in ids[start:start + page_size]:
+            image = self.images[image_id]
+            result = {"msg_id": image["msg_id"],
+                      "local_filename": image["local_filename"],
+                      "thumbnail": thumbnail_path(image, thumb_dir, derived_dir)}
+            result.update(self.messages[image["msg_id"]])
+            images.append(result)
+
+        return {
+            "total": len(ids),
+            "page": max(page, 1),
+            "page_size": page_size,
+            "pages": (len(ids) + page_size - 1) // page_size,
+            "images": images
+        }
+
+
+def default_cache_file(index_file: str) -> str:
+    """Postings cache path next to the index: image_index.json -> image_index_query.json"""
+    path = Path(index_file)
+    return str(path.parent / f"{path.stem}_query.json")
+
+
+def index_fingerprint(index_file: str) -> Dict:
+    """Path, mtime and size identifying one version of an index.
+
+    An IndexStore runs in WAL mode: a process that keeps the store open
+    commits into the -wal file and leaves the main file untouched until a
+    checkpoint, so the -wal file's stat is part of the fingerprint.
+    """
+    stat = os.stat(index_file)
+    source = {"path": os.path.abspath(index_file), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    if is_index_store(index_file):
+        try:
+            wal = os.stat(index_file + "-wal")
+            source["wal"] = {"mtime_ns": wal.st_mtime_ns, "size": wal.st_size}
+        except FileNotFoundError:
+            source["wal"] = None
+    return source
+
+
+def open_query_index(index_file: str, cache_file: str = None, rebuild: bool = False) -> ImageQueryIndex:
+    """Load cached postings for an index, rebuilding them if the index changed.
+
+    Args:
+        index_file: Image index (JSON or .sqlite/.db)
+        cache_file: Postings cache (default: {index stem}_query.json beside the index)
+        rebuild: Ignore any existing cache
+
+    Returns:
+        ImageQueryIndex
+    """
+    cache_file = cache_file or default_cache_file(index_file)
+    source = index_fingerprint(index_file)
+
+    if not rebuild:
+        query_index = ImageQueryIndex.load(cache_file, source=source)
+        if query_index is not None:
+            return query_index
+
+    query_index = ImageQueryIndex.build(load_index_file(index_file))
+    query_index.save(cache_file, source=source)
+    return query_index
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# ABOUTME: CLI tool to query images by keyword, chapter, author and date with AND/OR/NOT and paging
+# ABOUTME: Uses cached inverted postings (rebuilt automatically when the index changes)
+
+import argparse
+import json
+import time
+from pathlib import Path
+from image_query import open_query_index, DEFAULT_PAGE_SIZE, DEFAULT_THUMB_DIR
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Query images by keyword, chapter, author and date',
+        usage='%(prog)s [-h] [--page N] [--page-size N] [--thumb_dir DIR] [--derived_dir DIR] [--cache FILE] [--rebuild] [--json] index_file QUERY',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Query terms:
+  firewall                 keyword (plural or singular)
+  "oil cooler"             multi-word keyword
+  chapter:4                Cozy IV chapter
+  author:davis             author name contains text
+  after:2011 before:2012-06  message date range (YYYY, YYYY-MM or YYYY-MM-DD, inclusive)
+
+Terms are combined with AND (default), OR, NOT and parentheses:
+  %(prog)s ../data/image_index.json 'firewall'
+  %(prog)s ../data/image_index.json '(firewall OR cowling) chapter:23 NOT fuel after:2010'
+        '''
+    )
+
+    parser.add_argument('index_file',
+                        help='Path to image index JSON file (or .sqlite/.db index)')
+    parser.add_argument('query', metavar='QUERY',
+                        help='Query text (see below)')
+    parser.add_argument('--page', type=int, default=1,
+                        help='Page number (default: 1)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f'Images per page (default: {DEFAULT_PAGE_SIZE})')
+    parser.add_argument('--thumb_dir', default=DEFAULT_THUMB_DIR,
+                        help=f'Thumbnail directory used in output paths (default: {DEFAULT_THUMB_DIR})')
+    parser.add_argument('--derived_dir', default=None,
+                        help='Derivatives directory; recorded 200px JPEG derivatives are preferred over thumbnails')
+    parser.add_argument('--cache', default=None,
+                        help='Postings cache file (default: {index}_query.json next to the index)')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Rebuild the postings cache even if it is current')
+    parser.add_argument('--json', action='store_true',
+                        help='Print results as JSON')
+
+    args = parser.parse_args()
+
+    if not Path(args.index_file).exists():
+        print(f"Error: Index file not found: {args.index_file}")
+        return 1
+
+    start_time = time.time()
+    query_index = open_query_index(args.index_file, cache_file=args.cache, rebuild=args.rebuild)
+    load_time = time.time() - start_time
+
+    start_time = time.time()
+    try:
+        results = query_index.search(args.query, page=args.page, page_size=args.page_size,
+                                     thumb_dir=args.thumb_dir, derived_dir=args.derived_dir)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    query_time = time.time() - start_time
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return 0
+
+    for image in results["images"]:
+        print(f"{image['thumbnail']}")
+        print(f"    {image['msg_id']}  {image['date']}  {image['author']}  \"{image['subject'][:60]}\"")
+
+    print()
+    print(f"{results['total']} images, page {results['page']} of {max(results['pages'], 1)} "
+          f"(index {load_time * 1000:.0f} ms, query {query_time * 1000:.1f} ms)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
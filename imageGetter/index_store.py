@@ -0,0 +1,503 @@
+# ABOUTME: SQLite storage backend for the image index with message, image and keyword tables
+# ABOUTME: Lazy per-message reads, per-record updates, transactions, and import/export of the JSON schema
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Index files with these suffixes are opened as an IndexStore, anything else is JSON
+STORE_SUFFIXES = (".sqlite", ".db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    msg_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    metadata TEXT NOT NULL,
+    extra TEXT NOT NULL,
+    key_order TEXT NOT NULL,
+    has_keywords INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_position ON messages (position);
+CREATE TABLE IF NOT EXISTS images (
+    msg_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    local_filename TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (msg_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_images_filename ON images (local_filename);
+CREATE TABLE IF NOT EXISTS message_keywords (
+    msg_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    keyword TEXT NOT NULL,
+    PRIMARY KEY (msg_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON message_keywords (keyword);
+"""
+
+
+def is_index_store(index_file: str) -> bool:
+    """True if the path names an IndexStore database rather than a JSON index."""
+    return Path(index_file).suffix.lower() in STORE_SUFFIXES
+
+
+def updates_in_place(index_file: str, output_file: str = None) -> bool:
+    """True if a tool can update records of an existing IndexStore instead of rewriting the index.
+
+    Args:
+        index_file: Index the tool reads
+        output_file: Index the tool writes (None = index_file)
+    """
+    return (is_index_store(index_file) and Path(index_file).exists()
+            and (output_file is None or output_file == index_file))
+
+
+class IndexStore:
+    """Image index kept in SQLite instead of one large JSON document.
+
+    Messages, their images and their keywords live in separate tables, so a
+    tool can read one message (or one field) without parsing the whole
+    index, and can update keywords or images of a single message without
+    rewriting everything. Message order and field order are preserved, so
+    export_json() reproduces the imported JSON index.
+    """
+
+    def __init__(self, db_path: str):
+        """Open (or create) an index database.
+
+        Args:
+            db_path: Path to SQLite file
+        """
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: transactions are controlled explicitly by transaction()
+        self._conn = sqlite3.connect(db_path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self):
+        """Group writes; everything inside commits together or rolls back on error.
+
+        Nested use joins the outer transaction.
+        """
+        if self._depth:
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+            return
+
+        self._conn.execute("BEGIN")
+        self._depth = 1
+        try:
+            yield self
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        else:
+            self._conn.execute("COMMIT")
+        finally:
+            self._depth = 0
+
+    # ---- reads -------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def __contains__(self, msg_id: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM messages WHERE msg_id=?", (msg_id,)).fetchone() is not None
+
+    def image_count(self) -> int:
+        """Total number of image entries across all messages."""
+        return self._conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def message_ids(self, limit: int = None) -> List[str]:
+        """Message ids in index order.
+
+        Args:
+            limit: Optional maximum number of ids
+
+        Returns:
+            List of message ids
+        """
+        return [row[0] for row in self._conn.execute(
+            "SELECT msg_id FROM messages ORDER BY position LIMIT ?",
+            (-1 if limit is None else limit,)
+        )]
+
+    def get_metadata(self, msg_id: str) -> Dict:
+        """Metadata of one message (KeyError if unknown)."""
+        row = self._conn.execute("SELECT metadata FROM messages WHERE msg_id=?", (msg_id,)).fetchone()
+        if row is None:
+            raise KeyError(msg_id)
+        return json.loads(row[0])
+
+    def get_images(self, msg_id: str) -> List[Dict]:
+        """Image entries of one message, in order."""
+        return [json.loads(row[0]) for row in self._conn.execute(
+            "SELECT data FROM images WHERE msg_id=? ORDER BY position", (msg_id,)
+        )]
+
+    def get_keywords(self, msg_id: str) -> Optional[List[str]]:
+        """Keywords of one message, or None if it has never been tagged."""
+        row = self._conn.execute("SELECT has_keywords FROM messages WHERE msg_id=?", (msg_id,)).fetchone()
+        if row is None:
+            raise KeyError(msg_id)
+        if not row[0]:
+            return None
+        return [r[0] for r in self._conn.execute(
+            "SELECT keyword FROM message_keywords WHERE msg_id=? ORDER BY position", (msg_id,)
+        )]
+
+    def iter_images(self) -> Iterator[Tuple[str, Dict]]:
+        """Stream (msg_id, image entry) pairs in index order without reading messages."""
+        cursor = self._conn.cursor()
+        cursor.execute(
+            "SELECT images.msg_id, images.data FROM images JOIN messages USING (msg_id) "
+            "ORDER BY messages.position, images.position"
+        )
+        for msg_id, data in cursor:
+            yield msg_id, json.loads(data)
+
+    def messages_with_images(self, local_filenames) -> List[str]:
+        """Ids of the messages holding any of the given image files, in index order."""
+        filenames = list(local_filenames)
+        msg_ids = set()
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(filenames), 500):
+            batch = filenames[start:start + 500]
+            msg_ids.update(row[0] for row in self._conn.execute(
+                f"SELECT DISTINCT msg_id FROM images WHERE local_filename IN ({','.join('?' * len(batch))})",
+                batch
+            ))
+        return [msg_id for msg_id in self.message_ids() if msg_id in msg_ids]
+
+    def messages_without_images(self) -> List[str]:
+        """Ids of the messages that have no image entries, in index order."""
+        return [row[0] for row in self._conn.execute(
+            "SELECT msg_id FROM messages WHERE msg_id NOT IN (SELECT msg_id FROM images) ORDER BY position"
+        )]
+
+    def find_image(self, local_filename: str) -> Optional[Tuple[str, Dict]]:
+        """Look up an image entry by local filename.
+
+        Returns:
+            (msg_id, image entry) or None
+        """
+        row = self._conn.execute(
+            "SELECT msg_id, data FROM images WHERE local_filename=? LIMIT 1", (local_filename,)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _assemble(self, msg_id: str, metadata: str, extra: str, key_order: str, has_keywords: int,
+                  images: List[Dict] = None, keywords: List[str] = None) -> Dict:
+        """Rebuild a message dict in its original field order (images/keywords fetched if not given).
+
+        "images" and "keywords" are only present if the message had them; a
+        keywords field that was null comes back as null.
+        """
+        order = json.loads(key_order)
+        fields = json.loads(extra)
+        if "metadata" in order:
+            fields["metadata"] = json.loads(metadata)
+        if "images" in order:
+            fields["images"] = self.get_images(msg_id) if images is None else images
+        if has_keywords:
+            fields["keywords"] = self.get_keywords(msg_id) if keywords is None else keywords
+        elif "keywords" in order:
+            fields["keywords"] = None
+
+        message = {key: fields.pop(key) for key in order if key in fields}
+        message.update(fields)
+        return message
+
+    def get_message(self, msg_id: str) -> Dict:
+        """One message in the JSON index schema (KeyError if unknown)."""
+        row = self._conn.execute(
+            "SELECT msg_id, metadata, extra, key_order, has_keywords FROM messages WHERE msg_id=?", (msg_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(msg_id)
+        return self._assemble(*row)
+
+    def iter_messages(self, limit: int = None) -> Iterator[Tuple[str, Dict]]:
+        """Stream (msg_id, message) pairs in index order, one message assembled at a time.
+
+        Args:
+            limit: Optional maximum number of messages
+        """
+        cursor = self._conn.cursor()
+        cursor.execute(
+            "SELECT msg_id, metadata, extra, key_order, has_keywords FROM messages "
+            "ORDER BY position LIMIT ?",
+            (-1 if limit is None else limit,)
+        )
+        for row in cursor:
+            yield row[0], self._assemble(*row)
+
+    # ---- writes ------------------------------------------------------------
+
+    def put_message(self, msg_id: str, message: Dict):
+        """Insert or replace one message (keeps its position if it already exists)."""
+        row = self._conn.execute("SELECT position FROM messages WHERE msg_id=?", (msg_id,)).fetchone()
+        if row is not None:
+            position = row[0]
+        else:
+            position = self._conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM messages").fetchone()[0]
+
+        extra = {key: value for key, value in message.items()
+                 if key not in ("metadata", "images", "keywords")}
+        has_keywords = "keywords" in message and message["keywords"] is not None
+
+        with self.transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?)",
+                (msg_id, position,
+                 json.dumps(message.get("metadata", {}), ensure_ascii=False),
+                 json.dumps(extra, ensure_ascii=False),
+                 json.dumps(list(message.keys())),
+                 int(has_keywords))
+            )
+            self._write_images(msg_id, message.get("images", []))
+            self._write_keywords(msg_id, message["keywords"] if has_keywords else [])
+
+    def _ensure_field(self, msg_id: str, field: str, present: bool):
+        """Add a field to (or drop it from) the exported field order of one message."""
+        row = self._conn.execute("SELECT key_order FROM messages WHERE msg_id=?", (msg_id,)).fetchone()
+        if row is None:
+            return
+        key_order = json.loads(row[0])
+        if present == (field in key_order):
+            return
+        if present:
+            key_order.append(field)
+        else:
+            key_order.remove(field)
+        self._conn.execute("UPDATE messages SET key_order=? WHERE msg_id=?", (json.dumps(key_order), msg_id))
+
+    def set_images(self, msg_id: str, images: List[Dict]):
+        """Replace the image entries of one message."""
+        with self.transaction():
+            self._ensure_field(msg_id, "images", True)
+            self._write_images(msg_id, images)
+
+    def _write_images(self, msg_id: str, images: List[Dict]):
+        self._conn.execute("DELETE FROM images WHERE msg_id=?", (msg_id,))
+        self._conn.executemany(
+            "INSERT INTO images VALUES (?, ?, ?, ?)",
+            [(msg_id, position, image.get("local_filename"), json.dumps(image, ensure_ascii=False))
+             for position, image in enumerate(images)]
+        )
+
+    def _write_keywords(self, msg_id: str, keywords: List[str]):
+        self._conn.execute("DELETE FROM message_keywords WHERE msg_id=?", (msg_id,))
+        self._conn.executemany(
+            "INSERT INTO message_keywords VALUES (?, ?, ?)",
+            [(msg_id, position, keyword) for position, keyword in enumerate(keywords)]
+        )
+
+    def set_keywords(self, msg_id: str, keywords: Optional[List[str]]):
+        """Replace the keywords of one message (None = mark as untagged)."""
+        if msg_id not in self:
+            raise KeyError(msg_id)
+        with self.transaction():
+            self._conn.execute("UPDATE messages SET has_keywords=? WHERE msg_id=?",
+                               (int(keywords is not None), msg_id))
+            self._ensure_field(msg_id, "keywords", keywords is not None)
+            self._write_keywords(msg_id, keywords or [])
+
+    def delete_message(self, msg_id: str):
+        """Remove a message with its images and keywords."""
+        with self.transaction():
+            for table in ("messages", "images", "message_keywords"):
+                self._conn.execute(f"DELETE FROM {table} WHERE msg_id=?", (msg_id,))
+
+    # ---- JSON import / export ----------------------------------------------
+
+    def import_json(self, index_data: Dict):
+        """Replace the whole store with a JSON index dictionary (one transaction)."""
+        with self.transaction():
+            for table in ("messages", "images", "message_keywords"):
+                self._conn.execute(f"DELETE FROM {table}")
+            for msg_id, message in index_data.items():
+                self.put_message(msg_id, message)
+
+    def export_json(self, limit: int = None) -> Dict:
+        """The store as a JSON index dictionary (optionally only the first N messages)."""
+        if limit is not None:
+            return dict(self.iter_messages(limit=limit))
+
+        # Whole index: read each table once instead of querying per message
+        images = {}
+        for msg_id, data in self._conn.execute("SELECT msg_id, data FROM images ORDER BY msg_id, position"):
+            images.setdefault(msg_id, []).append(json.loads(data))
+        keywords = {}
+        for msg_id, keyword in self._conn.execute(
+                "SELECT msg_id, keyword FROM message_keywords ORDER BY msg_id, position"):
+            keywords.setdefault(msg_id, []).append(keyword)
+
+        return {
+            row[0]: self._assemble(*row, images=images.get(row[0], []), keywords=keywords.get(row[0], []))
+            for row in self._conn.execute(
+                "SELECT msg_id, metadata, extra, key_order, has_keywords FROM messages ORDER BY position")
+        }
+
+    def close(self):
+        """Close the database."""
+        self._conn.close()
+
+
+def load_index_file(index_file: str, limit: int = None) -> Dict:
+    """Load an index from a JSON file or an IndexStore database.
+
+    Args:
+        index_file: Path to image_index.json or an index database (.sqlite/.db)
+        limit: Optional limit on number of messages to load
+
+    Returns:
+        Dictionary of messages in the JSON index schema
+    """
+    if is_index_store(index_file):
+        if not Path(index_file).exists():
+            raise FileNotFoundError(f"Index file not found: {index_file}")
+        store = IndexStore(index_file)
+        try:
+            return store.export_json(limit=limit)
+        finally:
+            store.close()
+
+    with open(index_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if limit:
+        return dict(list(data.items())[:limit])
+    return data
+
+
+def save_index_file(index_data: Dict, index_file: str, ensure_ascii: bool = True):
+    """Save an index to a JSON file or an IndexStore database.
+
+    Args:
+        index_data: Dictionary of messages in the JSON index schema
+        index_file: Path to JSON file or index database (.sqlite/.db)
+        ensure_ascii: JSON only - escape non-ASCII characters
+    """
+    if is_index_store(index_file):
+        store = IndexStore(index_file)
+        try:
+            store.import_json(index_data)
+        finally:
+            store.close()
+        return
+
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(index_data, f, indent=2, ensure_ascii=ensure_ascii)
+
+
+def load_index_images(index_file: str) -> Dict:
+    """Load only the images of each message, for tools that never look at the rest.
+
+    From an IndexStore only the images table is read and the result is
+    {msg_id: {"images": [...]}} (messages without images are left out); write
+    changes back with save_images(). A JSON index is loaded whole.
+
+    Args:
+        index_file: Path to image_index.json or an index database (.sqlite/.db)
+
+    Returns:
+        Dictionary of messages, each with at least an "images" list
+    """
+    if not is_index_store(index_file):
+        return load_index_file(index_file)
+    if not Path(index_file).exists():
+        raise FileNotFoundError(f"Index file not found: {index_file}")
+    store = IndexStore(index_file)
+    try:
+        index_data = {}
+        for msg_id, image in store.iter_images():
+            index_data.setdefault(msg_id, {"images": []})["images"].append(image)
+        return index_data
+    finally:
+        store.close()
+
+
+def _update_store(index_file: str, msg_ids, update) -> bool:
+    """Apply update(store, msg_id) to some messages of an existing IndexStore in one transaction.
+
+    Returns:
+        False if index_file is not an existing store or lacks one of the
+        messages (nothing is written then)
+    """
+    if not is_index_store(index_file) or not Path(index_file).exists():
+        return False
+    store = IndexStore(index_file)
+    try:
+        if any(msg_id not in store for msg_id in msg_ids):
+            return False
+        with store.transaction():
+            for msg_id in msg_ids:
+                update(store, msg_id)
+        return True
+    finally:
+        store.close()
+
+
+def save_keywords(index_data: Dict, index_file: str, msg_ids) -> bool:
+    """Write only the keywords of some messages into an existing IndexStore.
+
+    Args:
+        index_data: Dictionary of messages holding the new keywords
+        index_file: Index path
+        msg_ids: Messages whose keywords changed
+
+    Returns:
+        True if written per record; False if index_file is not an existing
+        store (caller should save the whole index instead)
+    """
+    return _update_store(index_file, msg_ids,
+                         lambda store, msg_id: store.set_keywords(msg_id, index_data[msg_id].get("keywords")))
+
+
+def save_images(index_data: Dict, index_file: str, msg_ids) -> bool:
+    """Write only the images of some messages into an existing IndexStore.
+
+    Args:
+        index_data: Dictionary of messages holding the new image lists
+        index_file: Index path
+        msg_ids: Messages whose images changed
+
+    Returns:
+        True if written per record; False if index_file is not an existing
+        store (caller should save the whole index instead)
+    """
+    return _update_store(index_file, msg_ids,
+                         lambda store, msg_id: store.set_images(msg_id, index_data[msg_id].get("images", [])))
+
+
+def save_messages(index_data: Dict, index_file: str, msg_ids, removed_ids=()) -> bool:
+    """Replace some whole messages (and delete others) in an existing IndexStore.
+
+    Args:
+        index_data: Dictionary of messages holding the new versions
+        index_file: Index path
+        msg_ids: Messages that changed
+        removed_ids: Messages to delete
+
+    Returns:
+        True if written per record; False if index_file is not an existing
+        store (caller should save the whole index instead)
+    """
+    removed = set(removed_ids)
+
+    def update(store, msg_id):
+        if msg_id in removed:
+            store.delete_message(msg_id)
+        else:
+            store.put_message(msg_id, index_data[msg_id])
+
+    return _update_store(index_file, [msg_id for msg_id in msg_ids if msg_id not in removed] + list(removed_ids),
+                         update)
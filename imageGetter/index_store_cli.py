@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# ABOUTME: CLI tool to convert the image index between JSON and the SQLite IndexStore
+# ABOUTME: import: JSON -> database, export: database -> JSON (same schema as image_index.json)
+
+import argparse
+import json
+from pathlib import Path
+from index_store import IndexStore, is_index_store
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert the image index between JSON and an index database',
+        usage='%(prog)s [-h] {import,export} SOURCE DEST',
+        epilog='''
+Examples:
+  %(prog)s import ../data/image_index.json ../data/image_index.sqlite
+  %(prog)s export ../data/image_index.sqlite ../data/image_index.json
+
+Every imageGetter tool accepts a .sqlite/.db index path wherever it takes an index JSON file.
+        '''
+    )
+
+    parser.add_argument('command', choices=['import', 'export'],
+                        help='import: JSON -> database, export: database -> JSON')
+    parser.add_argument('source', metavar='SOURCE',
+                        help='Input index (JSON for import, .sqlite/.db for export)')
+    parser.add_argument('dest', metavar='DEST',
+                        help='Output index (.sqlite/.db for import, JSON for export)')
+
+    args = parser.parse_args()
+
+    if not Path(args.source).exists():
+        print(f"Error: Input file not found: {args.source}")
+        return 1
+
+    database = args.dest if args.command == 'import' else args.source
+    if not is_index_store(database):
+        print(f"Error: Index database must end in .sqlite or .db: {database}")
+        return 1
+
+    if args.command == 'import':
+        print(f"Loading index from {args.source}...")
+        with open(args.source, 'r', encoding='utf-8') as f:
+            index_data = json.load(f)
+
+        print(f"Importing {len(index_data)} messages into {args.dest}...")
+        store = IndexStore(args.dest)
+        store.import_json(index_data)
+    else:
+        store = IndexStore(args.source)
+        print(f"Exporting {len(store)} messages to {args.dest}...")
+        with open(args.dest, 'w', encoding='utf-8') as f:
+            json.dump(store.export_json(), f, indent=2)
+
+    print(f"Done: {len(store)} messages, {store.image_count()} images")
+    store.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
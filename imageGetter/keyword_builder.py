@@ -1,10 +1,11 @@
 # ABOUTME: Message sampling and text extraction for LLM keyword building
 # ABOUTME: Samples random messages from image_index.json and extracts text for keyword extraction
 
-import json
 import random
 from typing import List, Dict, Set
 import ollama
+from index_store import load_index_file
+from llm_cache import LLMResponseCache
 from llm_config import OLLAMA_HOST, LLM_MODEL, KEYWORD_EXTRACTION_PROMPT, LLM_TIMEOUT
 
 
@@ -17,8 +18,7 @@ def load_image_index(file_path: str) -> Dict:
     Returns:
         Dictionary of messages with metadata and images
     """
-    with open(file_path, 'r') as f:
-        return json.load(f)
+    return load_index_file(file_path)
 
 
 def sample_random_messages(image_index: Dict, sample_size: int) -> List[Dict]:
@@ -65,12 +65,14 @@ def extract_message_text(message: Dict) -> str:
 class KeywordExtractor:
     """Extract keywords from messages using LLM."""
 
-    def __init__(self, ollama_host: str = None, model: str = None):
+    def __init__(self, ollama_host: str = None, model: str = None, cache: LLMResponseCache = None):
         """Initialize keyword extractor with Ollama client.
 
         Args:
             ollama_host: Ollama server URL (defaults to OLLAMA_HOST from config)
             model: LLM model name (defaults to LLM_MODEL from config)
+            cache: Optional persistent response cache (keyed by model, prompt
+                and existing keyword list)
         """
         # Create client with timeout at the HTTP request level
         self.ollama_client = ollama.Client(
@@ -78,6 +80,7 @@ class KeywordExtractor:
             timeout=LLM_TIMEOUT
         )
         self.model = model or LLM_MODEL
+        self.cache = cache
 
     def extract_keywords_from_message(self, message_text: str, existing_keywords: List[str] = None) -> List[str]:
         """Extract keywords from a single message using LLM.
@@ -102,21 +105,31 @@ class KeywordExtractor:
             else:
                 keywords_str = "(none yet - this is the first extraction)"
 
-            # Format the prompt with both message and existing keywords
-            prompt = KEYWORD_EXTRACTION_PROMPT.format(
-                keywords=keywords_str,
-                message=message_text
-            )
-
-            # Call LLM (timeout is set at Client level)
-            response = self.ollama_client.generate(
-                model=self.model,
-                prompt=prompt,
-                stream=False
-            )
+            # Cached answer from an earlier run?
+            prompt_version = LLMResponseCache.prompt_version(KEYWORD_EXTRACTION_PROMPT, keywords_str)
+            raw_response = None
+            if self.cache is not None:
+                raw_response = self.cache.get(self.model, prompt_version, message_text)
+
+            if raw_response is None:
+                # Format the prompt with both message and existing keywords
+                prompt = KEYWORD_EXTRACTION_PROMPT.format(
+                    keywords=keywords_str,
+                    message=message_text
+                )
+
+                # Call LLM (timeout is set at Client level)
+                response = self.ollama_client.generate(
+                    model=self.model,
+                    prompt=prompt,
+                    stream=False
+                )
+                raw_response = response.get('response', '')
+                if self.cache is not None:
+                    self.cache.put(self.model, prompt_version, message_text, raw_response)
 
             # Parse response - expecting comma-separated keywords (but LLM sometimes uses newlines)
-            response_text = response.get('response', '').strip()
+            response_text = raw_response.strip()
             if not response_text:
                 return []
 
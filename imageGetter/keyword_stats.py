@@ -0,0 +1,197 @@
+# ABOUTME: Sparse message-by-keyword matrix built once from the image index, cached against the index hash
+# ABOUTME: Frequencies, co-occurrence, per-chapter distributions and per-year trends computed from the matrix
+
+import hashlib
+import json
+from collections import Counter
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from image_query import parse_message_date
+from index_store import load_index_file
+
+# Bump when the cached matrix layout changes
+CACHE_VERSION = 1
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's bytes, read in chunks (no JSON parsing)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class KeywordMatrix:
+    """Sparse message x keyword count matrix.
+
+    Each row is one message: the ids (ascending) of the keywords it carries
+    (message keywords plus the keywords of its images, lowercased) with
+    occurrence counts, its chapters and its year. Statistics are aggregations over
+    rows with Counter, so no statistic revisits the index itself.
+    """
+
+    def __init__(self):
+        self.vocabulary: List[str] = []
+        self.rows: List[Tuple[List[int], List[int]]] = []
+        self.chapters: List[List[int]] = []
+        self.years: List[Optional[int]] = []
+        self.summary: Dict[str, int] = {"messages": 0, "messages_with_keywords": 0,
+                                        "messages_with_image_keywords": 0}
+
+    @classmethod
+    def build(cls, index_data: Dict) -> "KeywordMatrix":
+        """Build the matrix from an image index dictionary (one pass over all messages)."""
+        matrix = cls()
+        vocab_index: Dict[str, int] = {}
+        summary = matrix.summary
+
+        for message in index_data.values():
+            summary["messages"] += 1
+            msg_keywords = message.get("keywords", [])
+            image_keywords = [kw for image in message.get("images", []) for kw in image.get("keywords", [])]
+            if msg_keywords:
+                summary["messages_with_keywords"] += 1
+            if image_keywords:
+                summary["messages_with_image_keywords"] += 1
+
+            counts = Counter(kw.lower() for kw in msg_keywords)
+            counts.update(kw.lower() for kw in image_keywords)
+            for keyword in counts:
+                if keyword not in vocab_index:
+                    vocab_index[keyword] = len(matrix.vocabulary)
+                    matrix.vocabulary.append(keyword)
+            # Rows keep keyword ids ascending, so pairs come out of combinations() ordered
+            row = sorted((vocab_index[keyword], count) for keyword, count in counts.items())
+            matrix.rows.append(([kw_id for kw_id, _ in row], [count for _, count in row]))
+
+            matrix.chapters.append([int(chapter) for chapter in message.get("chapters") or []])
+            message_date = parse_message_date(message.get("metadata", {}).get("date", ""))
+            matrix.years.append(message_date.year if message_date else None)
+
+        return matrix
+
+    # ---- persistence -------------------------------------------------------
+
+    def save(self, cache_file: str, index_hash: str):
+        """Write the matrix to a JSON cache file tagged with the index hash."""
+        data = {
+            "version": CACHE_VERSION,
+            "index_hash": index_hash,
+            "vocabulary": self.vocabulary,
+            "rows": self.rows,
+            "chapters": self.chapters,
+            "years": self.years,
+            "summary": self.summary
+        }
+        Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, cache_file: str, index_hash: str) -> Optional["KeywordMatrix"]:
+        """Read a cached matrix (None if missing, unreadable, outdated or for another index)."""
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != CACHE_VERSION or data.get("index_hash") != index_hash:
+            return None
+
+        matrix = cls()
+        matrix.vocabulary = data["vocabulary"]
+        matrix.rows = [(ids, counts) for ids, counts in data["rows"]]
+        matrix.chapters = data["chapters"]
+        matrix.years = data["years"]
+        matrix.summary = data["summary"]
+        return matrix
+
+    # ---- statistics --------------------------------------------------------
+
+    def _named(self, counts: Counter) -> Counter:
+        vocabulary = self.vocabulary
+        return Counter({vocabulary[kw_id]: count for kw_id, count in counts.items()})
+
+    def frequencies(self) -> Counter:
+        """Total occurrences of each keyword (message and image keywords)."""
+        totals = Counter()
+        for ids, counts in self.rows:
+            for kw_id, count in zip(ids, counts):
+                totals[kw_id] += count
+        return self._named(totals)
+
+    def message_frequencies(self) -> Counter:
+        """Number of messages carrying each keyword."""
+        totals = Counter()
+        for ids, _ in self.rows:
+            totals.update(ids)
+        return self._named(totals)
+
+    def cooccurrence(self, min_count: int = 1) -> Counter:
+        """Number of messages carrying each pair of keywords.
+
+        Args:
+            min_count: Drop pairs seen in fewer messages
+
+        Returns:
+            Counter of (keyword_a, keyword_b) -> messages, with keyword_a < keyword_b
+        """
+        pairs = Counter()
+        for ids, _ in self.rows:
+            if len(ids) > 1:
+                pairs.update(combinations(ids, 2))
+
+        vocabulary = self.vocabulary
+        result = Counter()
+        for (a, b), count in pairs.items():
+            if count >= min_count:
+                name_a, name_b = vocabulary[a], vocabulary[b]
+                result[(name_a, name_b) if name_a < name_b else (name_b, name_a)] = count
+        return result
+
+    def _grouped(self, groups_per_row) -> Dict:
+        grouped: Dict = {}
+        for (ids, _), groups in zip(self.rows, groups_per_row):
+            for group in groups:
+                grouped.setdefault(group, Counter()).update(ids)
+        return {group: self._named(counts) for group, counts in sorted(grouped.items())}
+
+    def by_chapter(self) -> Dict[int, Counter]:
+        """Messages per keyword within each chapter."""
+        return self._grouped(self.chapters)
+
+    def by_year(self) -> Dict[int, Counter]:
+        """Messages per keyword within each year (messages without a parseable date are left out)."""
+        return self._grouped([year] if year is not None else [] for year in self.years)
+
+
+def default_cache_file(index_file: str) -> str:
+    """Matrix cache path next to the index: image_index.json -> image_index_keyword_stats.json"""
+    path = Path(index_file)
+    return str(path.parent / f"{path.stem}_keyword_stats.json")
+
+
+def open_keyword_matrix(index_file: str, cache_file: str = None, index_data: Dict = None) -> KeywordMatrix:
+    """Load the cached matrix for an index, rebuilding it if the index content changed.
+
+    Args:
+        index_file: Image index (JSON or .sqlite/.db)
+        cache_file: Matrix cache (default: {index stem}_keyword_stats.json beside the index)
+        index_data: Already loaded index, used instead of reading index_file on a cache miss
+
+    Returns:
+        KeywordMatrix
+    """
+    cache_file = cache_file or default_cache_file(index_file)
+    index_hash = file_hash(index_file)
+
+    matrix = KeywordMatrix.load(cache_file, index_hash)
+    if matrix is None:
+        matrix = KeywordMatrix.build(index_data if index_data is not None else load_index_file(index_file))
+        matrix.save(cache_file, index_hash)
+    return matrix
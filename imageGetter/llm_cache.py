@@ -0,0 +1,161 @@
+# ABOUTME: Persistent SQLite cache of LLM responses keyed by model, prompt version and message hash
+# ABOUTME: Lets tagging, categorization and keyword extraction survive index rebuilds without re-asking the LLM
+
+import hashlib
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+# Least recently used entries beyond this are evicted when the cache is closed
+DEFAULT_MAX_ENTRIES = 200000
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed store of raw LLM responses.
+
+    Entries are keyed by (model, prompt_version, message_hash). prompt_version
+    is a hash of the prompt template plus any fixed context sent with it (e.g.
+    the keyword list), so editing a prompt or the keyword list invalidates old
+    answers automatically. Safe to share between threads.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Open (or create) the cache database.
+
+        Args:
+            db_path: Path to SQLite file
+            max_entries: Entries kept by evict() (least recently used are dropped)
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   model TEXT NOT NULL,
+                   prompt_version TEXT NOT NULL,
+                   message_hash TEXT NOT NULL,
+                   response TEXT NOT NULL,
+                   created TEXT NOT NULL,
+                   last_used REAL NOT NULL,
+                   PRIMARY KEY (model, prompt_version, message_hash)
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def prompt_version(template: str, *context: str) -> str:
+        """Version id for a prompt template and its fixed context.
+
+        Args:
+            template: Prompt template text (before message formatting)
+            *context: Other prompt inputs shared by many messages (keyword list, ...)
+
+        Returns:
+            Short hex id that changes whenever template or context changes
+        """
+        return _sha256("\x00".join((template,) + context))[:16]
+
+    def get(self, model: str, prompt_version: str, message_text: str) -> Optional[str]:
+        """Look up a cached response and mark it as recently used.
+
+        Args:
+            model: LLM model name
+            prompt_version: Output of prompt_version()
+            message_text: Message text sent to the LLM
+
+        Returns:
+            Cached raw response, or None on a miss
+        """
+        key = (model, prompt_version, _sha256(message_text))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE model=? AND prompt_version=? AND message_hash=?",
+                key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE responses SET last_used=? WHERE model=? AND prompt_version=? AND message_hash=?",
+                (time.time(),) + key
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, model: str, prompt_version: str, message_text: str, response: str):
+        """Store (or replace) a response.
+
+        Args:
+            model: LLM model name
+            prompt_version: Output of prompt_version()
+            message_text: Message text sent to the LLM
+            response: Raw LLM response text
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (model, prompt_version, _sha256(message_text), response,
+                 datetime.now().isoformat(timespec='seconds'), time.time())
+            )
+            self._conn.commit()
+
+    def evict(self, max_entries: int = None) -> int:
+        """Drop least recently used entries beyond max_entries.
+
+        Args:
+            max_entries: Entries to keep (default: self.max_entries)
+
+        Returns:
+            Number of entries removed
+        """
+        keep = self.max_entries if max_entries is None else max_entries
+        with self._lock:
+            cursor = self._conn.execute(
+                """DELETE FROM responses WHERE rowid IN (
+                       SELECT rowid FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                   )""",
+                (keep,)
+            )
+            self._conn.commit()
+            self.evicted += cursor.rowcount
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counts for this session.
+
+        Returns:
+            Dictionary with hits, misses, hit_rate (0.0-1.0), entries and evicted
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+            "evicted": self.evicted
+        }
+
+    def close(self):
+        """Evict old entries and close the database."""
+        self.evict()
+        self._conn.close()
@@ -7,6 +7,12 @@ LLM_MODEL = "gemma3:4b"  # Tom can edit this as needed
 #LLM_MODEL = "gemma3:1b"  # Tom can edit this as needed
 #LLM_MODEL = "mistral-openorca:7b"  # Tom can edit this as needed
 LLM_TIMEOUT = 30.0  # Timeout in seconds for LLM requests (default: 30s)
+LLM_PARALLEL = 1    # Concurrent tagging requests; match OLLAMA_NUM_PARALLEL on the Ollama server
+LLM_CACHE_FILE = "../data/llm_cache.sqlite"  # Persistent LLM response cache (survives index rebuilds)
+
+# Prompt-cache reuse (tagging with --reuse-prompt-cache)
+LLM_KEEP_ALIVE = "30m"  # Keep model (and its cached keyword prefix) loaded between requests
+LLM_NUM_CTX = 8192      # Context window; must fit keyword list + message or the prefix gets truncated
 
 # Keywords that should be filtered out from tagging results
 # These are common words that appear frequently but aren't useful for categorization
@@ -74,3 +80,28 @@ Keywords: {keywords}
 Message: {message}
 
 Return the matching keywords as a comma-separated list. If no keywords match, return "NONE". Do not include explanations or extra text."""
+
+# Prompt template for batched keyword tagging: several messages per LLM call.
+# {messages} is a JSON object mapping short ids ("1", "2", ...) to message text.
+KEYWORD_BATCH_TAGGING_PROMPT = """You are analyzing aircraft builder messages. Given this list of keywords, return ONLY the keywords that are relevant to each message below.
+
+Keywords: {keywords}
+
+Messages (JSON object mapping message id to message text):
+{messages}
+
+Return a JSON object mapping EVERY message id to a list of its matching keywords, for example {{"1": ["firewall", "cowling"], "2": []}}. Use an empty list if no keywords match. Do not include explanations or extra text."""
+
+# Static system prompts for prompt-cache reuse. The keyword list lives in the system message,
+# which is byte-identical on every call, so Ollama only evaluates the user message after the first call.
+KEYWORD_TAGGING_SYSTEM_PROMPT = """You are analyzing aircraft builder messages. Given this list of keywords, return ONLY the keywords that are relevant to the message the user sends.
+
+Keywords: {keywords}
+
+Return the matching keywords as a comma-separated list. If no keywords match, return "NONE". Do not include explanations or extra text."""
+
+KEYWORD_BATCH_TAGGING_SYSTEM_PROMPT = """You are analyzing aircraft builder messages. Given this list of keywords, return ONLY the keywords that are relevant to each message the user sends.
+
+Keywords: {keywords}
+
+The user sends a JSON object mapping message id to message text. Return a JSON object mapping EVERY message id to a list of its matching keywords, for example {{"1": ["firewall", "cowling"], "2": []}}. Use an empty list if no keywords match. Do not include explanations or extra text."""
@@ -1,19 +1,26 @@
 # ABOUTME: Batch processor for tagging messages with LLM keywords
 # ABOUTME: Loads image index, applies keyword tagger to each message, saves results
 
-import json
 import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List
 from llm_tagger import KeywordTagger
+from llm_cache import LLMResponseCache
+from message_store import DEFAULT_MSGS_MD_DIR, get_message_store
+from index_store import load_index_file, save_index_file, save_keywords
+
+# Message text sent to the LLM is truncated to this length to avoid timeouts
+MAX_LLM_TEXT_CHARS = 2000
 
 
 def load_image_index(index_file: str) -> Dict:
-    """Load image index from JSON file.
+    """Load image index from JSON file or index database.
 
     Args:
-        index_file: Path to image_index.json
+        index_file: Path to image_index.json (or .sqlite/.db IndexStore)
 
     Returns:
         Dictionary of messages with metadata and images
@@ -25,8 +32,7 @@ def load_image_index(index_file: str) -> Dict:
     if not index_path.exists():
         raise FileNotFoundError(f"Index file not found: {index_file}")
 
-    with open(index_file, 'r') as f:
-        return json.load(f)
+    return load_index_file(index_file)
 
 
 def load_keywords(keywords_file: str) -> List[str]:
@@ -63,82 +69,21 @@ def load_keywords(keywords_file: str) -> List[str]:
     return keywords
 
 
-def extract_message_text(message: Dict, msgs_md_dir: str = "../data/msgs_md") -> str:
+def extract_message_text(message: Dict, msgs_md_dir: str = DEFAULT_MSGS_MD_DIR) -> str:
     """Extract full message text from markdown file for LLM processing.
 
-    Reads the full message body from the corresponding markdown file
-    in data/msgs_md/{first_letter}/{message_id}.md
+    Reads the message body through the shared MessageTextStore for
+    msgs_md_dir (data/msgs_md/{first_letter}/{message_id}.md).
 
     Args:
         message: Message dictionary with metadata
         msgs_md_dir: Path to msgs_md directory (default: ../data/msgs_md)
 
     Returns:
-        Clean text string for LLM input (subject + body)
+        Clean text string for LLM input (subject + body), limited to
+        MAX_LLM_TEXT_CHARS to avoid timeouts
     """
-    metadata = message.get("metadata", {})
-    subject = metadata.get("subject", "")
-    message_id = metadata.get("message_id", "")
-
-    # If no message_id, return just subject
-    if not message_id:
-        return subject
-
-    # Construct path to markdown file: msgs_md/{first_letter}/{message_id}.md
-    first_letter = message_id[0].upper()
-    md_file = Path(msgs_md_dir) / first_letter / f"{message_id}.md"
-
-    # If file doesn't exist, return just subject
-    if not md_file.exists():
-        # Try lowercase directory (some messages might be stored there)
-        first_letter_lower = message_id[0].lower()
-        md_file = Path(msgs_md_dir) / first_letter_lower / f"{message_id}.md"
-        if not md_file.exists():
-            # Also try aDigits directory for messages starting with lowercase 'a' followed by digit
-            if message_id[0].lower() == 'a' and len(message_id) > 1 and message_id[1].isdigit():
-                md_file = Path(msgs_md_dir) / "aDigits" / f"{message_id}.md"
-                if not md_file.exists():
-                    return subject
-            else:
-                return subject
-
-    # Read markdown file and extract body text
-    try:
-        with open(md_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Skip the first few lines (metadata header) and extract body
-        # The body starts after the subject line (marked with "# ")
-        lines = content.split('\n')
-        body_lines = []
-        found_subject = False
-
-        for line in lines:
-            # Once we find the subject line, start collecting body text
-            if line.strip().startswith('# '):
-                found_subject = True
-                continue
-
-            # After finding subject, collect all text
-            if found_subject:
-                # Skip image markers and profile photos
-                if not line.strip().startswith('![') and not line.strip().startswith('https://'):
-                    body_lines.append(line)
-
-        body_text = '\n'.join(body_lines).strip()
-
-        # Return subject + body (limited to reasonable length for LLM)
-        # Limit to ~2000 characters to avoid timeout
-        full_text = f"{subject}\n\n{body_text}"
-        if len(full_text) > 2000:
-            full_text = full_text[:2000] + "..."
-
-        return full_text
-
-    except Exception as e:
-        # On any error, fall back to just subject
-        print(f"Warning: Could not read message body for {message_id}: {e}")
-        return subject
+    return get_message_store(msgs_md_dir).get_text(message, max_chars=MAX_LLM_TEXT_CHARS)
 
 
 def print_verbose_output(
@@ -177,7 +122,12 @@ def tag_messages(
     output_file: str = None,
     limit: int = None,
     model: str = None,
-    verbose: bool = False
+    verbose: bool = False,
+    batch_size: int = 1,
+    reuse_prompt_cache: bool = False,
+    parallel: int = 1,
+    cache_file: str = None,
+    text_store_file: str = None
 ) -> Dict:
     """Tag messages in index with LLM keywords.
 
@@ -188,12 +138,23 @@ def tag_messages(
         limit: If specified, process only first N messages
         model: Optional model override
         verbose: If True, print detailed output for each message
+        batch_size: Messages per LLM call (1 = one call per message). Larger batches
+            send the keyword list once per batch instead of once per message.
+        reuse_prompt_cache: If True, send the keyword list as a fixed system message so
+            Ollama reuses its evaluated prefix across messages (see KeywordTagger)
+        parallel: Number of LLM requests in flight at once; set to the server's
+            OLLAMA_NUM_PARALLEL. Results are still applied in index order.
+        cache_file: Optional SQLite LLM response cache; unchanged messages are
+            answered from it instead of the LLM (e.g. after an index rebuild)
+        text_store_file: Optional SQLite cache of parsed message text (see MessageTextStore)
 
     Returns:
         Dictionary with statistics:
         - processed: Number of messages tagged
         - skipped: Number of messages skipped (already tagged)
         - errors: Number of errors encountered
+        - prompt_eval: Prompt evaluation summary from KeywordTagger.get_prompt_eval_stats()
+        - llm_cache: LLMResponseCache.get_stats() (only when cache_file is given)
     """
     # Default output to input file for backward compatibility
     if output_file is None:
@@ -204,7 +165,9 @@ def tag_messages(
     keywords = load_keywords(keywords_file)
 
     # Initialize tagger
-    tagger = KeywordTagger()
+    cache = LLMResponseCache(cache_file) if cache_file else None
+    tagger = KeywordTagger(reuse_prompt_cache=reuse_prompt_cache, cache=cache)
+    text_store = get_message_store(DEFAULT_MSGS_MD_DIR, text_store_file)
 
     # Statistics
     stats = {
@@ -213,21 +176,11 @@ def tag_messages(
         "errors": 0
     }
 
-    # Count total messages to process for progress tracking
-    total_to_process = 0
-    for message in index_data.values():
-        has_keywords = "keywords" in message and message.get("keywords") is not None
-        if not has_keywords:
-            total_to_process += 1
-
-    if limit and limit < total_to_process:
-        total_to_process = limit
-
-    # Process messages
-    messages_processed = 0
+    # Select messages to process (skip already tagged, stop at limit)
+    to_process = []
     for msg_id, message in index_data.items():
         # Check limit
-        if limit is not None and messages_processed >= limit:
+        if limit is not None and len(to_process) >= limit:
             break
 
         # Skip if already tagged
@@ -236,55 +189,104 @@ def tag_messages(
             stats["skipped"] += 1
             continue
 
-        # Extract message text
-        message_text = extract_message_text(message)
+        to_process.append(msg_id)
+
+    total_to_process = len(to_process)
+    batch_size = max(1, batch_size)
+    parallel = max(1, parallel)
+    batches = [to_process[i:i + batch_size] for i in range(0, total_to_process, batch_size)]
 
-        # Tag message with keywords
+    def run_batch(batch_ids):
+        """Tag one batch; runs on a worker thread and never raises."""
+        batch_texts = {msg_id: text_store.get_text(index_data[msg_id], max_chars=MAX_LLM_TEXT_CHARS)
+                       for msg_id in batch_ids}
         try:
-            # TAG WITH KEYWORDS
-            matched_keywords, keyword_response = tagger.tag_message(message_text, keywords, model=model)
-            message["keywords"] = matched_keywords
-
-            # VERBOSE OUTPUT
-            if verbose:
-                print_verbose_output(
-                    msg_id, message.get("metadata", {}),
-                    keyword_response, matched_keywords
-                )
-            # PROGRESS OUTPUT (non-verbose)
+            if batch_size == 1:
+                msg_id = batch_ids[0]
+                return {msg_id: tagger.tag_message(batch_texts[msg_id], keywords, model=model)}, None
+            return tagger.tag_messages_batch(batch_texts, keywords, model=model), None
+        except Exception as e:
+            return {}, e
+
+    # Tagging in place: only changed keywords need writing (per record for an index database)
+    unsaved_ids = []
+    in_place = output_file == index_file
+
+    def save_progress():
+        save_image_index(index_data, output_file, list(unsaved_ids) if in_place else None)
+        unsaved_ids.clear()
+
+    def apply_batch(batch_ids, batch_results, batch_error):
+        """Write one batch's results into the index (main thread, index order)."""
+        for msg_id in batch_ids:
+            message = index_data[msg_id]
+
+            if batch_error is not None:
+                print(f"ERROR tagging message {msg_id}: {batch_error}")
+                # Set empty list on error (valid state)
+                message["keywords"] = []
+                stats["errors"] += 1
             else:
-                subject = message.get("metadata", {}).get("subject", "")
-                print(f"[{stats['processed']+1}/{total_to_process}] {subject[:60]}")
+                matched_keywords, keyword_response = batch_results[msg_id]
+                message["keywords"] = matched_keywords
+
+                # VERBOSE OUTPUT
+                if verbose:
+                    print_verbose_output(
+                        msg_id, message.get("metadata", {}),
+                        keyword_response, matched_keywords
+                    )
+                # PROGRESS OUTPUT (non-verbose)
+                else:
+                    subject = message.get("metadata", {}).get("subject", "")
+                    print(f"[{stats['processed']+1}/{total_to_process}] {subject[:60]}")
 
             stats["processed"] += 1
-            messages_processed += 1
-        except Exception as e:
-            print(f"ERROR tagging message {msg_id}: {e}")
-            # Set empty list on error (valid state)
-            message["keywords"] = []
-            stats["errors"] += 1
-            stats["processed"] += 1
-            messages_processed += 1
-
-        # Auto-save every 50 messages
-        if stats["processed"] % 50 == 0:
-            if not verbose:
-                print(f"  → Auto-saved after {stats['processed']} messages")
-            save_image_index(index_data, output_file)
+            unsaved_ids.append(msg_id)
+
+            # Auto-save every 50 messages
+            if stats["processed"] % 50 == 0:
+                if not verbose:
+                    print(f"  → Auto-saved after {stats['processed']} messages")
+                save_progress()
+
+    if parallel == 1:
+        for batch_ids in batches:
+            apply_batch(batch_ids, *run_batch(batch_ids))
+    else:
+        # Keep at most `parallel` requests in flight; apply oldest first so output and
+        # auto-saves follow index order regardless of which request finishes first
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            pending = deque()
+            for batch_ids in batches:
+                pending.append((batch_ids, executor.submit(run_batch, batch_ids)))
+                if len(pending) >= parallel:
+                    done_ids, future = pending.popleft()
+                    apply_batch(done_ids, *future.result())
+            while pending:
+                done_ids, future = pending.popleft()
+                apply_batch(done_ids, *future.result())
 
     # Final save
-    save_image_index(index_data, output_file)
+    save_progress()
 
+    text_store.flush()
+    stats["prompt_eval"] = tagger.get_prompt_eval_stats()
+    if cache is not None:
+        stats["llm_cache"] = cache.get_stats()
+        cache.close()
     return stats
 
 
-def save_image_index(index_data: Dict, index_file: str):
-    """Save image index to JSON file.
+def save_image_index(index_data: Dict, index_file: str, changed_ids: List[str] = None):
+    """Save image index to JSON file or index database.
 
     Args:
         index_data: Dictionary to save
-        index_file: Path to save to
+        index_file: Path to save to (.sqlite/.db for an IndexStore)
+        changed_ids: Optional ids of messages whose keywords changed; an
+            existing index database then only gets those keywords updated
     """
-    # Write data directly (no backup needed since we write to new files)
-    with open(index_file, 'w') as f:
-        json.dump(index_data, f, indent=2)
+    if changed_ids is not None and save_keywords(index_data, index_file, changed_ids):
+        return
+    save_index_file(index_data, index_file)
@@ -9,13 +9,14 @@ from llm_tag_messages import (
     load_keywords,
     tag_messages
 )
-from llm_config import LLM_TIMEOUT
+from llm_config import LLM_CACHE_FILE, LLM_TIMEOUT, LLM_PARALLEL
+from message_store import DEFAULT_STORE_FILE
 
 
 def main():
     parser = argparse.ArgumentParser(
         description='Tag messages with LLM keywords',
-        usage='%(prog)s [-h] [--keywords KEYWORDS] [--limit N] [--model MODEL] [--verbose] SOURCE [DEST]'
+        usage='%(prog)s [-h] [--keywords KEYWORDS] [--limit N] [--model MODEL] [--batch-size N] [--reuse-prompt-cache] [--parallel N] [--llm-cache FILE | --no-llm-cache] [--text-store FILE] [--verbose] SOURCE [DEST]'
     )
 
     # Positional arguments
@@ -31,6 +32,18 @@ def main():
                         help='Process only first N messages (default: all)')
     parser.add_argument('--model', type=str, default=None,
                         help='Override LLM model from llm_config.py')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Messages per LLM call; keyword list is sent once per batch (default: 1)')
+    parser.add_argument('--parallel', type=int, default=LLM_PARALLEL,
+                        help=f'Concurrent LLM requests, match OLLAMA_NUM_PARALLEL on the server (default: {LLM_PARALLEL})')
+    parser.add_argument('--reuse-prompt-cache', action='store_true',
+                        help='Send keyword list as a fixed system prompt so Ollama reuses it across messages')
+    parser.add_argument('--llm-cache', type=str, default=LLM_CACHE_FILE,
+                        help=f'LLM response cache file (default: {LLM_CACHE_FILE})')
+    parser.add_argument('--no-llm-cache', action='store_true',
+                        help='Always ask the LLM, ignore the response cache')
+    parser.add_argument('--text-store', type=str, default=DEFAULT_STORE_FILE,
+                        help=f'Cache of parsed message text (default: {DEFAULT_STORE_FILE})')
     parser.add_argument('--verbose', action='store_true',
                         help='Show detailed LLM responses for keyword tagging')
 
@@ -89,7 +102,13 @@ def main():
 
     # Process messages
     print("Tagging messages with keywords...")
-    print(f"LLM timeout per message: {LLM_TIMEOUT}s (configurable in llm_config.py)")
+    print(f"LLM timeout per request: {LLM_TIMEOUT}s (configurable in llm_config.py)")
+    if args.batch_size > 1:
+        print(f"Batch size: {args.batch_size} messages per LLM call")
+    if args.parallel > 1:
+        print(f"Parallel requests: {args.parallel}")
+    if args.reuse_prompt_cache:
+        print("Prompt cache reuse enabled - keyword list sent as fixed system prompt")
     if args.verbose:
         print("Verbose mode enabled - showing detailed LLM responses")
     print()
@@ -101,7 +120,12 @@ def main():
         output_file=args.dest,
         limit=args.limit,
         model=args.model,
-        verbose=args.verbose
+        verbose=args.verbose,
+        batch_size=args.batch_size,
+        reuse_prompt_cache=args.reuse_prompt_cache,
+        parallel=args.parallel,
+        cache_file=None if args.no_llm_cache else args.llm_cache,
+        text_store_file=args.text_store
     )
 
     processed_count = stats["processed"]
@@ -120,6 +144,26 @@ def main():
     print(f"Messages skipped:            {skipped_count}")
     print(f"Messages with errors:        {error_count}")
 
+    # Response cache
+    llm_cache = stats.get("llm_cache")
+    if llm_cache:
+        print(f"\nLLM response cache:")
+        print(f"  Hits / misses:             {llm_cache['hits']} / {llm_cache['misses']}")
+        print(f"  Hit rate:                  {llm_cache['hit_rate']:.1%}")
+        print(f"  Entries:                   {llm_cache['entries']}")
+
+    # Prompt evaluation cost (reported by Ollama)
+    prompt_eval = stats.get("prompt_eval", {})
+    if prompt_eval.get("calls"):
+        print(f"\nPrompt evaluation:")
+        print(f"  LLM calls:                 {prompt_eval['calls']}")
+        print(f"  Prompt tokens evaluated:   {prompt_eval['prompt_tokens']}")
+        print(f"  Prompt eval time:          {prompt_eval['prompt_eval_seconds']:.1f}s")
+        print(f"  First call:                {prompt_eval['first_call_ms']:.0f}ms")
+        if prompt_eval["avg_later_call_ms"] is not None:
+            print(f"  Later calls (average):     {prompt_eval['avg_later_call_ms']:.0f}ms")
+            print(f"  Estimated time saved:      {prompt_eval['estimated_seconds_saved']:.1f}s")
+
     # Keyword statistics
     keyword_counts = []
     for message in index_data.values():
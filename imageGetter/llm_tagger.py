@@ -1,25 +1,183 @@
 # ABOUTME: LLM-based keyword tagger for aircraft builder messages
 # ABOUTME: Matches message text against master keyword list using Ollama LLM
 
+import json
 import ollama
-from typing import List
-from llm_config import OLLAMA_HOST, LLM_MODEL, KEYWORD_TAGGING_PROMPT, LLM_TIMEOUT
+from typing import Dict, Iterable, List
+from llm_cache import LLMResponseCache
+from llm_config import (
+    OLLAMA_HOST,
+    LLM_MODEL,
+    KEYWORD_TAGGING_PROMPT,
+    CHAPTER_CATEGORIZATION_PROMPT,
+    KEYWORD_BATCH_TAGGING_PROMPT,
+    KEYWORD_TAGGING_SYSTEM_PROMPT,
+    KEYWORD_BATCH_TAGGING_SYSTEM_PROMPT,
+    LLM_TIMEOUT,
+    LLM_KEEP_ALIVE,
+    LLM_NUM_CTX
+)
 
 
 class KeywordTagger:
     """Tag messages with keywords using LLM semantic matching."""
 
-    def __init__(self, ollamahost: str = None):
+    def __init__(self, ollamahost: str = None, reuse_prompt_cache: bool = False,
+                 cache: LLMResponseCache = None):
         """Initialize keyword tagger with Ollama client.
 
         Args:
             ollamahost: Ollama server URL (defaults to OLLAMA_HOST from config)
+            reuse_prompt_cache: If True, tag via the chat API with the keyword list in a
+                fixed system message (and keep_alive), so Ollama reuses the evaluated
+                keyword prefix instead of re-processing it for every message
+            cache: Optional persistent response cache; messages already answered
+                for the same model, prompt and keyword list are not sent again
         """
         self.host = ollamahost or OLLAMA_HOST
+        self.reuse_prompt_cache = reuse_prompt_cache
+        self.cache = cache
         self.ollamaclient = ollama.Client(
             host=self.host,
             timeout=LLM_TIMEOUT
         )
+        self.prompt_eval_samples = []
+
+    def _record_prompt_eval(self, response):
+        """Keep prompt_eval_count/prompt_eval_duration reported by Ollama for one call."""
+        count = response.get('prompt_eval_count')
+        duration = response.get('prompt_eval_duration')
+        if count is not None and duration is not None:
+            self.prompt_eval_samples.append((count, duration))
+
+    def _generate(self, prompt: str, model: str = None, json_format: bool = False) -> str:
+        """Stateless completion: the whole prompt is evaluated on every call."""
+        kwargs = {"format": "json"} if json_format else {}
+        response = self.ollamaclient.generate(
+            model=model or LLM_MODEL,
+            prompt=prompt,
+            stream=False,
+            options={"num_ctx": LLM_NUM_CTX},
+            **kwargs
+        )
+        self._record_prompt_eval(response)
+        return response.get('response', '')
+
+    def _chat(self, system: str, user: str, model: str = None, json_format: bool = False) -> str:
+        """Chat completion with a fixed system message so its evaluated prefix can be reused."""
+        kwargs = {"format": "json"} if json_format else {}
+        response = self.ollamaclient.chat(
+            model=model or LLM_MODEL,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
+            ],
+            stream=False,
+            keep_alive=LLM_KEEP_ALIVE,
+            options={"num_ctx": LLM_NUM_CTX},
+            **kwargs
+        )
+        self._record_prompt_eval(response)
+        return response.get('message', {}).get('content', '')
+
+    @staticmethod
+    def _tag_prompt_version(keywords_str: str) -> str:
+        """Cache version for keyword tagging; shared by single, batch and prompt-cache modes."""
+        return LLMResponseCache.prompt_version(KEYWORD_TAGGING_PROMPT, keywords_str)
+
+    def _cache_get(self, model: str, prompt_version: str, message_text: str):
+        """Cached raw response or None (always None without a cache)."""
+        if self.cache is None:
+            return None
+        return self.cache.get(model or LLM_MODEL, prompt_version, message_text)
+
+    def _cache_put(self, model: str, prompt_version: str, message_text: str, raw_response: str):
+        """Remember a successful LLM response (no-op without a cache)."""
+        if self.cache is not None:
+            self.cache.put(model or LLM_MODEL, prompt_version, message_text, raw_response)
+
+    def _parse_tag_response(self, raw_response: str, keywords: List[str]) -> List[str]:
+        """Parse a comma/newline separated tagging response against the master list."""
+        response_text = raw_response.strip()
+        if not response_text or response_text.upper() == 'NONE':
+            return []
+
+        # Split by comma and/or newline (handle both formats)
+        candidates = []
+        for part in response_text.split(','):
+            candidates.extend(part.split('\n'))
+        return self._match_keywords(candidates, keywords)
+
+    def get_prompt_eval_stats(self) -> Dict:
+        """Summarize prompt evaluation cost reported by Ollama.
+
+        The first call evaluates the full prompt. With reuse_prompt_cache the
+        following calls only evaluate the message, so the difference between the
+        first call and the average later call estimates the time saved.
+
+        Returns:
+            Dictionary with calls, prompt_tokens, prompt_eval_seconds,
+            first_call_ms, avg_later_call_ms and estimated_seconds_saved
+            (timing fields are None until there are enough samples)
+        """
+        samples = self.prompt_eval_samples
+        stats = {
+            "calls": len(samples),
+            "prompt_tokens": sum(count for count, _ in samples),
+            "prompt_eval_seconds": sum(duration for _, duration in samples) / 1e9,
+            "first_call_ms": None,
+            "avg_later_call_ms": None,
+            "estimated_seconds_saved": None
+        }
+        if samples:
+            stats["first_call_ms"] = samples[0][1] / 1e6
+        if len(samples) > 1:
+            later = [duration for _, duration in samples[1:]]
+            stats["avg_later_call_ms"] = sum(later) / len(later) / 1e6
+            saved_ms = (stats["first_call_ms"] - stats["avg_later_call_ms"]) * len(later)
+            stats["estimated_seconds_saved"] = max(0.0, saved_ms / 1000)
+        return stats
+
+    @staticmethod
+    def _raise_if_model_not_found(e: Exception):
+        """Raise RuntimeError if e is an Ollama "model not found" error.
+
+        Args:
+            e: Exception raised by the Ollama client
+
+        Raises:
+            RuntimeError: If the configured model is not installed
+        """
+        error_msg = str(e)
+        if "not found" in error_msg.lower() and ("model" in error_msg.lower() or "404" in error_msg):
+            print(f"FATAL ERROR: Model not found. Check LLM_MODEL in llm_config.py")
+            print(f"Error details: {e}")
+            raise RuntimeError(f"LLM model not found: {e}") from e
+
+    @staticmethod
+    def _match_keywords(candidates: Iterable[str], keywords: List[str]) -> List[str]:
+        """Validate LLM keyword candidates against the master list.
+
+        Args:
+            candidates: Raw keyword strings from the LLM
+            keywords: Master keyword list
+
+        Returns:
+            Matching master keywords (case-insensitive, deduped, in candidate order)
+        """
+        master_by_lower = {}
+        for master_kw in keywords:
+            master_by_lower.setdefault(master_kw.lower(), master_kw)
+
+        matched_keywords = []
+        for keyword in candidates:
+            keyword = keyword.strip()
+            if not keyword or keyword.upper() == 'NONE':
+                continue
+            master_kw = master_by_lower.get(keyword.lower())
+            if master_kw is not None and master_kw not in matched_keywords:
+                matched_keywords.append(master_kw)
+        return matched_keywords
 
     def tag_message(self, message_text: str, keywords: List[str], model: str = None) -> tuple[List[str], str]:
         """Tag message with relevant keywords using LLM.
@@ -44,48 +202,30 @@ class KeywordTagger:
             # Format keyword list for prompt
             keywords_str = ", ".join(keywords)
 
-            # Format prompt
-            prompt = KEYWORD_TAGGING_PROMPT.format(
-                keywords=keywords_str,
-                message=message_text
-            )
-
-            # Call LLM
-            response = self.ollamaclient.generate(
-                model=model or LLM_MODEL,
-                prompt=prompt,
-                stream=False
-            )
-
-            # Parse response (keep raw for return, strip for parsing)
-            raw_response = response.get('response', '')
-            response_text = raw_response.strip()
-            if not response_text or response_text.upper() == 'NONE':
-                return ([], raw_response)
-
-            # Split by comma and/or newline (handle both formats)
-            matched_keywords = []
-            for part in response_text.split(','):
-                for keyword in part.split('\n'):
-                    keyword = keyword.strip()
-                    if keyword and keyword.upper() != 'NONE':
-                        # Validate against master keyword list (case-insensitive)
-                        keyword_lower = keyword.lower()
-                        for master_kw in keywords:
-                            if master_kw.lower() == keyword_lower:
-                                if master_kw not in matched_keywords:
-                                    matched_keywords.append(master_kw)
-                                break
-
-            return (matched_keywords, raw_response)
+            # Cached answer from an earlier run?
+            raw_response = self._cache_get(model, self._tag_prompt_version(keywords_str), message_text)
+
+            # Call LLM (keep raw response for return)
+            if raw_response is None:
+                if self.reuse_prompt_cache:
+                    raw_response = self._chat(
+                        KEYWORD_TAGGING_SYSTEM_PROMPT.format(keywords=keywords_str),
+                        message_text,
+                        model=model
+                    )
+                else:
+                    prompt = KEYWORD_TAGGING_PROMPT.format(
+                        keywords=keywords_str,
+                        message=message_text
+                    )
+                    raw_response = self._generate(prompt, model=model)
+                self._cache_put(model, self._tag_prompt_version(keywords_str), message_text, raw_response)
+
+            return (self._parse_tag_response(raw_response, keywords), raw_response)
 
         except Exception as e:
-            error_msg = str(e)
             # Model not found is a configuration error - terminate immediately
-            if "not found" in error_msg.lower() and ("model" in error_msg.lower() or "404" in error_msg):
-                print(f"FATAL ERROR: Model not found. Check LLM_MODEL in llm_config.py")
-                print(f"Error details: {e}")
-                raise RuntimeError(f"LLM model not found: {e}") from e
+            self._raise_if_model_not_found(e)
 
             # Other errors: log and return empty list (graceful degradation)
             print(f"ERROR tagging message: {e}")
@@ -108,21 +248,14 @@ class KeywordTagger:
             return ([], "")
 
         try:
-            # Import prompt
-            from llm_config import CHAPTER_CATEGORIZATION_PROMPT
-
-            # Format prompt
-            prompt = CHAPTER_CATEGORIZATION_PROMPT.format(message=message_text)
+            prompt_version = LLMResponseCache.prompt_version(CHAPTER_CATEGORIZATION_PROMPT)
+            raw_response = self._cache_get(model, prompt_version, message_text)
 
-            # Call LLM
-            response = self.ollamaclient.generate(
-                model=model or LLM_MODEL,
-                prompt=prompt,
-                stream=False
-            )
-
-            # Get raw response (keep original for return)
-            raw_response = response.get('response', '')
+            # Call LLM (keep raw response for return)
+            if raw_response is None:
+                prompt = CHAPTER_CATEGORIZATION_PROMPT.format(message=message_text)
+                raw_response = self._generate(prompt, model=model)
+                self._cache_put(model, prompt_version, message_text, raw_response)
             response_text = raw_response.strip()
 
             # Parse chapter numbers using regex
@@ -141,13 +274,101 @@ class KeywordTagger:
             return (chapters, raw_response)
 
         except Exception as e:
-            error_msg = str(e)
             # Model not found is a configuration error - terminate immediately
-            if "not found" in error_msg.lower() and ("model" in error_msg.lower() or "404" in error_msg):
-                print(f"FATAL ERROR: Model not found. Check LLM_MODEL in llm_config.py")
-                print(f"Error details: {e}")
-                raise RuntimeError(f"LLM model not found: {e}") from e
+            self._raise_if_model_not_found(e)
 
             # Other errors: log and return empty list (graceful degradation)
             print(f"ERROR categorizing message: {e}")
             return ([], f"ERROR: {e}")
+
+    def tag_messages_batch(self, messages: Dict[str, str], keywords: List[str],
+                           model: str = None) -> Dict[str, tuple[List[str], str]]:
+        """Tag several messages with one LLM call.
+
+        The keyword list is sent once for the whole batch instead of once per
+        message. The LLM is asked for a JSON object keyed by message id. If the
+        response can't be parsed, or leaves out some ids, those messages fall
+        back to tag_message() one at a time.
+
+        Args:
+            messages: Dictionary mapping message id -> message text
+            keywords: Master keyword list to match against
+            model: Optional model override (defaults to LLM_MODEL from config)
+
+        Returns:
+            Dictionary mapping message id -> (matched_keywords, raw_response).
+            raw_response is the full batch response for batched messages.
+        """
+        results = {msg_id: ([], "") for msg_id, text in messages.items()
+                   if not text or not text.strip()}
+        pending = [msg_id for msg_id in messages if msg_id not in results]
+
+        if not pending or not keywords:
+            return {msg_id: ([], "") for msg_id in messages}
+
+        # Messages answered in an earlier run don't go into the batch
+        keywords_str = ", ".join(keywords)
+        prompt_version = self._tag_prompt_version(keywords_str)
+        for msg_id in list(pending):
+            cached = self._cache_get(model, prompt_version, messages[msg_id])
+            if cached is not None:
+                results[msg_id] = (self._parse_tag_response(cached, keywords), cached)
+                pending.remove(msg_id)
+
+        if not pending:
+            return results
+        if len(pending) == 1:
+            results[pending[0]] = self.tag_message(messages[pending[0]], keywords, model=model)
+            return results
+
+        # Short ids keep the prompt small and are hard for the LLM to mangle
+        short_ids = {str(i + 1): msg_id for i, msg_id in enumerate(pending)}
+
+        try:
+            messages_json = json.dumps({sid: messages[msg_id] for sid, msg_id in short_ids.items()},
+                                       indent=1, ensure_ascii=False)
+
+            if self.reuse_prompt_cache:
+                raw_response = self._chat(
+                    KEYWORD_BATCH_TAGGING_SYSTEM_PROMPT.format(keywords=keywords_str),
+                    messages_json,
+                    model=model,
+                    json_format=True
+                )
+            else:
+                prompt = KEYWORD_BATCH_TAGGING_PROMPT.format(
+                    keywords=keywords_str,
+                    messages=messages_json
+                )
+                raw_response = self._generate(prompt, model=model, json_format=True)
+
+        except Exception as e:
+            self._raise_if_model_not_found(e)
+            print(f"ERROR tagging message batch: {e}")
+            for msg_id in pending:
+                results[msg_id] = ([], f"ERROR: {e}")
+            return results
+
+        try:
+            parsed = json.loads(raw_response)
+        except (json.JSONDecodeError, TypeError):
+            parsed = None
+        if not isinstance(parsed, dict):
+            parsed = {}
+
+        for sid, msg_id in short_ids.items():
+            value = parsed.get(sid)
+            if isinstance(value, str):
+                value = value.split(',')
+            if isinstance(value, list):
+                candidates = [str(v) for v in value]
+                matched_keywords = self._match_keywords(candidates, keywords)
+                results[msg_id] = (matched_keywords, raw_response)
+                # Cache in single-message response format so either path can reuse it
+                self._cache_put(model, prompt_version, messages[msg_id],
+                                ", ".join(matched_keywords) or "NONE")
+            else:
+                # Missing or malformed entry - ask about this message on its own
+                results[msg_id] = self.tag_message(messages[msg_id], keywords, model=model)
+
+        return results
@@ -0,0 +1,272 @@
+# ABOUTME: Shared store of cleaned message text read from msgs_md markdown files
+# ABOUTME: One directory walk builds an id-to-path map; parsed text is cached in SQLite across runs
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULT_MSGS_MD_DIR = "../data/msgs_md"
+DEFAULT_STORE_FILE = "../data/message_text.sqlite"
+
+# Commit cached text after this many new entries (and on close)
+COMMIT_EVERY = 200
+
+# Parsed text kept in memory (UTF-8 bytes); least recently used texts are dropped first
+MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def parse_message_body(content: str) -> str:
+    """Extract body text from a msgs_md markdown file.
+
+    The body starts after the subject line (marked with "# "). Image markers
+    and bare https:// lines (profile photos) are dropped.
+
+    Args:
+        content: Full markdown file content
+
+    Returns:
+        Body text (stripped)
+    """
+    body_lines = []
+    found_subject = False
+
+    for line in content.split('\n'):
+        stripped = line.strip()
+        # Once we find the subject line, start collecting body text
+        if stripped.startswith('# '):
+            found_subject = True
+            continue
+
+        # After finding subject, collect all text
+        if found_subject:
+            # Skip image markers and profile photos
+            if not stripped.startswith('![') and not stripped.startswith('https://'):
+                body_lines.append(line)
+
+    return '\n'.join(body_lines).strip()
+
+
+def _candidate_dirs(message_id: str) -> Tuple[str, ...]:
+    """Directories a message file may live in, in lookup priority order."""
+    dirs = (message_id[0].upper(), message_id[0].lower())
+    # Messages starting with lowercase 'a' followed by a digit are kept in aDigits
+    if message_id[0].lower() == 'a' and len(message_id) > 1 and message_id[1].isdigit():
+        dirs += ("aDigits",)
+    return dirs
+
+
+class MessageTextStore:
+    """Cleaned subject + body text for messages, shared by all pipeline stages.
+
+    The msgs_md tree is walked once to map message id -> file (with size and
+    mtime from the same walk), so lookups never probe directories. Parsed
+    bodies are cached in an optional SQLite file keyed by file path and
+    revalidated against size/mtime, so later runs skip reading and parsing
+    unchanged files. Recently used texts are also kept in memory, up to
+    memory_bytes. Safe to share between threads.
+    """
+
+    def __init__(self, msgs_md_dir: str = DEFAULT_MSGS_MD_DIR, store_path: str = None,
+                 memory_bytes: int = MEMORY_CACHE_BYTES):
+        """Open the store.
+
+        Args:
+            msgs_md_dir: Path to msgs_md directory
+            store_path: SQLite cache file (None = cache in memory for this run only)
+            memory_bytes: Size cap of the in-memory text cache
+        """
+        self.msgs_md_dir = msgs_md_dir
+        self.store_path = store_path
+        self.memory_bytes = memory_bytes
+        self._lock = threading.Lock()
+        self._path_map: Optional[Dict[str, Tuple[str, int, int]]] = None
+        self._memory: "OrderedDict[str, Tuple[int, int, str, int]]" = OrderedDict()
+        self._memory_used = 0
+        self._uncommitted = 0
+        self.reads = 0
+        self.cache_hits = 0
+
+        self._conn = None
+        if store_path:
+            Path(store_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(store_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS texts (
+                       path TEXT PRIMARY KEY,
+                       mtime_ns INTEGER NOT NULL,
+                       size INTEGER NOT NULL,
+                       text TEXT NOT NULL
+                   )"""
+            )
+            self._conn.commit()
+
+    def _build_path_map(self) -> Dict[str, Tuple[str, int, int]]:
+        """Walk msgs_md once: message id -> (path, mtime_ns, size)."""
+        path_map = {}
+        priority = {}
+        if not os.path.isdir(self.msgs_md_dir):
+            return path_map
+
+        for dir_entry in os.scandir(self.msgs_md_dir):
+            if not dir_entry.is_dir():
+                continue
+            for file_entry in os.scandir(dir_entry.path):
+                if not file_entry.name.endswith('.md') or not file_entry.is_file():
+                    continue
+                message_id = file_entry.name[:-3]
+                candidates = _candidate_dirs(message_id)
+                if dir_entry.name not in candidates:
+                    continue
+                rank = candidates.index(dir_entry.name)
+                if message_id in priority and priority[message_id] <= rank:
+                    continue
+                stat = file_entry.stat()
+                priority[message_id] = rank
+                path_map[message_id] = (file_entry.path, stat.st_mtime_ns, stat.st_size)
+
+        return path_map
+
+    def get_path(self, message_id: str) -> Optional[str]:
+        """Markdown file for a message id, or None if there is none."""
+        if self._path_map is None:
+            with self._lock:
+                if self._path_map is None:
+                    self._path_map = self._build_path_map()
+        entry = self._path_map.get(message_id) if message_id else None
+        return entry[0] if entry else None
+
+    def _cached_text(self, path: str, mtime_ns: int, size: int) -> Optional[str]:
+        """Cached text for a file if it is still current."""
+        with self._lock:
+            cached = self._memory.get(path)
+            if cached is not None:
+                self._memory.move_to_end(path)
+            elif self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT mtime_ns, size, text FROM texts WHERE path=?", (path,)
+                ).fetchone()
+                cached = tuple(row) if row else None
+        if cached and cached[0] == mtime_ns and cached[1] == size:
+            self.cache_hits += 1
+            return cached[2]
+        return None
+
+    def _store_text(self, path: str, mtime_ns: int, size: int, text: str):
+        """Remember parsed text for a file."""
+        with self._lock:
+            self._remember(path, mtime_ns, size, text)
+            if self._conn is not None:
+                self._conn.execute("INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?)",
+                                   (path, mtime_ns, size, text))
+                self._uncommitted += 1
+                if self._uncommitted >= COMMIT_EVERY:
+                    self._conn.commit()
+                    self._uncommitted = 0
+
+    def _remember(self, path: str, mtime_ns: int, size: int, text: str):
+        """Put text in the memory cache, evicting least recently used texts over the cap."""
+        old = self._memory.pop(path, None)
+        if old is not None:
+            self._memory_used -= old[3]
+        nbytes = len(text.encode('utf-8'))
+        if nbytes > self.memory_bytes:
+            return
+        self._memory[path] = (mtime_ns, size, text, nbytes)
+        self._memory_used += nbytes
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= evicted[3]
+
+    def get_body(self, message_id: str) -> Optional[str]:
+        """Cleaned body text of a message.
+
+        Args:
+            message_id: Message id (markdown file stem)
+
+        Returns:
+            Body text, or None if the message has no markdown file
+
+        Raises:
+            OSError: If the file exists but can't be read
+        """
+        self.get_path(message_id)
+        entry = self._path_map.get(message_id) if message_id else None
+        if entry is None:
+            return None
+
+        path, mtime_ns, size = entry
+        body = self._cached_text(path, mtime_ns, size)
+        if body is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                body = parse_message_body(f.read())
+            self.reads += 1
+            self._store_text(path, mtime_ns, size, body)
+        return body
+
+    def get_text(self, message: Dict, max_chars: int = None) -> str:
+        """Subject + body text for an index message.
+
+        Args:
+            message: Message dictionary with metadata (subject, message_id)
+            max_chars: Truncate to this many characters (adds "...")
+
+        Returns:
+            "{subject}\n\n{body}", or just the subject if there is no markdown file
+        """
+        metadata = message.get("metadata", {})
+        subject = metadata.get("subject", "")
+        message_id = metadata.get("message_id", "")
+
+        try:
+            body = self.get_body(message_id)
+        except Exception as e:
+            # On any error, fall back to just subject
+            print(f"Warning: Could not read message body for {message_id}: {e}")
+            return subject
+        if body is None:
+            return subject
+
+        full_text = f"{subject}\n\n{body}"
+        if max_chars is not None and len(full_text) > max_chars:
+            full_text = full_text[:max_chars] + "..."
+        return full_text
+
+    def flush(self):
+        """Commit cached text to the database (store stays open)."""
+        if self._conn is not None:
+            with self._lock:
+                self._conn.commit()
+                self._uncommitted = 0
+
+    def close(self):
+        """Commit cached text and close the database."""
+        if self._conn is not None:
+            with self._lock:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+
+_shared_stores: Dict[Tuple[str, Optional[str]], MessageTextStore] = {}
+_shared_lock = threading.Lock()
+
+
+def get_message_store(msgs_md_dir: str = DEFAULT_MSGS_MD_DIR, store_path: str = None) -> MessageTextStore:
+    """Process-wide store for a msgs_md directory, so the path map is built only once.
+
+    Args:
+        msgs_md_dir: Path to msgs_md directory
+        store_path: Optional SQLite cache file
+
+    Returns:
+        Shared MessageTextStore
+    """
+    key = (msgs_md_dir, store_path)
+    with _shared_lock:
+        if key not in _shared_stores:
+            _shared_stores[key] = MessageTextStore(msgs_md_dir, store_path)
+        return _shared_stores[key]
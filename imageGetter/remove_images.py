@@ -1,22 +1,21 @@
 # ABOUTME: Remove images from index based on removal list files
 # ABOUTME: Reads image filenames from text files and removes them from the index
 
-import json
 from pathlib import Path
 from typing import Dict, Set, List, Tuple
+from index_store import IndexStore, load_index_file, save_index_file
 
 
 def load_index(index_file: str) -> Dict:
-    """Load image index from JSON file.
+    """Load image index from JSON file or index database.
 
     Args:
-        index_file: Path to image index JSON file
+        index_file: Path to image index JSON file (or .sqlite/.db IndexStore)
 
     Returns:
         Dictionary of messages with metadata and images
     """
-    with open(index_file, 'r') as f:
-        return json.load(f)
+    return load_index_file(index_file)
 
 
 def load_removal_lists(removal_files: List[str]) -> Set[str]:
@@ -93,12 +92,48 @@ def remove_images_from_index(index_data: Dict, removal_set: Set[str]) -> Tuple[D
     return result, stats
 
 
+def remove_images_from_store(store: IndexStore, removal_set: Set[str]) -> Dict:
+    """Remove images from an IndexStore in place, touching only affected messages.
+
+    Same rules and statistics as remove_images_from_index().
+
+    Args:
+        store: Open IndexStore
+        removal_set: Set of image filenames to remove
+
+    Returns:
+        stats_dict with images_removed, messages_affected, messages_removed
+    """
+    stats = {
+        "images_removed": 0,
+        "messages_affected": 0,
+        "messages_removed": 0
+    }
+
+    with store.transaction():
+        for msg_id in store.messages_with_images(removal_set):
+            images = store.get_images(msg_id)
+            kept_images = [image for image in images if image.get("local_filename", "") not in removal_set]
+            stats["images_removed"] += len(images) - len(kept_images)
+            stats["messages_affected"] += 1
+            if kept_images:
+                store.set_images(msg_id, kept_images)
+            else:
+                store.delete_message(msg_id)
+                stats["messages_removed"] += 1
+        # Like the JSON path, messages without images do not stay in the index
+        for msg_id in store.messages_without_images():
+            store.delete_message(msg_id)
+            stats["messages_removed"] += 1
+
+    return stats
+
+
 def save_index(index_data: Dict, output_file: str):
-    """Save image index to JSON file.
+    """Save image index to JSON file or index database.
 
     Args:
         index_data: Dictionary to save
-        output_file: Path to output file
+        output_file: Path to output file (or .sqlite/.db IndexStore)
     """
-    with open(output_file, 'w') as f:
-        json.dump(index_data, f, indent=2)
+    save_index_file(index_data, output_file)
@@ -4,7 +4,8 @@
 
 import argparse
 from pathlib import Path
-from remove_images import load_index, load_removal_lists, remove_images_from_index, save_index
+from remove_images import load_index, load_removal_lists, remove_images_from_index, remove_images_from_store, save_index
+from index_store import IndexStore, updates_in_place
 
 
 def main():
@@ -40,10 +41,18 @@ Examples:
             print(f"Error: Removal list file not found: {removal_file}")
             return 1
 
+    # Same index database in and out: update the affected messages in place
+    store = IndexStore(args.index_file) if updates_in_place(args.index_file, args.output_file) else None
+
     print(f"Loading index from {args.index_file}...")
-    index_data = load_index(args.index_file)
-    total_messages = len(index_data)
-    total_images_before = sum(len(m.get("images", [])) for m in index_data.values())
+    if store is not None:
+        index_data = None
+        total_messages = len(store)
+        total_images_before = store.image_count()
+    else:
+        index_data = load_index(args.index_file)
+        total_messages = len(index_data)
+        total_images_before = sum(len(m.get("images", [])) for m in index_data.values())
     print(f"Loaded {total_messages} messages with {total_images_before} images")
     print()
 
@@ -55,9 +64,13 @@ Examples:
     print()
 
     print("Removing images from index...")
-    cleaned_index, stats = remove_images_from_index(index_data, removal_set)
-
-    total_images_after = sum(len(m.get("images", [])) for m in cleaned_index.values())
+    if store is not None:
+        stats = remove_images_from_store(store, removal_set)
+        total_images_after = store.image_count()
+        store.close()
+    else:
+        cleaned_index, stats = remove_images_from_index(index_data, removal_set)
+        total_images_after = sum(len(m.get("images", [])) for m in cleaned_index.values())
 
     print()
     print("="*60)
@@ -73,8 +86,9 @@ Examples:
     print("="*60)
     print()
 
-    print(f"Saving cleaned index to {args.output_file}...")
-    save_index(cleaned_index, args.output_file)
+    if store is None:
+        print(f"Saving cleaned index to {args.output_file}...")
+        save_index(cleaned_index, args.output_file)
     print(f"Cleaned index saved to: {args.output_file}")
     print()
 
@@ -1,26 +1,25 @@
 # ABOUTME: Batch processor for search-based keyword tagging
 # ABOUTME: Tags all messages in image index using SearchTagger with stemming
 
-import json
 import shutil
-from pathlib import Path
 from datetime import datetime
 from typing import Dict, List
 from search_tagger import SearchTagger
+from message_store import DEFAULT_MSGS_MD_DIR, get_message_store
+from index_store import load_index_file, save_index_file, save_keywords
 from llm_config import INVALID_KEYWORDS
 
 
 def load_image_index(index_file: str) -> Dict:
-    """Load image index from JSON file.
+    """Load image index from JSON file or index database.
 
     Args:
-        index_file: Path to JSON file
+        index_file: Path to JSON file (or .sqlite/.db IndexStore)
 
     Returns:
         Dictionary of messages
     """
-    with open(index_file, 'r') as f:
-        return json.load(f)
+    return load_index_file(index_file)
 
 
 def load_keywords(keywords_file: str) -> List[str]:
@@ -45,11 +44,11 @@ def load_keywords(keywords_file: str) -> List[str]:
     return keywords
 
 
-def extract_message_text(message: Dict, msgs_md_dir: str = "../data/msgs_md") -> str:
+def extract_message_text(message: Dict, msgs_md_dir: str = DEFAULT_MSGS_MD_DIR) -> str:
     """Extract full message text from markdown file for keyword searching.
 
-    Reads the full message body from the corresponding markdown file
-    in data/msgs_md/{first_letter}/{message_id}.md
+    Reads the message body through the shared MessageTextStore for
+    msgs_md_dir (data/msgs_md/{first_letter}/{message_id}.md).
 
     Args:
         message: Message dictionary with metadata
@@ -58,67 +57,7 @@ def extract_message_text(message: Dict, msgs_md_dir: str = "../data/msgs_md") ->
     Returns:
         Clean text string for searching (subject + body)
     """
-    from pathlib import Path
-
-    metadata = message.get("metadata", {})
-    subject = metadata.get("subject", "")
-    message_id = metadata.get("message_id", "")
-
-    # If no message_id, return just subject
-    if not message_id:
-        return subject
-
-    # Construct path to markdown file: msgs_md/{first_letter}/{message_id}.md
-    first_letter = message_id[0].upper()
-    md_file = Path(msgs_md_dir) / first_letter / f"{message_id}.md"
-
-    # If file doesn't exist, return just subject
-    if not md_file.exists():
-        # Try lowercase directory (some messages might be stored there)
-        first_letter_lower = message_id[0].lower()
-        md_file = Path(msgs_md_dir) / first_letter_lower / f"{message_id}.md"
-        if not md_file.exists():
-            # Also try aDigits directory for messages starting with lowercase 'a' followed by digit
-            if message_id[0].lower() == 'a' and len(message_id) > 1 and message_id[1].isdigit():
-                md_file = Path(msgs_md_dir) / "aDigits" / f"{message_id}.md"
-                if not md_file.exists():
-                    return subject
-            else:
-                return subject
-
-    # Read markdown file and extract body text
-    try:
-        with open(md_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Skip the first few lines (metadata header) and extract body
-        # The body starts after the subject line (marked with "# ")
-        lines = content.split('\n')
-        body_lines = []
-        found_subject = False
-
-        for line in lines:
-            # Once we find the subject line, start collecting body text
-            if line.strip().startswith('# '):
-                found_subject = True
-                continue
-
-            # After finding subject, collect all text
-            if found_subject:
-                # Skip image markers and profile photos
-                if not line.strip().startswith('![') and not line.strip().startswith('https://'):
-                    body_lines.append(line)
-
-        body_text = '\n'.join(body_lines).strip()
-
-        # Return subject + body (full text for keyword searching)
-        full_text = f"{subject}\n\n{body_text}"
-        return full_text
-
-    except Exception as e:
-        # On any error, fall back to just subject
-        print(f"Warning: Could not read message body for {message_id}: {e}")
-        return subject
+    return get_message_store(msgs_md_dir).get_text(message)
 
 
 def tag_messages(
@@ -128,7 +67,8 @@ def tag_messages(
     limit: int = None,
     verbose: bool = False,
     keep_existing: bool = False,
-    msgs_md_dir: str = "../data/msgs_md"
+    msgs_md_dir: str = DEFAULT_MSGS_MD_DIR,
+    text_store_file: str = None
 ) -> Dict:
     """Tag messages in index with keywords using search and stemming.
 
@@ -140,6 +80,7 @@ def tag_messages(
         verbose: If True, print detailed output for each message
         keep_existing: If True, merge with existing keywords; if False, replace (default: False)
         msgs_md_dir: Path to msgs_md directory (default: ../data/msgs_md)
+        text_store_file: Optional SQLite cache of parsed message text (see MessageTextStore)
 
     Returns:
         Dictionary with statistics:
@@ -155,8 +96,8 @@ def tag_messages(
     index_data = load_image_index(index_file)
     keywords = load_keywords(keywords_file)
 
-    # Initialize tagger
-    tagger = SearchTagger()
+    # Initialize tagger (vocabulary compiled once)
+    tagger = SearchTagger(keywords)
 
     # Statistics
     stats = {
@@ -165,20 +106,26 @@ def tag_messages(
         "errors": 0
     }
 
-    # Count total messages to process for progress tracking
-    total_to_process = len(index_data)
-    if limit and limit < total_to_process:
-        total_to_process = limit
+    # Create allowed vocabulary (case-insensitive) from aircraft_keywords.txt
+    allowed_keywords_lower = {kw.lower() for kw in keywords}
+    invalid_lower = {kw.lower() for kw in INVALID_KEYWORDS}
+
+    # Select messages (stop at limit) and extract message text from markdown files
+    selected_ids = list(index_data)
+    if limit is not None:
+        selected_ids = selected_ids[:limit]
+    total_to_process = len(selected_ids)
+    text_store = get_message_store(msgs_md_dir, text_store_file)
+    message_texts = {msg_id: text_store.get_text(index_data[msg_id]) for msg_id in selected_ids}
+    text_store.flush()
+
+    # Search for keywords in all message texts in one pass
+    matched_by_id = tagger.find_keywords_batch(message_texts)
 
     # Process messages
     messages_processed = 0
-    for msg_id, message in index_data.items():
-        # Check limit
-        if limit is not None and messages_processed >= limit:
-            break
-
-        # Extract message text from markdown file
-        message_text = extract_message_text(message, msgs_md_dir)
+    for msg_id in selected_ids:
+        message = index_data[msg_id]
 
         try:
             if verbose:
@@ -188,14 +135,10 @@ def tag_messages(
             # Get existing keywords (if any)
             existing_keywords = message.get("keywords", [])
 
-            # Create allowed vocabulary (case-insensitive) from aircraft_keywords.txt
-            allowed_keywords_lower = {kw.lower() for kw in keywords}
-
             # Filter existing keywords: keep only those in allowed vocabulary
             valid_existing = [kw for kw in existing_keywords if kw.lower() in allowed_keywords_lower]
 
-            # Search for keywords in message text
-            matched_keywords = tagger.find_keywords(message_text, keywords)
+            matched_keywords = matched_by_id[msg_id]
 
             # Decide whether to merge or replace
             if keep_existing:
@@ -212,7 +155,6 @@ def tag_messages(
                 deduplicated = matched_keywords
 
             # Filter out invalid keywords (should already be filtered, but belt-and-suspenders)
-            invalid_lower = {kw.lower() for kw in INVALID_KEYWORDS}
             final_keywords = [kw for kw in deduplicated if kw.lower() not in invalid_lower]
 
             # Store keywords
@@ -237,25 +179,22 @@ def tag_messages(
             stats["processed"] += 1
             messages_processed += 1
 
-        # Auto-save every 50 messages
-        if stats["processed"] % 50 == 0:
-            if not verbose:
-                print(f"  → Auto-saved after {stats['processed']} messages")
-            save_image_index(index_data, output_file)
-
-    # Final save
-    save_image_index(index_data, output_file)
+    # Final save (tagging in place: only the keywords of tagged messages change)
+    save_image_index(index_data, output_file,
+                     selected_ids if output_file == index_file else None)
 
     return stats
 
 
-def save_image_index(index_data: Dict, index_file: str):
-    """Save image index to JSON file.
+def save_image_index(index_data: Dict, index_file: str, changed_ids: List[str] = None):
+    """Save image index to JSON file or index database.
 
     Args:
         index_data: Dictionary to save
-        index_file: Path to save to
+        index_file: Path to save to (.sqlite/.db for an IndexStore)
+        changed_ids: Optional ids of messages whose keywords changed; an
+            existing index database then only gets those keywords updated
     """
-    # Write data directly (no backup needed since we write to new files)
-    with open(index_file, 'w') as f:
-        json.dump(index_data, f, indent=2)
+    if changed_ids is not None and save_keywords(index_data, index_file, changed_ids):
+        return
+    save_index_file(index_data, index_file)
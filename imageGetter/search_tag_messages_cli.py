@@ -11,6 +11,7 @@ from search_tag_messages import (
     tag_messages
 )
 from llm_config import INVALID_KEYWORDS
+from message_store import DEFAULT_STORE_FILE
 
 
 def filter_to_vocabulary(index_data: dict, allowed_keywords: list) -> dict:
@@ -111,7 +112,7 @@ def clean_invalid_keywords_from_index(index_data: dict) -> dict:
 def main():
     parser = argparse.ArgumentParser(
         description='Tag messages with keywords using search and stemming (fast)',
-        usage='%(prog)s [-h] [--keywords KEYWORDS] [--msgs-md-dir DIR] [--limit N] [--verbose] [--no-clean] [--keep-existing-keywords] SOURCE [DEST]'
+        usage='%(prog)s [-h] [--keywords KEYWORDS] [--msgs-md-dir DIR] [--text-store FILE] [--limit N] [--verbose] [--no-clean] [--keep-existing-keywords] SOURCE [DEST]'
     )
 
     # Positional arguments
@@ -125,6 +126,8 @@ def main():
                         help='Keywords file to use (default: aircraft_keywords.txt)')
     parser.add_argument('--msgs-md-dir', type=str, default='../data/msgs_md',
                         help='Path to msgs_md directory (default: ../data/msgs_md)')
+    parser.add_argument('--text-store', type=str, default=DEFAULT_STORE_FILE,
+                        help=f'Cache of parsed message text (default: {DEFAULT_STORE_FILE})')
     parser.add_argument('--limit', type=int, default=None,
                         help='Process only first N messages (default: all)')
     parser.add_argument('--verbose', action='store_true',
@@ -231,7 +234,8 @@ def main():
         limit=args.limit,
         verbose=args.verbose,
         keep_existing=args.keep_existing_keywords,
-        msgs_md_dir=args.msgs_md_dir
+        msgs_md_dir=args.msgs_md_dir,
+        text_store_file=args.text_store
     )
 
     processed_count = stats["processed"]
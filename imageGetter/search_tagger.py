@@ -2,21 +2,207 @@
 # ABOUTME: Fast, deterministic alternative to LLM-based tagging
 
 import re
-from typing import List
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Tuple
 from llm_config import INVALID_KEYWORDS
 
+# Suffix rules (order matters - try longer suffixes first)
+SUFFIXES = [
+    ('ational', 'ate'),    # relational -> relate
+    ('tional', 'tion'),    # conditional -> condition
+    ('tion', 'tion'),      # condition -> condition (keep as-is)
+    ('ness', ''),          # goodness -> good
+    ('ment', ''),          # establishment -> establish
+    ('iest', 'y'),         # happiest -> happy
+    ('iest', 'i'),         # prettiest -> pretti
+    ('ying', 'y'),         # flying -> fly
+    ('ing', ''),           # installing -> install
+    ('ies', 'y'),          # berries -> berry
+    ('ied', 'y'),          # tried -> try
+    ('sses', 'ss'),        # dresses -> dress
+    ('xes', 'x'),          # boxes -> box
+    ('zes', 'z'),          # sizes -> size
+    ('ches', 'ch'),        # switches -> switch
+    ('shes', 'sh'),        # dishes -> dish
+    ('ses', 's'),          # houses -> hous
+    ('ess', 'ess'),        # dress -> dress (keep as-is)
+    ('est', ''),           # fastest -> fast
+    ('ers', 'er'),         # workers -> worker
+    ('eer', 'eer'),        # engineer -> engineer (keep as-is)
+    ('ied', 'i'),          # died -> di
+    ('eed', 'ee'),         # agreed -> agree
+    ('eds', 'ed'),         # beds -> bed
+    ('ed', ''),            # installed -> install
+    ('es', ''),            # boxes -> box (after longer rules)
+    ('er', ''),            # faster -> fast
+    ('ly', ''),            # quickly -> quick
+    ('s', ''),             # firewalls -> firewall
+]
 
-class SearchTagger:
-    """Tag messages with keywords using search and stemming."""
+# Words are runs of word characters; hyphens separate words so "co-pilot" matches "pilot"
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+INVALID_KEYWORDS_LOWER = frozenset(kw.lower() for kw in INVALID_KEYWORDS)
+
+
+@lru_cache(maxsize=200000)
+def stem_word(word: str) -> str:
+    """Apply simple stemming to a word (memoized).
+
+    Handles common suffixes: plurals, -ing, -ed, -er, -est, -ly, -tion, -ness
+
+    Args:
+        word: Word to stem (lowercase)
+
+    Returns:
+        Stemmed word
+    """
+    # Handle empty/short words
+    if len(word) <= 2:
+        return word
+
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix):
+            stem = word[:-len(suffix)] + replacement
+            # Don't make word too short (minimum 2 chars after stemming)
+            if len(stem) >= 2:
+                return stem
+
+    return word
+
+
+def stem_tokens(text: str) -> List[str]:
+    """Split text into lowercase words and stem each one.
+
+    Args:
+        text: Message text or keyword
+
+    Returns:
+        List of stems in text order
+    """
+    return [stem_word(word) for word in WORD_PATTERN.findall(text.lower())]
+
+
+class PhraseAutomaton:
+    """Aho-Corasick automaton over stemmed token sequences.
+
+    Each keyword is a path of stems in a token trie; failure links let one
+    left-to-right pass over a message report every keyword ending at each
+    token, including overlapping and nested phrases ("nose gear" and "gear").
+    Matching cost is linear in message length regardless of vocabulary size.
+    """
 
     def __init__(self):
-        """Initialize search tagger."""
-        pass
+        """Create an automaton with only the root state."""
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[str]] = [[]]
 
-    def _stem(self, word: str) -> str:
-        """Apply simple stemming to a word.
+    def add(self, stems: Tuple[str, ...], keyword: str):
+        """Add a keyword under its stem sequence (call build() afterwards).
+
+        Args:
+            stems: Stemmed tokens of the keyword
+            keyword: Keyword to report when the sequence is seen
+        """
+        state = 0
+        for stem in stems:
+            next_state = self.goto[state].get(stem)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][stem] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(keyword)
+
+    def build(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for stem, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and stem not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(stem, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, stems: List[str]) -> set:
+        """Run one pass over a message's stems.
+
+        Args:
+            stems: Stemmed tokens of the message
+
+        Returns:
+            Set of keywords whose stem sequence occurs in the message
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for stem in stems:
+            while state and stem not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(stem, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class SearchTagger:
+    """Tag messages with keywords using search and stemming.
+
+    The vocabulary is compiled once into a PhraseAutomaton over keyword stems,
+    so tagging a message is a single pass over its words, for single-word and
+    multi-word keywords alike.
+    """
+
+    def __init__(self, keywords: List[str] = None):
+        """Initialize search tagger.
+
+        Args:
+            keywords: Optional vocabulary to compile up front
+        """
+        self._compiled_keywords = None
+        self._automaton = PhraseAutomaton()
+        self._keyword_rank: Dict[str, int] = {}
+        if keywords:
+            self.compile(keywords)
 
-        Handles common suffixes: plurals, -ing, -ed, -er, -est, -ly, -tion, -ness
+    def compile(self, keywords: List[str]):
+        """Build the phrase automaton for a vocabulary.
+
+        Multi-word (and hyphenated) keywords become stem sequences, e.g.
+        "oil cooler" -> ("oil", "cool"). Invalid keywords are dropped here.
+
+        Args:
+            keywords: Vocabulary to match against
+        """
+        self._compiled_keywords = tuple(keywords)
+        self._automaton = PhraseAutomaton()
+        self._keyword_rank = {}
+
+        for keyword in keywords:
+            if keyword in self._keyword_rank or keyword.lower() in INVALID_KEYWORDS_LOWER:
+                continue
+            stems = tuple(stem_tokens(keyword))
+            if not stems:
+                continue
+            self._keyword_rank[keyword] = len(self._keyword_rank)
+            self._automaton.add(stems, keyword)
+
+        self._automaton.build()
+
+    def _ensure_compiled(self, keywords: List[str]):
+        """Recompile if called with a different vocabulary than the compiled one."""
+        if keywords is not None and tuple(keywords) != self._compiled_keywords:
+            self.compile(keywords)
+
+    def _stem(self, word: str) -> str:
+        """Apply simple stemming to a word (see stem_word).
 
         Args:
             word: Word to stem (lowercase)
@@ -24,63 +210,21 @@ class SearchTagger:
         Returns:
             Stemmed word
         """
-        # Handle empty/short words
-        if len(word) <= 2:
-            return word
-
-        # Store original for minimum length checks
-        original_len = len(word)
-
-        # Suffix rules (order matters - try longer suffixes first)
-        suffixes = [
-            ('ational', 'ate'),    # relational -> relate
-            ('tional', 'tion'),    # conditional -> condition
-            ('tion', 'tion'),      # condition -> condition (keep as-is)
-            ('ness', ''),          # goodness -> good
-            ('ment', ''),          # establishment -> establish
-            ('iest', 'y'),         # happiest -> happy
-            ('iest', 'i'),         # prettiest -> pretti
-            ('ying', 'y'),         # flying -> fly
-            ('ing', ''),           # installing -> install
-            ('ies', 'y'),          # berries -> berry
-            ('ied', 'y'),          # tried -> try
-            ('sses', 'ss'),        # dresses -> dress
-            ('xes', 'x'),          # boxes -> box
-            ('zes', 'z'),          # sizes -> size
-            ('ches', 'ch'),        # switches -> switch
-            ('shes', 'sh'),        # dishes -> dish
-            ('ses', 's'),          # houses -> hous
-            ('ess', 'ess'),        # dress -> dress (keep as-is)
-            ('est', ''),           # fastest -> fast
-            ('ers', 'er'),         # workers -> worker
-            ('eer', 'eer'),        # engineer -> engineer (keep as-is)
-            ('eer', 'eer'),        # engineer -> engineer (keep as-is)
-            ('ied', 'y'),          # carried -> carry
-            ('ied', 'i'),          # died -> di
-            ('eed', 'ee'),         # agreed -> agree
-            ('eds', 'ed'),         # beds -> bed
-            ('ed', ''),            # installed -> install
-            ('es', ''),            # boxes -> box (after longer rules)
-            ('er', ''),            # faster -> fast
-            ('ly', ''),            # quickly -> quick
-            ('s', ''),             # firewalls -> firewall
-        ]
-
-        for suffix, replacement in suffixes:
-            if word.endswith(suffix):
-                stem = word[:-len(suffix)] + replacement
-                # Don't make word too short (minimum 2 chars after stemming)
-                if len(stem) >= 2:
-                    return stem
+        return stem_word(word)
 
-        return word
+    def _match_stems(self, message_stems: List[str]) -> List[str]:
+        """Match a message's stems against the compiled automaton."""
+        found = self._automaton.find(message_stems)
+
+        # Vocabulary order, like a scan over the keyword list would give
+        return sorted(found, key=self._keyword_rank.__getitem__)
 
-    def find_keywords(self, message_text: str, keywords: List[str]) -> List[str]:
+    def find_keywords(self, message_text: str, keywords: List[str] = None) -> List[str]:
         """Find keywords that match in message text using stemming.
 
         Args:
             message_text: Message text to search
-            keywords: List of keywords to search for
+            keywords: List of keywords to search for (default: compiled vocabulary)
 
         Returns:
             List of matched keywords (deduped, from original keyword list)
@@ -88,32 +232,28 @@ class SearchTagger:
         # Handle empty inputs
         if not message_text or not message_text.strip():
             return []
-        if not keywords:
+        if keywords is not None and not keywords:
             return []
 
-        # Normalize message text
-        message_lower = message_text.lower()
+        self._ensure_compiled(keywords)
+        return self._match_stems(stem_tokens(message_text))
 
-        # Split message into words (handle hyphens as word separators)
-        # This allows "co-pilot" to match "pilot"
-        message_words = re.findall(r'\b\w+\b', message_lower)
+    def find_keywords_batch(self, messages: Dict[str, str],
+                            keywords: List[str] = None) -> Dict[str, List[str]]:
+        """Find keywords for many messages with one compiled vocabulary.
 
-        # Stem all message words
-        message_stems = set(self._stem(word) for word in message_words)
-
-        # Find matching keywords
-        matched = []
-        for keyword in keywords:
-            keyword_lower = keyword.lower()
-            keyword_stem = self._stem(keyword_lower)
-
-            # Check if keyword stem appears in message stems
-            if keyword_stem in message_stems:
-                if keyword not in matched:  # Dedupe
-                    matched.append(keyword)
+        Args:
+            messages: Dictionary mapping message id -> message text
+            keywords: List of keywords to search for (default: compiled vocabulary)
 
-        # Filter out invalid keywords
-        invalid_lower = {kw.lower() for kw in INVALID_KEYWORDS}
-        matched = [kw for kw in matched if kw.lower() not in invalid_lower]
+        Returns:
+            Dictionary mapping message id -> matched keywords
+        """
+        if keywords is not None and not keywords:
+            return {msg_id: [] for msg_id in messages}
 
-        return matched
+        self._ensure_compiled(keywords)
+        return {
+            msg_id: self._match_stems(stem_tokens(text)) if text and text.strip() else []
+            for msg_id, text in messages.items()
+        }
@@ -0,0 +1,69 @@
+# ABOUTME: Tests for the static-site mode of the tag statistics HTML view
+# ABOUTME: Covers shared assets, per-page manifests, unchanged-page skipping and stale page removal
+
+import json
+
+from analyze_tag_statistics import generate_static_site, iter_view_images
+
+
+def make_index(count, keyword="firewall"):
+    return {
+        f"msg{i}": {
+            "metadata": {"subject": f"Subject {i}"},
+            "images": [{"local_filename": f"msg{i}_part0_1_a.jpg"}, {"url": "not downloaded"}],
+            "keywords": [keyword]
+        }
+        for i in range(count)
+    }
+
+
+def read_manifest(path):
+    text = path.read_text(encoding='utf-8')
+    assert text.startswith("renderPage(") and text.endswith(");\n")
+    return json.loads(text[len("renderPage("):-3])
+
+
+class TestStaticSite:
+    def test_pages_share_assets_and_load_manifest(self, tmp_path):
+        base = tmp_path / "stats_view"
+        stats = generate_static_site(make_index(5), "thumbs", str(base), page_size=2)
+
+        assert (stats["pages"], stats["images"], stats["written"]) == (3, 5, 8)
+        assets = tmp_path / "stats_view_assets"
+        assert (assets / "tag_view.css").exists() and (assets / "tag_view.js").exists()
+
+        page = (tmp_path / "stats_view_page3.html").read_text()
+        assert "stats_view_assets/tag_view.css" in page
+        assert "stats_view_assets/page3.js" in page
+        assert "<style>" not in page
+
+        manifest = read_manifest(assets / "page3.js")
+        assert (manifest["page"], manifest["pages"], manifest["base"]) == (3, 3, "stats_view")
+        msg_id, subject, filename, keywords, img_html = manifest["images"][0]
+        assert (msg_id, subject, filename, keywords) == ("msg4", "Subject 4", "msg4_part0_1_a.jpg", "firewall")
+        assert "thumbs/msg4_part0_1_a_thumb.jpg" in img_html
+
+    def test_rerun_rewrites_only_changed_pages(self, tmp_path):
+        base = str(tmp_path / "stats_view")
+        index_data = make_index(6)
+        generate_static_site(index_data, "thumbs", base, page_size=2)
+
+        index_data["msg5"]["keywords"] = ["cowling"]
+        stats = generate_static_site(index_data, "thumbs", base, page_size=2)
+
+        assert (stats["written"], stats["unchanged"]) == (1, 7)
+        assert read_manifest(tmp_path / "stats_view_assets" / "page3.js")["images"][1][3] == "cowling"
+
+    def test_stale_pages_removed(self, tmp_path):
+        base = str(tmp_path / "stats_view")
+        generate_static_site(make_index(6), "thumbs", base, page_size=2)
+        stats = generate_static_site(make_index(3), "thumbs", base, page_size=2)
+
+        assert stats["removed"] == 2
+        assert not (tmp_path / "stats_view_page3.html").exists()
+        assert not (tmp_path / "stats_view_assets" / "page3.js").exists()
+        assert (tmp_path / "stats_view_page2.html").exists()
+
+    def test_view_images_skip_undownloaded(self):
+        assert [img["local_filename"] for img in iter_view_images(make_index(2))] == [
+            "msg0_part0_1_a.jpg", "msg1_part0_1_a.jpg"]
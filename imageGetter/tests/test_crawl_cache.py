@@ -0,0 +1,114 @@
+# ABOUTME: Unit tests for the webGetter crawl cache (conditional re-crawls)
+# ABOUTME: Uses a stub HTTP session; covers new/changed/unchanged/error results and deferred recording
+
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "webGetter"))
+import requests
+
+from crawl_cache import CrawlCache, content_hash
+
+URL = "http://site.test/page.htm"
+
+
+class StubResponse:
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}")
+
+
+class StubSession:
+    """Returns the queued responses in order (an exception is raised) and records request headers."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.sent_headers.append(headers)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def page(content=b"<html>v1</html>", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT"):
+    return StubResponse(content=content, headers={"ETag": etag, "Last-Modified": last_modified})
+
+
+class TestFetchIfChanged:
+    def test_new_page_recorded_only_after_confirm(self, tmp_path):
+        cache = CrawlCache(str(tmp_path / "cache.json"))
+        session = StubSession(page(), page())
+
+        assert cache.fetch_if_changed(session, URL) == ("new", b"<html>v1</html>")
+        assert cache.request_headers(URL) == {}
+
+        # Not confirmed (processing failed): the next run still sees a new page
+        assert cache.fetch_if_changed(session, URL) == ("new", b"<html>v1</html>")
+        cache.confirm(URL)
+
+        entry = cache.dctEntries[URL]
+        assert entry["etag"] == '"v1"'
+        assert entry["last_modified"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+        assert entry["sha256"] == content_hash(b"<html>v1</html>")
+        assert cache.request_headers(URL) == {"If-None-Match": '"v1"',
+                                              "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+    def test_not_modified_is_unchanged(self, tmp_path):
+        cache = CrawlCache(str(tmp_path / "cache.json"))
+        session = StubSession(page(), StubResponse(status_code=304))
+        cache.fetch_if_changed(session, URL)
+        cache.confirm(URL)
+
+        assert cache.fetch_if_changed(session, URL) == ("unchanged", None)
+        assert session.sent_headers[1]["If-None-Match"] == '"v1"'
+
+    def test_same_content_is_unchanged_without_validators(self, tmp_path):
+        cache = CrawlCache(str(tmp_path / "cache.json"))
+        session = StubSession(StubResponse(content=b"same"), StubResponse(content=b"same"))
+        cache.fetch_if_changed(session, URL)
+        cache.confirm(URL)
+
+        assert cache.fetch_if_changed(session, URL) == ("unchanged", None)
+        assert session.sent_headers[1] == {}
+
+    def test_changed_content_recorded_only_after_confirm(self, tmp_path):
+        cache = CrawlCache(str(tmp_path / "cache.json"))
+        session = StubSession(page(), page(b"<html>v2</html>", etag='"v2"'))
+        cache.fetch_if_changed(session, URL)
+        cache.confirm(URL)
+
+        assert cache.fetch_if_changed(session, URL) == ("changed", b"<html>v2</html>")
+        assert cache.dctEntries[URL]["etag"] == '"v1"'
+        assert cache.dctEntries[URL]["sha256"] == content_hash(b"<html>v1</html>")
+
+        cache.confirm(URL)
+        assert cache.dctEntries[URL]["etag"] == '"v2"'
+        assert cache.dctEntries[URL]["sha256"] == content_hash(b"<html>v2</html>")
+
+    def test_errors(self, tmp_path):
+        cache = CrawlCache(str(tmp_path / "cache.json"))
+        session = StubSession(requests.exceptions.ConnectionError("refused"), StubResponse(status_code=500))
+
+        assert cache.fetch_if_changed(session, URL) == ("error", None)
+        assert cache.fetch_if_changed(session, URL) == ("error", None)
+        cache.confirm(URL)
+        assert URL not in cache.dctEntries
+
+    def test_save_and_reload(self, tmp_path):
+        strPath = str(tmp_path / "cache.json")
+        cache = CrawlCache(strPath)
+        cache.fetch_if_changed(StubSession(page()), URL)
+        cache.confirm(URL)
+        cache.save()
+
+        reloaded = CrawlCache(strPath)
+        assert reloaded.dctEntries == cache.dctEntries
+        assert not (tmp_path / "cache.json.tmp").exists()
@@ -0,0 +1,208 @@
+# ABOUTME: Unit tests for the webGetter site crawler
+# ABOUTME: Uses a stub HTTP session serving a small fake site; no network access
+
+import time
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "webGetter"))
+import pytest
+import requests
+
+from crawler import Crawler, RateLimiter, extract_links
+
+BASE = "https://site.test/"
+
+
+class StubResponse:
+    def __init__(self, url, status_code=200, text="", content_type="text/html"):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = {"Content-Type": content_type}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} for {self.url}")
+
+
+class StubSession:
+    """requests.Session serving PAGES: url -> html, a StubResponse, or an exception to raise."""
+
+    pages = {}
+
+    def __init__(self):
+        self.headers = {}
+        self.requested = []
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def get(self, url, timeout=None):
+        self.requested.append(url)
+        page = self.pages.get(url)
+        if page is None:
+            return StubResponse(url, status_code=404)
+        if isinstance(page, Exception):
+            raise page
+        if isinstance(page, StubResponse):
+            return page
+        return StubResponse(url, text=page)
+
+    def close(self):
+        pass
+
+
+def links(*hrefs):
+    return "<html><body>" + "".join(f'<a href="{href}">{href}</a>' for href in hrefs) + "</body></html>"
+
+
+@pytest.fixture
+def site(monkeypatch):
+    """Serve a fake site to every Crawler created in the test; returns the page dict to fill."""
+    pages = {}
+    monkeypatch.setattr(StubSession, "pages", pages)
+    monkeypatch.setattr(requests, "Session", StubSession)
+    return pages
+
+
+def accept_all(strRelative):
+    return True
+
+
+class TestExtractLinks:
+    def test_links_resolved_and_fragments_dropped(self):
+        lstLinks, bNeedsJs = extract_links(links("a.html#top", "/b/", "https://other.test/x"), BASE + "dir/")
+
+        assert lstLinks == [BASE + "dir/a.html", BASE + "b/", "https://other.test/x"]
+        assert not bNeedsJs
+
+    def test_script_only_page_needs_javascript(self):
+        _, bNeedsJs = extract_links("<html><script>render()</script><p>Loading</p></html>", BASE)
+
+        assert bNeedsJs
+
+
+class TestRateLimiter:
+    def test_requests_to_one_host_are_spaced(self):
+        limiter = RateLimiter(0.05)
+        lstStarts = []
+        for _ in range(3):
+            limiter.wait("site.test")
+            lstStarts.append(time.monotonic())
+
+        assert lstStarts[1] - lstStarts[0] >= 0.045
+        assert lstStarts[2] - lstStarts[1] >= 0.045
+
+    def test_hosts_do_not_delay_each_other(self):
+        limiter = RateLimiter(1.0)
+        fStart = time.monotonic()
+        limiter.wait("a.test")
+        limiter.wait("b.test")
+
+        assert time.monotonic() - fStart < 0.5
+
+
+class TestRobots:
+    def test_disallowed_pages_are_left_out(self, site):
+        site[BASE + "robots.txt"] = StubResponse(BASE + "robots.txt", content_type="text/plain",
+                                                 text="User-agent: *\nDisallow: /private\n")
+        site[BASE] = links("private/a.html", "public.html")
+        site[BASE + "public.html"] = links()
+        crawler = Crawler(BASE, accept_all, intWorkers=2, fDelay=0)
+
+        dctFound = crawler.crawl()
+
+        assert dctFound == {"": True, "public.html": True}
+        assert BASE + "private/a.html" not in crawler.session.requested
+        assert not crawler.allowed(BASE + "private/b.html")
+
+    def test_crawl_delay_wins_if_larger(self, site):
+        site[BASE + "robots.txt"] = StubResponse(BASE + "robots.txt", content_type="text/plain",
+                                                 text="User-agent: *\nCrawl-delay: 2\n")
+        crawler = Crawler(BASE, accept_all, fDelay=0.5)
+
+        assert crawler.rateLimiter.fDelay == 2.0
+
+    def test_robots_ignored_when_disabled(self, site):
+        site[BASE + "robots.txt"] = StubResponse(BASE + "robots.txt", content_type="text/plain",
+                                                 text="User-agent: *\nDisallow: /\n")
+        site[BASE] = links()
+        crawler = Crawler(BASE, accept_all, fDelay=0, bObeyRobots=False)
+
+        assert crawler.crawl() == {"": True}
+        assert BASE + "robots.txt" not in crawler.session.requested
+
+
+class TestCrawl:
+    def test_accept_none_false_true(self, site):
+        site[BASE] = links("crawl.html", "record.html", "ignore.html", "https://other.test/x")
+        site[BASE + "crawl.html"] = links("deeper.html")
+        site[BASE + "deeper.html"] = links()
+        dctRules = {"crawl.html": True, "deeper.html": True, "record.html": False, "ignore.html": None}
+        crawler = Crawler(BASE, dctRules.get, intWorkers=2, fDelay=0)
+
+        dctFound = crawler.crawl()
+
+        assert dctFound == {"": True, "crawl.html": True, "record.html": False, "deeper.html": True}
+        assert BASE + "record.html" not in crawler.session.requested
+        assert BASE + "ignore.html" not in crawler.session.requested
+
+    def test_max_pages_stops_fetching(self, site):
+        site[BASE] = links("1.html")
+        site[BASE + "1.html"] = links("2.html")
+        site[BASE + "2.html"] = links("3.html")
+        crawler = Crawler(BASE, accept_all, intWorkers=1, fDelay=0)
+
+        dctFound = crawler.crawl(intMaxPages=2)
+
+        assert dctFound == {"": True, "1.html": True, "2.html": False}
+        assert BASE + "2.html" not in crawler.session.requested
+
+    def test_failed_request_yields_no_links(self, site):
+        site[BASE] = links("down.html", "up.html")
+        site[BASE + "down.html"] = requests.exceptions.ConnectionError("refused")
+        site[BASE + "up.html"] = links()
+        crawler = Crawler(BASE, accept_all, intWorkers=2, fDelay=0)
+
+        assert crawler.crawl() == {"": True, "down.html": True, "up.html": True}
+
+    def test_non_html_response_yields_no_links(self, site):
+        site[BASE] = StubResponse(BASE, text=links("a.html"), content_type="application/pdf")
+        crawler = Crawler(BASE, accept_all, fDelay=0)
+
+        assert crawler.crawl() == {"": True}
+
+    def test_selenium_failure_does_not_abort_crawl(self, site):
+        site[BASE] = links("js.html", "plain.html")
+        site[BASE + "js.html"] = "<html><script>render()</script></html>"
+        site[BASE + "plain.html"] = links("last.html")
+        site[BASE + "last.html"] = links()
+
+        def make_driver():
+            raise RuntimeError("chrome not reachable")
+
+        crawler = Crawler(BASE, accept_all, intWorkers=1, fDelay=0, make_driver=make_driver)
+
+        dctFound = crawler.crawl()
+
+        assert dctFound == {"": True, "js.html": True, "plain.html": True, "last.html": True}
+
+    def test_javascript_page_read_with_selenium(self, site):
+        site[BASE] = "<html><script>render()</script></html>"
+        site[BASE + "rendered.html"] = links()
+
+        class FakeDriver:
+            page_source = links("rendered.html")
+
+            def get(self, url):
+                self.url = url
+
+            def quit(self):
+                pass
+
+        crawler = Crawler(BASE, accept_all, fDelay=0, make_driver=FakeDriver)
+
+        assert crawler.crawl() == {"": True, "rendered.html": True}
+        assert crawler.intSeleniumPages == 1
+        crawler.close()
@@ -4,13 +4,31 @@ import pytest
 import json
 import tempfile
 from pathlib import Path
+from PIL import Image
 from dedupe_images import (
     load_index,
     dedupe_message_images,
-    save_index
+    save_index,
+    compute_dhash,
+    hamming_distance,
+    BKTree,
+    hash_images,
+    load_hash_cache,
+    save_hash_cache,
+    dedupe_index
 )
 
 
+def make_photo(path, seed, size=(120, 90), quality=90):
+    """Write a JPEG with a seed-dependent pattern (distinct dHash per seed)."""
+    img = Image.new('RGB', (16, 12))
+    for x in range(16):
+        for y in range(12):
+            value = (x * 37 + y * 91 + seed * 53 + (x * y * seed)) % 256
+            img.putpixel((x, y), (value, (value * 3) % 256, 255 - value))
+    img.resize(size, Image.Resampling.BILINEAR).save(path, 'JPEG', quality=quality)
+
+
 class TestLoadIndex:
     """Test loading image index."""
 
@@ -188,3 +206,144 @@ class TestSaveIndex:
         with open(output_file) as f:
             result = json.load(f)
         assert result == test_data
+
+
+class TestPerceptualHash:
+    """Test dHash and BK-tree lookups."""
+
+    def test_resized_copy_is_near_duplicate(self, tmp_path):
+        """Test that a resized, recompressed copy has a nearby dHash."""
+        make_photo(tmp_path / "a.jpg", seed=1, size=(400, 300))
+        make_photo(tmp_path / "a_small.jpg", seed=1, size=(200, 150), quality=60)
+        make_photo(tmp_path / "b.jpg", seed=7, size=(400, 300))
+
+        hash_a = compute_dhash(str(tmp_path / "a.jpg"))
+        hash_small = compute_dhash(str(tmp_path / "a_small.jpg"))
+        hash_b = compute_dhash(str(tmp_path / "b.jpg"))
+
+        assert hamming_distance(hash_a, hash_small) <= 4
+        assert hamming_distance(hash_a, hash_b) > 4
+
+    def test_bktree_find_within_distance(self):
+        """Test that BK-tree returns exactly the items within the radius."""
+        tree = BKTree()
+        for value in [0b0000, 0b0001, 0b0011, 0b1111, 0b11110000]:
+            tree.add(value, value)
+
+        found = sorted(item for _, item in tree.find(0b0000, 1))
+
+        assert found == [0b0000, 0b0001]
+        assert tree.find(0b0000, -1) == []
+
+
+class TestHashImages:
+    """Test parallel hashing with sidecar cache."""
+
+    def test_hash_images_uses_cache(self, tmp_path):
+        """Test that unchanged files are not re-hashed and changed files are."""
+        img_dir = tmp_path / "images"
+        img_dir.mkdir()
+        make_photo(img_dir / "img1.jpg", seed=1)
+        make_photo(img_dir / "img2.jpg", seed=2)
+
+        cache = {}
+        hashes = hash_images(["img1.jpg", "img2.jpg", "missing.jpg"], str(img_dir), cache, workers=1)
+
+        assert set(hashes) == {"img1.jpg", "img2.jpg"}
+        assert len(hashes["img1.jpg"]["sha256"]) == 64
+
+        # Round-trip cache; poison an entry to prove it is reused rather than recomputed
+        cache_file = tmp_path / "hashes.json"
+        save_hash_cache(cache, str(cache_file))
+        cache = load_hash_cache(str(cache_file))
+        cache["img1.jpg"]["sha256"] = "cached"
+
+        hashes = hash_images(["img1.jpg", "img2.jpg"], str(img_dir), cache, workers=1)
+        assert hashes["img1.jpg"]["sha256"] == "cached"
+
+    def test_hash_images_in_process_pool(self, tmp_path):
+        """Test that the process pool gives the same result as in-process hashing."""
+        img_dir = tmp_path / "images"
+        img_dir.mkdir()
+        for i in range(4):
+            make_photo(img_dir / f"img{i}.jpg", seed=i)
+        filenames = [f"img{i}.jpg" for i in range(4)]
+
+        serial = hash_images(filenames, str(img_dir), {}, workers=1)
+        parallel = hash_images(filenames, str(img_dir), {}, workers=2)
+
+        assert serial == parallel
+
+
+class TestDedupeIndex:
+    """Test whole-index deduplication."""
+
+    def test_same_size_different_content_kept(self, tmp_path):
+        """Test that different images sharing a file size are not removed."""
+        img_dir = tmp_path / "images"
+        img_dir.mkdir()
+        (img_dir / "img1.jpg").write_bytes(b"x" * 100)
+        (img_dir / "img2.jpg").write_bytes(b"y" * 100)
+
+        index = {"msg1": {"images": [{"local_filename": "img1.jpg"},
+                                     {"local_filename": "img2.jpg"}]}}
+        hashes = hash_images(["img1.jpg", "img2.jpg"], str(img_dir), {}, workers=1)
+
+        result, stats = dedupe_index(index, hashes)
+
+        assert len(result["msg1"]["images"]) == 2
+        assert stats["exact_duplicates"] == 0
+
+    def test_cross_message_duplicates_get_back_references(self, tmp_path):
+        """Test that reposts in other messages are removed and linked to the kept copy."""
+        img_dir = tmp_path / "images"
+        img_dir.mkdir()
+        make_photo(img_dir / "m1_a.jpg", seed=1, size=(400, 300))
+        (img_dir / "m2_a.jpg").write_bytes((img_dir / "m1_a.jpg").read_bytes())
+        make_photo(img_dir / "m3_a.jpg", seed=1, size=(200, 150), quality=60)
+        make_photo(img_dir / "m3_b.jpg", seed=9)
+
+        index = {
+            "msg1": {"metadata": {"subject": "Original"}, "images": [{"local_filename": "m1_a.jpg"}]},
+            "msg2": {"metadata": {"subject": "Repost"}, "images": [{"local_filename": "m2_a.jpg"}]},
+            "msg3": {"metadata": {"subject": "Resized"}, "images": [{"local_filename": "m3_a.jpg"},
+                                                                    {"local_filename": "m3_b.jpg"},
+                                                                    {"local_filename": "gone.jpg"}]}
+        }
+        filenames = ["m1_a.jpg", "m2_a.jpg", "m3_a.jpg", "m3_b.jpg", "gone.jpg"]
+        hashes = hash_images(filenames, str(img_dir), {}, workers=1)
+
+        result, stats = dedupe_index(index, hashes)
+
+        assert stats == {"exact_duplicates": 1, "near_duplicates": 1, "missing_removed": 1}
+        assert [i["local_filename"] for i in result["msg1"]["images"]] == ["m1_a.jpg"]
+        assert result["msg2"]["images"] == []
+        assert [i["local_filename"] for i in result["msg3"]["images"]] == ["m3_b.jpg"]
+
+        kept = result["msg1"]["images"][0]
+        assert kept["references"] == [
+            {"message_id": "msg2", "local_filename": "m2_a.jpg"},
+            {"message_id": "msg3", "local_filename": "m3_a.jpg"}
+        ]
+        assert result["msg2"]["shared_images"] == [{"message_id": "msg1", "local_filename": "m1_a.jpg"}]
+        assert result["msg3"]["shared_images"] == [{"message_id": "msg1", "local_filename": "m1_a.jpg"}]
+
+        # Original index untouched
+        assert len(index["msg2"]["images"]) == 1
+        assert "references" not in index["msg1"]["images"][0]
+
+    def test_exact_only_mode(self, tmp_path):
+        """Test that negative max_distance disables perceptual matching."""
+        img_dir = tmp_path / "images"
+        img_dir.mkdir()
+        make_photo(img_dir / "a.jpg", seed=1, size=(400, 300))
+        make_photo(img_dir / "b.jpg", seed=1, size=(200, 150), quality=60)
+
+        index = {"msg1": {"images": [{"local_filename": "a.jpg"}]},
+                 "msg2": {"images": [{"local_filename": "b.jpg"}]}}
+        hashes = hash_images(["a.jpg", "b.jpg"], str(img_dir), {}, workers=1)
+
+        result, stats = dedupe_index(index, hashes, max_distance=-1)
+
+        assert len(result["msg2"]["images"]) == 1
+        assert stats["near_duplicates"] == 0
@@ -13,6 +13,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from download_images import download_image, create_selenium_driver
 
 
+def fake_download(strUrl, strOutputPath, **kwargs):
+    """Stand-in for download_image that writes a small file and succeeds."""
+    Path(strOutputPath).write_bytes(b"fake image data for " + strUrl.encode())
+    return True
+
+
 class TestDownloadImage:
     """Tests for downloading single image from URL."""
 
@@ -192,7 +198,7 @@ class TestBatchDownload:
         import json
 
         # Mock download_image to always succeed
-        mock_download_image.return_value = True
+        mock_download_image.side_effect = fake_download
 
         # Create minimal image index
         dctIndex = {
@@ -251,7 +257,7 @@ class TestBatchDownload:
         import json
 
         # Mock download_image to always succeed
-        mock_download_image.return_value = True
+        mock_download_image.side_effect = fake_download
 
         # Create index with 3 images
         dctIndex = {
@@ -296,7 +302,15 @@ class TestBatchDownload:
         import json
 
         # Mock download_image to fail first, succeed second
-        mock_download_image.side_effect = [False, True]
+        lstOutcomes = [False, True]
+
+        def first_fails(strUrl, strOutputPath, **kwargs):
+            if lstOutcomes.pop(0):
+                return fake_download(strUrl, strOutputPath)
+            kwargs["lstErrors"].append("HTTP 404")
+            return False
+
+        mock_download_image.side_effect = first_fails
 
         dctIndex = {
             "MSG001": {
@@ -339,7 +353,7 @@ class TestBatchDownload:
         from pathlib import Path
 
         # Mock download_image to always succeed
-        mock_download_image.return_value = True
+        mock_download_image.side_effect = fake_download
 
         dctIndex = {
             "MSG001": {
@@ -387,3 +401,97 @@ class TestBatchDownload:
             assert mock_download_image.call_count == 2
 
 
+
+    @patch('download_images.download_image')
+    def test_journal_records_outcomes_and_folds_into_index(self, mock_download_image):
+        """Should journal each outcome and fold size/hash/error into the index once."""
+        import tempfile
+        import json
+        from download_journal import load_journal
+
+        lstOutcomes = [True, False]
+
+        def one_of_each(strUrl, strOutputPath, **kwargs):
+            if lstOutcomes.pop(0):
+                return fake_download(strUrl, strOutputPath)
+            kwargs["lstErrors"].append("HTTP 404")
+            return False
+
+        mock_download_image.side_effect = one_of_each
+
+        dctIndex = {
+            "MSG001": {
+                "metadata": {"message_id": "MSG001"},
+                "images": [{"url": "http://test1.jpg", "local_filename": "test1.jpg"}]
+            },
+            "MSG002": {
+                "metadata": {"message_id": "MSG002"},
+                "images": [{"url": "http://test2.jpg", "local_filename": "test2.jpg"}]
+            }
+        }
+
+        with tempfile.TemporaryDirectory() as strTempDir:
+            strIndexPath = f"{strTempDir}/index.json"
+            with open(strIndexPath, 'w') as f:
+                json.dump(dctIndex, f)
+
+            from download_images import download_batch
+
+            download_batch(strIndexPath, f"{strTempDir}/images", seleniumDriver=Mock())
+
+            # Journal written next to the index
+            dctJournal = load_journal(f"{strTempDir}/index_downloads.jsonl")
+            assert dctJournal["test1.jpg"]["status"] == "success"
+            assert dctJournal["test1.jpg"]["size_bytes"] > 0
+            assert len(dctJournal["test1.jpg"]["sha256"]) == 64
+            assert dctJournal["test2.jpg"]["status"] == "failed"
+            assert dctJournal["test2.jpg"]["error"] == "HTTP 404"
+
+            # Folded into index
+            with open(strIndexPath) as f:
+                dctResult = json.load(f)
+            dctImage1 = dctResult["MSG001"]["images"][0]
+            dctImage2 = dctResult["MSG002"]["images"][0]
+            assert dctImage1["download_status"] == "success"
+            assert dctImage1["size_bytes"] == dctJournal["test1.jpg"]["size_bytes"]
+            assert dctImage2["download_status"] == "failed"
+            assert dctImage2["download_error"] == "HTTP 404"
+
+    @patch('download_images.download_image')
+    def test_resume_redownloads_truncated_file(self, mock_download_image):
+        """Should re-download a journaled image whose file no longer matches the journal."""
+        import tempfile
+        import json
+
+        mock_download_image.side_effect = fake_download
+
+        dctIndex = {
+            "MSG001": {
+                "metadata": {"message_id": "MSG001"},
+                "images": [{"url": "http://test1.jpg", "local_filename": "test1.jpg"}]
+            },
+            "MSG002": {
+                "metadata": {"message_id": "MSG002"},
+                "images": [{"url": "http://test2.jpg", "local_filename": "test2.jpg"}]
+            }
+        }
+
+        with tempfile.TemporaryDirectory() as strTempDir:
+            strIndexPath = f"{strTempDir}/index.json"
+            with open(strIndexPath, 'w') as f:
+                json.dump(dctIndex, f)
+            strOutputDir = f"{strTempDir}/images"
+
+            from download_images import download_batch
+
+            download_batch(strIndexPath, strOutputDir, seleniumDriver=Mock())
+            assert mock_download_image.call_count == 2
+
+            # Truncate one file (e.g. interrupted copy) - exists() alone would skip it
+            Path(f"{strOutputDir}/test1.jpg").write_bytes(b"x")
+
+            dctStats = download_batch(strIndexPath, strOutputDir, seleniumDriver=Mock())
+
+            assert dctStats["skipped"] == 1
+            assert dctStats["success"] == 1
+            assert mock_download_image.call_count == 3
@@ -0,0 +1,163 @@
+# ABOUTME: Unit tests for the append-only download journal
+# ABOUTME: Tests recording, replay, resume validation, and folding into the image index
+
+from pathlib import Path
+
+# Import function to test
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from download_journal import (
+    DownloadJournal,
+    get_journal_path,
+    hash_file,
+    load_journal,
+    is_download_complete,
+    fold_journal_into_index
+)
+
+
+class TestJournalPath:
+    """Tests for journal location."""
+
+    def test_journal_path_next_to_index(self):
+        """Should place journal beside the index with _downloads.jsonl suffix."""
+        strPath = get_journal_path("../data/image_index.json")
+        assert Path(strPath) == Path("../data/image_index_downloads.jsonl")
+
+
+class TestRecordAndReplay:
+    """Tests for appending and replaying journal entries."""
+
+    def test_latest_entry_wins(self, tmp_path):
+        """Should replay to the most recent outcome per image."""
+        strJournalPath = str(tmp_path / "journal.jsonl")
+
+        journal = DownloadJournal(strJournalPath)
+        journal.record("MSG001", "img1.jpg", "failed", strError="timeout")
+        journal.record("MSG001", "img1.jpg", "success", intSizeBytes=10, strSha256="abc")
+        journal.record("MSG002", "img2.jpg", "failed", strError="HTTP 404")
+        journal.close()
+
+        dctJournal = load_journal(strJournalPath)
+
+        assert len(dctJournal) == 2
+        assert dctJournal["img1.jpg"]["status"] == "success"
+        assert dctJournal["img1.jpg"]["size_bytes"] == 10
+        assert dctJournal["img2.jpg"]["error"] == "HTTP 404"
+
+    def test_append_across_sessions(self, tmp_path):
+        """Should keep earlier entries when journal is reopened."""
+        strJournalPath = str(tmp_path / "journal.jsonl")
+
+        journal = DownloadJournal(strJournalPath)
+        journal.record("MSG001", "img1.jpg", "success", intSizeBytes=10, strSha256="abc")
+        journal.close()
+
+        journal = DownloadJournal(strJournalPath)
+        journal.record("MSG002", "img2.jpg", "success", intSizeBytes=20, strSha256="def")
+        journal.close()
+
+        assert set(load_journal(strJournalPath)) == {"img1.jpg", "img2.jpg"}
+
+    def test_ignores_truncated_last_line(self, tmp_path):
+        """Should skip a partially written line left by a crash."""
+        pathJournal = tmp_path / "journal.jsonl"
+
+        journal = DownloadJournal(str(pathJournal))
+        journal.record("MSG001", "img1.jpg", "success", intSizeBytes=10, strSha256="abc")
+        journal.close()
+        with open(pathJournal, 'a') as f:
+            f.write('{"message_id": "MSG002", "local_fil')
+
+        dctJournal = load_journal(str(pathJournal))
+
+        assert list(dctJournal) == ["img1.jpg"]
+
+    def test_missing_journal_is_empty(self, tmp_path):
+        """Should return empty dict when no journal exists yet."""
+        assert load_journal(str(tmp_path / "none.jsonl")) == {}
+
+
+class TestIsDownloadComplete:
+    """Tests for resume validation."""
+
+    def test_complete_when_size_matches(self, tmp_path):
+        """Should accept a journaled success whose file has the recorded size."""
+        pathImage = tmp_path / "img1.jpg"
+        pathImage.write_bytes(b"x" * 10)
+
+        assert is_download_complete({"status": "success", "size_bytes": 10}, pathImage)
+
+    def test_incomplete_when_size_differs(self, tmp_path):
+        """Should reject a file whose size no longer matches the journal."""
+        pathImage = tmp_path / "img1.jpg"
+        pathImage.write_bytes(b"x" * 5)
+
+        assert not is_download_complete({"status": "success", "size_bytes": 10}, pathImage)
+
+    def test_incomplete_when_missing_or_failed(self, tmp_path):
+        """Should reject missing files, failed entries, and unjournaled images."""
+        pathImage = tmp_path / "img1.jpg"
+
+        assert not is_download_complete({"status": "success", "size_bytes": 10}, pathImage)
+        pathImage.write_bytes(b"x" * 10)
+        assert not is_download_complete({"status": "failed", "size_bytes": None}, pathImage)
+        assert not is_download_complete(None, pathImage)
+
+
+class TestFoldJournal:
+    """Tests for folding journal into the index."""
+
+    def test_fold_updates_images(self):
+        """Should copy size/hash for successes and error for failures."""
+        dctIndex = {
+            "MSG001": {"images": [{"local_filename": "img1.jpg"}, {"local_filename": "img3.jpg"}]},
+            "MSG002": {"images": [{"local_filename": "img2.jpg", "download_error": "old"}]}
+        }
+        dctJournal = {
+            "img1.jpg": {"status": "success", "size_bytes": 10, "sha256": "abc", "error": None},
+            "img2.jpg": {"status": "failed", "size_bytes": None, "sha256": None, "error": "HTTP 404"}
+        }
+
+        intUpdated = fold_journal_into_index(dctIndex, dctJournal)
+
+        assert intUpdated == 2
+        assert dctIndex["MSG001"]["images"][0]["size_bytes"] == 10
+        assert dctIndex["MSG001"]["images"][0]["sha256"] == "abc"
+        assert "download_status" not in dctIndex["MSG001"]["images"][1]
+        assert dctIndex["MSG002"]["images"][0]["download_status"] == "failed"
+        assert dctIndex["MSG002"]["images"][0]["download_error"] == "HTTP 404"
+
+    def test_fold_into_index_store_rewrites_only_touched_messages(self, tmp_path):
+        """Should update images of journaled messages in an IndexStore and leave the rest alone."""
+        from download_images import fold_journal
+        from index_store import load_index_file, save_index_file
+
+        dctIndex = {
+            "MSG001": {"metadata": {"subject": "One"}, "images": [{"local_filename": "img1.jpg"}],
+                       "keywords": None},
+            "MSG002": {"metadata": {"subject": "Two"}, "images": [{"local_filename": "img2.jpg"}]}
+        }
+        strIndexPath = str(tmp_path / "index.sqlite")
+        save_index_file(dctIndex, strIndexPath)
+        journal = DownloadJournal(get_journal_path(strIndexPath))
+        journal.record("MSG001", "img1.jpg", "success", intSizeBytes=10, strSha256="abc")
+        journal.close()
+
+        assert fold_journal(strIndexPath) == 1
+
+        dctResult = load_index_file(strIndexPath)
+        assert dctResult["MSG001"]["images"][0]["sha256"] == "abc"
+        assert dctResult["MSG001"]["keywords"] is None
+        assert dctResult["MSG002"] == dctIndex["MSG002"]
+
+
+class TestHashFile:
+    """Tests for file hashing."""
+
+    def test_sha256_of_known_content(self, tmp_path):
+        """Should match the known SHA-256 of the empty file."""
+        pathFile = tmp_path / "empty.bin"
+        pathFile.write_bytes(b"")
+
+        assert hash_file(str(pathFile)) == "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
@@ -0,0 +1,115 @@
+# ABOUTME: Tests for multi-size, multi-format derivative generation
+# ABOUTME: Validates sizes, crop vs fit behaviour, formats, byte sizes, and up-to-date skipping
+
+import pytest
+import os
+from pathlib import Path
+from PIL import Image
+
+# Import from parent directory
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from generate_derivatives import (
+    generate_derivatives,
+    generate_derivatives_parallel,
+    get_derivative_filename,
+    check_formats,
+    pick_derivative
+)
+
+
+@pytest.fixture
+def landscape(tmp_path):
+    """2400x1600 JPEG source"""
+    path = tmp_path / "MSG001_part0_1_photo.jpg"
+    Image.new('RGB', (2400, 1600), color='red').save(path, quality=90)
+    return path
+
+
+class TestGenerateDerivatives:
+    """Test derivative generation from one source image"""
+
+    def test_all_sizes_and_formats(self, landscape, tmp_path):
+        """Test that every size x format is written and described"""
+        out_dir = tmp_path / "derived"
+
+        derivatives = generate_derivatives(str(landscape), str(out_dir), [200, 400, 1024], ["jpeg", "webp"])
+
+        assert len(derivatives) == 6
+        for derivative in derivatives:
+            path = out_dir / derivative["path"]
+            assert path.exists()
+            assert derivative["bytes"] == path.stat().st_size
+            with Image.open(path) as img:
+                assert img.size == (derivative["width"], derivative["height"])
+                assert img.format == {"jpeg": "JPEG", "webp": "WEBP"}[derivative["format"]]
+
+    def test_small_sizes_cropped_large_sizes_fit(self, landscape, tmp_path):
+        """Test that grid sizes are square crops and large sizes keep aspect ratio"""
+        derivatives = generate_derivatives(str(landscape), str(tmp_path / "d"), [200, 1024], ["jpeg"])
+
+        by_size = {d["size"]: d for d in derivatives}
+        assert (by_size[200]["width"], by_size[200]["height"]) == (200, 200)
+        assert (by_size[1024]["width"], by_size[1024]["height"]) == (1024, 683)
+
+    def test_large_size_not_upscaled(self, tmp_path):
+        """Test that fitted sizes never exceed the source dimensions"""
+        source = tmp_path / "small.png"
+        Image.new('RGB', (600, 300), color='blue').save(source)
+
+        derivatives = generate_derivatives(str(source), str(tmp_path / "d"), [1024], ["jpeg"])
+
+        assert (derivatives[0]["width"], derivatives[0]["height"]) == (600, 300)
+
+    def test_up_to_date_derivatives_not_rewritten(self, landscape, tmp_path):
+        """Test that derivatives newer than the source are reused"""
+        out_dir = tmp_path / "derived"
+        first = generate_derivatives(str(landscape), str(out_dir), [200], ["jpeg"])
+        path = out_dir / first[0]["path"]
+        os.utime(path, (5_000_000_000, 5_000_000_000))
+
+        second = generate_derivatives(str(landscape), str(out_dir), [200], ["jpeg"])
+
+        assert second == first
+        assert path.stat().st_mtime == 5_000_000_000
+
+    def test_invalid_source_returns_none(self, tmp_path):
+        """Test that undecodable sources fail gracefully"""
+        source = tmp_path / "bad.jpg"
+        source.write_bytes(b"<html>not an image</html>")
+
+        assert generate_derivatives(str(source), str(tmp_path / "d")) is None
+
+
+class TestHelpers:
+    """Test naming, format checks, lookup, and pool driver"""
+
+    def test_derivative_filename(self):
+        """Test derivative naming"""
+        assert get_derivative_filename("MSG_part0_1_x.jpeg", 400, "webp") == "MSG_part0_1_x_400.webp"
+
+    def test_check_formats(self):
+        """Test that unknown formats are reported"""
+        assert check_formats(["jpeg"]) == []
+        assert check_formats(["jpeg", "gif"]) == ["gif"]
+
+    def test_pick_derivative(self):
+        """Test lookup of a recorded derivative"""
+        image = {"derivatives": [{"size": 200, "format": "webp", "path": "a_200.webp"}]}
+
+        assert pick_derivative(image, 200, "webp")["path"] == "a_200.webp"
+        assert pick_derivative(image, 400, "webp") is None
+        assert pick_derivative({}, 200, "webp") is None
+
+    def test_parallel_driver(self, tmp_path):
+        """Test that the pool returns results for every source in order"""
+        sources = []
+        for i in range(3):
+            source = tmp_path / f"img{i}.png"
+            Image.new('RGB', (500, 400), color='green').save(source)
+            sources.append(str(source))
+
+        results = list(generate_derivatives_parallel(sources, str(tmp_path / "d"), [200], ["webp"], intWorkers=2))
+
+        assert [path for path, _ in results] == sources
+        assert all(derivatives and derivatives[0]["format"] == "webp" for _, derivatives in results)
@@ -11,7 +11,7 @@ import shutil
 # Import from parent directory
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from generate_thumbnails import generate_thumbnail
+from generate_thumbnails import generate_thumbnail, is_thumbnail_current, generate_thumbnails_parallel
 
 
 class TestThumbnailGeneration:
@@ -130,3 +130,68 @@ class TestThumbnailGeneration:
         thumb = Image.open(output_path)
         assert thumb.format == 'JPEG'
         thumb.close()
+
+    def test_large_jpeg_draft_decode_keeps_center(self, temp_dir):
+        """Test that draft-mode decoding of a large JPEG still crops the true center"""
+        # 4000x3000 phone-sized photo: red with a blue center block
+        test_img_path = os.path.join(temp_dir, "phone.jpg")
+        img = Image.new('RGB', (4000, 3000), color='red')
+        img.paste((0, 0, 255), (1800, 1300, 2200, 1700))
+        img.save(test_img_path, quality=90)
+
+        output_path = os.path.join(temp_dir, "thumb.jpg")
+        result = generate_thumbnail(test_img_path, output_path, intSize=200)
+
+        assert result == True
+        thumb = Image.open(output_path)
+        assert thumb.size == (200, 200)
+        assert thumb.getpixel((100, 100))[2] > 200  # Blue center
+        assert thumb.getpixel((5, 5))[0] > 200      # Red edge
+        thumb.close()
+
+
+class TestThumbnailFreshness:
+    """Test skip logic for thumbnails newer than their source"""
+
+    def test_missing_thumbnail_is_not_current(self, tmp_path):
+        """Test that a missing thumbnail must be generated"""
+        source = tmp_path / "img.jpg"
+        source.write_bytes(b"x")
+
+        assert is_thumbnail_current(str(source), str(tmp_path / "img_thumb.jpg")) == False
+
+    def test_thumbnail_older_than_source_is_stale(self, tmp_path):
+        """Test that a thumbnail older than a re-downloaded source is regenerated"""
+        source = tmp_path / "img.jpg"
+        thumb = tmp_path / "img_thumb.jpg"
+        source.write_bytes(b"x")
+        thumb.write_bytes(b"y")
+
+        os.utime(thumb, (1000, 1000))
+        os.utime(source, (2000, 2000))
+        assert is_thumbnail_current(str(source), str(thumb)) == False
+
+        os.utime(thumb, (3000, 3000))
+        assert is_thumbnail_current(str(source), str(thumb)) == True
+
+
+class TestParallelThumbnails:
+    """Test process pool thumbnail generation"""
+
+    def test_parallel_generates_all(self, tmp_path):
+        """Test that every job is processed and failures are reported"""
+        jobs = []
+        for i in range(3):
+            source = tmp_path / f"img{i}.png"
+            Image.new('RGB', (300, 200), color='green').save(source)
+            jobs.append((str(source), str(tmp_path / "thumbs" / f"img{i}_thumb.jpg")))
+        jobs.append((str(tmp_path / "missing.jpg"), str(tmp_path / "thumbs" / "missing_thumb.jpg")))
+
+        results = dict(generate_thumbnails_parallel(jobs, intSize=100, intWorkers=2))
+
+        assert len(results) == 4
+        assert results[str(tmp_path / "missing.jpg")] == False
+        for i in range(3):
+            assert results[str(tmp_path / f"img{i}.png")] == True
+            with Image.open(tmp_path / "thumbs" / f"img{i}_thumb.jpg") as thumb:
+                assert thumb.size == (100, 100)
@@ -0,0 +1,151 @@
+# ABOUTME: Unit tests for the asker hybrid retriever (keyword index + Chroma fusion)
+# ABOUTME: Uses an in-memory keyword index, a fake Chroma collection and a fake embedding client
+
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "newsGetter"))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "asker"))
+import pytest
+
+from documents import Abstract
+from index import Index
+from hybrid_retriever import HybridRetriever, rrf_scores, weighted_scores
+
+
+class FakeEmbedClient:
+    """Stands in for ollama.Client; the fake collection ignores the vector."""
+
+    def embed(self, model, input):
+        return {'embeddings': [[0.0, 1.0]]}
+
+
+class FakeCollection:
+    """Chroma collection returning fixed query hits, nearest first."""
+
+    def __init__(self, hits, chunks=None):
+        self.hits = hits
+        self.chunks = chunks or hits
+
+    def query(self, query_embeddings, n_results):
+        hits = self.hits[:n_results]
+        return {'ids': [[hit['id'] for hit in hits]],
+                'metadatas': [[{'source': hit['source']} for hit in hits]],
+                'documents': [[hit['document'] for hit in hits]],
+                'distances': [[hit['distance'] for hit in hits]]}
+
+    def get(self, where, include):
+        chunks = [chunk for chunk in self.chunks if chunk['source'] == where['source']]
+        return {'ids': [chunk['id'] for chunk in chunks],
+                'documents': [chunk['document'] for chunk in chunks]}
+
+
+def make_index(messages):
+    """Keyword index over (msg_id, text) pairs."""
+    index = Index()
+    for doc_id, (msg_id, text) in enumerate(messages):
+        index.index_document(Abstract(ID=doc_id, title='', body=text, msg_id=msg_id))
+    return index
+
+
+def make_retriever(hits, messages, chunks=None, **kwargs):
+    return HybridRetriever(FakeCollection(hits, chunks), make_index(messages), "embed-model",
+                           ollamaclient=FakeEmbedClient(), **kwargs)
+
+
+class TestFusionScores:
+    """Tests for rrf_scores and weighted_scores."""
+
+    def test_rrf_sums_reciprocal_ranks(self):
+        scores = rrf_scores([["a", "b"], ["b", "c"]], k=60)
+
+        assert scores["a"] == pytest.approx(1 / 61)
+        assert scores["b"] == pytest.approx(1 / 62 + 1 / 61)
+        assert scores["c"] == pytest.approx(1 / 62)
+
+    def test_rrf_applies_weights(self):
+        scores = rrf_scores([["a"], ["b"]], weights=[2.0, 0.5], k=0)
+
+        assert scores == {"a": 2.0, "b": 0.5}
+
+    def test_weighted_normalises_each_list(self):
+        fused = weighted_scores([[("a", 0.9), ("b", 0.5)], [("b", 30.0), ("c", 10.0)]], [1.0, 1.0])
+
+        assert fused == {"a": 1.0, "b": 1.0, "c": 0.0}
+
+    def test_weighted_single_hit_and_empty_list(self):
+        fused = weighted_scores([[("a", 0.2)], []], [0.5, 1.0])
+
+        assert fused == {"a": 0.5}
+
+
+class TestLexicalSearch:
+    """Tests for the keyword side of the retriever."""
+
+    def test_unknown_token_is_ignored(self):
+        retriever = make_retriever([], [("m1", "nose gear leg"), ("m2", "main gear")])
+
+        hits = retriever.lexical_search("nose gear zzzunknownword")
+
+        assert [msg_id for msg_id, _ in hits] == ["m1", "m2"]
+        retriever.close()
+
+    def test_only_unknown_tokens_returns_nothing(self):
+        retriever = make_retriever([], [("m1", "nose gear leg")])
+
+        assert retriever.lexical_search("zzzunknownword") == []
+        retriever.close()
+
+
+class TestRetrieve:
+    """Tests for fusion and deduplication in retrieve."""
+
+    def test_unknown_token_query_does_not_raise(self):
+        hits = [{"id": "m1_0", "source": "m1", "document": "nose gear leg", "distance": 0.1}]
+        retriever = make_retriever(hits, [("m1", "nose gear leg")])
+
+        context = retriever.retrieve("nose gear zzzunknownword")
+
+        assert [chunk["id"] for chunk in context] == ["m1_0"]
+        retriever.close()
+
+    def test_duplicate_text_is_returned_once(self):
+        hits = [{"id": "m1_0", "source": "m1", "document": "Nose gear leg", "distance": 0.1},
+                {"id": "m2_0", "source": "m2", "document": "nose  gear leg", "distance": 0.2},
+                {"id": "m2_1", "source": "m2", "document": "wheel fairing", "distance": 0.3}]
+        retriever = make_retriever(hits, [("m1", "nose gear leg"), ("m2", "wheel fairing")])
+
+        context = retriever.retrieve("nose gear")
+
+        assert [chunk["id"] for chunk in context] == ["m1_0", "m2_1"]
+        retriever.close()
+
+    def test_keyword_only_message_contributes_best_chunks(self):
+        hits = [{"id": "m1_0", "source": "m1", "document": "engine mount", "distance": 0.1}]
+        chunks = hits + [{"id": "m2_0", "source": "m2", "document": "paint schedule", "distance": None},
+                         {"id": "m2_1", "source": "m2", "document": "O-320 carburetor", "distance": None}]
+        retriever = make_retriever(hits, [("m1", "engine mount"), ("m2", "O-320 carburetor paint")],
+                                   chunks=chunks, chunks_per_source=1)
+
+        context = retriever.retrieve("O-320 carburetor")
+
+        by_id = {chunk["id"]: chunk for chunk in context}
+        assert set(by_id) == {"m1_0", "m2_1"}
+        assert by_id["m2_1"]["vector_rank"] is None
+        assert by_id["m2_1"]["lexical_rank"] == 1
+        retriever.close()
+
+    def test_max_chunks_limits_context(self):
+        hits = [{"id": f"m{n}_0", "source": f"m{n}", "document": f"chunk {n}", "distance": n / 10}
+                for n in range(5)]
+        retriever = make_retriever(hits, [("m0", "chunk")], max_chunks=3, method="weighted")
+
+        context = retriever.retrieve("chunk")
+
+        assert len(context) == 3
+        assert context[0]["id"] == "m0_0"
+        retriever.close()
+
+    def test_unknown_method_rejected(self):
+        with pytest.raises(ValueError):
+            HybridRetriever(FakeCollection([]), Index(), "embed-model", method="max")
@@ -0,0 +1,153 @@
+# ABOUTME: Tests for the inverted image query index
+# ABOUTME: Covers query parsing, keyword/chapter/author/date postings, boolean combinations, paging and caching
+
+import json
+from datetime import date
+
+import pytest
+
+from image_query import ImageQueryIndex, parse_query, parse_date_bound, open_query_index, default_cache_file
+from index_store import IndexStore
+
+
+INDEX = {
+    "msg1": {
+        "metadata": {"subject": "Firewall install", "author": "Ted Davis", "date": "Feb 11, 2011"},
+        "images": [
+            {"local_filename": "msg1_part0_1_a.jpg", "keywords": ["landing"]},
+            {"local_filename": "msg1_part0_2_b.jpg"}
+        ],
+        "keywords": ["firewall"],
+        "chapters": [23]
+    },
+    "msg2": {
+        "metadata": {"subject": "Cowling fit", "author": "krw...@gmail.com", "date": "Jul 23, 2012"},
+        "images": [{"local_filename": "msg2_part0_1_c.png",
+                    "derivatives": [{"size": 200, "format": "jpeg", "path": "msg2_part0_1_c_200.jpg"}]}],
+        "llm_keywords": ["cowlings", "oil cooler"],
+        "chapters": [23, 4]
+    },
+    "msg3": {
+        "metadata": {"subject": "Fuel lines", "author": "Ted Davis", "date": "Mar 1, 2013"},
+        "images": [{"local_filename": "msg3_part0_1_d.jpg"}],
+        "keywords": ["fuel", "firewall"]
+    },
+    "msg4": {
+        "metadata": {"subject": "No images downloaded", "date": "bad date"},
+        "images": [{"url": "https://example.com/x.jpg"}],
+        "keywords": ["firewall"]
+    }
+}
+
+
+@pytest.fixture
+def query_index():
+    return ImageQueryIndex.build(INDEX)
+
+
+def files(results):
+    return [image["local_filename"] for image in results["images"]]
+
+
+class TestParseQuery:
+    def test_terms_and_operators(self):
+        assert parse_query("firewall") == ("keyword", "firewall")
+        assert parse_query('a OR "oil cooler" NOT chapter:4') == (
+            "or", [("keyword", "a"), ("and", [("keyword", "oil cooler"), ("not", ("chapter", 4))])])
+        assert parse_query('(a OR b) AND author:"ted davis"') == (
+            "and", [("or", [("keyword", "a"), ("keyword", "b")]), ("author", "ted davis")])
+
+    def test_date_bounds(self):
+        assert parse_date_bound("2011", end=False) == date(2011, 1, 1)
+        assert parse_date_bound("2011", end=True) == date(2011, 12, 31)
+        assert parse_date_bound("2012-02", end=True) == date(2012, 2, 29)
+        assert parse_date_bound("2012-12", end=True) == date(2012, 12, 31)
+        assert parse_query("before:2012-03-04") == ("before", date(2012, 3, 4))
+
+    @pytest.mark.parametrize("text", ["", "(a", "a )", "OR a", "chapter:x", "after:soon"])
+    def test_malformed_queries(self, text):
+        with pytest.raises(ValueError):
+            parse_query(text)
+
+
+class TestImageQueryIndex:
+    def test_keyword_postings_include_message_and_image_keywords(self, query_index):
+        assert files(query_index.search("firewall")) == [
+            "msg1_part0_1_a.jpg", "msg1_part0_2_b.jpg", "msg3_part0_1_d.jpg"]
+        assert files(query_index.search("landing")) == ["msg1_part0_1_a.jpg"]
+        # Plural and singular share a posting; multi-word keywords work quoted
+        assert files(query_index.search("cowling")) == ["msg2_part0_1_c.png"]
+        assert files(query_index.search('"Oil Cooler"')) == ["msg2_part0_1_c.png"]
+        assert query_index.search("unknown")["total"] == 0
+
+    def test_chapter_author_and_date(self, query_index):
+        assert query_index.search("chapter:4")["total"] == 1
+        assert query_index.search("chapter:23")["total"] == 3
+        assert query_index.search("author:davis")["total"] == 3
+        assert files(query_index.search("after:2012 before:2012")) == ["msg2_part0_1_c.png"]
+        assert query_index.search("after:2012-07-24")["total"] == 1
+
+    def test_boolean_combinations(self, query_index):
+        assert files(query_index.search("firewall NOT fuel")) == ["msg1_part0_1_a.jpg", "msg1_part0_2_b.jpg"]
+        assert files(query_index.search("fuel OR cowling")) == ["msg2_part0_1_c.png", "msg3_part0_1_d.jpg"]
+        assert query_index.search("(fuel OR cowling) AND chapter:23")["total"] == 1
+
+    def test_paging_and_result_fields(self, query_index):
+        page = query_index.search("author:davis", page=2, page_size=2, thumb_dir="thumbs")
+
+        assert (page["total"], page["page"], page["pages"]) == (3, 2, 2)
+        assert page["images"] == [{
+            "msg_id": "msg3", "local_filename": "msg3_part0_1_d.jpg",
+            "thumbnail": "thumbs/msg3_part0_1_d_thumb.jpg",
+            "subject": "Fuel lines", "author": "Ted Davis", "date": "Mar 1, 2013"
+        }]
+
+    def test_thumbnail_prefers_recorded_derivative(self, query_index):
+        image = query_index.search("cowling", thumb_dir="thumbs", derived_dir="derived")["images"][0]
+        assert image["thumbnail"] == "derived/msg2_part0_1_c_200.jpg"
+
+    def test_images_without_local_file_are_not_indexed(self, query_index):
+        assert "msg4" not in {image["msg_id"] for image in query_index.images}
+
+
+class TestOpenQueryIndex:
+    def test_cache_is_reused_until_index_changes(self, tmp_path):
+        index_file = tmp_path / "image_index.json"
+        index_file.write_text(json.dumps(INDEX))
+        cache_file = default_cache_file(str(index_file))
+        assert cache_file == str(tmp_path / "image_index_query.json")
+
+        first = open_query_index(str(index_file))
+        assert first.search("firewall")["total"] == 3
+
+        # Poison the cache: a current cache is used as-is
+        with open(cache_file) as f:
+            cached = json.load(f)
+        cached["keywords"]["firewal"] = []
+        cached["keywords"]["firewall"] = []
+        with open(cache_file, 'w') as f:
+            json.dump(cached, f)
+        assert open_query_index(str(index_file)).search("firewall")["total"] == 0
+
+        # Changing the index invalidates the cache
+        changed = dict(INDEX)
+        changed.pop("msg3")
+        index_file.write_text(json.dumps(changed, indent=2))
+        assert open_query_index(str(index_file)).search("firewall")["total"] == 2
+
+    def test_store_cache_sees_uncheckpointed_writes(self, tmp_path):
+        index_file = tmp_path / "image_index.sqlite"
+        store = IndexStore(str(index_file))
+        try:
+            store.import_json(INDEX)
+            assert open_query_index(str(index_file)).search("firewall")["total"] == 3
+
+            # A writer that keeps the store open commits into the -wal file only
+            main_stat = index_file.stat()
+            store.delete_message("msg3")
+            assert index_file.stat().st_mtime_ns == main_stat.st_mtime_ns
+            assert index_file.stat().st_size == main_stat.st_size
+
+            assert open_query_index(str(index_file)).search("firewall")["total"] == 2
+        finally:
+            store.close()
@@ -0,0 +1,204 @@
+# ABOUTME: Tests for the SQLite image index store
+# ABOUTME: Covers JSON round-trip, per-record updates, transactions and .sqlite/.db dispatch in the tools
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from index_store import (IndexStore, is_index_store, load_index_file, load_index_images, save_images,
+                         save_index_file, save_keywords, save_messages, updates_in_place)
+
+
+INDEX = {
+    "msg1": {
+        "metadata": {"subject": "Installing firewall", "author": "Pilot"},
+        "images": [
+            {"local_filename": "msg1_1.jpg", "url": "https://example.com/1.jpg"},
+            {"local_filename": "msg1_2.jpg", "url": "https://example.com/2.jpg"}
+        ],
+        "keywords": ["firewall"]
+    },
+    "msg2": {
+        "images": [],
+        "metadata": {"subject": "Cowling été"},
+        "custom": {"nested": [1, 2]}
+    },
+    "msg3": {
+        "metadata": {"subject": "Tagged with nothing"},
+        "images": [],
+        "keywords": []
+    }
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = IndexStore(str(tmp_path / "index.sqlite"))
+    store.import_json(INDEX)
+    yield store
+    store.close()
+
+
+class TestIndexStore:
+    def test_round_trip_preserves_order_and_fields(self, store):
+        exported = store.export_json()
+
+        assert exported == INDEX
+        assert list(exported) == list(INDEX)
+        for msg_id in INDEX:
+            assert list(exported[msg_id]) == list(INDEX[msg_id])
+
+    def test_round_trip_keeps_null_keywords_and_missing_images(self, store):
+        odd = {"metadata": {"subject": "Odd"}, "keywords": None}
+        store.put_message("msg4", odd)
+
+        assert store.get_message("msg4") == odd
+        assert store.export_json()["msg4"] == odd
+        assert list(store.get_message("msg4")) == ["metadata", "keywords"]
+
+    def test_limited_export_matches_full_export(self, store):
+        assert store.export_json(limit=2) == dict(list(INDEX.items())[:2])
+        assert dict(store.iter_messages()) == INDEX
+
+    def test_lazy_reads(self, store):
+        assert len(store) == 3
+        assert "msg2" in store
+        assert "nope" not in store
+        assert store.message_ids() == ["msg1", "msg2", "msg3"]
+        assert store.get_metadata("msg1")["author"] == "Pilot"
+        assert store.get_keywords("msg1") == ["firewall"]
+        assert store.get_keywords("msg2") is None
+        assert store.get_keywords("msg3") == []
+        assert store.image_count() == 2
+        assert store.find_image("msg1_2.jpg") == ("msg1", INDEX["msg1"]["images"][1])
+        assert store.find_image("missing.jpg") is None
+        assert list(store.iter_images()) == [("msg1", image) for image in INDEX["msg1"]["images"]]
+        assert store.messages_with_images(["msg1_2.jpg", "missing.jpg"]) == ["msg1"]
+        assert store.messages_without_images() == ["msg2", "msg3"]
+        with pytest.raises(KeyError):
+            store.get_message("nope")
+
+    def test_set_keywords_updates_one_message(self, store):
+        store.set_keywords("msg2", ["cowling", "engine"])
+
+        message = store.get_message("msg2")
+        assert message["keywords"] == ["cowling", "engine"]
+        assert list(message) == ["images", "metadata", "custom", "keywords"]
+        assert store.get_message("msg1") == INDEX["msg1"]
+
+        store.set_keywords("msg2", None)
+        assert "keywords" not in store.get_message("msg2")
+
+    def test_put_message_keeps_position(self, store):
+        store.put_message("msg1", {"metadata": {"subject": "Edited"}, "images": []})
+        store.put_message("msg4", {"metadata": {"subject": "New"}, "images": []})
+
+        assert store.message_ids() == ["msg1", "msg2", "msg3", "msg4"]
+        assert store.get_message("msg1") == {"metadata": {"subject": "Edited"}, "images": []}
+        assert store.find_image("msg1_1.jpg") is None
+
+    def test_transaction_rolls_back_on_error(self, store):
+        with pytest.raises(RuntimeError):
+            with store.transaction():
+                store.set_keywords("msg1", ["changed"])
+                store.delete_message("msg2")
+                raise RuntimeError("boom")
+
+        assert store.export_json() == INDEX
+
+
+class TestIndexFiles:
+    def test_dispatch_on_suffix(self, tmp_path):
+        assert is_index_store("index.sqlite")
+        assert is_index_store("index.DB")
+        assert not is_index_store("image_index.json")
+
+        for name in ["index.json", "index.sqlite"]:
+            path = str(tmp_path / name)
+            save_index_file(INDEX, path)
+            assert load_index_file(path) == INDEX
+            assert load_index_file(path, limit=1) == {"msg1": INDEX["msg1"]}
+
+        with open(tmp_path / "index.json") as f:
+            assert json.load(f) == INDEX
+
+    def test_load_missing_store_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_index_file(str(tmp_path / "missing.sqlite"))
+
+    def test_save_keywords_only_for_existing_store(self, tmp_path):
+        db_path = str(tmp_path / "index.sqlite")
+        json_path = str(tmp_path / "index.json")
+        updated = json.loads(json.dumps(INDEX))
+        updated["msg2"]["keywords"] = ["cowling"]
+
+        assert not save_keywords(updated, json_path, ["msg2"])
+        assert not save_keywords(updated, db_path, ["msg2"])
+
+        save_index_file(INDEX, db_path)
+        assert save_keywords(updated, db_path, ["msg2"])
+        assert load_index_file(db_path) == updated
+
+    def test_save_images_and_messages_per_record(self, tmp_path):
+        db_path = str(tmp_path / "index.sqlite")
+        save_index_file(INDEX, db_path)
+        assert updates_in_place(db_path)
+        assert not updates_in_place(db_path, str(tmp_path / "copy.sqlite"))
+        assert not updates_in_place(str(tmp_path / "index.json"))
+
+        images = load_index_images(db_path)
+        assert images == {"msg1": {"images": INDEX["msg1"]["images"]}}
+        images["msg1"]["images"][0]["sha256"] = "abc"
+        assert save_images(images, db_path, ["msg1"])
+
+        updated = json.loads(json.dumps(INDEX))
+        updated["msg1"]["images"][0]["sha256"] = "abc"
+        assert load_index_file(db_path) == updated
+
+        updated["msg2"]["custom"] = "changed"
+        assert save_messages(updated, db_path, ["msg2"], removed_ids=["msg3"])
+        del updated["msg3"]
+        assert load_index_file(db_path) == updated
+
+    def test_tools_update_store_in_place(self, tmp_path):
+        from clean_invalid_keywords import clean_invalid_keywords
+        from remove_images import remove_images_from_store
+        from llm_config import INVALID_KEYWORDS
+
+        db_path = str(tmp_path / "index.sqlite")
+        index = json.loads(json.dumps(INDEX))
+        index["msg1"]["keywords"].append(INVALID_KEYWORDS[0])
+        save_index_file(index, db_path)
+
+        with patch.object(IndexStore, 'import_json', side_effect=AssertionError("whole index rewritten")):
+            stats = clean_invalid_keywords(db_path)
+            assert stats["message_keywords_removed"] == 1
+            assert load_index_file(db_path) == INDEX
+
+            store = IndexStore(db_path)
+            stats = remove_images_from_store(store, {"msg1_1.jpg"})
+            store.close()
+
+        assert stats == {"images_removed": 1, "messages_affected": 1, "messages_removed": 2}
+        assert load_index_file(db_path) == {
+            "msg1": dict(INDEX["msg1"], images=[INDEX["msg1"]["images"][1]])
+        }
+
+    def test_llm_tagging_updates_store_in_place(self, tmp_path):
+        from llm_tag_messages import tag_messages
+        from llm_tagger import KeywordTagger
+
+        db_path = str(tmp_path / "index.sqlite")
+        save_index_file(INDEX, db_path)
+        keywords_file = tmp_path / "keywords.txt"
+        keywords_file.write_text("firewall\ncowling\n")
+
+        with patch.object(KeywordTagger, 'tag_message', return_value=(["cowling"], "{}")):
+            stats = tag_messages(db_path, str(keywords_file))
+
+        assert stats["processed"] == 1
+        result = load_index_file(db_path)
+        assert result["msg2"]["keywords"] == ["cowling"]
+        assert result["msg1"] == INDEX["msg1"]
+        assert list(result) == list(INDEX)
@@ -0,0 +1,89 @@
+# ABOUTME: Tests for the sparse keyword matrix statistics engine
+# ABOUTME: Covers frequencies, co-occurrence, chapter/year breakdowns and the index-hash cache
+
+import json
+from collections import Counter
+
+from keyword_stats import KeywordMatrix, open_keyword_matrix, default_cache_file
+from analyze_tag_statistics import analyze_keywords
+
+
+INDEX = {
+    "msg1": {
+        "metadata": {"date": "Feb 11, 2011"},
+        "images": [{"keywords": ["Landing"]}, {"keywords": ["firewall"]}],
+        "keywords": ["Firewall", "cowling"],
+        "chapters": [23]
+    },
+    "msg2": {
+        "metadata": {"date": "Jul 23, 2012"},
+        "images": [],
+        "keywords": ["cowling", "firewall"],
+        "chapters": [4, 23]
+    },
+    "msg3": {
+        "metadata": {"date": "unknown"},
+        "images": [{}],
+        "keywords": []
+    }
+}
+
+
+class TestKeywordMatrix:
+    def test_frequencies_match_nested_loop_count(self):
+        expected = Counter()
+        for message in INDEX.values():
+            expected.update(kw.lower() for kw in message.get("keywords", []))
+            for image in message.get("images", []):
+                expected.update(kw.lower() for kw in image.get("keywords", []))
+
+        assert KeywordMatrix.build(INDEX).frequencies() == expected
+        assert analyze_keywords(INDEX) == expected
+
+    def test_summary_and_message_frequencies(self):
+        matrix = KeywordMatrix.build(INDEX)
+
+        assert matrix.summary == {"messages": 3, "messages_with_keywords": 2,
+                                  "messages_with_image_keywords": 1}
+        assert matrix.message_frequencies() == Counter({"firewall": 2, "cowling": 2, "landing": 1})
+
+    def test_cooccurrence_counts_messages_per_pair(self):
+        pairs = KeywordMatrix.build(INDEX).cooccurrence()
+
+        assert pairs == Counter({("cowling", "firewall"): 2, ("cowling", "landing"): 1,
+                                 ("firewall", "landing"): 1})
+        assert KeywordMatrix.build(INDEX).cooccurrence(min_count=2) == Counter({("cowling", "firewall"): 2})
+
+    def test_chapter_and_year_breakdowns(self):
+        matrix = KeywordMatrix.build(INDEX)
+
+        by_chapter = matrix.by_chapter()
+        assert list(by_chapter) == [4, 23]
+        assert by_chapter[4] == Counter({"cowling": 1, "firewall": 1})
+        assert by_chapter[23]["firewall"] == 2
+
+        by_year = matrix.by_year()
+        assert list(by_year) == [2011, 2012]
+        assert by_year[2011] == Counter({"firewall": 1, "cowling": 1, "landing": 1})
+
+
+class TestOpenKeywordMatrix:
+    def test_cache_keyed_on_index_content(self, tmp_path):
+        index_file = tmp_path / "image_index.json"
+        index_file.write_text(json.dumps(INDEX))
+        cache_file = default_cache_file(str(index_file))
+        assert cache_file == str(tmp_path / "image_index_keyword_stats.json")
+
+        assert open_keyword_matrix(str(index_file)).summary["messages"] == 3
+
+        # A cache for the same content is used without reading the index
+        with open(cache_file) as f:
+            cached = json.load(f)
+        cached["summary"]["messages"] = 99
+        with open(cache_file, 'w') as f:
+            json.dump(cached, f)
+        assert open_keyword_matrix(str(index_file)).summary["messages"] == 99
+
+        # Different content -> different hash -> rebuilt
+        index_file.write_text(json.dumps({"msg1": INDEX["msg1"]}))
+        assert open_keyword_matrix(str(index_file)).summary["messages"] == 1
@@ -0,0 +1,142 @@
+# ABOUTME: Tests for the persistent SQLite LLM response cache
+# ABOUTME: Covers keying, hit-rate stats, LRU eviction and use from KeywordTagger/KeywordExtractor
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from llm_cache import LLMResponseCache
+from llm_tagger import KeywordTagger
+from keyword_builder import KeywordExtractor
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a cache in a temporary directory."""
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+class TestLLMResponseCache:
+    """Test LLMResponseCache storage and stats."""
+
+    def test_put_and_get(self, cache):
+        version = LLMResponseCache.prompt_version("template {message}", "a, b")
+        assert cache.get("m1", version, "hello") is None
+
+        cache.put("m1", version, "hello", "firewall")
+
+        assert cache.get("m1", version, "hello") == "firewall"
+        # Different model, prompt version or message text are separate entries
+        assert cache.get("m2", version, "hello") is None
+        assert cache.get("m1", LLMResponseCache.prompt_version("template {message}", "a, c"), "hello") is None
+        assert cache.get("m1", version, "hello!") is None
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        first = LLMResponseCache(path)
+        first.put("m", "v", "text", "answer")
+        first.close()
+
+        second = LLMResponseCache(path)
+        assert second.get("m", "v", "text") == "answer"
+        second.close()
+
+    def test_stats(self, cache):
+        cache.put("m", "v", "a", "x")
+        cache.get("m", "v", "a")
+        cache.get("m", "v", "a")
+        cache.get("m", "v", "b")
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+        assert stats["entries"] == 1
+
+    def test_evict_least_recently_used(self, cache):
+        for text in ["a", "b", "c"]:
+            cache.put("m", "v", text, text.upper())
+            time.sleep(0.01)
+        # Touch "a" so "b" becomes least recently used
+        cache.get("m", "v", "a")
+
+        removed = cache.evict(max_entries=2)
+
+        assert removed == 1
+        assert cache.get("m", "v", "b") is None
+        assert cache.get("m", "v", "a") == "A"
+        assert cache.get("m", "v", "c") == "C"
+        assert cache.get_stats()["evicted"] == 1
+
+
+class TestTaggerCache:
+    """Test that taggers consult the cache before calling the LLM."""
+
+    keywords = ["firewall", "cowling", "fuel"]
+
+    def test_tag_message_uses_cache(self, cache):
+        tagger = KeywordTagger(cache=cache)
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.generate.return_value = {'response': 'firewall'}
+
+            first = tagger.tag_message("Installing the firewall", self.keywords)
+            second = tagger.tag_message("Installing the firewall", self.keywords)
+
+            mock_client.generate.assert_called_once()
+        assert first == second == (["firewall"], "firewall")
+
+        # Changing the keyword list invalidates the cached answer
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.generate.return_value = {'response': 'NONE'}
+            tagger.tag_message("Installing the firewall", self.keywords + ["canard"])
+            mock_client.generate.assert_called_once()
+
+    def test_errors_are_not_cached(self, cache):
+        tagger = KeywordTagger(cache=cache)
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.generate.side_effect = [Exception("Connection refused"), {'response': 'fuel'}]
+
+            assert tagger.tag_message("Fuel lines", self.keywords)[0] == []
+            assert tagger.tag_message("Fuel lines", self.keywords)[0] == ["fuel"]
+
+    def test_batch_and_single_share_cache(self, cache):
+        tagger = KeywordTagger(cache=cache)
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.generate.return_value = {'response': '{"1": ["firewall"], "2": []}'}
+            tagger.tag_messages_batch({"a": "Firewall work", "b": "Weather"}, self.keywords)
+
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            assert tagger.tag_message("Firewall work", self.keywords)[0] == ["firewall"]
+            assert tagger.tag_message("Weather", self.keywords)[0] == []
+            results = tagger.tag_messages_batch({"a": "Firewall work", "c": "Cowling"}, self.keywords)
+
+            # Only the uncached message goes to the LLM
+            mock_client.generate.assert_called_once()
+            assert "Firewall work" not in mock_client.generate.call_args[1]['prompt']
+        assert results["a"][0] == ["firewall"]
+
+    def test_categorize_message_uses_cache(self, cache):
+        tagger = KeywordTagger(cache=cache)
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.generate.return_value = {'response': '4, 19'}
+
+            tagger.categorize_message("Wing layup")
+            chapters, _ = tagger.categorize_message("Wing layup")
+
+            mock_client.generate.assert_called_once()
+        assert chapters == [4, 19]
+
+    def test_keyword_extractor_uses_cache(self, cache):
+        extractor = KeywordExtractor(cache=cache)
+        with patch.object(extractor, 'ollama_client') as mock_client:
+            mock_client.generate.return_value = {'response': 'firewall, cowling'}
+
+            extractor.extract_keywords_from_message("Firewall and cowling", ["fuel"])
+            keywords = extractor.extract_keywords_from_message("Firewall and cowling", ["fuel"])
+
+            mock_client.generate.assert_called_once()
+        assert keywords == ["firewall", "cowling"]
+        assert cache.get_stats()["hits"] == 1
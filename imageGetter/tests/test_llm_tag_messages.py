@@ -295,6 +295,45 @@ class TestTagMessages:
             assert "firewall" in captured.out
 
 
+    def test_batch_mode_tags_in_batches(self, test_index, test_keywords):
+        """Test that batch_size groups untagged messages into batched LLM calls."""
+        from unittest.mock import patch
+        from llm_tagger import KeywordTagger
+
+        def fake_batch(self, messages, keywords, model=None):
+            return {msg_id: (["firewall"], "{}") for msg_id in messages}
+
+        with patch.object(KeywordTagger, 'tag_messages_batch', autospec=True,
+                          side_effect=fake_batch) as mock_batch:
+            stats = tag_messages(test_index, test_keywords, batch_size=5)
+
+        # msg1 and msg2 untagged -> one batch; msg3 skipped
+        assert mock_batch.call_count == 1
+        assert set(mock_batch.call_args[0][1]) == {"msg1", "msg2"}
+        assert (stats["processed"], stats["skipped"], stats["errors"]) == (2, 1, 0)
+
+        with open(test_index) as f:
+            result = json.load(f)
+        assert result["msg1"]["keywords"] == ["firewall"]
+        assert result["msg2"]["keywords"] == ["firewall"]
+        assert result["msg3"]["keywords"] == ["engine"]
+
+    def test_batch_mode_respects_limit(self, test_index, test_keywords):
+        """Test that limit caps the messages sent in batches."""
+        from unittest.mock import patch
+        from llm_tagger import KeywordTagger
+
+        def fake_batch(self, messages, keywords, model=None):
+            return {msg_id: ([], "{}") for msg_id in messages}
+
+        with patch.object(KeywordTagger, 'tag_messages_batch', autospec=True,
+                          side_effect=fake_batch) as mock_batch:
+            stats = tag_messages(test_index, test_keywords, limit=1, batch_size=5)
+
+        assert stats["processed"] == 1
+        assert list(mock_batch.call_args[0][1]) == ["msg1"]
+
+
 class TestSaveImageIndex:
     """Test saving image index."""
 
@@ -337,3 +376,40 @@ class TestSaveImageIndex:
         # Check new data was written
         result = json.loads(index_file.read_text())
         assert result["msg1"]["metadata"]["subject"] == "New"
+
+
+    def test_parallel_applies_results_in_index_order(self, tmp_path):
+        """Test that concurrent tagging applies results in index order despite completion order."""
+        import time
+        from unittest.mock import patch
+        from llm_tagger import KeywordTagger
+
+        index = {
+            f"msg{i}": {"metadata": {"subject": f"Subject {i}"}, "images": []}
+            for i in range(6)
+        }
+        index["msg2"]["keywords"] = ["engine"]
+        index_file = tmp_path / "index.json"
+        index_file.write_text(json.dumps(index))
+        keywords_file = tmp_path / "keywords.txt"
+        keywords_file.write_text("firewall\nengine\n")
+
+        def fake_tag(self, message_text, keywords, model=None):
+            # Earlier messages finish later
+            number = int(message_text.split()[-1])
+            time.sleep(0.01 * (6 - number))
+            return [f"kw{number}"], f"kw{number}"
+
+        with patch.object(KeywordTagger, 'tag_message', autospec=True, side_effect=fake_tag), \
+                patch('llm_tag_messages.print_verbose_output') as mock_verbose:
+            stats = tag_messages(str(index_file), str(keywords_file),
+                                 limit=4, verbose=True, parallel=3)
+
+        assert (stats["processed"], stats["skipped"], stats["errors"]) == (4, 1, 0)
+        assert [c[0][0] for c in mock_verbose.call_args_list] == ["msg0", "msg1", "msg3", "msg4"]
+
+        result = json.loads(index_file.read_text())
+        assert result["msg0"]["keywords"] == ["kw0"]
+        assert result["msg2"]["keywords"] == ["engine"]
+        assert result["msg4"]["keywords"] == ["kw4"]
+        assert "keywords" not in result["msg5"]
@@ -3,6 +3,7 @@
 import pytest
 from unittest.mock import Mock, patch
 from llm_tagger import KeywordTagger
+from llm_config import LLM_NUM_CTX
 
 
 class TestKeywordTagger:
@@ -332,3 +333,147 @@ class TestKeywordTagger:
             # Should raise RuntimeError, not return empty list
             with pytest.raises(RuntimeError, match="LLM model not found"):
                 tagger.categorize_message(message)
+
+    def test_tag_messages_batch_single_call(self, tagger, keywords):
+        """Test that a batch is tagged with one LLM call and mapped back by id."""
+        messages = {
+            "msgA": "Installing the firewall",
+            "msgB": "Cowling and canard work",
+            "msgC": "Weather delays"
+        }
+
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            raw = '{"1": ["firewall", "bogus"], "2": ["Cowling", "canard"], "3": []}'
+            mock_client.generate.return_value = {'response': raw}
+
+            results = tagger.tag_messages_batch(messages, keywords)
+
+            mock_client.generate.assert_called_once()
+            call_kwargs = mock_client.generate.call_args[1]
+            assert call_kwargs['format'] == 'json'
+            # Batch prompts are long; the context size must not fall back to the server default
+            assert call_kwargs['options'] == {'num_ctx': LLM_NUM_CTX}
+            # Keyword list appears once, all messages appear in the prompt
+            assert call_kwargs['prompt'].count("firewall, cowling") == 1
+            assert "Weather delays" in call_kwargs['prompt']
+
+            assert results["msgA"] == (["firewall"], raw)
+            assert results["msgB"] == (["cowling", "canard"], raw)
+            assert results["msgC"] == ([], raw)
+
+    def test_tag_messages_batch_falls_back_on_bad_json(self, tagger, keywords):
+        """Test fallback to single-message calls when batch response isn't JSON."""
+        messages = {"msgA": "Installing the firewall", "msgB": "Fuel lines"}
+
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.generate.side_effect = [
+                {'response': 'Sure! Here are the keywords: firewall'},
+                {'response': 'firewall'},
+                {'response': 'fuel'}
+            ]
+
+            results = tagger.tag_messages_batch(messages, keywords)
+
+            assert mock_client.generate.call_count == 3
+            assert results["msgA"] == (["firewall"], "firewall")
+            assert results["msgB"] == (["fuel"], "fuel")
+
+    def test_tag_messages_batch_falls_back_for_missing_ids(self, tagger, keywords):
+        """Test that only messages missing from the JSON response are retried singly."""
+        messages = {"msgA": "Installing the firewall", "msgB": "Fuel lines"}
+
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.generate.side_effect = [
+                {'response': '{"1": ["firewall"]}'},
+                {'response': 'fuel'}
+            ]
+
+            results = tagger.tag_messages_batch(messages, keywords)
+
+            assert mock_client.generate.call_count == 2
+            assert results["msgA"][0] == ["firewall"]
+            assert results["msgB"][0] == ["fuel"]
+
+    def test_tag_messages_batch_empty_messages(self, tagger, keywords):
+        """Test that empty messages are not sent to the LLM."""
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.generate.return_value = {'response': 'engine'}
+
+            results = tagger.tag_messages_batch({"msgA": "", "msgB": "Engine mount"}, keywords)
+
+            # Only one non-empty message - single call path
+            mock_client.generate.assert_called_once()
+            assert results["msgA"] == ([], "")
+            assert results["msgB"] == (["engine"], "engine")
+
+    def test_tag_messages_batch_model_not_found_raises_error(self, tagger, keywords):
+        """Test that model not found error terminates batch tagging immediately."""
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.generate.side_effect = Exception("model 'gemma3:1b' not found (status code: 404)")
+
+            with pytest.raises(RuntimeError, match="LLM model not found"):
+                tagger.tag_messages_batch({"a": "firewall", "b": "cowling"}, keywords)
+
+    def test_reuse_prompt_cache_sends_identical_system_prompt(self, keywords):
+        """Test that prompt cache mode keeps the keyword list in a fixed system message."""
+        tagger = KeywordTagger(reuse_prompt_cache=True)
+
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.chat.side_effect = [
+                {'message': {'content': 'firewall'}},
+                {'message': {'content': 'fuel'}}
+            ]
+
+            result1, _ = tagger.tag_message("Installing the firewall", keywords)
+            result2, _ = tagger.tag_message("Fuel lines", keywords)
+
+            mock_client.generate.assert_not_called()
+            assert result1 == ["firewall"]
+            assert result2 == ["fuel"]
+
+            calls = mock_client.chat.call_args_list
+            system1, user1 = calls[0][1]['messages']
+            system2, user2 = calls[1][1]['messages']
+            # Prefix is byte-identical, only the user message changes
+            assert system1 == system2
+            assert "firewall, cowling" in system1['content']
+            assert user1 == {"role": "user", "content": "Installing the firewall"}
+            assert user2 == {"role": "user", "content": "Fuel lines"}
+            assert calls[0][1]['keep_alive']
+
+    def test_reuse_prompt_cache_batch_uses_json_chat(self, keywords):
+        """Test that batch tagging in prompt cache mode uses chat with JSON output."""
+        tagger = KeywordTagger(reuse_prompt_cache=True)
+
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.chat.return_value = {'message': {'content': '{"1": ["firewall"], "2": []}'}}
+
+            results = tagger.tag_messages_batch({"msgA": "Firewall", "msgB": "Weather"}, keywords)
+
+            call_kwargs = mock_client.chat.call_args[1]
+            assert call_kwargs['format'] == 'json'
+            assert "Weather" in call_kwargs['messages'][1]['content']
+            assert "Weather" not in call_kwargs['messages'][0]['content']
+            assert results["msgA"][0] == ["firewall"]
+            assert results["msgB"][0] == []
+
+    def test_prompt_eval_stats(self, tagger, keywords):
+        """Test aggregation of Ollama prompt_eval timings."""
+        assert tagger.get_prompt_eval_stats()["calls"] == 0
+
+        with patch.object(tagger, 'ollamaclient') as mock_client:
+            mock_client.generate.side_effect = [
+                {'response': 'firewall', 'prompt_eval_count': 900, 'prompt_eval_duration': 2_000_000_000},
+                {'response': 'fuel', 'prompt_eval_count': 40, 'prompt_eval_duration': 100_000_000},
+                {'response': 'NONE', 'prompt_eval_count': 60, 'prompt_eval_duration': 300_000_000}
+            ]
+            for message in ["Firewall", "Fuel", "Weather"]:
+                tagger.tag_message(message, keywords)
+
+        stats = tagger.get_prompt_eval_stats()
+        assert stats["calls"] == 3
+        assert stats["prompt_tokens"] == 1000
+        assert stats["prompt_eval_seconds"] == pytest.approx(2.4)
+        assert stats["first_call_ms"] == pytest.approx(2000)
+        assert stats["avg_later_call_ms"] == pytest.approx(200)
+        assert stats["estimated_seconds_saved"] == pytest.approx(3.6)
@@ -0,0 +1,118 @@
+# ABOUTME: Tests for the shared message text store
+# ABOUTME: Covers the id-to-path map, body parsing, truncation and the SQLite text cache
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from message_store import MessageTextStore, parse_message_body, get_message_store
+
+
+MD_CONTENT = """[Original Message ID:A-TestMsg](...)
+ # Installing firewall today
+
+ ### author
+
+![image](photo.jpg)
+https://example.com/profile.jpg
+ This is the message body.
+"""
+
+
+@pytest.fixture
+def msgs_md(tmp_path):
+    """Create a msgs_md tree with upper, lower and aDigits directories."""
+    root = tmp_path / "msgs_md"
+    for name in ["A", "b", "aDigits"]:
+        (root / name).mkdir(parents=True)
+    (root / "A" / "A-TestMsg.md").write_text(MD_CONTENT)
+    (root / "b" / "bLower.md").write_text(" # Subject\nLower body\n")
+    (root / "aDigits" / "a1Digit.md").write_text(" # Subject\nDigit body\n")
+    # Wrong directory for this id - must not be found
+    (root / "A" / "zMisplaced.md").write_text(" # Subject\nNope\n")
+    return root
+
+
+def make_message(message_id, subject="Subject line"):
+    return {"metadata": {"subject": subject, "message_id": message_id}}
+
+
+class TestParseMessageBody:
+    def test_skips_header_images_and_links(self):
+        body = parse_message_body(MD_CONTENT)
+
+        assert "This is the message body." in body
+        assert "Original Message" not in body
+        assert "photo.jpg" not in body
+        assert "profile.jpg" not in body
+
+
+class TestMessageTextStore:
+    def test_finds_files_in_all_directory_variants(self, msgs_md):
+        store = MessageTextStore(str(msgs_md))
+
+        assert store.get_body("A-TestMsg").endswith("This is the message body.")
+        assert store.get_body("bLower") == "Lower body"
+        assert store.get_body("a1Digit") == "Digit body"
+        assert store.get_body("zMisplaced") is None
+        assert store.get_body("missing") is None
+
+    def test_get_text(self, msgs_md):
+        store = MessageTextStore(str(msgs_md))
+
+        assert store.get_text(make_message("bLower")) == "Subject line\n\nLower body"
+        assert store.get_text(make_message("missing")) == "Subject line"
+        assert store.get_text({"metadata": {}}) == ""
+        assert store.get_text(make_message("bLower"), max_chars=10) == "Subject li..."
+
+    def test_directory_walked_once(self, msgs_md):
+        store = MessageTextStore(str(msgs_md))
+        with patch('message_store.os.scandir', wraps=os.scandir) as mock_scandir:
+            store.get_body("A-TestMsg")
+            calls = mock_scandir.call_count
+            store.get_body("bLower")
+            store.get_body("missing")
+
+        assert mock_scandir.call_count == calls
+
+    def test_sqlite_cache_across_runs(self, msgs_md, tmp_path):
+        store_path = str(tmp_path / "text.sqlite")
+        first = MessageTextStore(str(msgs_md), store_path)
+        first.get_body("bLower")
+        first.close()
+
+        second = MessageTextStore(str(msgs_md), store_path)
+        assert second.get_body("bLower") == "Lower body"
+        assert (second.reads, second.cache_hits) == (0, 1)
+        second.close()
+
+    def test_changed_file_is_reparsed(self, msgs_md, tmp_path):
+        store_path = str(tmp_path / "text.sqlite")
+        first = MessageTextStore(str(msgs_md), store_path)
+        first.get_body("bLower")
+        first.close()
+
+        (msgs_md / "b" / "bLower.md").write_text(" # Subject\nEdited lower body\n")
+
+        second = MessageTextStore(str(msgs_md), store_path)
+        assert second.get_body("bLower") == "Edited lower body"
+        second.close()
+
+    def test_memory_cache_is_bounded(self, msgs_md):
+        # Room for one of the two short bodies only
+        store = MessageTextStore(str(msgs_md), memory_bytes=12)
+        store.get_body("bLower")
+        store.get_body("a1Digit")
+        store.get_body("a1Digit")
+        store.get_body("bLower")
+
+        assert (store.reads, store.cache_hits) == (3, 1)
+        assert store._memory_used <= 12
+        # A text larger than the cap is never kept
+        store.get_body("A-TestMsg")
+        store.get_body("A-TestMsg")
+        assert store.reads == 5
+
+    def test_shared_store(self, msgs_md):
+        assert get_message_store(str(msgs_md)) is get_message_store(str(msgs_md))
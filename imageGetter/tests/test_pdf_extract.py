@@ -0,0 +1,133 @@
+# ABOUTME: Unit tests for the extractPDFs extraction engine
+# ABOUTME: Covers page order, per-page files, timing stats and PdfHashCache skips in extract_documents
+
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "extractPDFs"))
+import pytest
+
+pytest.importorskip("pypdf")
+import pdfExtract
+from pdfExtract import (
+    PdfHashCache,
+    extract_documents,
+    extract_pdf_to_pages,
+    extract_pdf_to_text,
+    format_timing,
+    iter_page_text
+)
+
+EXAMPLE_PDF = Path(__file__).parent.parent.parent / "extractPDFs" / "example.pdf"
+
+
+class FakePage:
+    def __init__(self, strText):
+        self.strText = strText
+
+    def extract_text(self):
+        if self.strText.startswith("!"):
+            raise ValueError("broken page")
+        return self.strText
+
+
+class FakeReader:
+    """PdfReader over a fake 'PDF': page texts separated by '|'; a page starting with '!' fails."""
+
+    def __init__(self, source):
+        if isinstance(source, str):
+            source = Path(source).read_bytes()
+        self.pages = [FakePage(strText) for strText in source.decode('utf-8').split('|')]
+
+
+@pytest.fixture
+def fake_pdfs(monkeypatch):
+    monkeypatch.setattr(pdfExtract, "open_reader", FakeReader)
+
+
+def write_pdf(path, *pages):
+    path.write_bytes('|'.join(pages).encode('utf-8'))
+    return str(path)
+
+
+class TestPageExtraction:
+    def test_pages_in_order_and_unreadable_page_empty(self, fake_pdfs):
+        lstPages = list(iter_page_text(b"one|!bad|three", intWorkers=1))
+
+        assert [(intPage, strText) for intPage, strText, _ in lstPages] == [(0, "one"), (1, ""), (2, "three")]
+
+    def test_text_file_with_separator_and_stats(self, fake_pdfs, tmp_path):
+        strOut = str(tmp_path / "out.txt")
+
+        dctStats = extract_pdf_to_text(b"ab|cde|f", strOut, intWorkers=1, strSeparator="\n")
+
+        assert Path(strOut).read_text(encoding='utf-8') == "ab\ncde\nf"
+        assert dctStats["pages"] == 3
+        assert dctStats["chars"] == 6
+        assert len(dctStats["page_seconds"]) == 3
+        assert 1 <= dctStats["slowest_page"] <= 3
+        assert not dctStats["skipped"]
+
+    def test_one_file_per_page(self, fake_pdfs, tmp_path):
+        extract_pdf_to_pages(b"first|second", str(tmp_path / "pages"), intWorkers=1)
+
+        assert (tmp_path / "pages" / "page1.txt").read_text(encoding='utf-8') == "first"
+        assert (tmp_path / "pages" / "page2.txt").read_text(encoding='utf-8') == "second"
+
+    def test_format_timing(self):
+        assert format_timing({"skipped": True}) == "unchanged, skipped"
+        assert format_timing({"pages": 0}) == "no pages"
+        assert format_timing({"pages": 2, "chars": 10, "seconds": 0.5, "page_seconds": [0.1, 0.3],
+                              "slowest_page": 2}).startswith("2 pages, 10 chars")
+
+    @pytest.mark.skipif(not EXAMPLE_PDF.exists(), reason="example.pdf not present")
+    def test_process_pool_keeps_page_order(self, monkeypatch):
+        monkeypatch.setattr(pdfExtract, "MIN_PAGES_PARALLEL", 1)
+        monkeypatch.setattr(pdfExtract, "PAGES_PER_TASK", 1)
+
+        lstSerial = [strText for _, strText, _ in iter_page_text(str(EXAMPLE_PDF), intWorkers=1)]
+        lstPooled = [(intPage, strText) for intPage, strText, _ in iter_page_text(str(EXAMPLE_PDF), intWorkers=2)]
+
+        assert lstPooled == list(enumerate(lstSerial))
+
+
+class TestExtractDocuments:
+    def test_results_in_job_order(self, fake_pdfs, tmp_path):
+        lstJobs = [(write_pdf(tmp_path / f"{strName}.pdf", strName), str(tmp_path / f"{strName}.txt"))
+                   for strName in ("c", "a", "b")]
+
+        lstResults = list(extract_documents(lstJobs, intWorkers=1))
+
+        assert [strPdf for strPdf, _ in lstResults] == [strPdf for strPdf, _ in lstJobs]
+        assert (tmp_path / "a.txt").read_text(encoding='utf-8') == "a"
+
+    def test_hash_cache_skips_unchanged(self, fake_pdfs, tmp_path):
+        strCache = str(tmp_path / "hashes.json")
+        strSame = write_pdf(tmp_path / "same.pdf", "same")
+        strEdited = write_pdf(tmp_path / "edited.pdf", "v1")
+        strDeleted = write_pdf(tmp_path / "deleted.pdf", "text")
+        lstJobs = [(strSame, str(tmp_path / "same.txt")), (strEdited, str(tmp_path / "edited.txt")),
+                   (strDeleted, str(tmp_path / "deleted.txt"))]
+        assert all(not dctStats["skipped"] for _, dctStats in extract_documents(lstJobs, 1, strCache))
+
+        write_pdf(tmp_path / "edited.pdf", "v2")
+        (tmp_path / "deleted.txt").unlink()
+        dctResults = dict(extract_documents(lstJobs, 1, strCache))
+
+        assert dctResults[strSame] == {"skipped": True}
+        assert not dctResults[strEdited]["skipped"]
+        assert not dctResults[strDeleted]["skipped"]
+        assert (tmp_path / "edited.txt").read_text(encoding='utf-8') == "v2"
+        assert (tmp_path / "deleted.txt").exists()
+
+    def test_hash_cache_file_round_trip(self, tmp_path):
+        strPdf = str(tmp_path / "x.pdf")
+        cache = PdfHashCache(str(tmp_path / "hashes.json"))
+        cache.put(strPdf, "abc")
+        cache.save()
+        (tmp_path / "x.txt").write_text("done")
+
+        reloaded = PdfHashCache(str(tmp_path / "hashes.json"))
+        assert reloaded.is_unchanged(strPdf, str(tmp_path / "x.txt"), "abc")
+        assert not reloaded.is_unchanged(strPdf, str(tmp_path / "x.txt"), "def")
+        assert not reloaded.is_unchanged(strPdf, str(tmp_path / "missing.txt"), "abc")
@@ -0,0 +1,120 @@
+# ABOUTME: Unit tests for the asker reranking stage
+# ABOUTME: Uses a fake Ollama client whose replies, delays and failures are set per passage
+
+import threading
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "asker"))
+import pytest
+
+from common import tracing
+from reranker import OllamaReranker, parse_score
+
+
+class FakeScoreClient:
+    """Stands in for ollama.Client: replies[passage] is the reply text, an exception, or an Event to wait on."""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.prompts = []
+
+    def generate(self, model, prompt, stream, options):
+        self.prompts.append(prompt)
+        passage = prompt.split("Passage: ", 1)[1].split("\n", 1)[0]
+        reply = self.replies[passage]
+        if isinstance(reply, threading.Event):
+            reply.wait(5)
+            reply = "1"
+        if isinstance(reply, Exception):
+            raise reply
+        return {'response': reply}
+
+
+@pytest.fixture
+def metrics():
+    """Enable the shared tracer (no files) and hand back its counters."""
+    tracing.configure(enabled=True)
+    tracing.tracer.reset()
+    yield tracing.tracer.counters
+    tracing.configure(enabled=False)
+    tracing.tracer.reset()
+
+
+def exhausted(counters):
+    return counters.get(("rerank_budget_exhausted", (("model", "rerank-model"),)), 0)
+
+
+class TestParseScore:
+    """Tests for parse_score."""
+
+    def test_plain_number(self):
+        assert parse_score("7") == 7.0
+
+    def test_first_number_in_text(self):
+        assert parse_score("Score: 8.5/10") == 8.5
+
+    def test_clamped_to_max(self):
+        assert parse_score("12") == 10.0
+
+    def test_no_number(self):
+        assert parse_score("not relevant") is None
+
+
+class TestRerank:
+    """Tests for ordering and the time budget in OllamaReranker.rerank."""
+
+    def test_orders_by_score_ties_by_retrieval_order(self, metrics):
+        client = FakeScoreClient({"a": "3", "b": "9", "c": "3", "d": "none"})
+        reranker = OllamaReranker("rerank-model", ollamaclient=client, keep=4, batch_size=2)
+
+        ranked = reranker.rerank("question", ["a", "b", "c", "d"])
+
+        assert ranked == [(1, 9.0), (0, 3.0), (2, 3.0), (3, None)]
+        assert exhausted(metrics) == 0
+
+    def test_keep_limits_result(self):
+        client = FakeScoreClient({"a": "1", "b": "2", "c": "3"})
+        reranker = OllamaReranker("rerank-model", ollamaclient=client, keep=2)
+
+        assert reranker.rerank("question", ["a", "b", "c"]) == [(2, 3.0), (1, 2.0)]
+
+    def test_passage_is_truncated(self):
+        client = FakeScoreClient({"abc": "5"})
+        reranker = OllamaReranker("rerank-model", ollamaclient=client, max_chars=3)
+
+        reranker.rerank("question", ["abcdef"])
+
+        assert "Passage: abc\n" in client.prompts[0]
+
+    def test_budget_leaves_rest_in_retrieval_order(self, metrics):
+        slow = threading.Event()
+        client = FakeScoreClient({"a": "2", "b": slow, "c": "9", "d": "8"})
+        reranker = OllamaReranker("rerank-model", ollamaclient=client, keep=4, batch_size=2, time_budget=0.2)
+
+        ranked = reranker.rerank("question", ["a", "b", "c", "d"])
+        slow.set()
+
+        assert ranked == [(0, 2.0), (1, None), (2, None), (3, None)]
+        assert exhausted(metrics) == 1
+
+    def test_abandoned_batch_does_not_starve_next_question(self):
+        slow = threading.Event()
+        client = FakeScoreClient({"slow": slow, "a": "4", "b": "6"})
+        reranker = OllamaReranker("rerank-model", ollamaclient=client, keep=2, batch_size=1, time_budget=0.2)
+
+        reranker.rerank("first", ["slow"])
+        ranked = reranker.rerank("second", ["a", "b"])
+        slow.set()
+
+        assert ranked == [(1, 6.0), (0, 4.0)]
+
+    def test_failed_score_is_not_budget_exhaustion(self, metrics):
+        client = FakeScoreClient({"a": ConnectionError("refused"), "b": "5"})
+        reranker = OllamaReranker("rerank-model", ollamaclient=client, keep=2)
+
+        ranked = reranker.rerank("question", ["a", "b"])
+
+        assert ranked == [(1, 5.0), (0, None)]
+        assert exhausted(metrics) == 0
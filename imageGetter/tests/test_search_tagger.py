@@ -162,3 +162,61 @@ class TestSearchTagger:
         assert "COZY" not in matched
         assert "cozy" not in matched
         assert "firewall" in matched
+
+    def test_multi_word_keyword(self):
+        """Test that multi-word keywords match as stemmed phrases."""
+        tagger = SearchTagger()
+        message_text = "Replaced the oil cooler and checked the nose gears."
+        keywords = ["oil cooler", "nose gear", "main gear", "gear"]
+
+        matched = tagger.find_keywords(message_text, keywords)
+
+        assert matched == ["oil cooler", "nose gear", "gear"]
+
+    def test_results_in_vocabulary_order(self):
+        """Test that matches come back in keyword list order, not message order."""
+        tagger = SearchTagger()
+        matched = tagger.find_keywords("engine then firewall", ["firewall", "engine"])
+
+        assert matched == ["firewall", "engine"]
+
+    def test_precompiled_vocabulary(self):
+        """Test tagging with the vocabulary compiled in the constructor."""
+        tagger = SearchTagger(["firewall", "cowling"])
+
+        assert tagger.find_keywords("Fitting the cowling") == ["cowling"]
+        # Passing a different list recompiles
+        assert tagger.find_keywords("Fitting the cowling", ["canard"]) == []
+
+    def test_find_keywords_batch(self):
+        """Test tagging several messages in one call."""
+        tagger = SearchTagger(["firewall", "fuel", "cozy"])
+
+        results = tagger.find_keywords_batch({
+            "a": "Firewall installed",
+            "b": "Fuel lines and firewall",
+            "c": "",
+            "d": "My Cozy"
+        })
+
+        assert results == {"a": ["firewall"], "b": ["firewall", "fuel"], "c": [], "d": []}
+
+    def test_overlapping_and_nested_phrases(self):
+        """Test that phrases sharing words are all found in one pass."""
+        tagger = SearchTagger()
+        message_text = "Sanded the main gear leg fairing"
+        keywords = ["main gear leg", "gear leg fairing", "gear leg", "leg", "nose gear"]
+
+        matched = tagger.find_keywords(message_text, keywords)
+
+        assert matched == ["main gear leg", "gear leg fairing", "gear leg", "leg"]
+
+    def test_phrase_after_partial_match(self):
+        """Test that a failed partial phrase still lets a later phrase match."""
+        tagger = SearchTagger()
+        message_text = "Glassed the wing root rib"
+        keywords = ["wing root fairing", "root rib"]
+
+        matched = tagger.find_keywords(message_text, keywords)
+
+        assert matched == ["root rib"]
@@ -0,0 +1,145 @@
+# ABOUTME: Unit tests for the webGetter streaming section splitter
+# ABOUTME: Checks output parity with the original Canard Pusher chunker loop and the byte offsets in the section index
+
+import json
+import re
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "webGetter"))
+import pytest
+
+import section_splitter
+from section_splitter import SectionSplitter, read_section_index
+
+# Patterns of webGetter/canard_pusher_chunker.py
+REMOVE_PATTERNS = [r'\s*(CP|VVN)\d{1,2}, Page', r'^\s*\-{3,}']
+BREAK_PATTERN = r'\s*(VARIVIGGEN\s+NEWS\s+NO\.?|THE\s+CANARD\s+PUSHER\s+NO\.?)'
+
+CORPUS_LINES = [
+    "Front matter before the first issue",
+    "THE CANARD PUSHER NO. 1, JULY 1974",
+    "First issue text.",
+    "x",
+    "  ",
+    "CP1, Page 2",
+    "-----",
+    "More text for issue one.",
+    "THE CANARD PUSHER NO. 1, continued",
+    "THE CANARD PUSHER NO. 1, JULY 1974",
+    "Still issue one.",
+    "VARIVIGGEN NEWS NO. 2, OCTOBER 1974",
+    "Issue two, with unicode – dash.",
+    "ab",
+]
+
+
+def old_chunker(strInputFile, strOutDir):
+    """The loop webGetter/canard_pusher_chunker.py ran before SectionSplitter (files cp__no{n})."""
+    lines = []
+    with open(strInputFile, 'r', encoding='utf-8') as f:
+        for line in f:
+            if len(line) > 2:
+                lines.append(line.strip())
+
+    curIssue = ""
+    nIssue = 0
+    f = None
+    for line in lines:
+        bSkip = False
+        for pattern in REMOVE_PATTERNS:
+            if re.match(pattern, line):
+                bSkip = True
+                break
+        if bSkip:
+            continue
+        if re.match(BREAK_PATTERN, line.upper()):
+            issue = line.split(',')[0]
+            if issue != curIssue:
+                curIssue = issue
+                nIssue += 1
+                if f is not None:
+                    f.close()
+                f = open(str(Path(strOutDir) / f"cp__no{nIssue}"), "w", encoding='utf-8')
+        if f is not None:
+            f.write(line + "\n")
+    if f is not None:
+        f.close()
+
+
+def write_corpus(path, strEnding, bFinalNewline=True):
+    strText = strEnding.join(CORPUS_LINES) + (strEnding if bFinalNewline else "")
+    path.write_bytes(strText.encode('utf-8'))
+    return str(path)
+
+
+def read_dir(path):
+    return {p.name: p.read_bytes() for p in sorted(path.iterdir())}
+
+
+@pytest.mark.parametrize("strEnding", ["\n", "\r\n", "\r"])
+@pytest.mark.parametrize("bFinalNewline", [True, False])
+def test_output_matches_old_chunker(tmp_path, strEnding, bFinalNewline):
+    strCorpus = write_corpus(tmp_path / "corpus.txt", strEnding, bFinalNewline)
+    (tmp_path / "old").mkdir()
+    old_chunker(strCorpus, str(tmp_path / "old"))
+
+    splitter = SectionSplitter(REMOVE_PATTERNS, BREAK_PATTERN)
+    lstIndex = splitter.split(strCorpus, str(tmp_path / "new"), "cp__no{n}")
+
+    assert read_dir(tmp_path / "new") == read_dir(tmp_path / "old")
+    assert [dctEntry["issue"] for dctEntry in lstIndex] == ["THE CANARD PUSHER NO. 1", "VARIVIGGEN NEWS NO. 2"]
+
+
+@pytest.mark.parametrize("strEnding", ["\n", "\r\n", "\r"])
+def test_index_offsets_locate_sections(tmp_path, strEnding):
+    strCorpus = write_corpus(tmp_path / "corpus.txt", strEnding)
+    bytCorpus = Path(strCorpus).read_bytes()
+
+    splitter = SectionSplitter(REMOVE_PATTERNS, BREAK_PATTERN)
+    lstIndex = splitter.split(strCorpus, str(tmp_path / "out"))
+
+    first, second = lstIndex
+    assert bytCorpus[first["start"]:].startswith(b"THE CANARD PUSHER NO. 1, JULY 1974")
+    assert first["end"] == second["start"]
+    assert bytCorpus[second["start"]:].startswith(b"VARIVIGGEN NEWS NO. 2")
+    assert second["end"] == len(bytCorpus)
+    assert b"Front matter" not in bytCorpus[first["start"]:]
+
+    # Every line written to a section file comes from that section's byte range
+    for dctEntry in lstIndex:
+        strRange = bytCorpus[dctEntry["start"]:dctEntry["end"]].decode('utf-8')
+        strWritten = Path(dctEntry["file"]).read_text(encoding='utf-8')
+        assert all(line in strRange for line in strWritten.splitlines())
+        assert dctEntry["lines"] == len(strWritten.splitlines())
+        assert dctEntry["chars"] == len(strWritten)
+
+
+def test_index_file_written_beside_output_dir(tmp_path):
+    strCorpus = write_corpus(tmp_path / "corpus.txt", "\n")
+
+    lstIndex = SectionSplitter(REMOVE_PATTERNS, BREAK_PATTERN).split(strCorpus, str(tmp_path / "out"))
+
+    assert list(read_section_index(str(tmp_path / "out_sections.jsonl"))) == lstIndex
+    assert not any(p.suffix == ".jsonl" for p in (tmp_path / "out").iterdir())
+
+
+def test_buffered_writes_flush_every_line(tmp_path, monkeypatch):
+    monkeypatch.setattr(section_splitter, "WRITE_BATCH_LINES", 2)
+    strCorpus = write_corpus(tmp_path / "corpus.txt", "\n")
+    (tmp_path / "old").mkdir()
+    old_chunker(strCorpus, str(tmp_path / "old"))
+
+    SectionSplitter(REMOVE_PATTERNS, BREAK_PATTERN).split(strCorpus, str(tmp_path / "new"), "cp__no{n}")
+
+    assert read_dir(tmp_path / "new") == read_dir(tmp_path / "old")
+
+
+def test_case_sensitive_break(tmp_path):
+    strCorpus = write_corpus(tmp_path / "corpus.txt", "\n")
+
+    lstIndex = SectionSplitter(REMOVE_PATTERNS, r'VARIVIGGEN', bIgnoreCase=False).split(
+        strCorpus, str(tmp_path / "out"))
+
+    assert [dctEntry["issue"] for dctEntry in lstIndex] == ["VARIVIGGEN NEWS NO. 2"]
+    assert json.loads((tmp_path / "out_sections.jsonl").read_text().splitlines()[0])["n"] == 1
@@ -0,0 +1,79 @@
+# ABOUTME: Tests for the tracing/instrumentation module
+# ABOUTME: Covers no-op mode, nested spans in the JSONL trace, counters, histograms and the Prometheus snapshot
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# The tracing module is shared by every pipeline directory and lives in the top-level common package
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from common.tracing import Tracer, NOOP_SPAN
+
+
+@pytest.fixture
+def tracer():
+    t = Tracer()
+    yield t
+    t.close()
+
+
+class TestNoopMode:
+    def test_disabled_tracer_records_nothing(self, tracer):
+        assert tracer.span("embed", chunks=3) is NOOP_SPAN
+        with tracer.span("embed") as s:
+            s.set(chunks=3)
+        tracer.count("chunks", 5)
+        tracer.observe("embed_seconds", 0.2)
+
+        assert tracer.counters == {}
+        assert tracer.histograms == {}
+        assert tracer.prometheus_text() == ""
+
+
+class TestSpans:
+    def test_nested_spans_written_to_trace(self, tracer, tmp_path):
+        trace_file = tmp_path / "trace.jsonl"
+        tracer.configure(trace_file=str(trace_file))
+
+        with tracer.span("embed_file", path="a.txt"):
+            with tracer.span("embed") as s:
+                s.set(chunks=2)
+        with pytest.raises(ValueError):
+            with tracer.span("vector_store"):
+                raise ValueError("boom")
+        tracer.flush()
+
+        records = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        assert [r["name"] for r in records] == ["embed", "embed_file", "vector_store"]
+        inner, outer, failed = records
+        assert inner["parent_id"] == outer["span_id"]
+        assert outer["parent_id"] is None
+        assert inner["attrs"] == {"chunks": 2}
+        assert outer["attrs"] == {"path": "a.txt"}
+        assert failed["error"] == "ValueError"
+        assert tracer.counters[("vector_store_errors", ())] == 1
+        assert tracer.histograms[("embed_seconds", ())]["count"] == 1
+
+
+class TestMetrics:
+    def test_prometheus_snapshot(self, tracer, tmp_path):
+        metrics_file = tmp_path / "metrics.prom"
+        tracer.configure(metrics_file=str(metrics_file), buckets=(0.1, 1.0))
+        tracer.count("chunks", 3, model="nomic")
+        tracer.count("chunks", 2, model="nomic")
+        tracer.observe("generate_seconds", 0.05)
+        tracer.observe("generate_seconds", 0.5)
+        tracer.observe("generate_seconds", 5.0)
+        tracer.flush()
+
+        lines = metrics_file.read_text().splitlines()
+        assert "# TYPE ea_chunks_total counter" in lines
+        assert 'ea_chunks_total{model="nomic"} 5' in lines
+        assert "# TYPE ea_generate_seconds histogram" in lines
+        assert 'ea_generate_seconds_bucket{le="0.1"} 1' in lines
+        assert 'ea_generate_seconds_bucket{le="1.0"} 2' in lines
+        assert 'ea_generate_seconds_bucket{le="+Inf"} 3' in lines
+        assert "ea_generate_seconds_sum 5.55" in lines
+        assert "ea_generate_seconds_count 3" in lines
@@ -1,5 +1,8 @@
 import markdownify
-import re, random, time
+import re, random, time, os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import tracing
 
 ##----Filters
 remove_strings = []
@@ -59,7 +62,7 @@ remove_patterns.append(r'[A-Za-z0-9=&_\-]{25,}') #repeating characters in urls
 remove_patterns.append(r'([A-Za-z0-9=\-_])(%)([A-Za-z0-9=\-_])') #spaces in urls
 remove_patterns.append(r'(http|https)') #http
 remove_patterns.append(r'(googlegroups\.com|groups\.google\.com|googleusercontent\.com|google|gmail\.com|groups\.yahoo\.com|yahoogroups\.com|yahoo\.com|\.jpg)') #extra url stuff not
-remove_patterns.append(r'(sbcglobal|aol|verizon|gmail|yahoo|hotmail|earthlink)\.(com|org|net')
+remove_patterns.append(r'(sbcglobal|aol|verizon|gmail|yahoo|hotmail|earthlink)\.(com|org|net)')
 remove_patterns.append(r'msgid')
 remove_patterns.append(r'%[0-9A-Fa-foO]2') #url encoded characters
 remove_patterns.append(r'\s+')
@@ -75,6 +78,7 @@ def normalize_quotes(text):
     
     return text
 
+@tracing.traced("filter")
 def filter_markdown(markdown_text):
     #remove the first line
     lines = markdown_text.splitlines()
@@ -1,19 +1,21 @@
 """
-Data Processor and File Splitter.
+Canard Pusher corpus splitter.
 
-This script processes a list of input lines (simulating lines read from a larger log or data file).
-It performs two main actions:
+Splits the combined Canard Pusher / Varieze newsletter text into one file per issue
+using section_splitter.SectionSplitter:
 
-1. Filtering: It skips any lines matching predefined 'REMOVE_PATTERNS'.
-2. File Rotation: It checks for a 'BREAK_PATTERN' (e.g., 'ISSUE-A'). When a line matches this
-   pattern and the extracted issue ID is new, the script closes the current output file
-   and opens a new one, ensuring data for different issues are separated.
+1. Filtering: It skips any lines matching 'remove_patterns' (page breaks, rules).
+2. File Rotation: It checks for 'break_pattern' (the newsletter masthead). When a line
+   matches this pattern and the extracted issue ID is new, the current output file is
+   closed and a new one is opened, so data for different issues are separated.
 
-The script uses a try...finally block for robust file handling, guaranteeing that
-the last output file is always closed.
+The corpus is streamed line by line. A section index (issue id and byte offsets in
+the corpus) is written beside the output directory, to look up where each issue's
+text came from.
 """
 
-import re
+from section_splitter import SectionSplitter
+
 remove_patterns = []
 remove_patterns.append( r'\s*(CP|VVN)\d{1,2}, Page' ) #page breaks
 remove_patterns.append( r'^\s*\-{3,}' ) #line of ----
@@ -21,35 +23,9 @@ break_pattern = r'\s*(VARIVIGGEN\s+NEWS\s+NO\.?|THE\s+CANARD\s+PUSHER\s+NO\.?)'
 
 CP_CORPUS_FILE = '/mnt/c/users/tom/downloads/CPs_1_to_82_Sections.txt'
 OUTDIR = '../data/cozybuilders/'
+INDEX_FILE = '../data/cozybuilders_cp_sections.jsonl'  #outside OUTDIR so it is not embedded
 
-lines = []
-with open(CP_CORPUS_FILE, 'r', encoding='utf-8') as f:
-    for line in f:
-        if len(line) > 2:
-           lines.append(line.strip())
-f.close()
-
-curIssue = ""
-nIssue = 0
-f = None
-for line in lines:
-    bSkip = False
-    for pattern in remove_patterns:
-        if re.match(pattern, line):
-            bSkip = True
-            break
-    if bSkip:
-        print(f"skip {line}")
-        continue
-    if re.match(break_pattern, line.upper()):
-        issue = line.split(',')[0]
-        if issue != curIssue:
-            curIssue = issue
-            nIssue += 1
-            outpath = OUTDIR + "cp__no" + str(nIssue)
-            print(f"writing {curIssue} to {outpath}")
-            if f is not None:
-                f.close()
-            f = open(outpath,"w", encoding='utf-8')
-    if f is not None:
-        f.write(line + "\n")
\ No newline at end of file
+if __name__ == "__main__":
+    splitter = SectionSplitter(remove_patterns, break_pattern, bVerbose=True)
+    sections = splitter.split(CP_CORPUS_FILE, OUTDIR, "cp__no{n}", INDEX_FILE)
+    print(f"{len(sections)} issues written, index in {INDEX_FILE}")
@@ -0,0 +1,117 @@
+# ABOUTME: Per-URL crawl cache of ETag, Last-Modified and content hash for conditional re-crawls
+# ABOUTME: Pages are reprocessed only when the server reports a change and the content hash differs
+
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import tracing
+
+REQUEST_TIMEOUT = 30
+
+
+def content_hash(bytContent: bytes) -> str:
+    """SHA-256 of page content."""
+    return hashlib.sha256(bytContent).hexdigest()
+
+
+class CrawlCache:
+    """
+    JSON file mapping URL -> {etag, last_modified, sha256, checked}.
+
+    Used to send conditional requests (If-None-Match / If-Modified-Since) and
+    to detect pages whose bytes are unchanged even when the server does not
+    support validators.
+    """
+
+    def __init__(self, strPath: str):
+        """
+        Args:
+            strPath: Cache file (created on save)
+        """
+        self.strPath = strPath
+        self.dctEntries: Dict[str, Dict] = {}
+        self._dctPending: Dict[str, Tuple[requests.Response, str]] = {}
+        if os.path.exists(strPath):
+            with open(strPath, 'r', encoding='utf-8') as f:
+                self.dctEntries = json.load(f)
+
+    def request_headers(self, strUrl: str) -> Dict[str, str]:
+        """Conditional request headers for a URL (empty if never seen)."""
+        dctEntry = self.dctEntries.get(strUrl, {})
+        dctHeaders = {}
+        if dctEntry.get("etag"):
+            dctHeaders["If-None-Match"] = dctEntry["etag"]
+        if dctEntry.get("last_modified"):
+            dctHeaders["If-Modified-Since"] = dctEntry["last_modified"]
+        return dctHeaders
+
+    def record(self, strUrl: str, response: requests.Response, strHash: str = None):
+        """Remember validators (and the content hash, if given) from a response."""
+        dctEntry = self.dctEntries.setdefault(strUrl, {})
+        if response.headers.get("ETag"):
+            dctEntry["etag"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            dctEntry["last_modified"] = response.headers["Last-Modified"]
+        if strHash is not None:
+            dctEntry["sha256"] = strHash
+        dctEntry["checked"] = datetime.now().isoformat(timespec='seconds')
+
+    def fetch_if_changed(self, session: requests.Session, strUrl: str) -> Tuple[str, Optional[bytes]]:
+        """
+        Conditionally fetch a URL.
+
+        Args:
+            session: HTTP session (connection pooling)
+            strUrl: Absolute URL
+
+        Returns:
+            (status, content): status is "new" (never seen), "changed",
+            "unchanged" (304 or same content hash, content None) or
+            "error" (content None). Validators and hash of new and changed
+            pages are only recorded by confirm(), once the page has been
+            processed, so a failed run retries them.
+        """
+        with tracing.span("fetch", url=strUrl) as span:
+            strStatus, content = self._fetch(session, strUrl)
+            span.set(status=strStatus)
+        tracing.count("fetch_results", status=strStatus)
+        return strStatus, content
+
+    def _fetch(self, session: requests.Session, strUrl: str) -> Tuple[str, Optional[bytes]]:
+        bKnown = "sha256" in self.dctEntries.get(strUrl, {})
+        try:
+            response = session.get(strUrl, headers=self.request_headers(strUrl), timeout=REQUEST_TIMEOUT)
+            if response.status_code == 304:
+                self.record(strUrl, response)
+                return "unchanged", None
+            response.raise_for_status()
+        except requests.exceptions.RequestException as err:
+            print(f"Error fetching {strUrl}: {err}")
+            return "error", None
+
+        strHash = content_hash(response.content)
+        if bKnown and self.dctEntries[strUrl]["sha256"] == strHash:
+            self.record(strUrl, response, strHash)
+            return "unchanged", None
+        self._dctPending[strUrl] = (response, strHash)
+        return ("changed" if bKnown else "new"), response.content
+
+    def confirm(self, strUrl: str):
+        """Record validators and hash of a fetched page after it was processed."""
+        if strUrl in self._dctPending:
+            response, strHash = self._dctPending.pop(strUrl)
+            self.record(strUrl, response, strHash)
+
+    def save(self):
+        """Write the cache file."""
+        strTmp = self.strPath + ".tmp"
+        with open(strTmp, 'w', encoding='utf-8') as f:
+            json.dump(self.dctEntries, f, indent=1)
+        os.replace(strTmp, self.strPath)
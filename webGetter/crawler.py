@@ -0,0 +1,263 @@
+# ABOUTME: Site crawler with a frontier deque, visited set, robots.txt and per-host rate limiting
+# ABOUTME: Fetches pages over pooled HTTP with concurrent workers; falls back to Selenium only for JavaScript pages
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib import robotparser
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import tracing
+
+USER_AGENT = "ea_tools-webGetter/1.0"
+REQUEST_TIMEOUT = 30
+
+# Pages whose HTML has fewer visible characters than this but does have
+# <script> tags are assumed to be rendered by JavaScript
+JS_MIN_TEXT_CHARS = 200
+
+
+class LinkParser(HTMLParser):
+    """Collect href values of <a> tags and the amount of visible text."""
+
+    def __init__(self):
+        super().__init__()
+        self.lstHrefs: List[str] = []
+        self.intTextChars = 0
+        self.intScripts = 0
+        self._intSkipDepth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            for strName, strValue in attrs:
+                if strName == 'href' and strValue:
+                    self.lstHrefs.append(strValue)
+        elif tag in ('script', 'style'):
+            self._intSkipDepth += 1
+            if tag == 'script':
+                self.intScripts += 1
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style') and self._intSkipDepth:
+            self._intSkipDepth -= 1
+
+    def handle_data(self, data):
+        if not self._intSkipDepth:
+            self.intTextChars += len(data.strip())
+
+
+def extract_links(strHtml: str, strPageUrl: str) -> Tuple[List[str], bool]:
+    """
+    Find links in a page.
+
+    Args:
+        strHtml: Page HTML
+        strPageUrl: URL the page was fetched from (for resolving relative links)
+
+    Returns:
+        (absolute link URLs with #fragments removed, True if the page looks JavaScript-rendered)
+    """
+    parser = LinkParser()
+    parser.feed(strHtml)
+    parser.close()
+    lstLinks = [urljoin(strPageUrl, strHref).split('#', 1)[0] for strHref in parser.lstHrefs]
+    bNeedsJs = parser.intScripts > 0 and parser.intTextChars < JS_MIN_TEXT_CHARS and not lstLinks
+    return lstLinks, bNeedsJs
+
+
+class RateLimiter:
+    """Minimum delay between request starts to the same host, shared by all workers."""
+
+    def __init__(self, fDelay: float):
+        self.fDelay = fDelay
+        self._dctNextSlot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, strHost: str, fDelay: float = None):
+        """Block until a request to strHost may start."""
+        fDelay = self.fDelay if fDelay is None else fDelay
+        with self._lock:
+            fNow = time.monotonic()
+            fSlot = max(fNow, self._dctNextSlot.get(strHost, 0.0))
+            self._dctNextSlot[strHost] = fSlot + fDelay
+        if fSlot > fNow:
+            time.sleep(fSlot - fNow)
+
+
+class Crawler:
+    """
+    Breadth-first site crawler.
+
+    The frontier is a deque and found URLs are kept in a dict, so picking
+    the next page and checking a link are O(1) and a crawl is linear in the
+    number of links. Pages are fetched with a pooled requests.Session on a thread
+    pool; robots.txt and a per-host delay are honoured. A page that comes
+    back without links but with scripts and almost no text is re-fetched
+    with the Selenium driver from make_driver (created on first use).
+    """
+
+    def __init__(self, strBaseUrl: str, fnAccept: Callable[[str], Optional[bool]],
+                 intWorkers: int = 8, fDelay: float = 0.25, bObeyRobots: bool = True,
+                 make_driver: Callable = None):
+        """
+        Args:
+            strBaseUrl: Site root; only URLs under it are crawled
+            fnAccept: Called with the URL relative to strBaseUrl. Returns None
+                to ignore the link, False to record it without fetching it,
+                True to record and crawl it
+            intWorkers: Concurrent HTTP fetches
+            fDelay: Minimum seconds between requests to the host (robots.txt
+                Crawl-delay wins if larger)
+            bObeyRobots: Skip URLs disallowed by robots.txt
+            make_driver: Factory for a Selenium WebDriver (None = never use Selenium)
+        """
+        self.strBaseUrl = strBaseUrl
+        self.fnAccept = fnAccept
+        self.intWorkers = intWorkers
+        self.make_driver = make_driver
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=intWorkers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.robots = self._load_robots() if bObeyRobots else None
+        fRobotsDelay = self.robots.crawl_delay(USER_AGENT) if self.robots else None
+        self.rateLimiter = RateLimiter(max(fDelay, float(fRobotsDelay or 0)))
+
+        self._driver = None
+        self._driverLock = threading.Lock()
+        self.intSeleniumPages = 0
+
+    def _load_robots(self) -> Optional[robotparser.RobotFileParser]:
+        """Fetch and parse robots.txt (None = no restrictions)."""
+        try:
+            response = self.session.get(urljoin(self.strBaseUrl, '/robots.txt'), timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        robots = robotparser.RobotFileParser()
+        robots.parse(response.text.splitlines())
+        return robots
+
+    def allowed(self, strUrl: str) -> bool:
+        """True if robots.txt lets us fetch the URL."""
+        return self.robots is None or self.robots.can_fetch(USER_AGENT, strUrl)
+
+    def _fetch_selenium(self, strUrl: str) -> str:
+        """Render a page in the Selenium browser (one page at a time)."""
+        with self._driverLock, tracing.span("fetch_selenium", url=strUrl):
+            if self._driver is None:
+                self._driver = self.make_driver()
+            self._driver.get(strUrl)
+            self.intSeleniumPages += 1
+            return self._driver.page_source
+
+    def fetch_links(self, strUrl: str) -> List[str]:
+        """
+        Fetch a page and return the absolute URLs it links to.
+
+        Non-HTML responses and failed requests yield no links.
+        """
+        self.rateLimiter.wait(urlsplit(strUrl).netloc)
+        try:
+            with tracing.span("fetch", url=strUrl):
+                response = self.session.get(strUrl, timeout=REQUEST_TIMEOUT)
+                response.raise_for_status()
+        except requests.exceptions.RequestException as err:
+            print(f"Error fetching {strUrl}: {err}")
+            return []
+        if 'html' not in response.headers.get('Content-Type', 'text/html'):
+            return []
+
+        lstLinks, bNeedsJs = extract_links(response.text, response.url)
+        if bNeedsJs and self.make_driver is not None:
+            print(f"{strUrl} needs JavaScript, loading with Selenium")
+            lstLinks, _ = extract_links(self._fetch_selenium(strUrl), strUrl)
+        return lstLinks
+
+    def crawl(self, lstStart: Iterable[str] = ("",), intMaxPages: int = None) -> Dict[str, bool]:
+        """
+        Crawl the site breadth-first.
+
+        Args:
+            lstStart: Start URLs relative to the base URL
+            intMaxPages: Stop fetching after this many pages (None = no limit)
+
+        Returns:
+            Every accepted URL (relative to the base URL) -> True if it was
+            fetched, False if it was recorded only (not crawled, or over the
+            page limit). Crawlable URLs disallowed by robots.txt are left out.
+        """
+        intBaseLen = len(self.strBaseUrl)
+        dctFound: Dict[str, bool] = {}
+        frontier = deque()
+        for strRelative in lstStart:
+            dctFound[strRelative] = False
+            frontier.append(strRelative)
+
+        intFetched = 0
+        dctPending = {}
+        with ThreadPoolExecutor(max_workers=self.intWorkers) as executor:
+            while frontier or dctPending:
+                # Keep every worker busy while the page budget lasts
+                while frontier and len(dctPending) < self.intWorkers and \
+                        (intMaxPages is None or intFetched < intMaxPages):
+                    strRelative = frontier.popleft()
+                    strUrl = self.strBaseUrl + strRelative
+                    if not self.allowed(strUrl):
+                        # Disallowed pages are left out of the result so nothing downstream fetches them
+                        del dctFound[strRelative]
+                        continue
+                    dctFound[strRelative] = True
+                    intFetched += 1
+                    print(f"Searching {strUrl}")
+                    dctPending[executor.submit(self.fetch_links, strUrl)] = strRelative
+
+                if not dctPending:
+                    break
+
+                setDone, _ = wait(dctPending, return_when=FIRST_COMPLETED)
+                for future in setDone:
+                    strPage = dctPending.pop(future)
+                    try:
+                        lstLinks = future.result()
+                    except Exception as err:
+                        # Selenium or parser failures lose this page's links, not the crawl
+                        print(f"Error reading {self.strBaseUrl + strPage}: {err}")
+                        lstLinks = []
+                    intNew = 0
+                    for strLink in lstLinks:
+                        if not strLink.startswith(self.strBaseUrl):
+                            continue
+                        strRelative = strLink[intBaseLen:]
+                        if strRelative in dctFound:
+                            continue
+                        bCrawl = self.fnAccept(strRelative)
+                        if bCrawl is None:
+                            continue
+                        dctFound[strRelative] = False
+                        intNew += 1
+                        if bCrawl:
+                            frontier.append(strRelative)
+                    print(f"Page {strPage or '/'} found {intNew} new urls")
+
+        return dctFound
+
+    def close(self):
+        """Close the HTTP session and the Selenium browser (if one was started)."""
+        self.session.close()
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
@@ -2,11 +2,16 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 import markdownify
+from bs4 import UnicodeDammit
+import base64
 import re, random, time
-from pypdf import PdfReader
 import requests
-from io import BytesIO
-import os
+import os, sys
+from crawl_cache import CrawlCache
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "extractPDFs"))
+from pdfExtract import extract_pdf_to_text, format_timing
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import tracing
 
 ## Set up
 DESC_KEY = 'cozybuilders'
@@ -15,6 +20,12 @@ BASE_URL = 'http://cozybuilders.org/'  # Replace with your desired URL
 input_path = f"../data/{DESC_KEY}.txt"
 output_dir = f"../data/{DESC_KEY}/"
 pdf_dir = f"{output_dir}pdfs/"
+crawl_cache_path = f"../data/{DESC_KEY}_crawl_cache.json"  #ETag/Last-Modified/hash per url
+changed_list_path = "../data/changed_files.txt"  #output files the embedder must re-embed
+#site PDFs are small and this script has no __main__ guard (spawned workers would re-run it),
+#so pages are extracted in-process; raise only where worker processes fork
+pdf_workers = 1
+archive_pdfs = False  #True keeps a copy of every downloaded PDF in pdf_dir
 
 remove_strings = []
 remove_patterns = []
@@ -35,6 +46,7 @@ def normalize_quotes(text):
     
     return text
 
+@tracing.traced("filter")
 def filter_markdown(markdown_text):
     #remove the first line
     lines = markdown_text.splitlines()
@@ -95,42 +107,19 @@ def elements_to_markdown(elements):
 
 
 
-def download_pdf_to_directory(pdf_url):
+def download_pdf(pdf_url):
     """
-    Downloads a file from a URL and saves it to a specified directory.
+    Downloads a PDF into memory.
     
     :param pdf_url: The URL of the PDF file.
-    :param target_directory: The local directory where the file should be saved.
-    :param file_name: The name to save the file as.
+    :return: The PDF bytes, or None if the download failed.
     """
-    
-    # 1. Ensure the directory exists
-    if not os.path.exists(pdf_dir):
-        os.makedirs(pdf_dir)
-        print(f"Created directory: {pdf_dir}")
-
-    file_name = pdf_url.split('/')[-1] 
-
-    # 2. Create the full local file path
-    full_path = os.path.join(pdf_dir, file_name)
-
-    print(f"Attempting to download file to: {full_path}")
+    print(f"Attempting to download {pdf_url}")
     
     try:
-        # 3. Send a GET request to the URL
-        # stream=True is used for efficient handling of large files
-        response = requests.get(pdf_url, stream=True)
+        response = requests.get(pdf_url)
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-
-        # 4. Write the content to the local file in binary mode ('wb')
-        with open(full_path, 'wb') as file:
-            # response.iter_content is efficient for large files, reading in chunks
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
-        
-        print(f"Successfully downloaded {file_name} to {full_path}")
-
-        return full_path
+        return response.content
 
     except requests.exceptions.HTTPError as errh:
         print(f"HTTP Error: {errh}")
@@ -141,27 +130,64 @@ def download_pdf_to_directory(pdf_url):
     except requests.exceptions.RequestException as err:
         print(f"An error occurred: {err}")
 
-def savePDFtoText(pdf_url,text_path):
-    pdf_path = download_pdf_to_directory(pdf_url)
-    bFoundText = False
-
-    reader = PdfReader(pdf_path) 
+def archive_pdf(pdf_url, content):
+    """
+    Saves the raw PDF bytes to pdf_dir.
     
-    with open(text_path, 'w', encoding='utf-8') as f:
-        for page in reader.pages:
-            text = page.extract_text()
-            if not bFoundText and len(text) > 0:
-                bFoundText = True
-            f.write(text)
-
-    if bFoundText is False:
+    :param pdf_url: The URL of the PDF file (its last path part is the file name).
+    :param content: PDF bytes.
+    """
+    if not os.path.exists(pdf_dir):
+        os.makedirs(pdf_dir)
+        print(f"Created directory: {pdf_dir}")
+
+    full_path = os.path.join(pdf_dir, pdf_url.split('/')[-1])
+    with open(full_path, 'wb') as file:
+        file.write(content)
+    return full_path
+
+def savePDFtoText(pdf_url,text_path,content=None):
+    #the reader works on the downloaded bytes in memory; disk is only touched for the text
+    #(and for the raw PDF when archive_pdfs is set)
+    if content is None:
+        content = download_pdf(pdf_url)
+        if content is None:
+            return
+    if archive_pdfs:
+        archive_pdf(pdf_url, content)
+
+    #pages are streamed to text_path in page order with per-page timing
+    stats = extract_pdf_to_text(content, text_path, pdf_workers)
+    print(f"{pdf_url}: {format_timing(stats)}")
+
+    if stats["chars"] == 0:
         print(f"no text found in {pdf_url} removing")
         os.remove(text_path)
 
 
-def saveHtmToText(url,text_path):
+MAX_DATA_URL_CHARS = 2 * 1024 * 1024  #Chrome refuses longer urls
+
+def html_data_url(content,url):
+    #the page bytes the crawl cache already fetched, as a url Chrome renders without going back to the site.
+    #a <base> tag keeps the page's relative scripts, stylesheets and images resolving against the site,
+    #so hidden blocks stay hidden and scripted content is built as with driver.get(url).
+    #None if the page is too big for a data url
+    html = UnicodeDammit(content).unicode_markup
+    if not re.search(r'<base[\s>]', html, re.IGNORECASE):
+        base = '<base href="' + url.replace('"', '%22') + '">'
+        html, found = re.subn(r'<head(\s[^>]*)?>', lambda m: m.group(0) + base, html, count=1, flags=re.IGNORECASE)
+        if not found:
+            html = base + html
+    data_url = "data:text/html;charset=utf-8;base64," + base64.b64encode(html.encode('utf-8')).decode('ascii')
+    return data_url if len(data_url) <= MAX_DATA_URL_CHARS else None
+
+def saveHtmToText(url,text_path,content=None):
         print(f"Htm")
-        driver.get(url)
+        driver = get_driver()
+        #render the fetched bytes when we have them so each changed page is downloaded only once;
+        #pages too big for a data url are loaded from the site again
+        data_url = html_data_url(content,url) if content is not None else None
+        driver.get(data_url or url)
 
         # 1. Locate the <body> element.
         body_element = driver.find_element(By.TAG_NAME, "body")
@@ -180,27 +206,39 @@ def saveHtmToText(url,text_path):
                 f.write(embedtxt)
         f.close()
 
-def process_page(driver,url,output_path):
+def process_page(url,output_path,content=None):
     ext = url[-3:].lower()
     print(f"processing {url} to {output_path}")
     if ext == 'pdf':
-        savePDFtoText(BASE_URL+url,output_path)
+        savePDFtoText(BASE_URL+url,output_path,content)
     else:
-        saveHtmToText(BASE_URL+url,output_path)
+        saveHtmToText(BASE_URL+url,output_path,content)
+
+driver = None
+def get_driver():
+    #html pages are rendered in the debug Chrome; only attach once a page actually needs converting
+    global driver
+    if driver is None:
+        service = Service(executable_path='..//..//chromedriver-win64//chromedriver.exe')
+        options = webdriver.ChromeOptions()
+        options.add_experimental_option("debuggerAddress", "127.0.0.1:9222")
+        driver = webdriver.Chrome(service=service, options=options)
+    return driver
 
 ######################
 ##  MAIN
 ######################
-service = Service(executable_path='..//..//chromedriver-win64//chromedriver.exe')
-options = webdriver.ChromeOptions()
-options.add_experimental_option("debuggerAddress", "127.0.0.1:9222")
-driver = webdriver.Chrome(service=service, options=options)
-
 with open(input_path, 'r') as f:
     aUrls = [line.strip() for line in f]
 f.close()
 print(f"Read {len(aUrls)} lines from {input_path}")
 
+#conditional requests: only pages whose content changed are converted and re-embedded
+session = requests.Session()
+crawl_cache = CrawlCache(crawl_cache_path)
+nProcessed = 0
+nUnchanged = 0
+
 for url in aUrls:
     if len(url) > 0:
         #replace directory and extensions with characters so we can 
@@ -208,10 +246,26 @@ for url in aUrls:
         filename = url.replace("/","_-_")
         filename = filename.replace(".","___")
         output_path = output_dir+filename
-        #now check to see if the file exists
-        if os.path.exists(output_path):
-            print(f"{url} completed. skipping...")
-        else:
-            process_page(driver,url,output_path)
 
+        status, content = crawl_cache.fetch_if_changed(session, BASE_URL+url)
+        if status == "error":
+            continue
+        if status == "unchanged" or (status == "new" and os.path.exists(output_path)):
+            #a page converted before the cache existed is taken as the baseline
+            crawl_cache.confirm(BASE_URL+url)
+            print(f"{url} unchanged. skipping...")
+            nUnchanged += 1
+            continue
+
+        process_page(url,output_path,content)
+        crawl_cache.confirm(BASE_URL+url)
+        crawl_cache.save()
+        nProcessed += 1
+        if status == "changed":
+            #also listed if the new version produced no text, so its old chunks get dropped
+            with open(changed_list_path, 'a') as fChanged:
+                fChanged.write(output_path + '\n')
+
+crawl_cache.save()
+print(f"{nProcessed} pages processed, {nUnchanged} unchanged")
 print(f"done")
\ No newline at end of file
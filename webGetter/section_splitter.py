@@ -0,0 +1,141 @@
+# ABOUTME: Streaming splitter that cuts a newsletter corpus text file into one file per issue/section
+# ABOUTME: Lines are read lazily, filtered with precompiled patterns and written through buffers; emits a JSONL section index
+
+import argparse
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Lines collected before a section file is written
+WRITE_BATCH_LINES = 1024
+
+
+class SectionSplitter:
+    """
+    Split a text corpus into sections.
+
+    A line matching the break pattern starts a new section when its issue id
+    (the text before the first comma) differs from the current one. Lines
+    matching any remove pattern and lines before the first break are dropped.
+    The input is read line by line, so memory use does not depend on the
+    corpus size. As in text mode, a line ends at CR LF, CR or LF, so corpora
+    extracted with CR-only line endings split the same way.
+    """
+
+    def __init__(self, lstRemovePatterns: Iterable[str], strBreakPattern: str, bIgnoreCase: bool = True,
+                 bVerbose: bool = False):
+        """
+        Args:
+            lstRemovePatterns: Regexes (re.match on the stripped line) of lines to drop
+            strBreakPattern: Regex (re.match) of lines that start an issue
+            bIgnoreCase: Match the break pattern case-insensitively
+            bVerbose: Print every dropped line
+        """
+        lstRemovePatterns = list(lstRemovePatterns)
+        # One alternation costs a single match per line instead of one per pattern
+        self.reRemove = re.compile('|'.join(f'(?:{p})' for p in lstRemovePatterns)) if lstRemovePatterns else None
+        self.reBreak = re.compile(strBreakPattern, re.IGNORECASE if bIgnoreCase else 0)
+        self.bVerbose = bVerbose
+
+    def split(self, strInputFile: str, strOutDir: str, strNameFormat: str = "section{n}",
+              strIndexFile: Optional[str] = None) -> List[Dict]:
+        """
+        Split a corpus file.
+
+        Args:
+            strInputFile: UTF-8 corpus file
+            strOutDir: Directory for the section files
+            strNameFormat: Section file name, {n} = 1-based section number
+            strIndexFile: JSONL section index (default: {strOutDir}_sections.jsonl, beside
+                the output directory so the embedder does not pick it up)
+
+        Returns:
+            The index entries: section number, issue id, file, start/end byte
+            offsets of the section in the input, lines and characters written
+        """
+        os.makedirs(strOutDir, exist_ok=True)
+        if strIndexFile is None:
+            strIndexFile = os.path.normpath(strOutDir) + "_sections.jsonl"
+
+        lstIndex = []
+        # newline='': split on \r\n, \r and \n but keep the line endings, so byte offsets stay exact
+        with open(strInputFile, 'r', encoding='utf-8', newline='') as fIn, \
+                open(strIndexFile, 'w', encoding='utf-8') as fIndex:
+            fOut = None
+            lstBuffer = []
+            dctSection = None
+            intOffset = 0
+
+            def close_section(intEnd: int):
+                if fOut is not None:
+                    fOut.writelines(lstBuffer)
+                    lstBuffer.clear()
+                    fOut.close()
+                    dctSection["end"] = intEnd
+                    fIndex.write(json.dumps(dctSection) + '\n')
+                    lstIndex.append(dctSection)
+
+            for line in fIn:
+                intLineStart = intOffset
+                intOffset += len(line.encode('utf-8'))
+                # Kept if longer than 2 characters, counting the line end as one (as the old chunker did)
+                strText = line.rstrip('\r\n')
+                if len(strText) + (strText != line) <= 2:
+                    continue
+                line = line.strip()
+                if self.reRemove is not None and self.reRemove.match(line):
+                    if self.bVerbose:
+                        print(f"skip {line}")
+                    continue
+
+                if self.reBreak.match(line):
+                    strIssue = line.split(',')[0]
+                    if dctSection is None or strIssue != dctSection["issue"]:
+                        close_section(intLineStart)
+                        intNum = len(lstIndex) + 1
+                        strOutPath = os.path.join(strOutDir, strNameFormat.format(n=intNum))
+                        print(f"writing {strIssue} to {strOutPath}")
+                        fOut = open(strOutPath, 'w', encoding='utf-8')
+                        dctSection = {"n": intNum, "issue": strIssue, "file": strOutPath,
+                                      "start": intLineStart, "end": None, "lines": 0, "chars": 0}
+
+                if fOut is not None:
+                    lstBuffer.append(line + "\n")
+                    dctSection["lines"] += 1
+                    dctSection["chars"] += len(line) + 1
+                    if len(lstBuffer) >= WRITE_BATCH_LINES:
+                        fOut.writelines(lstBuffer)
+                        lstBuffer.clear()
+
+            close_section(intOffset)
+        return lstIndex
+
+
+def read_section_index(strIndexFile: str) -> Iterable[Dict]:
+    """Yield the entries of a JSONL section index."""
+    with open(strIndexFile, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split a newsletter corpus into one file per issue")
+    parser.add_argument("input", help="Corpus text file (UTF-8)")
+    parser.add_argument("outdir", help="Output directory")
+    parser.add_argument("--break-pattern", required=True, help="Regex of lines that start an issue")
+    parser.add_argument("--remove", action="append", default=[], help="Regex of lines to drop (repeatable)")
+    parser.add_argument("--name", default="section{n}", help="Section file name, {n} = section number")
+    parser.add_argument("--index", help="Section index file (JSONL)")
+    parser.add_argument("--case-sensitive", action="store_true", help="Match the break pattern case-sensitively")
+    parser.add_argument("--verbose", action="store_true", help="Print dropped lines")
+    args = parser.parse_args()
+
+    splitter = SectionSplitter(args.remove, args.break_pattern, not args.case_sensitive, args.verbose)
+    lstIndex = splitter.split(args.input, args.outdir, args.name, args.index)
+    print(f"{len(lstIndex)} sections written")
+
+
+if __name__ == "__main__":
+    main()